@@ -0,0 +1,161 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+PREDICTION_COLUMN = "pred_label"
+POSITIVE_CLASS = "yes"
+NEGATIVE_CLASS = "no"
+
+
+@dataclass
+class SyntheticModelConfig:
+    """
+    Shape of the generated model and its logged data
+
+    Attributes:
+    ------------------
+    features:
+        number of feature columns
+    categorical_ratio:
+        share of the features which are categorical, the rest are numeric
+    cardinality:
+        number of distinct values of each categorical feature
+    events:
+        number of prediction events logged to the production dataset
+    days:
+        the events are spread evenly over the last `days` days
+    baseline_rows:
+        number of rows of the training batch dataset used as drift baseline
+    empty_ratio:
+        share of the feature values which are logged empty
+    batch_size:
+        number of events sent per /v1/log.events request
+    seed:
+        seed of the random generator, the same config always generates the same data
+    """
+
+    features: int = 20
+    categorical_ratio: float = 0.5
+    cardinality: int = 10
+    events: int = 10000
+    days: int = 7
+    baseline_rows: int = 1000
+    empty_ratio: float = 0.05
+    batch_size: int = 500
+    seed: int = 42
+
+
+@dataclass
+class SyntheticModel:
+    """
+    Generates the schema and rows of a synthetic binary classification model
+
+    Attributes:
+    ------------------
+    config:
+        shape of the model and its data
+    end_time:
+        timestamp of the newest generated event
+    """
+
+    config: SyntheticModelConfig
+    end_time: datetime = field(default_factory=datetime.utcnow)
+
+    def __post_init__(self):
+        self._random = random.Random(self.config.seed)
+        num_categorical = round(self.config.features * self.config.categorical_ratio)
+        self.categorical_columns = [f"cat_{i}" for i in range(num_categorical)]
+        self.numeric_columns = [
+            f"num_{i}" for i in range(self.config.features - num_categorical)
+        ]
+        self.start_time = self.end_time - timedelta(days=self.config.days)
+
+    def version_schema(self) -> Dict[str, Dict[str, str]]:
+        features = {column: "NUMERIC" for column in self.numeric_columns}
+        features.update({column: "CATEGORICAL" for column in self.categorical_columns})
+        return {
+            "features": features,
+            "predictions": {PREDICTION_COLUMN: "CATEGORICAL"},
+        }
+
+    def _value(self, column: str, empty_ratio: float) -> Optional[object]:
+        if self._random.random() < empty_ratio:
+            return None
+        if column in self.categorical_columns:
+            return f"c{self._random.randrange(self.config.cardinality)}"
+        return round(self._random.gauss(50, 15), 3)
+
+    def _features(self, empty_ratio: float = 0.0) -> Dict[str, object]:
+        return {
+            column: self._value(column, empty_ratio)
+            for column in self.numeric_columns + self.categorical_columns
+        }
+
+    def _label(self) -> str:
+        return POSITIVE_CLASS if self._random.random() < 0.4 else NEGATIVE_CLASS
+
+    def baseline_rows(self) -> List[Dict]:
+        """Rows of the training batch dataset, batch logging does not accept empty values"""
+        return [
+            {
+                "features": self._features(),
+                "predictions": {PREDICTION_COLUMN: self._label()},
+            }
+            for _ in range(self.config.baseline_rows)
+        ]
+
+    def event_batches(self) -> List[List[Dict]]:
+        """
+        Prediction events in /v1/log.events request batches, with timestamps
+        spread evenly between start_time and end_time
+        """
+        step = (self.end_time - self.start_time) / max(self.config.events, 1)
+        events = []
+        for i in range(self.config.events):
+            events.append(
+                {
+                    "features": self._features(self.config.empty_ratio),
+                    "predictions": {PREDICTION_COLUMN: self._label()},
+                    "actuals": {PREDICTION_COLUMN: self._label()},
+                    "timestamp": (self.start_time + step * i).isoformat(),
+                }
+            )
+        return [
+            events[i : i + self.config.batch_size]
+            for i in range(0, len(events), self.config.batch_size)
+        ]
+
+    @staticmethod
+    def hourly_counts(
+        batches: List[List[Dict]],
+    ) -> Dict[Tuple[str, datetime], Tuple[int, int]]:
+        """
+        (empty_count, total_count) of each feature per hour, in the shape the
+        streaming monitors keep in the column counts collection
+        """
+        counts: Dict[Tuple[str, datetime], Tuple[int, int]] = {}
+        for batch in batches:
+            for event in batch:
+                hour = datetime.fromisoformat(event["timestamp"]).replace(
+                    minute=0, second=0, microsecond=0
+                )
+                for column, value in event["features"].items():
+                    empty, total = counts.get((column, hour), (0, 0))
+                    counts[(column, hour)] = (empty + (value is None), total + 1)
+        return counts
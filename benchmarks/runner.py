@@ -0,0 +1,509 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+
+import argparse
+import inspect
+import json
+import statistics
+import sys
+import time
+import warnings
+from dataclasses import asdict, dataclass, field
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from benchmarks.datagen import (
+    POSITIVE_CLASS,
+    PREDICTION_COLUMN,
+    SyntheticModel,
+    SyntheticModelConfig,
+)
+from waterdip.core.commons.models import TimeRange
+from waterdip.core.metrics.base import MongoMetric
+from waterdip.core.metrics.classification_metrics import (
+    ClassificationDateHistogramDBMetrics,
+)
+from waterdip.core.metrics.data_metrics import (
+    CardinalityCategorical,
+    CategoricalCountHistogram,
+    CategoricalNestedDateCountHistogram,
+    CountEmptyDateHistogram,
+    CountEmptyHistogram,
+    CountEmptyHourlyCounters,
+    NumericBasicMetrics,
+    NumericCountHistogram,
+    NumericNestedCountDateHistogram,
+)
+from waterdip.core.metrics.drift_psi import PSIMetrics
+from waterdip.processor.monitors.monitor_processor import MonitorProcessor
+from waterdip.server.db.mongodb import (
+    MONGO_COLLECTION_BATCH_ROWS,
+    MONGO_COLLECTION_EVENT_ROWS,
+    MONGO_COLLECTION_MONITORS,
+    MongodbBackend,
+)
+from waterdip.server.db.repositories.alert_repository import AlertRepository
+from waterdip.server.db.repositories.column_count_repository import (
+    ColumnCountRepository,
+)
+from waterdip.server.db.repositories.dataset_repository import DatasetRepository
+from waterdip.server.db.repositories.dataset_row_repository import (
+    BatchDatasetRowRepository,
+    EventDatasetRowRepository,
+)
+from waterdip.server.db.repositories.integration_repository import IntegrationRepository
+from waterdip.server.db.repositories.model_repository import ModelVersionRepository
+from waterdip.server.services.dataset_service import DatasetService
+from waterdip.server.services.integration_service import IntegrationService
+from waterdip.server.services.metrics_service import DatasetMetricsService
+from waterdip.server.services.model_service import ModelVersionService
+
+BENCHMARK_DATABASE = "wd_benchmark"
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    Wall clock timings of one benchmarked operation
+
+    Attributes:
+    ------------------
+    name:
+        unique name of the operation, like metric:NumericBasicMetrics
+    timings:
+        duration of each measured run in seconds
+    extra:
+        operation specific figures, like rows_per_s for ingestion
+    """
+
+    name: str
+    timings: List[float]
+    extra: Dict[str, float] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "median_s": statistics.median(self.timings),
+            "min_s": min(self.timings),
+            "max_s": max(self.timings),
+            "runs": len(self.timings),
+            **self.extra,
+        }
+
+
+def time_call(fn: Callable[[], Any], runs: int, warmup: int = 1) -> List[float]:
+    """Durations of `runs` calls of fn, after `warmup` untimed calls"""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def metric_classes() -> List[type]:
+    """All the concrete MongoMetric subclasses"""
+    classes, pending = [], list(MongoMetric.__subclasses__())
+    while pending:
+        cls = pending.pop()
+        pending.extend(cls.__subclasses__())
+        if not inspect.isabstract(cls) and cls not in classes:
+            classes.append(cls)
+    return sorted(classes, key=lambda cls: cls.__name__)
+
+
+def compare_to_baseline(
+    results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float
+) -> List[str]:
+    """
+    Names of the operations whose median time grew more than `threshold` times
+    over the stored baseline. Operations missing on either side are ignored
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline or not baseline[name]["median_s"]:
+            continue
+        ratio = result["median_s"] / baseline[name]["median_s"]
+        result["baseline_ratio"] = round(ratio, 3)
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+
+class BenchmarkSuite:
+    """
+    Loads a synthetic model through the API into a dedicated database and
+    times the metrics, ingestion and monitor processing against it
+
+    Attributes:
+    ------------------
+    config:
+        shape of the synthetic model
+    mongo_backend:
+        backend of the benchmark database, everything in it is dropped on setup
+    runs:
+        number of measured runs of each operation
+    """
+
+    def __init__(
+        self, config: SyntheticModelConfig, mongo_backend: MongodbBackend, runs: int
+    ):
+        self.config = config
+        self.mongo_backend = mongo_backend
+        self.runs = runs
+        self.model = SyntheticModel(config=config)
+        self.results: Dict[str, BenchmarkResult] = {}
+        self._database = mongo_backend.database
+
+        warnings.filterwarnings("ignore", category=DeprecationWarning)
+        from fastapi.testclient import TestClient
+
+        from waterdip.server.app import app
+
+        app.dependency_overrides[MongodbBackend.get_instance] = lambda: mongo_backend
+        self._client = TestClient(app)
+
+    def _post(self, url: str, payload: Dict) -> Dict:
+        response = self._client.post(url=url, json=payload)
+        if response.status_code != 200:
+            raise RuntimeError(
+                f"{url} failed [{response.status_code}]: {response.text}"
+            )
+        return response.json()
+
+    def _add(self, name: str, timings: List[float], **extra: float):
+        self.results[name] = BenchmarkResult(name=name, timings=timings, extra=extra)
+
+    def _time(self, name: str, fn: Callable[[], Any]):
+        try:
+            self._add(name, time_call(fn, self.runs))
+        except NotImplementedError as e:
+            # mongomock does not implement every aggregation operator
+            print(f"skipped {name}, not supported by the backend: {e}")
+
+    def setup(self):
+        """Register the model and log the baseline and the events, timing the event ingestion"""
+        self.mongo_backend.client.drop_database(self.mongo_backend.database.name)
+
+        self.model_id = self._post(
+            "/v1/model.register", {"model_name": "benchmark_model"}
+        )["model_id"]
+        self.model_version_id = self._post(
+            "/v1/model.version.register",
+            {
+                "model_id": self.model_id,
+                "model_version": "v1",
+                "task_type": "BINARY",
+                "version_schema": self.model.version_schema(),
+            },
+        )["model_version_id"]
+        self._post(
+            "/v1/model.update",
+            {
+                "model_id": self.model_id,
+                "property_name": "positive_class",
+                "positive_class": {"name": POSITIVE_CLASS},
+            },
+        )
+        self._post(
+            "/v1/log.dataset",
+            {
+                "model_version_id": self.model_version_id,
+                "environment": "TRAINING",
+                "rows": self.model.baseline_rows(),
+            },
+        )
+
+        batches = self.model.event_batches()
+        timings = []
+        for batch in batches:
+            payload = {"model_version_id": self.model_version_id, "events": batch}
+            started = time.perf_counter()
+            self._post("/v1/log.events", payload)
+            timings.append(time.perf_counter() - started)
+        self._add(
+            "ingestion:/v1/log.events",
+            timings,
+            rows_per_s=round(self.config.events / sum(timings), 1),
+        )
+
+        datasets = DatasetRepository(mongodb=self.mongo_backend)
+        self.event_dataset_id, self.batch_dataset_id = [
+            datasets.find_datasets(
+                {"model_version_id": self.model_version_id, "environment": environment}
+            )[0].dataset_id
+            for environment in ["PRODUCTION", "TRAINING"]
+        ]
+        ColumnCountRepository(mongodb=self.mongo_backend).increment_counts(
+            dataset_id=self.event_dataset_id,
+            counts=SyntheticModel.hourly_counts(batches),
+        )
+
+        self.time_range = TimeRange(
+            start_time=self.model.start_time,
+            end_time=self.model.end_time + timedelta(minutes=1),
+        )
+
+    def _metric_cases(self) -> Dict[type, Callable[[], Any]]:
+        events = self._database[MONGO_COLLECTION_EVENT_ROWS]
+        batch_rows = self._database[MONGO_COLLECTION_BATCH_ROWS]
+        dataset_id, time_range = self.event_dataset_id, self.time_range
+        numeric_columns = self.model.numeric_columns
+        categorical_columns = self.model.categorical_columns + [PREDICTION_COLUMN]
+
+        def metric(cls: type, **kwargs) -> Callable[[], Any]:
+            return lambda: cls(
+                collection=events, dataset_id=dataset_id
+            ).aggregation_result(time_range=time_range, **kwargs)
+
+        return {
+            CategoricalCountHistogram: metric(CategoricalCountHistogram),
+            CategoricalNestedDateCountHistogram: metric(
+                CategoricalNestedDateCountHistogram
+            ),
+            NumericCountHistogram: metric(
+                NumericCountHistogram, numeric_columns=numeric_columns
+            ),
+            NumericNestedCountDateHistogram: metric(
+                NumericNestedCountDateHistogram, numeric_columns=numeric_columns
+            ),
+            CountEmptyHistogram: metric(CountEmptyHistogram),
+            CountEmptyDateHistogram: metric(CountEmptyDateHistogram),
+            CountEmptyHourlyCounters: lambda: CountEmptyHourlyCounters(
+                collection=ColumnCountRepository(mongodb=self.mongo_backend).collection,
+                dataset_id=dataset_id,
+            ).aggregation_result(time_range=time_range),
+            CardinalityCategorical: metric(CardinalityCategorical),
+            NumericBasicMetrics: metric(NumericBasicMetrics),
+            ClassificationDateHistogramDBMetrics: lambda: ClassificationDateHistogramDBMetrics(
+                collection=events, dataset_id=dataset_id, positive_class=POSITIVE_CLASS
+            ).aggregation_result(
+                time_range=time_range
+            ),
+            PSIMetrics: lambda: PSIMetrics(
+                collection=events,
+                dataset_id=dataset_id,
+                baseline_dataset_id=self.batch_dataset_id,
+                baseline_collection=batch_rows,
+            ).aggregation_result(
+                numeric_columns=numeric_columns,
+                categorical_columns=categorical_columns,
+                time_range=time_range,
+            ),
+        }
+
+    def run_metrics(self):
+        cases = self._metric_cases()
+        for cls in metric_classes():
+            if cls not in cases:
+                print(f"warning: no benchmark case for metric {cls.__name__}")
+                continue
+            self._time(f"metric:{cls.__name__}", cases[cls])
+
+    def run_combined_metrics(self):
+        backend = self.mongo_backend
+        model_version_repo = ModelVersionRepository(mongodb=backend)
+        dataset_service = DatasetService(
+            repository=DatasetRepository(mongodb=backend),
+            model_version_repository=model_version_repo,
+        )
+        service = DatasetMetricsService(
+            event_repo=EventDatasetRowRepository(mongodb=backend),
+            batch_repo=BatchDatasetRowRepository(mongodb=backend),
+            dataset_service=dataset_service,
+            model_version_service=ModelVersionService(
+                repository=model_version_repo, dataset_service=dataset_service
+            ),
+        )
+        self._time(
+            "service:DatasetMetricsService.combined_metrics",
+            lambda: service.combined_metrics(
+                model_id=self.model_id,
+                model_version_id=self.model_version_id,
+                dataset_id=self.event_dataset_id,
+                time_range=self.time_range,
+            ),
+        )
+
+    def _monitor_requests(self) -> Dict[str, Dict]:
+        window = f"{self.config.days}d"
+        features = self.model.numeric_columns + self.model.categorical_columns
+        return {
+            "DATA_QUALITY": {
+                "evaluation_metric": "EMPTY_VALUE",
+                "dimensions": {"features": features},
+                "threshold": {"threshold": "gt", "value": 0.5},
+                "evaluation_window": window,
+            },
+            "DRIFT": {
+                "evaluation_metric": "PSI",
+                "dimensions": {"features": features},
+                "threshold": {"threshold": "gt", "value": 0.5},
+                "baseline": {"dataset_env": "TRAINING"},
+                "evaluation_window": window,
+            },
+            "PERFORMANCE": {
+                "evaluation_metric": "PRECISION",
+                "threshold": {"threshold": "lt", "value": 0.9},
+                "evaluation_window": window,
+            },
+        }
+
+    def run_monitors(self):
+        monitors = self._database[MONGO_COLLECTION_MONITORS]
+        for monitor_type, condition in self._monitor_requests().items():
+            monitor_name = f"benchmark_{monitor_type.lower()}"
+            self._post(
+                "/v1/monitor.create",
+                {
+                    "monitor_name": monitor_name,
+                    "monitor_type": monitor_type,
+                    "monitor_identification": {
+                        "model_id": self.model_id,
+                        "model_version_id": self.model_version_id,
+                    },
+                    "monitor_condition": condition,
+                    "severity": "LOW",
+                },
+            )
+            processor = MonitorProcessor(
+                monitor=monitors.find_one({"monitor_name": monitor_name}),
+                mongodb_backend=self.mongo_backend,
+                alert_repo=AlertRepository(mongodb=self.mongo_backend),
+                dataset_repo=DatasetRepository(mongodb=self.mongo_backend),
+                integration_service=IntegrationService(
+                    repository=IntegrationRepository(mongodb=self.mongo_backend)
+                ),
+            )
+            self._time(f"monitor:{monitor_type}", processor.process)
+
+    def run(self) -> Dict[str, Dict]:
+        self.setup()
+        self.run_metrics()
+        self.run_combined_metrics()
+        self.run_monitors()
+        return {name: result.to_dict() for name, result in self.results.items()}
+
+
+def _mongo_backend(mongo_url: Optional[str], database: str) -> MongodbBackend:
+    if mongo_url is None:
+        import mongomock
+
+        return MongodbBackend(
+            mongo_client=mongomock.MongoClient(), mongo_database=database
+        )
+    from pymongo import MongoClient
+
+    return MongodbBackend(mongo_client=MongoClient(mongo_url), mongo_database=database)
+
+
+def _parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    defaults = SyntheticModelConfig()
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.runner",
+        description="Time the metrics, event ingestion and monitor processing on a synthetic model",
+    )
+    parser.add_argument("--features", type=int, default=defaults.features)
+    parser.add_argument(
+        "--categorical-ratio", type=float, default=defaults.categorical_ratio
+    )
+    parser.add_argument("--cardinality", type=int, default=defaults.cardinality)
+    parser.add_argument("--events", type=int, default=defaults.events)
+    parser.add_argument("--days", type=int, default=defaults.days)
+    parser.add_argument("--baseline-rows", type=int, default=defaults.baseline_rows)
+    parser.add_argument("--empty-ratio", type=float, default=defaults.empty_ratio)
+    parser.add_argument("--batch-size", type=int, default=defaults.batch_size)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--mongo-url",
+        default=None,
+        help="mongodb to benchmark against, an in memory mongomock when not set",
+    )
+    parser.add_argument(
+        "--database",
+        default=BENCHMARK_DATABASE,
+        help="database used for the benchmark, it is dropped before the run",
+    )
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument(
+        "--baseline",
+        default=None,
+        help="results file of an earlier run to compare with",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="median time ratio over the baseline reported as a regression",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    config = SyntheticModelConfig(
+        features=args.features,
+        categorical_ratio=args.categorical_ratio,
+        cardinality=args.cardinality,
+        events=args.events,
+        days=args.days,
+        baseline_rows=args.baseline_rows,
+        empty_ratio=args.empty_ratio,
+        batch_size=args.batch_size,
+        seed=args.seed,
+    )
+    suite = BenchmarkSuite(
+        config=config,
+        mongo_backend=_mongo_backend(args.mongo_url, args.database),
+        runs=args.runs,
+    )
+    results = suite.run()
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+
+    with open(args.output, "w") as output_file:
+        json.dump(
+            {
+                "config": asdict(config),
+                "backend": "mongodb" if args.mongo_url else "mongomock",
+                "results": results,
+            },
+            output_file,
+            indent=2,
+        )
+
+    for name, result in results.items():
+        ratio = result.get("baseline_ratio")
+        print(
+            f"{name:<60} median {result['median_s'] * 1000:>10.2f} ms"
+            + (f"  x{ratio:.2f} of baseline" if ratio is not None else "")
+        )
+    for name in regressions:
+        print(f"regression: {name} is slower than {args.threshold}x the baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
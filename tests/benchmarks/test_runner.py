@@ -0,0 +1,72 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+
+import json
+import subprocess
+import sys
+
+from benchmarks.datagen import SyntheticModel, SyntheticModelConfig
+from benchmarks.runner import compare_to_baseline
+
+
+class TestSyntheticModel:
+    def test_should_generate_configured_shape(self):
+        config = SyntheticModelConfig(
+            features=4, categorical_ratio=0.25, events=10, days=2, batch_size=4
+        )
+        model = SyntheticModel(config=config)
+
+        schema = model.version_schema()
+        batches = model.event_batches()
+
+        assert list(schema["features"].values()).count("CATEGORICAL") == 1
+        assert [len(batch) for batch in batches] == [4, 4, 2]
+        assert batches[0][0]["timestamp"] == model.start_time.isoformat()
+        counts = SyntheticModel.hourly_counts(batches)
+        assert sum(total for _, total in counts.values()) == 10 * 4
+
+
+def test_should_flag_regressions_over_threshold():
+    results = {"metric:A": {"median_s": 2.0}, "metric:B": {"median_s": 1.1}}
+    baseline = {"metric:A": {"median_s": 1.0}, "metric:B": {"median_s": 1.0}}
+
+    assert compare_to_baseline(results, baseline, threshold=1.25) == ["metric:A"]
+    assert results["metric:B"]["baseline_ratio"] == 1.1
+
+
+def test_should_write_results_for_every_operation(tmp_path):
+    output = tmp_path / "results.json"
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.runner",
+            "--features=2",
+            "--events=20",
+            "--days=1",
+            "--baseline-rows=10",
+            "--runs=1",
+            f"--output={output}",
+        ],
+        capture_output=True,
+        text=True,
+    )
+
+    assert completed.returncode == 0, completed.stderr
+    assert "no benchmark case" not in completed.stdout
+    results = json.loads(output.read_text())["results"]
+    assert results["ingestion:/v1/log.events"]["rows_per_s"] > 0
+    assert "metric:CountEmptyHistogram" in results
+    assert "monitor:PERFORMANCE" in results
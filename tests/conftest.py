@@ -21,6 +21,22 @@ from fastapi.testclient import TestClient
 
 from tests.testing_helpers import MongodbBackendTesting
 from waterdip.server.db.mongodb import MongodbBackend
+from waterdip.server.db.repositories.baseline_repository import (
+    BaselineHistogramRepository,
+)
+from waterdip.server.db.repositories.dataset_row_repository import (
+    EventDatasetRowRepository,
+)
+from waterdip.server.db.repositories.model_repository import (
+    ModelRepository,
+    ModelVersionRepository,
+)
+from waterdip.server.db.repositories.monitor_lease_repository import (
+    MonitorLeaseRepository,
+)
+from waterdip.server.db.repositories.performance_count_repository import (
+    PerformanceCountRepository,
+)
 
 
 @pytest.fixture(scope="class")
@@ -40,6 +56,26 @@ def mock_mongo_backend(monkeypatch) -> MongodbBackend:
     return MongodbBackendTesting(mock_mongo_client)
 
 
+@pytest.fixture(autouse=True)
+def restore_repository_instances():
+    """
+    Monitor processors fall back to the repository singletons, singletons created
+    on the mongo backend of a test must not be used by the next tests
+    """
+    repositories = [
+        BaselineHistogramRepository,
+        EventDatasetRowRepository,
+        ModelRepository,
+        ModelVersionRepository,
+        MonitorLeaseRepository,
+        PerformanceCountRepository,
+    ]
+    instances = [(repository, repository._INSTANCE) for repository in repositories]
+    yield
+    for repository, instance in instances:
+        repository._INSTANCE = instance
+
+
 @pytest.fixture(scope="class")
 def test_client(app: FastAPI) -> TestClient:
     warnings.filterwarnings("ignore", category=DeprecationWarning)
@@ -0,0 +1,61 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+
+from datetime import datetime
+
+import pytest
+
+from waterdip.core.commons.models import TimeGranularity, TimeRange
+from waterdip.core.metrics.base import TimeBuckets
+
+
+class TestTimeBuckets:
+    def test_should_align_buckets_to_the_granularity(self):
+        created_at = datetime(2023, 3, 1, 10, 30, 5)
+
+        assert TimeBuckets.start_time(
+            TimeBuckets(TimeGranularity.HOUR).bucket(created_at)
+        ) == datetime(2023, 3, 1, 10)
+        assert TimeBuckets.start_time(TimeBuckets().bucket(created_at)) == datetime(
+            2023, 3, 1
+        )
+        # 2023-03-01 is a wednesday
+        assert TimeBuckets.start_time(
+            TimeBuckets(TimeGranularity.WEEK).bucket(created_at)
+        ) == datetime(2023, 2, 27)
+
+    def test_should_start_days_in_the_timezone(self):
+        buckets = TimeBuckets(timezone="Asia/Kolkata", at=datetime(2023, 3, 1))
+        bucket = buckets.bucket(datetime(2023, 3, 1, 20))
+
+        assert TimeBuckets.start_time(bucket) == datetime(2023, 3, 1, 18, 30)
+        assert buckets.local_start_time(bucket) == datetime(2023, 3, 2)
+        with pytest.raises(ValueError):
+            TimeBuckets(timezone="Mars/Olympus_Mons")
+
+    def test_should_list_the_buckets_of_a_time_range(self):
+        buckets = TimeBuckets(TimeGranularity.HOUR).buckets(
+            TimeRange(
+                start_time=datetime(2023, 3, 1, 22, 15),
+                end_time=datetime(2023, 3, 2, 1),
+            )
+        )
+
+        assert [TimeBuckets.start_time(bucket) for bucket in buckets] == [
+            datetime(2023, 3, 1, 22),
+            datetime(2023, 3, 1, 23),
+            datetime(2023, 3, 2, 0),
+            datetime(2023, 3, 2, 1),
+        ]
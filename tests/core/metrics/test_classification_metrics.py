@@ -16,7 +16,13 @@ from datetime import datetime
 from uuid import UUID
 
 from tests.testing_helpers import MongodbBackendTesting, clean_model_data
-from waterdip.core.commons.models import DatasetType, Environment, TimeRange
+from waterdip.core.commons.models import (
+    DatasetType,
+    Environment,
+    TimeGranularity,
+    TimeRange,
+)
+from waterdip.core.metrics.base import TimeBuckets
 from waterdip.core.metrics.classification_metrics import (
     ClassificationDateHistogramDBMetrics,
 )
@@ -38,6 +44,8 @@ from waterdip.server.db.mongodb import (
     MONGO_COLLECTION_MODELS,
 )
 
+day_bucket = TimeBuckets().bucket
+
 TEST_CLASSIFICATION_MODEL_ID = "4468c560-14d1-47e1-8d68-d4a93e9eb3ed"
 TEST_CLASSIFICATION_MODEL_VERSION_ID = "a367b135-06bc-4676-99da-ca5ec4d7f0c0"
 TEST_CLASSIFICATION_MODEL_DATASET_ID = "4d32217b-12e1-4458-98e8-8897b6f9823e"
@@ -231,7 +239,7 @@ class TestClassificationDateHist:
                 end_time=datetime(year=2022, month=12, day=23),
             )
         )
-        assert result["accuracy"]["23-12-2022"] == 0.33
+        assert result["accuracy"][day_bucket(datetime(2022, 12, 23))] == 0.33
 
     def test_should_return_classification_metrics_with_time_range(self):
         clf_date_hist = ClassificationDateHistogramDBMetrics(
@@ -245,4 +253,70 @@ class TestClassificationDateHist:
                 end_time=datetime(year=2022, month=12, day=22),
             )
         )
-        assert sorted(list(result["accuracy"].keys())) == ["21-12-2022", "22-12-2022"]
+        assert sorted(list(result["accuracy"].keys())) == [
+            day_bucket(datetime(2022, 12, 21)),
+            day_bucket(datetime(2022, 12, 22)),
+        ]
+
+    def test_should_return_classification_metrics_per_hour_in_timezone(self):
+        clf_date_hist = ClassificationDateHistogramDBMetrics(
+            collection=database[MONGO_COLLECTION_EVENT_ROWS],
+            dataset_id=UUID(TEST_CLASSIFICATION_MODEL_EVENT_DATASET_ID),
+            positive_class="true",
+        )
+        time_range = TimeRange(
+            start_time=datetime(year=2022, month=12, day=23),
+            end_time=datetime(year=2022, month=12, day=23, hour=2),
+        )
+        hourly = clf_date_hist.aggregation_result(
+            time_range=time_range, granularity=TimeGranularity.HOUR
+        )
+        assert list(hourly["accuracy"].values()) == [0.33, None, None]
+
+        # rows of 23-12-2022 00:00 UTC are of 23-12-2022 05:30 in India
+        daily = clf_date_hist.aggregation_result(
+            time_range=time_range, timezone="Asia/Kolkata"
+        )
+        assert [TimeBuckets.start_time(bucket) for bucket in daily["accuracy"]] == [
+            datetime(2022, 12, 22, 18, 30)
+        ]
+        assert list(daily["accuracy"].values()) == [0.33]
+
+    def test_should_return_confusion_counts_per_day(self):
+        clf_date_hist = ClassificationDateHistogramDBMetrics(
+            collection=database[MONGO_COLLECTION_EVENT_ROWS],
+            dataset_id=UUID(TEST_CLASSIFICATION_MODEL_EVENT_DATASET_ID),
+            positive_class="true",
+        )
+        result = clf_date_hist.confusion_counts(
+            start_time=datetime(year=2022, month=12, day=21),
+            end_time=datetime(year=2022, month=12, day=23),
+        )
+        assert sorted(result.keys()) == [
+            datetime(year=2022, month=12, day=21),
+            datetime(year=2022, month=12, day=22),
+        ]
+        assert result[datetime(year=2022, month=12, day=21)]["false_negative"] == 1
+        assert result[datetime(year=2022, month=12, day=22)]["true_positive"] == 1
+
+    def test_should_calculate_metrics_from_counts(self):
+        metrics = ClassificationDateHistogramDBMetrics.metrics_from_counts(
+            {
+                "total": 5,
+                "is_match": 2,
+                "true_positive": 2,
+                "false_negative": 1,
+                "true_negative": 0,
+                "false_positive": 2,
+            }
+        )
+        assert metrics["accuracy"] == 0.4
+        assert metrics["precision"] == 0.5
+        assert round(metrics["recall"], 2) == 0.67
+        assert round(metrics["f1"], 2) == 0.57
+        assert ClassificationDateHistogramDBMetrics.metrics_from_counts({}) == {
+            "accuracy": None,
+            "precision": None,
+            "recall": None,
+            "f1": None,
+        }
@@ -16,6 +16,8 @@ import uuid
 from datetime import datetime
 from uuid import UUID
 
+import pytest
+
 from tests.testing_helpers import (
     DATASET_EVENT_ID_V2,
     MODEL_ID,
@@ -23,13 +25,19 @@ from tests.testing_helpers import (
     MongodbBackendTesting,
 )
 from waterdip.core.commons.models import DatasetType, Environment, TimeRange
+from waterdip.core.metrics.base import TimeBuckets
 from waterdip.core.metrics.data_metrics import (
     CardinalityCategorical,
     CategoricalCountHistogram,
+    CategoricalNestedDateCountHistogram,
+    CountEmptyDateHistogram,
     CountEmptyHistogram,
     NumericBasicMetrics,
     NumericCountHistogram,
     NumericNestedCountDateHistogram,
+    fold_categories,
+    kept_categories,
+    numeric_bin_edges,
 )
 from waterdip.server.db.models.dataset_rows import (
     BaseDatasetBatchRowDB,
@@ -283,6 +291,52 @@ class TestHistogramCategoricalFeatures:
         )
         assert len(hist_result.items()) == 1
 
+    def test_should_fold_categories_beyond_top_k(self):
+        categorical_hist = CategoricalCountHistogram(
+            collection=database[MONGO_COLLECTION_EVENT_ROWS],
+            dataset_id=UUID(DATASET_EVENT_ID_V2),
+        )
+        time_range = TimeRange(
+            start_time=datetime(year=2022, month=12, day=18),
+            end_time=datetime(year=2022, month=12, day=23),
+        )
+        full = categorical_hist.aggregation_result(time_range=time_range)
+        bounded = categorical_hist.aggregation_result(time_range=time_range, top_k=1)
+
+        assert bounded["f4"]["bins"] == ["yellow", "__other__"]
+        assert sum(bounded["f4"]["count"]) == sum(full["f4"]["count"])
+
+    def test_should_count_categories_per_time_bucket(self):
+        time_range = TimeRange(
+            start_time=datetime(year=2022, month=12, day=18),
+            end_time=datetime(year=2022, month=12, day=23),
+        )
+        hist = CategoricalNestedDateCountHistogram(
+            collection=database[MONGO_COLLECTION_EVENT_ROWS],
+            dataset_id=UUID(DATASET_EVENT_ID_V2),
+        )
+        daily = hist.aggregation_result(time_range=time_range)
+        bucketed = hist.aggregation_result(
+            time_range=time_range, time_buckets=TimeBuckets()
+        )
+
+        assert {
+            TimeBuckets.start_time(bucket).strftime("%d-%m-%Y"): bucket_hist
+            for bucket, bucket_hist in bucketed.items()
+        } == daily
+        assert len(daily) > 0
+
+    def test_should_fold_onto_given_categories(self):
+        hist = {
+            "c1": {"bins": ["a", "b", "c"], "count": [5, 3, 1]},
+            "c2": {"bins": ["x"], "count": [2]},
+        }
+        folded = fold_categories(hist, categories={"c1": ["c", "z"]})
+
+        assert folded["c1"] == {"bins": ["c", "z", "__other__"], "count": [1, 0, 8]}
+        assert folded["c2"] == hist["c2"]
+        assert kept_categories(folded) == {"c1": ["c", "z"], "c2": ["x"]}
+
 
 class TestCountEmptyHistogram:
     def test_should_return_null_columns(self):
@@ -301,6 +355,47 @@ class TestCountEmptyHistogram:
         assert hist_result["f3"]["empty_percentage"] == 25.0
         assert hist_result["p2"]["empty_count"] == 0
 
+    def test_should_prune_columns_before_unwind(self):
+        hist = CountEmptyHistogram(
+            collection=database[MONGO_COLLECTION_EVENT_ROWS],
+            dataset_id=UUID(DATASET_EVENT_ID_V2),
+            columns=["f3"],
+        )
+        query = hist._aggregation_query()
+        hist_result = hist.aggregation_result(
+            time_range=TimeRange(
+                start_time=datetime(year=2022, month=12, day=18),
+                end_time=datetime(year=2022, month=12, day=23),
+            )
+        )
+
+        assert list(query[1]["$addFields"]["columns"].keys()) == ["$filter"]
+        assert query[2] == {"$unwind": "$columns"}
+        assert list(hist_result.keys()) == ["f3"]
+        assert hist_result["f3"]["empty_count"] == 1
+        assert hist_result["f3"]["empty_percentage"] == 25.0
+
+
+class TestCountEmptyDateHistogram:
+    def test_should_return_daily_empty_series(self):
+        hist = CountEmptyDateHistogram(
+            collection=database[MONGO_COLLECTION_EVENT_ROWS],
+            dataset_id=UUID(DATASET_EVENT_ID_V2),
+        )
+        hist_result = hist.aggregation_result(
+            time_range=TimeRange(
+                start_time=datetime(year=2022, month=12, day=19),
+                end_time=datetime(year=2022, month=12, day=24),
+            )
+        )
+
+        assert hist_result["dates"][0] == datetime(year=2022, month=12, day=19)
+        assert len(hist_result["dates"]) == 6
+        assert hist_result["columns"]["f3"]["empty_count"][4] == 1
+        assert hist_result["columns"]["f4"]["empty_count"][3] == 1
+        assert hist_result["columns"]["f3"]["total_count"][:2] == [0, 1]
+        assert sum(hist_result["columns"]["p2"]["empty_count"]) == 0
+
 
 class TestCardinalityCategorical:
     def test_should_return_cardinality_of_categorical_columns(self):
@@ -316,6 +411,93 @@ class TestCardinalityCategorical:
         )
         assert cardinality_result["f4"]["top_value"] == "yellow"
 
+    def test_should_return_only_allowed_columns(self):
+        cardinality = CardinalityCategorical(
+            collection=database[MONGO_COLLECTION_EVENT_ROWS],
+            dataset_id=UUID(DATASET_EVENT_ID_V2),
+            columns=["p2", "f3"],
+        )
+        cardinality_result = cardinality.aggregation_result(
+            time_range=TimeRange(
+                start_time=datetime(year=2022, month=12, day=18),
+                end_time=datetime(year=2022, month=12, day=23),
+            )
+        )
+        assert list(cardinality_result.keys()) == ["p2"]
+
+    def test_should_match_exact_cardinality_in_approximate_mode(self):
+        cardinality = CardinalityCategorical(
+            collection=database[MONGO_COLLECTION_EVENT_ROWS],
+            dataset_id=UUID(DATASET_EVENT_ID_V2),
+        )
+        time_range = TimeRange(
+            start_time=datetime(year=2022, month=12, day=18),
+            end_time=datetime(year=2022, month=12, day=23),
+        )
+        exact = cardinality.aggregation_result(time_range=time_range)
+        approximate = cardinality.aggregation_result(
+            time_range=time_range, approximate=True, top_k=1
+        )
+
+        assert approximate.keys() == exact.keys()
+        for column in exact:
+            assert (
+                approximate[column]["unique_values"] == exact[column]["unique_values"]
+            )
+            assert approximate[column]["top_value"] == exact[column]["top_value"]
+            assert (
+                approximate[column]["top_value_count"]
+                == exact[column]["top_value_count"]
+            )
+            assert len(approximate[column]["values"]) == 1
+
+    def test_should_stream_value_counts_once_per_time_range(self, mocker):
+        collection = database[MONGO_COLLECTION_EVENT_ROWS]
+        cardinality = CardinalityCategorical(
+            collection=collection, dataset_id=UUID(DATASET_EVENT_ID_V2)
+        )
+        aggregate = mocker.spy(collection, "aggregate")
+        time_range = TimeRange(
+            start_time=datetime(year=2022, month=12, day=18),
+            end_time=datetime(year=2022, month=12, day=23),
+        )
+        cardinality.aggregation_result(time_range=time_range)
+        cardinality.aggregation_result(time_range=time_range, approximate=True)
+
+        assert [call.kwargs["allowDiskUse"] for call in aggregate.call_args_list] == [
+            True,
+            True,
+        ]
+        value_counts = aggregate.call_args_list[1].args[0][-1]["$group"]["_id"]
+        assert set(value_counts.keys()) == {"name", "value"}
+
+    def test_should_merge_daily_cardinality_sketches(self):
+        docs = [
+            {
+                "_id": {"name": "f4", "value": "red", "date_str": "20-12-2022"},
+                "count": 3,
+            },
+            {
+                "_id": {"name": "f4", "value": "red", "date_str": "21-12-2022"},
+                "count": 1,
+            },
+            {
+                "_id": {"name": "f4", "value": "blue", "date_str": "21-12-2022"},
+                "count": 2,
+            },
+        ]
+        sketches = CardinalityCategorical.daily_cardinality_sketches(docs, top_k=2)
+
+        assert list(sketches["distinct"].keys()) == ["20-12-2022", "21-12-2022"]
+        assert sketches["distinct"]["21-12-2022"]["f4"].cardinality() == 2
+        merged = (
+            sketches["top"]["20-12-2022"]["f4"] + sketches["top"]["21-12-2022"]["f4"]
+        )
+        assert merged.top() == [
+            {"value": "red", "count": 4},
+            {"value": "blue", "count": 2},
+        ]
+
 
 class TestNumericBasicMetrics:
     def test_should_return_basic_numeric_values(self):
@@ -333,6 +515,52 @@ class TestNumericBasicMetrics:
         assert numeric_basic_result["f3"]["min"] == 0
         assert numeric_basic_result["f3"]["zeros"] == 1
 
+    def test_should_return_percentiles_from_daily_sketches(self):
+        numeric_basic = NumericBasicMetrics(
+            collection=database[MONGO_COLLECTION_EVENT_ROWS],
+            dataset_id=UUID(DATASET_EVENT_ID_V2),
+        )
+        numeric_basic_result = numeric_basic.aggregation_result(
+            time_range=TimeRange(
+                start_time=datetime(year=2022, month=12, day=18),
+                end_time=datetime(year=2022, month=12, day=23),
+            ),
+            std_dev_disable="true",
+            percentiles=[0, 0.5, 1],
+        )
+        percentiles = numeric_basic_result["f3"]["percentiles"]
+
+        assert percentiles["p0"] == 0
+        assert percentiles["p50"] == pytest.approx(2, rel=0.01)
+        assert percentiles["p100"] == pytest.approx(30, rel=0.01)
+
+    def test_should_build_quantile_sketches_per_day(self):
+        docs = [
+            {
+                "_id": {
+                    "column_name": "f3",
+                    "date_str": "20-12-2022",
+                    "sign": 1,
+                    "key": 10,
+                },
+                "count": 2,
+            },
+            {
+                "_id": {
+                    "column_name": "f3",
+                    "date_str": "21-12-2022",
+                    "sign": 0,
+                    "key": None,
+                },
+                "count": 1,
+            },
+        ]
+        sketches = NumericBasicMetrics.daily_quantile_sketches(docs)
+
+        assert list(sketches.keys()) == ["20-12-2022", "21-12-2022"]
+        assert sketches["20-12-2022"]["f3"].count == 2
+        assert sketches["21-12-2022"]["f3"].zero_count == 1
+
 
 class TestNumericCountHistogram:
     def test_should_return_numeric_count_histogram(self, mocker):
@@ -356,6 +584,37 @@ class TestNumericCountHistogram:
         )
         assert numeric_basic_result["f3"]["bins"] == ["0", "2"]
 
+    def test_should_return_histogram_on_bin_edges(self):
+        numeric_hist = NumericCountHistogram(
+            collection=database[MONGO_COLLECTION_EVENT_ROWS],
+            dataset_id=UUID(DATASET_EVENT_ID_V2),
+        )
+        numeric_hist_result = numeric_hist.aggregation_result(
+            time_range=TimeRange(
+                start_time=datetime(year=2022, month=12, day=18),
+                end_time=datetime(year=2022, month=12, day=23),
+            ),
+            numeric_columns=["f3"],
+            bin_edges={"f3": [1.0, 2.0, 3.0]},
+        )
+        assert numeric_hist_result["f3"]["bins"] == ["underflow", 1.0, 2.0, "overflow"]
+        assert numeric_hist_result["f3"]["count"] == [1, 0, 1, 1]
+
+
+class TestNumericBinEdges:
+    def test_should_return_quantile_edges(self):
+        edges = numeric_bin_edges(list(range(0, 101)), bins=4)
+        assert edges[:-1] == [0.0, 25.0, 50.0, 75.0]
+        assert 100.0 < edges[-1] < 100.0001
+
+    def test_should_return_two_edges_for_constant_column(self):
+        edges = numeric_bin_edges([5, 5, 5])
+        assert len(edges) == 2
+        assert edges[0] == 5.0 and edges[1] > 5.0
+
+    def test_should_return_none_without_values(self):
+        assert numeric_bin_edges([]) is None
+
 
 class TestNumericNestedCountDateHistogram:
     def test_should_agg_facet_data(self):
@@ -435,3 +694,56 @@ class TestNumericNestedCountDateHistogram:
             numeric_columns=["f3"],
         )
         assert numeric_basic_result["18-12-2022"]["f3"]["bins"] == ["0", "2"]
+
+    def test_should_count_per_time_bucket(self):
+        time_range = TimeRange(
+            start_time=datetime(year=2022, month=12, day=18),
+            end_time=datetime(year=2022, month=12, day=23),
+        )
+        hist = NumericNestedCountDateHistogram(
+            collection=database[MONGO_COLLECTION_EVENT_ROWS],
+            dataset_id=UUID(DATASET_EVENT_ID_V2),
+        )
+        bin_edges = {"f3": [1.0, 2.0, 3.0]}
+        daily = hist.aggregation_result(
+            time_range=time_range, numeric_columns=["f3"], bin_edges=bin_edges
+        )
+        bucketed = hist.aggregation_result(
+            time_range=time_range,
+            numeric_columns=["f3"],
+            bin_edges=bin_edges,
+            time_buckets=TimeBuckets(),
+        )
+
+        assert {
+            TimeBuckets.start_time(bucket).strftime("%d-%m-%Y"): bucket_hist
+            for bucket, bucket_hist in bucketed.items()
+        } == daily
+        assert len(daily) > 0
+
+    def test_should_add_up_daily_histograms_on_bin_edges(self):
+        time_range = TimeRange(
+            start_time=datetime(year=2022, month=12, day=18),
+            end_time=datetime(year=2022, month=12, day=23),
+        )
+        bin_edges = {"f3": [1.0, 2.0, 3.0]}
+        daily = NumericNestedCountDateHistogram(
+            collection=database[MONGO_COLLECTION_EVENT_ROWS],
+            dataset_id=UUID(DATASET_EVENT_ID_V2),
+        ).aggregation_result(
+            time_range=time_range, numeric_columns=["f3"], bin_edges=bin_edges
+        )
+        total = NumericCountHistogram(
+            collection=database[MONGO_COLLECTION_EVENT_ROWS],
+            dataset_id=UUID(DATASET_EVENT_ID_V2),
+        ).aggregation_result(
+            time_range=time_range, numeric_columns=["f3"], bin_edges=bin_edges
+        )
+
+        summed = [0, 0, 0, 0]
+        for day_hist in daily.values():
+            if "f3" not in day_hist:
+                continue
+            assert day_hist["f3"]["bins"] == total["f3"]["bins"]
+            summed = [a + b for a, b in zip(summed, day_hist["f3"]["count"])]
+        assert summed == total["f3"]["count"]
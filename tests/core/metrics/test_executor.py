@@ -0,0 +1,447 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import threading
+import uuid
+from datetime import datetime, timedelta
+from functools import partial
+from uuid import UUID
+
+import pytest
+
+from tests.testing_helpers import MODEL_ID, MODEL_VERSION_ID_V2, MongodbBackendTesting
+from waterdip.core.commons.models import TimeRange
+from waterdip.core.metrics.data_metrics import (
+    CountEmptyDateHistogram,
+    CountEmptyHistogram,
+    NumericBasicMetrics,
+    NumericCountHistogram,
+    NumericNestedCountDateHistogram,
+)
+from waterdip.core.metrics.executor import (
+    MAX_RESULT_BYTES,
+    ColumnGroupExecutor,
+    PartitionCache,
+    TimePartitionExecutor,
+    combine_basic_metrics,
+    combine_count_histograms,
+    combine_date_results,
+    combine_empty_counts,
+    combine_empty_date_histograms,
+    strip_basic_metrics_moments,
+)
+from waterdip.core.metrics.sampling import RowSample
+from waterdip.server.db.models.dataset_rows import BaseEventRowDB, EventDataColumnDB
+from waterdip.server.db.mongodb import MONGO_COLLECTION_EVENT_ROWS
+
+WIDE_DATASET_ID = "7a4c0c8e-6a3e-4f43-9d0e-2d3b6f1c0a44"
+WIDE_COLUMNS = [f"f{i}" for i in range(12)]
+
+database = MongodbBackendTesting.get_instance().database
+collection = database[MONGO_COLLECTION_EVENT_ROWS]
+time_range = TimeRange(
+    start_time=datetime(year=2023, month=3, day=1),
+    end_time=datetime(year=2023, month=3, day=3),
+)
+
+
+def setup_module():
+    rows = [
+        BaseEventRowDB(
+            row_id=uuid.uuid4(),
+            dataset_id=UUID(WIDE_DATASET_ID),
+            model_id=UUID(MODEL_ID),
+            model_version_id=UUID(MODEL_VERSION_ID_V2),
+            created_at=datetime(year=2023, month=3, day=1 + i % 3),
+            columns=[
+                EventDataColumnDB(
+                    name=name,
+                    value_numeric=None if (i + j) % 5 == 0 else i * j,
+                    data_type="NUMERIC",
+                    mapping_type="FEATURE",
+                )
+                for j, name in enumerate(WIDE_COLUMNS)
+            ],
+        )
+        for i in range(10)
+    ]
+    collection.insert_many([row.dict() for row in rows])
+
+
+def teardown_module():
+    collection.delete_many({"dataset_id": WIDE_DATASET_ID})
+
+
+class TestColumnGroupExecutor:
+    def test_should_split_columns_into_at_least_one_group_per_worker(self):
+        groups = ColumnGroupExecutor(workers=4).column_groups(WIDE_COLUMNS)
+
+        assert groups == [WIDE_COLUMNS[i : i + 3] for i in range(0, 12, 3)]
+        assert ColumnGroupExecutor(workers=4).column_groups(["a"]) == [["a"]]
+        assert ColumnGroupExecutor().column_groups([]) == []
+
+    def test_should_bound_groups_by_result_size_and_max_columns(self):
+        columns = [f"c{i}" for i in range(1000)]
+        executor = ColumnGroupExecutor(workers=1)
+
+        by_size = executor.column_groups(
+            columns, bytes_per_column=MAX_RESULT_BYTES // 100
+        )
+        assert len(by_size) == 10
+        assert max(len(group) for group in by_size) == 100
+        executor.max_group_columns = 300
+        assert [len(group) for group in executor.column_groups(columns)] == [
+            250,
+            250,
+            250,
+            250,
+        ]
+
+    def test_should_estimate_result_size_from_aggregation_kwargs(self):
+        one_day = NumericBasicMetrics.result_bytes_per_column(
+            time_range=TimeRange(
+                start_time=datetime(2023, 3, 1), end_time=datetime(2023, 3, 1, 23)
+            ),
+            percentiles=[0.5],
+        )
+        ninety_days = NumericBasicMetrics.result_bytes_per_column(
+            time_range=TimeRange(
+                start_time=datetime(2023, 1, 1), end_time=datetime(2023, 3, 31)
+            ),
+            percentiles=[0.5],
+        )
+        coarse = NumericBasicMetrics.result_bytes_per_column(
+            percentiles=[0.5], relative_accuracy=0.05
+        )
+
+        base = NumericBasicMetrics.result_bytes_per_column()
+        assert base < coarse < one_day
+        assert ninety_days - base == 90 * (one_day - base)
+        assert NumericCountHistogram.result_bytes_per_column(
+            bin_edges={"a": list(range(100))}
+        ) > NumericCountHistogram.result_bytes_per_column(bin_edges={"a": [1.0]})
+        assert (
+            NumericCountHistogram.result_bytes_per_column(bin_edges={"a": [1.0]})
+            == NumericCountHistogram.facet_bytes_per_column
+        )
+
+        executor = ColumnGroupExecutor(workers=1)
+        columns = [f"c{i}" for i in range(1000)]
+        assert len(executor.column_groups(columns, bytes_per_column=ninety_days)) > len(
+            executor.column_groups(columns, bytes_per_column=one_day)
+        )
+
+    def test_should_merge_results_of_parallel_groups(self):
+        threads = set()
+
+        def group_metric(group):
+            threads.add(threading.current_thread().name)
+            return {column: len(group) for column in group}
+
+        result = ColumnGroupExecutor(workers=3).run(group_metric, WIDE_COLUMNS)
+
+        assert list(result.keys()) == WIDE_COLUMNS
+        assert all(
+            threads_name.startswith("wd-column-group") for threads_name in threads
+        )
+
+    def test_should_fail_run_when_a_group_fails(self):
+        def group_metric(group):
+            if "f7" in group:
+                raise TimeoutError("group timed out")
+            return {}
+
+        with pytest.raises(TimeoutError):
+            ColumnGroupExecutor(workers=4).run(group_metric, WIDE_COLUMNS)
+
+    def test_should_pass_aggregate_options(self):
+        assert ColumnGroupExecutor().aggregate_options == {"allowDiskUse": True}
+        assert ColumnGroupExecutor(max_time_ms=500).aggregate_options == {
+            "allowDiskUse": True,
+            "maxTimeMS": 500,
+        }
+
+    @pytest.mark.parametrize(
+        "metric_class, aggregation_kwargs, columns_kwarg",
+        [
+            (CountEmptyHistogram, {"time_range": time_range}, None),
+            (
+                NumericBasicMetrics,
+                {"time_range": time_range, "std_dev_disable": "true"},
+                None,
+            ),
+            (
+                NumericCountHistogram,
+                {
+                    "time_range": time_range,
+                    "bin_edges": {c: [1.0, 10.0] for c in WIDE_COLUMNS},
+                },
+                "numeric_columns",
+            ),
+        ],
+    )
+    def test_should_match_single_pipeline_result(
+        self, metric_class, aggregation_kwargs, columns_kwarg
+    ):
+        metric_kwargs = {"collection": collection, "dataset_id": UUID(WIDE_DATASET_ID)}
+        single_kwargs = dict(aggregation_kwargs)
+        if columns_kwarg is not None:
+            single_kwargs[columns_kwarg] = WIDE_COLUMNS
+        single = metric_class(**metric_kwargs).aggregation_result(**single_kwargs)
+
+        grouped = ColumnGroupExecutor(workers=4, max_group_columns=5).run_metric(
+            metric_class,
+            columns=WIDE_COLUMNS,
+            metric_kwargs=metric_kwargs,
+            aggregation_kwargs=aggregation_kwargs,
+            columns_kwarg=columns_kwarg,
+        )
+
+        assert grouped == single
+        assert sorted(grouped.keys()) == sorted(WIDE_COLUMNS)
+
+
+class TestTimePartitionExecutor:
+    def test_should_split_time_range_on_day_boundaries(self):
+        partitions = TimePartitionExecutor(granularity="day").partitions(
+            TimeRange(
+                start_time=datetime(2023, 3, 1, 10),
+                end_time=datetime(2023, 3, 3, 8),
+            )
+        )
+
+        assert [(p.start_time, p.end_time) for p in partitions] == [
+            (
+                datetime(2023, 3, 1, 10),
+                datetime(2023, 3, 2) - timedelta(milliseconds=1),
+            ),
+            (datetime(2023, 3, 2), datetime(2023, 3, 3) - timedelta(milliseconds=1)),
+            (datetime(2023, 3, 3), datetime(2023, 3, 3, 8)),
+        ]
+
+    def test_should_split_time_range_on_mondays(self):
+        # 2023-03-01 is a wednesday
+        partitions = TimePartitionExecutor(granularity="week").partitions(
+            TimeRange(
+                start_time=datetime(2023, 3, 1),
+                end_time=datetime(2023, 3, 20, 12),
+            )
+        )
+
+        assert [p.start_time for p in partitions] == [
+            datetime(2023, 3, 1),
+            datetime(2023, 3, 6),
+            datetime(2023, 3, 13),
+            datetime(2023, 3, 20),
+        ]
+        assert partitions[-1].end_time == datetime(2023, 3, 20, 12)
+
+    def test_should_not_split_short_time_ranges(self):
+        executor = TimePartitionExecutor(min_range_days=28)
+
+        assert executor.partitions(time_range) == [time_range]
+        with pytest.raises(ValueError):
+            TimePartitionExecutor(granularity="month")
+
+    def test_should_skip_cached_partitions(self):
+        calls = []
+
+        def partition_metric(partition):
+            calls.append(partition.start_time)
+            return {partition.start_time.strftime("%d-%m-%Y"): len(calls)}
+
+        executor = TimePartitionExecutor(workers=2, cache={})
+        first = executor.run(
+            partition_metric, time_range, combine=combine_date_results, cache_key="m"
+        )
+        second = executor.run(
+            partition_metric, time_range, combine=combine_date_results, cache_key="m"
+        )
+
+        assert len(calls) == 3
+        assert first == second
+        assert list(first.keys()) == ["01-03-2023", "02-03-2023", "03-03-2023"]
+
+    def test_should_not_cache_open_partitions(self):
+        calls = []
+        now = datetime.utcnow()
+        executor = TimePartitionExecutor(cache={})
+        open_range = TimeRange(
+            start_time=now - timedelta(hours=1), end_time=now + timedelta(hours=1)
+        )
+        for _ in range(2):
+            executor.run(
+                lambda partition: calls.append(partition) or {},
+                open_range,
+                combine=combine_date_results,
+                cache_key="m",
+            )
+
+        assert [p.end_time for p in calls].count(open_range.end_time) == 2
+        assert all(
+            not key.endswith(open_range.end_time.isoformat()) for key in executor.cache
+        )
+
+    def test_should_evict_and_expire_partition_results(self):
+        cache = PartitionCache(max_entries=2)
+        cache["a"] = {"count": [1]}
+        cache["b"] = {"count": [2]}
+        cache["a"]["count"].append(3)
+        cache["c"] = {"count": [4]}
+
+        assert sorted(cache) == ["a", "c"]
+        assert cache["a"] == {"count": [1]}
+
+        expired = PartitionCache(ttl=0)
+        expired["a"] = {"count": [1]}
+        assert expired.get("a") is None
+        assert len(expired) == 0
+
+    def test_should_key_partition_results_by_metric_kwargs(self):
+        metric = CountEmptyHistogram(
+            collection=collection, dataset_id=UUID(WIDE_DATASET_ID), columns=["f1"]
+        )
+        other_columns = CountEmptyHistogram(
+            collection=collection, dataset_id=UUID(WIDE_DATASET_ID), columns=["f2"]
+        )
+        sampled = CountEmptyHistogram(
+            collection=collection,
+            dataset_id=UUID(WIDE_DATASET_ID),
+            sample=RowSample(rate=0.5),
+        )
+
+        assert metric.partition_cache_key() == metric.partition_cache_key()
+        assert metric.partition_cache_key() != other_columns.partition_cache_key()
+        assert metric.partition_cache_key(bins=[1]) != metric.partition_cache_key()
+        assert metric.partition_cache_key().startswith("count_empty_hist:")
+        assert sampled.partition_cache_key() is None
+
+    def test_should_combine_count_histograms(self):
+        combined = combine_count_histograms(
+            {"a": {"bins": [0, 10], "count": [1, 2]}},
+            {
+                "a": {"bins": [10, 20], "count": [3, 4]},
+                "b": {"bins": ["x"], "count": [5]},
+            },
+        )
+
+        assert combined == {
+            "a": {"bins": [0, 10, 20], "count": [1, 5, 4]},
+            "b": {"bins": ["x"], "count": [5]},
+        }
+
+    def test_should_combine_empty_date_histograms(self):
+        combined = combine_empty_date_histograms(
+            {"dates": [1], "columns": {"a": {"empty_count": [1], "total_count": [2]}}},
+            {"dates": [2], "columns": {"b": {"empty_count": [3], "total_count": [4]}}},
+        )
+
+        assert combined == {
+            "dates": [1, 2],
+            "columns": {
+                "a": {"empty_count": [1, 0], "total_count": [2, 0]},
+                "b": {"empty_count": [0, 3], "total_count": [0, 4]},
+            },
+        }
+
+    def test_should_match_single_pipeline_date_histograms(self):
+        edges = {column: [0.0, 20.0, 40.0, 100.0] for column in WIDE_COLUMNS}
+        metric = NumericNestedCountDateHistogram(
+            collection=collection, dataset_id=UUID(WIDE_DATASET_ID)
+        )
+        executor = TimePartitionExecutor(workers=3)
+
+        partitioned = executor.run_metric(
+            metric,
+            time_range,
+            combine=combine_date_results,
+            numeric_columns=WIDE_COLUMNS,
+            bin_edges=edges,
+        )
+
+        assert partitioned == metric.aggregation_result(
+            numeric_columns=WIDE_COLUMNS, time_range=time_range, bin_edges=edges
+        )
+        assert sorted(partitioned.keys()) == ["01-03-2023", "02-03-2023", "03-03-2023"]
+
+        empty_metric = CountEmptyDateHistogram(
+            collection=collection, dataset_id=UUID(WIDE_DATASET_ID)
+        )
+        assert executor.run_metric(
+            empty_metric, time_range, combine=combine_empty_date_histograms
+        ) == empty_metric.aggregation_result(time_range=time_range)
+
+        empty_counts = CountEmptyHistogram(
+            collection=collection, dataset_id=UUID(WIDE_DATASET_ID)
+        )
+        assert executor.run_metric(
+            empty_counts, time_range, combine=combine_empty_counts
+        ) == empty_counts.aggregation_result(time_range=time_range)
+
+    def test_should_match_single_pipeline_counts_and_moments(self):
+        executor = TimePartitionExecutor(workers=3)
+        edges = {column: [1.0, 10.0] for column in WIDE_COLUMNS}
+        hist = NumericCountHistogram(
+            collection=collection, dataset_id=UUID(WIDE_DATASET_ID)
+        )
+        assert executor.run_metric(
+            hist,
+            time_range,
+            combine=combine_count_histograms,
+            numeric_columns=WIDE_COLUMNS,
+            bin_edges=edges,
+        ) == hist.aggregation_result(
+            numeric_columns=WIDE_COLUMNS, time_range=time_range, bin_edges=edges
+        )
+
+        basic = NumericBasicMetrics(
+            collection=collection, dataset_id=UUID(WIDE_DATASET_ID)
+        )
+        partitioned = executor.run_metric(
+            basic,
+            time_range,
+            combine=combine_basic_metrics,
+            std_dev_disable="true",
+            moments=True,
+        )
+        single = basic.aggregation_result(time_range=time_range, std_dev_disable="true")
+
+        assert sorted(partitioned.keys()) == sorted(single.keys())
+        for column, metrics in single.items():
+            for stat in ("avg", "total", "min", "max"):
+                assert partitioned[column][stat] == metrics[stat]
+
+    def test_should_combine_percentiles_from_partition_sketches(self):
+        percentiles = [0.5, 0.9]
+        basic = NumericBasicMetrics(
+            collection=collection, dataset_id=UUID(WIDE_DATASET_ID)
+        )
+        partitioned = TimePartitionExecutor(workers=3).run_metric(
+            basic,
+            time_range,
+            combine=partial(combine_basic_metrics, percentiles=percentiles),
+            std_dev_disable="true",
+            percentiles=percentiles,
+            moments=True,
+        )
+        single = basic.aggregation_result(
+            time_range=time_range, std_dev_disable="true", percentiles=percentiles
+        )
+
+        stripped = strip_basic_metrics_moments(partitioned)
+        for column, metrics in single.items():
+            assert stripped[column]["percentiles"] == metrics["percentiles"]
+            assert "moments" not in stripped[column]
+            assert "quantile_sketch" not in stripped[column]
+            assert "std_dev" not in stripped[column]
@@ -16,14 +16,24 @@ import uuid
 from datetime import datetime
 from uuid import UUID
 
+import pytest
+
 from tests.testing_helper_metrics_data import (
     METRICS_MODEL_VERSION_V1_SCHEMA,
     metrics_batch_data_rows,
     metrics_event_rows,
 )
 from tests.testing_helpers import MongodbBackendTesting, clean_model_data
-from waterdip.core.commons.models import DatasetType, Environment, TimeRange
+from waterdip.core.commons.models import (
+    DatasetType,
+    Environment,
+    TimeGranularity,
+    TimeRange,
+)
+from waterdip.core.metrics.base import TimeBuckets
 from waterdip.core.metrics.drift_psi import PSIMetrics
+from waterdip.core.metrics.executor import TimePartitionExecutor
+from waterdip.core.metrics.sampling import RowSample
 from waterdip.server.db.models.dataset_rows import (
     BaseDatasetBatchRowDB,
     BaseEventRowDB,
@@ -172,3 +182,183 @@ class TestDriftPSIMetrics:
         )
 
         assert len(psi_result) == 5
+
+    def test_psi_metrics_with_top_k_categories(self):
+        psi = PSIMetrics(
+            collection=event_collection,
+            dataset_id=UUID(DATASET_EVENT_ID_V1),
+            baseline_dataset_id=UUID(DATASET_BATCH_ID_V3_1),
+            baseline_collection=batch_collection,
+            top_k=2,
+        )
+        baseline = psi.baseline_distribution(numeric_columns=[])["categorical"]
+        for column in categorical_columns:
+            assert len(baseline[column]["bins"]) <= 3
+            assert baseline[column]["bins"][-1] == "__other__"
+
+        psi_result = psi.aggregation_result(
+            numeric_columns=[],
+            categorical_columns=categorical_columns,
+            time_range=TimeRange(
+                start_time=datetime(year=2022, month=12, day=18),
+                end_time=datetime(year=2022, month=12, day=22),
+            ),
+        )
+        psi_values = [
+            value for date_psi in psi_result.values() for value in date_psi.values()
+        ]
+        assert len(psi_values) > 0
+        assert all(value >= 0 for value in psi_values)
+
+    def test_psi_metrics_with_time_partitions(self):
+        time_range = TimeRange(
+            start_time=datetime(year=2022, month=12, day=18),
+            end_time=datetime(year=2022, month=12, day=22),
+        )
+        results = []
+        for time_partitions in [None, TimePartitionExecutor(workers=3)]:
+            psi = PSIMetrics(
+                collection=event_collection,
+                dataset_id=UUID(DATASET_EVENT_ID_V1),
+                baseline_dataset_id=UUID(DATASET_BATCH_ID_V3_1),
+                baseline_collection=batch_collection,
+                time_partitions=time_partitions,
+            )
+            results.append(
+                (
+                    psi.aggregation_result(
+                        numeric_columns=[],
+                        categorical_columns=categorical_columns,
+                        time_range=time_range,
+                    ),
+                    psi.feature_psi(
+                        numeric_columns=[],
+                        categorical_columns=categorical_columns,
+                        time_range=time_range,
+                    ),
+                )
+            )
+
+        assert results[1] == results[0]
+
+    def test_psi_metrics_by_time_buckets(self):
+        time_range = TimeRange(
+            start_time=datetime(year=2022, month=12, day=18),
+            end_time=datetime(year=2022, month=12, day=22),
+        )
+        results = {}
+        for time_buckets in [None, TimeBuckets(), TimeBuckets(TimeGranularity.HOUR)]:
+            psi = PSIMetrics(
+                collection=event_collection,
+                dataset_id=UUID(DATASET_EVENT_ID_V1),
+                baseline_dataset_id=UUID(DATASET_BATCH_ID_V3_1),
+                baseline_collection=batch_collection,
+                time_buckets=time_buckets,
+                time_partitions=TimePartitionExecutor(workers=2),
+            )
+            results[time_buckets] = psi.aggregation_result(
+                numeric_columns=[],
+                categorical_columns=categorical_columns,
+                time_range=time_range,
+            )
+        dates, days, hours = results.values()
+
+        assert list(days.values()) == list(dates.values())
+        assert [
+            TimeBuckets.start_time(bucket).strftime("%d-%m-%Y") for bucket in days
+        ] == list(dates.keys())
+        assert len(hours) == 4 * 24 + 1
+        assert {
+            TimeBuckets.start_time(bucket).strftime("%d-%m-%Y")
+            for bucket, hour_psi in hours.items()
+            if hour_psi
+        } == {date_str for date_str, date_psi in dates.items() if date_psi}
+
+    def test_psi_metrics_on_row_sample(self):
+        psi = PSIMetrics(
+            collection=event_collection,
+            dataset_id=UUID(DATASET_EVENT_ID_V1),
+            baseline_dataset_id=UUID(DATASET_BATCH_ID_V3_1),
+            baseline_collection=batch_collection,
+            sample=RowSample(rate=1),
+        )
+        psi_result = psi.aggregation_result(
+            numeric_columns=[],
+            categorical_columns=categorical_columns,
+            time_range=TimeRange(
+                start_time=datetime(year=2022, month=12, day=18),
+                end_time=datetime(year=2022, month=12, day=22),
+            ),
+        )
+
+        for date_str, date_psi in psi_result.items():
+            assert set(psi.psi_intervals.get(date_str, {}).keys()) == set(
+                date_psi.keys()
+            )
+        assert any(psi.psi_intervals.values())
+
+    def test_psi_should_be_zero_for_identical_auto_binned_distributions(self, mocker):
+        dataset_id = uuid.uuid4()
+        values = list(range(200))
+        event_collection.insert_many(
+            [
+                BaseEventRowDB(
+                    model_id=UUID(PSI_TEST_MODEL_ID),
+                    model_version_id=UUID(PSI_TEST_MODEL_VERSION_ID),
+                    row_id=uuid.uuid4(),
+                    dataset_id=dataset_id,
+                    columns=[
+                        EventDataColumnDB(
+                            name="length",
+                            value_numeric=value,
+                            data_type="NUMERIC",
+                            mapping_type="FEATURE",
+                        )
+                    ],
+                    created_at=datetime(year=2022, month=12, day=18, hour=1),
+                ).dict()
+                for value in values
+            ]
+        )
+        psi = PSIMetrics(
+            collection=event_collection,
+            dataset_id=dataset_id,
+            baseline_dataset_id=UUID(DATASET_BATCH_ID_V3_1),
+            baseline_collection=batch_collection,
+        )
+        # MongoMock does not support $bucketAuto, the baseline is the same
+        # values in 10 buckets of 20, the last one up to the maximum
+        mocker.patch.object(
+            psi._numeric_count_histogram_baseline,
+            "_aggregate",
+            return_value=mocker.Mock(
+                next=mocker.Mock(
+                    return_value={
+                        "length": [
+                            {
+                                "_id": {"min": low, "max": min(low + 20, values[-1])},
+                                "count": 20,
+                            }
+                            for low in range(0, 200, 20)
+                        ]
+                    }
+                )
+            ),
+        )
+        time_range = TimeRange(
+            start_time=datetime(year=2022, month=12, day=18),
+            end_time=datetime(year=2022, month=12, day=18, hour=23),
+        )
+
+        feature_psi = psi.feature_psi(
+            numeric_columns=["length"], categorical_columns=[], time_range=time_range
+        )
+        assert feature_psi["length"] == pytest.approx(0.0, abs=1e-9)
+        assert psi.rows_scanned == len(values)
+
+        psi_result = psi.aggregation_result(
+            numeric_columns=["length"], categorical_columns=[], time_range=time_range
+        )
+        assert psi_result["18-12-2022"]["length"] == pytest.approx(0.0, abs=1e-9)
+
+        event_collection.delete_many({"dataset_id": str(dataset_id)})
@@ -0,0 +1,220 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import uuid
+from datetime import datetime, timedelta
+
+import mongomock
+import pytest
+from bson.binary import Binary
+
+from waterdip.core.commons.models import TimeRange
+from waterdip.core.metrics.classification_metrics import (
+    ClassificationDateHistogramDBMetrics,
+)
+from waterdip.core.metrics.data_metrics import (
+    CardinalityCategorical,
+    CategoricalCountHistogram,
+    CountEmptyHistogram,
+    NumericCountHistogram,
+)
+from waterdip.core.metrics.rows import RowReader, compact_row, uuid_str
+from waterdip.core.metrics.sampling import RowSample
+
+COLUMN_DICTIONARY = [("f1", "FEATURE"), ("f2", "FEATURE"), ("p1", "PREDICTION")]
+DATASET_ID = uuid.UUID("5d0c4e5e-8f0a-4bb1-9a0e-4c7a3f0f6b1e")
+START_TIME = datetime(year=2023, month=1, day=1)
+TIME_RANGE = TimeRange(start_time=START_TIME, end_time=START_TIME + timedelta(days=3))
+
+
+def _event_rows(count: int = 30):
+    rows = []
+    for index in range(count):
+        prediction = "yes" if index % 2 else "no"
+        actual = "yes" if index % 3 else "no"
+        rows.append(
+            {
+                "row_id": str(uuid.UUID(int=index * (2**128 // count))),
+                "dataset_id": str(DATASET_ID),
+                "model_id": str(uuid.uuid4()),
+                "model_version_id": str(uuid.uuid4()),
+                "event_id": None,
+                "created_at": START_TIME + timedelta(hours=2 * index),
+                "prediction_cf": [prediction],
+                "actual_cf": [actual],
+                "is_match": prediction == actual,
+                "columns": [
+                    {
+                        "name": "f1",
+                        "value_numeric": None if index % 5 == 0 else float(index),
+                        "data_type": "NUMERIC",
+                        "mapping_type": "FEATURE",
+                    },
+                    {
+                        "name": "f2",
+                        "value_categorical": None
+                        if index % 7 == 0
+                        else ["red", "green", "blue"][index % 3],
+                        "data_type": "CATEGORICAL",
+                        "mapping_type": "FEATURE",
+                    },
+                    {
+                        "name": "p1",
+                        "value_categorical": prediction,
+                        "data_type": "CATEGORICAL",
+                        "mapping_type": "PREDICTION",
+                    },
+                ],
+            }
+        )
+    return rows
+
+
+@pytest.fixture(scope="module")
+def collections():
+    """The same rows in the v1 layout, the compact layout and half in each"""
+    database = mongomock.MongoClient().db
+    rows = _event_rows()
+    database["v1"].insert_many([dict(row) for row in rows])
+    database["v2"].insert_many(
+        [compact_row(row, column_dictionary=COLUMN_DICTIONARY) for row in rows]
+    )
+    database["mixed"].insert_many(
+        [
+            compact_row(row, column_dictionary=COLUMN_DICTIONARY)
+            if index % 2
+            else dict(row)
+            for index, row in enumerate(rows)
+        ]
+    )
+    return database
+
+
+def _results(collections, result):
+    v1 = result(collections["v1"], RowReader())
+    reader = RowReader(compact=True, column_dictionary=COLUMN_DICTIONARY)
+    return v1, result(collections["v2"], reader), result(collections["mixed"], reader)
+
+
+class TestCompactRow:
+    def test_should_encode_columns_by_dictionary_id(self):
+        row = _event_rows(count=2)[1]
+        compact = compact_row(row, column_dictionary=COLUMN_DICTIONARY)
+
+        assert compact["v"] == 2
+        assert "columns" not in compact and "event_id" not in compact
+        assert compact["n"] == [[0, 1.0]]
+        assert compact["c"] == [[1, "green"], [2, "yes"]]
+        assert isinstance(compact["dataset_id"], Binary)
+        assert uuid_str(compact["dataset_id"]) == str(DATASET_ID)
+        assert compact["prediction_cf"] == ["yes"]
+
+    def test_should_name_row_and_column_missing_from_dictionary(self):
+        row = _event_rows(count=1)[0]
+
+        with pytest.raises(
+            ValueError, match=r"Column \[f1\] of type \[FEATURE\] of row"
+        ):
+            compact_row(row, column_dictionary=COLUMN_DICTIONARY[1:])
+
+
+class TestRowReader:
+    def test_should_match_both_layouts_by_id(self):
+        reader = RowReader(compact=True)
+
+        assert RowReader().id_value(DATASET_ID) == str(DATASET_ID)
+        assert reader.id_value(DATASET_ID)["$in"][0] == str(DATASET_ID)
+        assert uuid_str(reader.id_value(DATASET_ID)["$in"][1]) == str(DATASET_ID)
+
+    def test_should_return_same_categorical_histogram(self, collections):
+        v1, v2, mixed = _results(
+            collections,
+            lambda collection, reader: CategoricalCountHistogram(
+                collection=collection, dataset_id=DATASET_ID, row_reader=reader
+            ).aggregation_result(time_range=TIME_RANGE),
+        )
+
+        assert set(v1) == {"f2", "p1"}
+        assert v1 == v2 == mixed
+
+    def test_should_return_same_numeric_histogram(self, collections):
+        v1, v2, mixed = _results(
+            collections,
+            lambda collection, reader: NumericCountHistogram(
+                collection=collection, dataset_id=DATASET_ID, row_reader=reader
+            ).aggregation_result(
+                numeric_columns=["f1"],
+                time_range=TIME_RANGE,
+                bin_edges={"f1": [0.0, 10.0, 20.0, 30.0]},
+            ),
+        )
+
+        assert sum(v1["f1"]["count"]) == 24
+        assert v1 == v2 == mixed
+
+    def test_should_return_same_empty_counts_of_allowed_columns(self, collections):
+        v1, v2, mixed = _results(
+            collections,
+            lambda collection, reader: CountEmptyHistogram(
+                collection=collection,
+                dataset_id=DATASET_ID,
+                columns=["f1", "f2"],
+                row_reader=reader,
+            ).aggregation_result(time_range=TIME_RANGE),
+        )
+
+        assert set(v1) == {"f1", "f2"}
+        assert v1["f1"]["empty_count"] == 6
+        assert v1 == v2 == mixed
+
+    def test_should_return_same_cardinality(self, collections):
+        v1, v2, mixed = _results(
+            collections,
+            lambda collection, reader: CardinalityCategorical(
+                collection=collection, dataset_id=DATASET_ID, row_reader=reader
+            ).aggregation_result(time_range=TIME_RANGE),
+        )
+
+        assert v1["f2"]["unique_values"] == 3
+        assert v1 == v2 == mixed
+
+    def test_should_sample_same_rows(self, collections):
+        v1, v2, mixed = _results(
+            collections,
+            lambda collection, reader: CountEmptyHistogram(
+                collection=collection,
+                dataset_id=DATASET_ID,
+                sample=RowSample(rate=0.5),
+                row_reader=reader,
+            ).aggregation_result(time_range=TIME_RANGE),
+        )
+
+        assert v1["p1"]["total_count"] == 16
+        assert v1 == v2 == mixed
+
+    def test_should_return_same_confusion_counts(self, collections):
+        v1, v2, mixed = _results(
+            collections,
+            lambda collection, reader: ClassificationDateHistogramDBMetrics(
+                collection=collection,
+                dataset_id=DATASET_ID,
+                positive_class="yes",
+                row_reader=reader,
+            ).confusion_counts(
+                start_time=TIME_RANGE.start_time, end_time=TIME_RANGE.end_time
+            ),
+        )
+
+        assert sum(counts["total"] for counts in v1.values()) == 30
+        assert v1 == v2 == mixed
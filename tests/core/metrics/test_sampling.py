@@ -0,0 +1,120 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+
+import uuid
+from datetime import datetime
+from uuid import UUID
+
+import numpy as np
+import pytest
+
+from tests.testing_helpers import MODEL_ID, MODEL_VERSION_ID_V2, MongodbBackendTesting
+from waterdip.core.metrics.data_metrics import CategoricalCountHistogram
+from waterdip.core.metrics.drift_psi import PSIMetrics
+from waterdip.core.metrics.sampling import RowSample, bootstrap_counts
+from waterdip.server.db.models.dataset_rows import BaseEventRowDB, EventDataColumnDB
+from waterdip.server.db.mongodb import MONGO_COLLECTION_EVENT_ROWS
+
+SAMPLED_DATASET_ID = "5b0e3c9a-41d2-4c4e-8a55-0f6c8f2b9d17"
+
+database = MongodbBackendTesting.get_instance().database
+collection = database[MONGO_COLLECTION_EVENT_ROWS]
+rows = [
+    BaseEventRowDB(
+        row_id=uuid.uuid4(),
+        dataset_id=UUID(SAMPLED_DATASET_ID),
+        model_id=UUID(MODEL_ID),
+        model_version_id=UUID(MODEL_VERSION_ID_V2),
+        created_at=datetime(year=2023, month=3, day=1),
+        columns=[
+            EventDataColumnDB(
+                name="color",
+                value_categorical=["red", "green", "blue"][i % 3],
+                data_type="CATEGORICAL",
+                mapping_type="FEATURE",
+            )
+        ],
+    ).dict()
+    for i in range(300)
+]
+
+
+def setup_module():
+    collection.insert_many([dict(row) for row in rows])
+
+
+def teardown_module():
+    collection.delete_many({"dataset_id": SAMPLED_DATASET_ID})
+
+
+class TestRowSample:
+    def test_should_filter_rows_by_row_id_prefix(self):
+        assert RowSample(rate=1).row_filter == {}
+        assert RowSample(rate=0.5).row_filter == {"row_id": {"$lt": "80000000"}}
+        assert RowSample(rate=0.25).rate == 0.25
+        for rate in [0, 1.5]:
+            with pytest.raises(ValueError):
+                RowSample(rate=rate)
+
+    def test_should_scale_counts_with_errors(self):
+        sample = RowSample(rate=0.1)
+
+        assert sample.scale_count(120) == 1200
+        assert sample.scale_count(None) is None
+        assert round(sample.count_error(120), 1) == round(
+            1.96 * (120 * 0.9) ** 0.5 / 0.1, 1
+        )
+        assert RowSample(rate=1).count_error(120) == 0
+        assert sample.scale_histogram({"bins": ["a"], "count": [10]}) == {
+            "bins": ["a"],
+            "count": [100],
+            "error": [sample.count_error(10)],
+        }
+        assert round(sample.mean_error(std_dev=2.0, count=100), 2) == 0.39
+        assert sample.mean_error(std_dev=None, count=100) is None
+
+    def test_should_aggregate_the_sampled_rows(self):
+        sample = RowSample(rate=0.5)
+        sampled = CategoricalCountHistogram(
+            collection=collection, dataset_id=UUID(SAMPLED_DATASET_ID), sample=sample
+        ).aggregation_result()
+
+        expected = {}
+        for row in rows:
+            if row["row_id"] < "80000000":
+                value = row["columns"][0]["value_categorical"]
+                expected[value] = expected.get(value, 0) + 1
+        assert dict(zip(sampled["color"]["bins"], sampled["color"]["count"])) == (
+            expected
+        )
+
+    def test_should_bootstrap_deterministically(self):
+        resamples = bootstrap_counts([10, 20, 70], iterations=50)
+
+        assert resamples.shape == (50, 3)
+        assert np.all(resamples.sum(axis=1) == 100)
+        assert np.array_equal(resamples, bootstrap_counts([10, 20, 70], iterations=50))
+        assert not bootstrap_counts([0, 0], iterations=5).any()
+
+    def test_should_bracket_psi_with_interval(self):
+        baseline = {"bins": ["a", "b", "c"], "count": [30, 30, 40]}
+        production = {"bins": ["a", "b", "c"], "count": [50, 20, 30]}
+        psi = PSIMetrics.psi_from_histograms(baseline, production)
+
+        low, high = PSIMetrics.psi_interval(
+            baseline, production, sample=RowSample(rate=0.1)
+        )
+        assert low <= psi <= high
+        assert low < high
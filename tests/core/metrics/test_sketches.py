@@ -0,0 +1,298 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import bson
+import numpy as np
+import pytest
+
+from waterdip.core.metrics.sketches import (
+    CategoricalCounter,
+    FixedEdgeHistogram,
+    HyperLogLog,
+    MomentsAccumulator,
+    QuantileSketch,
+    Sketch,
+    TopK,
+    merge_daily_sketches,
+    percentile_name,
+)
+
+
+class TestFixedEdgeHistogram:
+    def test_should_count_values_with_outlier_bins(self):
+        hist = FixedEdgeHistogram(edges=[1.0, 2.0, 3.0]).add(
+            [0, 1, 1.5, 2, 3, 30, None]
+        )
+
+        assert hist.to_dict() == {
+            "bins": ["underflow", 1.0, 2.0, "overflow"],
+            "count": [1, 2, 1, 2],
+        }
+        assert hist.total == 6
+
+    def test_should_parse_bucket_docs(self):
+        docs = [
+            {"_id": -1.7976931348623157e308, "count": 1},
+            {"_id": 2.0, "count": 4},
+            {"_id": 3.0, "count": 2},
+        ]
+        hist = FixedEdgeHistogram.from_bucket_docs([1.0, 2.0, 3.0], docs)
+
+        assert hist.counts.tolist() == [1, 0, 4, 2]
+
+    def test_should_merge_histograms_on_same_edges(self):
+        first = FixedEdgeHistogram([1.0, 2.0]).add([0, 1.5])
+        second = FixedEdgeHistogram([1.0, 2.0]).add([1.2, 5])
+
+        assert (first + second).counts.tolist() == [1, 2, 1]
+        with pytest.raises(ValueError):
+            first.merge(FixedEdgeHistogram([1.0, 3.0]))
+        with pytest.raises(TypeError):
+            first.merge(CategoricalCounter())
+
+    def test_should_rebin_onto_subset_of_edges(self):
+        hist = FixedEdgeHistogram([1.0, 2.0, 3.0, 4.0]).add([0, 1, 2, 2.5, 3, 4, 5])
+        rebinned = hist.rebin([2.0, 4.0])
+
+        assert rebinned.counts.tolist() == [2, 3, 2]
+        assert rebinned.total == hist.total
+        with pytest.raises(ValueError):
+            hist.rebin([2.5])
+
+    def test_should_round_trip_bytes_and_bson(self):
+        hist = FixedEdgeHistogram([0.5, 1.5]).add([0, 1, 2, 2])
+        restored = FixedEdgeHistogram.from_bytes(hist.to_bytes())
+        document = bson.decode(bson.encode({"hist": hist.to_bson()}))["hist"]
+
+        assert np.array_equal(restored.edges, hist.edges)
+        assert restored.counts.tolist() == hist.counts.tolist()
+        assert Sketch.from_bson(document).counts.tolist() == [1, 1, 2]
+
+    def test_should_convert_to_histogram_model(self):
+        histogram = FixedEdgeHistogram([1.0, 2.0]).add([1.5]).to_histogram()
+
+        assert histogram.bins == ["underflow", "1.0", "overflow"]
+        assert histogram.val == [0, 1, 0]
+
+
+class TestCategoricalCounter:
+    def test_should_dictionary_encode_categories(self):
+        counter = CategoricalCounter().add(["red", "blue", "red", None])
+
+        assert counter.categories == ["red", "blue"]
+        assert counter.counts.tolist() == [2, 1]
+        assert counter.code("green") == 2
+        assert counter.count("green") == 0
+
+    def test_should_merge_counters_with_different_categories(self):
+        first = CategoricalCounter(["red", "blue"], [2, 1])
+        second = CategoricalCounter(["blue", "green"], [3, 4])
+        merged = first.merge(second)
+
+        assert merged.to_dict() == {
+            "bins": ["red", "blue", "green"],
+            "count": [2, 4, 4],
+        }
+        assert first.counts.tolist() == [2, 1]
+        assert merged.top(2) == ["blue", "green"]
+
+    def test_should_rebin_into_other_bin(self):
+        counter = CategoricalCounter(["a", "b", "c"], [5, 3, 1])
+
+        assert counter.rebin(["a", "z"], other="__other__").to_dict() == {
+            "bins": ["a", "z", "__other__"],
+            "count": [5, 0, 4],
+        }
+        assert counter.rebin(["b"]).total == 3
+
+    def test_should_round_trip_bytes_and_bson(self):
+        counter = CategoricalCounter(["réd", "", "blue"], [1, 2, 3])
+        restored = Sketch.from_bson(counter.to_bson())
+
+        assert restored.categories == ["réd", "", "blue"]
+        assert restored.counts.tolist() == [1, 2, 3]
+        assert CategoricalCounter.from_bytes(counter.to_bytes()).total == 6
+
+    def test_should_convert_from_and_to_histogram_dict(self):
+        counter = CategoricalCounter.from_dict({"bins": ["x", "y"], "count": [1, 2]})
+
+        assert counter.to_histogram().bins == ["x", "y"]
+        assert counter.to_histogram().val == [1, 2]
+
+
+class TestMomentsAccumulator:
+    def test_should_merge_to_moments_of_union(self):
+        values = [0, 1.5, 2, 7, 0, -3, 10]
+        first = MomentsAccumulator().add(values[:3])
+        second = MomentsAccumulator().add(values[3:])
+        merged = first + second
+
+        assert merged.count == len(values)
+        assert merged.mean == pytest.approx(np.mean(values))
+        assert merged.variance == pytest.approx(np.var(values))
+        assert (merged.min, merged.max, merged.zeros) == (-3, 10, 2)
+
+    def test_should_merge_with_empty_accumulator(self):
+        moments = MomentsAccumulator().add([1, 2, 3])
+
+        assert (MomentsAccumulator() + moments).mean == 2
+        assert MomentsAccumulator().to_basic_metrics() == {}
+        assert MomentsAccumulator().std_dev is None
+
+    def test_should_round_trip_bytes(self):
+        moments = MomentsAccumulator().add([1, 2, 4])
+        restored = MomentsAccumulator.from_bytes(moments.to_bytes())
+
+        assert restored.to_basic_metrics() == moments.to_basic_metrics()
+        assert len(moments.to_bytes()) == 48
+
+    def test_should_convert_to_basic_metrics(self):
+        basic_metrics = MomentsAccumulator().add([0, 2, 4]).to_basic_metrics()
+
+        assert basic_metrics == {
+            "avg": 2.0,
+            "total": 3,
+            "min": 0.0,
+            "max": 4.0,
+            "zeros": 1,
+            "std_dev": 1.63,
+            "variance": 3,
+        }
+
+
+class TestQuantileSketch:
+    VALUES = (
+        np.random.default_rng(7).lognormal(3, 1, 5000).tolist()
+        + (-np.random.default_rng(8).lognormal(1, 1, 1000)).tolist()
+        + [0] * 50
+    )
+
+    def test_should_estimate_quantiles_within_relative_accuracy(self):
+        sketch = QuantileSketch(relative_accuracy=0.01).add(self.VALUES + [None])
+
+        assert sketch.count == len(self.VALUES)
+        for q in [0.01, 0.1, 0.17, 0.5, 0.9, 0.99]:
+            exact = np.quantile(self.VALUES, q, method="lower")
+            assert sketch.quantile(q) == pytest.approx(exact, rel=0.01, abs=1e-9)
+
+    def test_should_merge_to_sketch_of_union(self):
+        first = QuantileSketch().add(self.VALUES[:2000])
+        second = QuantileSketch().add(self.VALUES[2000:])
+        union = QuantileSketch().add(self.VALUES)
+        merged = first + second
+
+        assert merged.positive == union.positive
+        assert merged.negative == union.negative
+        assert merged.zero_count == union.zero_count
+        with pytest.raises(ValueError):
+            first.merge(QuantileSketch(relative_accuracy=0.02))
+
+    def test_should_bound_buckets_keeping_upper_quantiles(self):
+        sketch = QuantileSketch(max_buckets=64).add(self.VALUES)
+        exact = np.quantile(self.VALUES, 0.99, method="lower")
+
+        assert len(sketch.positive) + len(sketch.negative) == 64
+        assert sketch.quantile(0.99) == pytest.approx(exact, rel=0.01)
+
+    def test_should_round_trip_bytes_and_bson(self):
+        sketch = QuantileSketch(relative_accuracy=0.02).add(self.VALUES)
+        restored = Sketch.from_bson(sketch.to_bson())
+
+        assert restored.relative_accuracy == 0.02
+        assert restored.positive == sketch.positive
+        assert restored.negative == sketch.negative
+        assert restored.quantile(0.5) == sketch.quantile(0.5)
+
+    def test_should_return_none_for_empty_sketch(self):
+        assert QuantileSketch().quantile(0.5) is None
+        with pytest.raises(ValueError):
+            QuantileSketch().quantile(1.5)
+
+    def test_should_merge_daily_sketches_per_column(self):
+        daily = {
+            "20-12-2022": {"f1": QuantileSketch().add([1, 2])},
+            "21-12-2022": {"f1": QuantileSketch().add([3]), "f2": QuantileSketch()},
+        }
+        merged = merge_daily_sketches(daily)
+
+        assert merged["f1"].count == 3
+        assert merged["f2"].count == 0
+
+    def test_should_name_percentiles(self):
+        assert [percentile_name(q) for q in [0.5, 0.99, 0.999]] == [
+            "p50",
+            "p99",
+            "p99.9",
+        ]
+
+
+class TestHyperLogLog:
+    def test_should_estimate_cardinality_within_error(self):
+        for n in [1, 100, 50000]:
+            hll = HyperLogLog().add(f"user-{i}" for i in range(n))
+            assert hll.cardinality() == pytest.approx(n, rel=0.03)
+
+    def test_should_ignore_duplicates_and_empty_values(self):
+        hll = HyperLogLog().add(["a", "b", "a", None, "b"])
+
+        assert hll.cardinality() == 2
+
+    def test_should_merge_to_sketch_of_union(self):
+        first = HyperLogLog().add(str(i) for i in range(0, 20000))
+        second = HyperLogLog().add(str(i) for i in range(10000, 30000))
+        union = HyperLogLog().add(str(i) for i in range(0, 30000))
+
+        assert np.array_equal((first + second).registers, union.registers)
+        with pytest.raises(ValueError):
+            first.merge(HyperLogLog(precision=10))
+
+    def test_should_round_trip_bson_with_bounded_size(self):
+        hll = HyperLogLog(precision=12).add(str(i) for i in range(1000))
+        restored = Sketch.from_bson(hll.to_bson())
+
+        assert restored.cardinality() == hll.cardinality()
+        assert len(hll.to_bytes()) == 4097
+
+
+class TestTopK:
+    def test_should_count_exactly_below_capacity(self):
+        top_k = TopK(capacity=3).add("a", 5).add("b").add("a")
+
+        assert top_k.top() == [{"value": "a", "count": 6}, {"value": "b", "count": 1}]
+        assert top_k.errors == {"a": 0, "b": 0}
+
+    def test_should_keep_heavy_hitters_with_bounded_counters(self):
+        top_k = TopK(capacity=10)
+        for i in range(5000):
+            top_k.add("heavy" if i % 3 == 0 else f"id-{i}")
+
+        assert len(top_k.counts) == 10
+        assert top_k.top(1)[0]["value"] == "heavy"
+        heavy = top_k.counts["heavy"]
+        assert heavy - top_k.errors["heavy"] <= 1667 <= heavy
+
+    def test_should_merge_and_truncate_to_capacity(self):
+        first = TopK(capacity=2).add("a", 5).add("b", 1)
+        second = TopK(capacity=2).add("c", 3).add("b", 4)
+        merged = first.merge(second)
+
+        assert merged.top() == [{"value": "a", "count": 5}, {"value": "b", "count": 5}]
+
+    def test_should_round_trip_bytes(self):
+        top_k = TopK(capacity=2).add("é", 2).add("b").add("c")
+        restored = TopK.from_bytes(top_k.to_bytes())
+
+        assert restored.capacity == 2
+        assert restored.counts == top_k.counts
+        assert restored.errors == top_k.errors
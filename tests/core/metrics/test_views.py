@@ -0,0 +1,102 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+
+from datetime import datetime, timedelta
+
+from waterdip.core.commons.models import TimeRange
+from waterdip.core.metrics.views import (
+    MaterializedView,
+    combine_counts,
+    combine_date_histograms,
+)
+
+DAY = datetime(year=2023, month=1, day=2)
+MS = timedelta(milliseconds=1)
+
+
+class TestMaterializedView:
+    def test_should_serve_whole_days_up_to_watermark(self):
+        time_range = TimeRange(
+            start_time=DAY + timedelta(hours=6), end_time=DAY + timedelta(days=5) - MS
+        )
+        window = MaterializedView.window(
+            time_range, view_start=DAY, watermark=DAY + timedelta(days=3, hours=4)
+        )
+        view = MaterializedView(*window, days={})
+
+        assert window == (DAY + timedelta(days=1), DAY + timedelta(days=3, hours=4))
+        assert view.uncovered(time_range) == [
+            TimeRange(
+                start_time=time_range.start_time, end_time=DAY + timedelta(days=1) - MS
+            ),
+            TimeRange(
+                start_time=DAY + timedelta(days=3, hours=4),
+                end_time=time_range.end_time,
+            ),
+        ]
+
+    def test_should_serve_whole_days_before_range_end(self):
+        time_range = TimeRange(
+            start_time=DAY, end_time=DAY + timedelta(days=1, hours=12)
+        )
+        window = MaterializedView.window(
+            time_range,
+            view_start=DAY - timedelta(days=7),
+            watermark=DAY + timedelta(days=3),
+        )
+        view = MaterializedView(*window, days={})
+
+        assert window == (DAY, DAY + timedelta(days=1))
+        assert view.uncovered(time_range) == [
+            TimeRange(start_time=DAY + timedelta(days=1), end_time=time_range.end_time)
+        ]
+
+    def test_should_not_serve_range_without_whole_day(self):
+        time_range = TimeRange(
+            start_time=DAY + timedelta(hours=1), end_time=DAY + timedelta(hours=20)
+        )
+
+        assert (
+            MaterializedView.window(
+                time_range, view_start=DAY, watermark=DAY + timedelta(days=3)
+            )
+            is None
+        )
+        assert (
+            MaterializedView.window(
+                time_range,
+                view_start=DAY + timedelta(days=1),
+                watermark=DAY + timedelta(days=3),
+            )
+            is None
+        )
+
+    def test_should_combine_overlapping_dates(self):
+        combined = combine_date_histograms(
+            {"02-01-2023": {"color": {"bins": ["red", "blue"], "count": [1, 2]}}},
+            {
+                "02-01-2023": {"color": {"bins": ["blue"], "count": [3]}},
+                "03-01-2023": {"color": {"bins": ["red"], "count": [1]}},
+            },
+        )
+
+        assert combined == {
+            "02-01-2023": {"color": {"bins": ["red", "blue"], "count": [1, 5]}},
+            "03-01-2023": {"color": {"bins": ["red"], "count": [1]}},
+        }
+        assert combine_counts({"total": 2, "is_match": 1}, {"total": 3}) == {
+            "total": 5,
+            "is_match": 1,
+        }
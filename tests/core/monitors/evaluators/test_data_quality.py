@@ -13,11 +13,19 @@
 #  limitations under the License.
 
 import uuid
+from datetime import datetime, timedelta
 
 from tests.testing_helpers import MongodbBackendTesting
-from waterdip.core.commons.models import DataQualityMetric
-from waterdip.core.metrics.data_metrics import CountEmptyHistogram
-from waterdip.core.monitors.evaluators.data_quality import EmptyValueEvaluator
+from waterdip.core.commons.models import DataQualityMetric, TimeRange
+from waterdip.core.metrics.data_metrics import (
+    CountEmptyDateHistogram,
+    CountEmptyHistogram,
+)
+from waterdip.core.metrics.executor import PartitionCache, TimePartitionExecutor
+from waterdip.core.monitors.evaluators.data_quality import (
+    EmptyValueBackfillEvaluator,
+    EmptyValueEvaluator,
+)
 from waterdip.core.monitors.models import (
     DataQualityBaseMonitorCondition,
     MonitorDimensions,
@@ -78,3 +86,129 @@ class TestEmptyValueEvaluator:
         violations = evaluator.evaluate()
 
         assert len(violations) == 1
+
+    def test_should_read_closed_days_from_partition_cache(self, mocker):
+        aggregation_result = mocker.patch(
+            "waterdip.core.metrics.data_metrics.CountEmptyHistogram.aggregation_result",
+            return_value={
+                "f1": {"empty_count": 5, "empty_percentage": 5.0, "total_count": 100},
+            },
+        )
+
+        condition = DataQualityBaseMonitorCondition(
+            threshold=MonitorThreshold(threshold="gt", value=10),
+            evaluation_metric=DataQualityMetric.EMPTY_VALUE,
+            dimensions=MonitorDimensions(features=["f1"]),
+            evaluation_window="3d",
+        )
+        metric = CountEmptyHistogram(
+            collection=MongodbBackendTesting.get_instance().database[
+                "event_collection"
+            ],
+            dataset_id=uuid.uuid4(),
+        )
+        evaluator = EmptyValueEvaluator(
+            monitor_condition=condition,
+            metric=metric,
+            time_partitions=TimePartitionExecutor(cache=PartitionCache()),
+        )
+
+        violations = evaluator.evaluate()
+        partitions = aggregation_result.call_count
+        assert evaluator.evaluate() == violations
+        # the partial first and last days of the sliding window are aggregated again
+        assert aggregation_result.call_count == partitions + 2
+        assert violations[0]["metric_value"] == 5 * partitions
+        assert evaluator.rows_scanned == 100 * partitions
+
+
+class TestEmptyValueBackfillEvaluator:
+    def test_should_slide_evaluation_window_over_days(self, mocker):
+        start = datetime(year=2022, month=12, day=1)
+        aggregation_result = mocker.patch(
+            "waterdip.core.metrics.data_metrics.CountEmptyDateHistogram.aggregation_result",
+            return_value={
+                "dates": [start + timedelta(days=i) for i in range(6)],
+                "columns": {
+                    "f1": {
+                        "empty_count": [4, 7, 0, 2, 9, 0],
+                        "total_count": [10, 10, 10, 10, 10, 10],
+                    },
+                    "f2": {
+                        "empty_count": [0, 0, 0, 0, 0, 0],
+                        "total_count": [0, 0, 0, 0, 0, 0],
+                    },
+                },
+            },
+        )
+
+        condition = DataQualityBaseMonitorCondition(
+            threshold=MonitorThreshold(threshold="gt", value=8),
+            evaluation_metric=DataQualityMetric.EMPTY_VALUE,
+            dimensions=MonitorDimensions(features=["f1", "f2"]),
+            evaluation_window="2d",
+        )
+        metric = CountEmptyDateHistogram(
+            collection=MongodbBackendTesting.get_instance().database[
+                "event_collection"
+            ],
+            dataset_id=uuid.uuid4(),
+        )
+        evaluator = EmptyValueBackfillEvaluator(
+            monitor_condition=condition,
+            metric=metric,
+            time_range=TimeRange(
+                start_time=start + timedelta(days=1),
+                end_time=start + timedelta(days=5, hours=12),
+            ),
+        )
+
+        violations = evaluator.evaluate()
+
+        assert aggregation_result.call_args.kwargs["time_range"].start_time == start
+        assert [v["metric_value"] for v in violations] == [11, 11, 9]
+        # the current day is evaluated at the end of the time range
+        assert [v["evaluated_at"] for v in violations] == [
+            start + timedelta(days=2),
+            start + timedelta(days=5),
+            start + timedelta(days=5, hours=12),
+        ]
+        assert {v["dimension"] for v in violations} == {"f1"}
+        assert evaluator.rows_scanned == 60
+
+    def test_should_skip_windows_without_rows(self, mocker):
+        start = datetime(year=2022, month=12, day=1)
+        mocker.patch(
+            "waterdip.core.metrics.data_metrics.CountEmptyDateHistogram.aggregation_result",
+            return_value={
+                "dates": [start, start + timedelta(days=1)],
+                "columns": {
+                    "f1": {"empty_count": [0, 0], "total_count": [0, 5]},
+                },
+            },
+        )
+
+        condition = DataQualityBaseMonitorCondition(
+            threshold=MonitorThreshold(threshold="lt", value=1),
+            evaluation_metric=DataQualityMetric.EMPTY_VALUE,
+            dimensions=MonitorDimensions(features=["f1"]),
+            evaluation_window="1d",
+        )
+        metric = CountEmptyDateHistogram(
+            collection=MongodbBackendTesting.get_instance().database[
+                "event_collection"
+            ],
+            dataset_id=uuid.uuid4(),
+        )
+        evaluator = EmptyValueBackfillEvaluator(
+            monitor_condition=condition,
+            metric=metric,
+            time_range=TimeRange(
+                start_time=start, end_time=start + timedelta(days=1, hours=6)
+            ),
+        )
+
+        violations = evaluator.evaluate()
+
+        assert len(violations) == 1
+        assert violations[0]["evaluated_at"] == start + timedelta(days=1, hours=6)
@@ -0,0 +1,87 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import uuid
+from datetime import datetime, timedelta
+
+from tests.testing_helpers import MongodbBackendTesting
+from waterdip.core.commons.models import DriftMetric, Environment, ModelBaseline
+from waterdip.core.metrics.drift_psi import PSIMetrics
+from waterdip.core.monitors.evaluators.drift import PSIEvaluator
+from waterdip.core.monitors.models import (
+    DriftBaseMonitorCondition,
+    MonitorDimensions,
+    MonitorThreshold,
+)
+
+
+def _psi_metric() -> PSIMetrics:
+    collection = MongodbBackendTesting.get_instance().database["event_collection"]
+    return PSIMetrics(
+        collection=collection,
+        dataset_id=uuid.uuid4(),
+        baseline_dataset_id=uuid.uuid4(),
+        baseline_collection=collection,
+        baseline_distribution={"numeric": {}, "categorical": {}},
+    )
+
+
+class TestPSIEvaluator:
+    def test_should_generate_psi_violations(self, mocker):
+        feature_psi = mocker.patch(
+            "waterdip.core.metrics.drift_psi.PSIMetrics.feature_psi",
+            return_value={"f1": 0.3, "f2": 0.1, "p1": 0.5},
+        )
+        condition = DriftBaseMonitorCondition(
+            threshold=MonitorThreshold(threshold="gt", value=0.2),
+            evaluation_metric=DriftMetric.PSI,
+            dimensions=MonitorDimensions(features=["f1", "f2"], predictions=["p1"]),
+            baseline=ModelBaseline(dataset_env=Environment.TRAINING),
+        )
+
+        evaluator = PSIEvaluator(
+            monitor_condition=condition,
+            metric=_psi_metric(),
+            numeric_columns=["f1", "p1"],
+            categorical_columns=["f2"],
+        )
+        violations = evaluator.evaluate()
+
+        assert [violation["dimension"] for violation in violations] == ["f1", "p1"]
+        assert violations[0]["metric_value"] == 0.3
+        assert feature_psi.call_args.kwargs["numeric_columns"] == ["f1", "p1"]
+        assert feature_psi.call_args.kwargs["categorical_columns"] == ["f2"]
+
+    def test_should_shift_evaluation_window_by_skip_period(self):
+        condition = DriftBaseMonitorCondition(
+            threshold=MonitorThreshold(threshold="gt", value=0.2),
+            evaluation_metric=DriftMetric.PSI,
+            dimensions=MonitorDimensions(features=["f1"]),
+            baseline=ModelBaseline(dataset_env=Environment.TRAINING),
+            evaluation_window="3d",
+            skip_period="2d",
+        )
+        evaluator = PSIEvaluator(
+            monitor_condition=condition,
+            metric=_psi_metric(),
+            numeric_columns=["f1"],
+            categorical_columns=[],
+        )
+
+        time_range = evaluator._get_evaluation_window_timerange()
+
+        assert time_range.end_time - time_range.start_time == timedelta(days=3)
+        assert abs(
+            (datetime.utcnow() - timedelta(days=2)) - time_range.end_time
+        ) < timedelta(minutes=1)
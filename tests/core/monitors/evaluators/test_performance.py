@@ -0,0 +1,86 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import uuid
+from datetime import timedelta
+
+from tests.testing_helpers import MongodbBackendTesting
+from waterdip.core.commons.models import PerformanceMetric
+from waterdip.core.metrics.classification_metrics import (
+    ClassificationDateHistogramDBMetrics,
+)
+from waterdip.core.monitors.evaluators.performance import PerformanceEvaluator
+from waterdip.core.monitors.models import (
+    MonitorThreshold,
+    PerformanceBaseMonitorCondition,
+)
+
+COUNTS = {
+    "total": 10,
+    "is_match": 6,
+    "true_positive": 3,
+    "false_negative": 3,
+    "true_negative": 3,
+    "false_positive": 1,
+}
+
+
+def _metric() -> ClassificationDateHistogramDBMetrics:
+    return ClassificationDateHistogramDBMetrics(
+        collection=MongodbBackendTesting.get_instance().database["event_collection"],
+        dataset_id=uuid.uuid4(),
+        positive_class="true",
+    )
+
+
+class TestPerformanceEvaluator:
+    def test_should_generate_performance_violation(self):
+        condition = PerformanceBaseMonitorCondition(
+            threshold=MonitorThreshold(threshold="lt", value=0.7),
+            evaluation_metric=PerformanceMetric.ACCURACY,
+            evaluation_window="30d",
+        )
+        time_ranges = []
+
+        def count_loader(time_range):
+            time_ranges.append(time_range)
+            return COUNTS
+
+        evaluator = PerformanceEvaluator(
+            monitor_condition=condition, metric=_metric(), count_loader=count_loader
+        )
+        violations = evaluator.evaluate()
+
+        assert violations == [
+            {
+                "metric_value": 0.6,
+                "threshold": condition.threshold,
+                "dimension": "ACCURACY",
+            }
+        ]
+        assert time_ranges[0].start_time.hour == 0
+        assert time_ranges[0].end_time - time_ranges[0].start_time >= timedelta(days=30)
+
+    def test_should_not_generate_violation_without_counts(self):
+        condition = PerformanceBaseMonitorCondition(
+            threshold=MonitorThreshold(threshold="lt", value=0.7),
+            evaluation_metric=PerformanceMetric.F1,
+        )
+        evaluator = PerformanceEvaluator(
+            monitor_condition=condition,
+            metric=_metric(),
+            count_loader=lambda time_range: {},
+        )
+
+        assert evaluator.evaluate() == []
@@ -0,0 +1,172 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import uuid
+from datetime import datetime, timedelta
+from uuid import UUID
+
+import pytest
+
+from waterdip.core.commons.models import ColumnDataType, ColumnMappingType, TimeRange
+from waterdip.core.metrics.data_metrics import CategoricalCountHistogram
+from waterdip.core.metrics.rows import binary_uuid
+from waterdip.processor.migrations.event_row_layout import EventRowLayoutMigration, main
+from waterdip.server.commons.config import settings
+from waterdip.server.db.models.dataset_rows import BaseEventRowDB, EventDataColumnDB
+from waterdip.server.db.models.models import (
+    BaseModelVersionDB,
+    ModelVersionSchemaFieldDetails,
+    ModelVersionSchemaInDB,
+)
+from waterdip.server.db.mongodb import (
+    MONGO_COLLECTION_EVENT_ROWS,
+    MONGO_COLLECTION_MODEL_VERSIONS,
+    MongodbBackend,
+)
+from waterdip.server.db.repositories.dataset_row_repository import (
+    EventDatasetRowRepository,
+)
+
+MODEL_ID = UUID("7d2c4b51-8b2f-4b44-a8c2-48b714bbee61")
+MODEL_VERSION_ID = UUID("7d2c4b51-8b2f-4b44-a8c2-48b714bbee62")
+DATASET_ID = UUID("7d2c4b51-8b2f-4b44-a8c2-48b714bbee63")
+FIRST_DAY = datetime(year=2023, month=2, day=1)
+TIME_RANGE = TimeRange(start_time=FIRST_DAY, end_time=FIRST_DAY + timedelta(days=1))
+
+
+def setup_rows(mongodb: MongodbBackend, count: int = 10):
+    """Model version with a categorical and a numeric feature, v1 event rows"""
+    version_schema = ModelVersionSchemaInDB(
+        features={
+            "color": ModelVersionSchemaFieldDetails(
+                data_type=ColumnDataType.CATEGORICAL
+            ),
+            "length": ModelVersionSchemaFieldDetails(data_type=ColumnDataType.NUMERIC),
+        },
+        predictions={},
+    )
+    mongodb.database[MONGO_COLLECTION_MODEL_VERSIONS].delete_many(
+        {"model_version_id": str(MODEL_VERSION_ID)}
+    )
+    mongodb.database[MONGO_COLLECTION_EVENT_ROWS].delete_many(
+        {"model_id": {"$in": [str(MODEL_ID), binary_uuid(MODEL_ID)]}}
+    )
+    mongodb.database[MONGO_COLLECTION_MODEL_VERSIONS].insert_one(
+        BaseModelVersionDB(
+            model_version_id=MODEL_VERSION_ID,
+            model_version="v1",
+            model_id=MODEL_ID,
+            version_schema=version_schema,
+        ).dict()
+    )
+    mongodb.database[MONGO_COLLECTION_EVENT_ROWS].insert_many(
+        [
+            BaseEventRowDB(
+                row_id=uuid.uuid4(),
+                dataset_id=DATASET_ID,
+                model_id=MODEL_ID,
+                model_version_id=MODEL_VERSION_ID,
+                columns=[
+                    EventDataColumnDB(
+                        name="color",
+                        value_categorical=["red", "blue"][index % 2],
+                        data_type=ColumnDataType.CATEGORICAL,
+                        mapping_type=ColumnMappingType.FEATURE,
+                    ),
+                    EventDataColumnDB(
+                        name="length",
+                        value_numeric=index,
+                        data_type=ColumnDataType.NUMERIC,
+                        mapping_type=ColumnMappingType.FEATURE,
+                    ),
+                ],
+                created_at=FIRST_DAY + timedelta(hours=index),
+            ).dict()
+            for index in range(count)
+        ]
+    )
+    return version_schema
+
+
+class TestEventRowLayoutMigration:
+    def test_should_rewrite_v1_rows_in_batches(
+        self, mock_mongo_backend: MongodbBackend
+    ):
+        setup_rows(mock_mongo_backend, count=10)
+        rows = mock_mongo_backend.database[MONGO_COLLECTION_EVENT_ROWS]
+
+        migrated = EventRowLayoutMigration(
+            mongodb_backend=mock_mongo_backend, batch_size=3
+        ).migrate([DATASET_ID])
+
+        assert migrated == {str(DATASET_ID): 10}
+        assert rows.count_documents({"model_id": str(MODEL_ID)}) == 0
+        assert rows.count_documents({"model_id": binary_uuid(MODEL_ID), "v": 2}) == 10
+
+    def test_should_resume_without_rewriting_compact_rows(
+        self, mock_mongo_backend: MongodbBackend
+    ):
+        setup_rows(mock_mongo_backend, count=10)
+        migration = EventRowLayoutMigration(
+            mongodb_backend=mock_mongo_backend, batch_size=4
+        )
+
+        assert migration.migrate_dataset(DATASET_ID) == 10
+        assert migration.migrate_dataset(DATASET_ID) == 0
+        assert migration.migrate([DATASET_ID]) == {str(DATASET_ID): 0}
+
+    def test_should_keep_rows_with_unknown_columns_in_v1_layout(
+        self, mock_mongo_backend: MongodbBackend
+    ):
+        setup_rows(mock_mongo_backend, count=10)
+        rows = mock_mongo_backend.database[MONGO_COLLECTION_EVENT_ROWS]
+        rows.update_one(
+            {"model_id": str(MODEL_ID), "columns.value_numeric": 4},
+            {"$set": {"columns.1.name": "weight"}},
+        )
+
+        migrated = EventRowLayoutMigration(
+            mongodb_backend=mock_mongo_backend, batch_size=3
+        ).migrate([DATASET_ID])
+
+        assert migrated == {str(DATASET_ID): 9}
+        v1_row = rows.find_one({"model_id": str(MODEL_ID)})
+        assert v1_row["columns"][1]["name"] == "weight"
+
+    def test_should_keep_metric_results(
+        self, mock_mongo_backend: MongodbBackend, mocker
+    ):
+        version_schema = setup_rows(mock_mongo_backend, count=10)
+        rows = mock_mongo_backend.database[MONGO_COLLECTION_EVENT_ROWS]
+        before = CategoricalCountHistogram(
+            collection=rows, dataset_id=DATASET_ID
+        ).aggregation_result(time_range=TIME_RANGE)
+
+        mocker.patch.object(settings, "event_row_layout", "v2")
+        EventRowLayoutMigration(mongodb_backend=mock_mongo_backend).migrate(
+            [DATASET_ID]
+        )
+        row_reader = EventDatasetRowRepository(mongodb=mock_mongo_backend).row_reader(
+            version_schema
+        )
+        after = CategoricalCountHistogram(
+            collection=rows, dataset_id=DATASET_ID, row_reader=row_reader
+        ).aggregation_result(time_range=TIME_RANGE)
+
+        assert after == before
+
+    def test_should_not_migrate_before_v2_layout(self, mocker):
+        mocker.patch.object(settings, "event_row_layout", "v1")
+
+        assert main([]) == 1
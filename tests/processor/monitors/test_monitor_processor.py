@@ -17,25 +17,58 @@ import uuid
 
 import pytest
 
+from tests.testing_helper_metrics_data import METRICS_MODEL_VERSION_V1_SCHEMA
+from tests.testing_helpers import MongodbBackendTesting
 from waterdip.core.commons.models import (
     DataQualityMetric,
     DatasetType,
+    DriftMetric,
     Environment,
+    ModelBaseline,
     MonitorSeverity,
     MonitorType,
+    PerformanceMetric,
+    TimeRange,
+)
+from waterdip.core.metrics.classification_metrics import (
+    ClassificationDateHistogramDBMetrics,
 )
 from waterdip.core.monitors.models import MonitorDimensions, MonitorThreshold
 from waterdip.processor.monitors.monitor_processor import MonitorProcessor
+from waterdip.server.db.models.alerts import BaseAlertDB
+from waterdip.server.db.models.dataset_rows import BaseClassificationEventRowDB
 from waterdip.server.db.models.datasets import BaseDatasetDB
+from waterdip.server.db.models.models import (
+    BaseModelDB,
+    BaseModelVersionDB,
+    ModelVersionSchemaInDB,
+)
 from waterdip.server.db.models.monitors import (
     BaseMonitorCondition,
     BaseMonitorDB,
     MonitorIdentification,
 )
-from waterdip.server.db.mongodb import MongodbBackend
+from waterdip.server.db.mongodb import (
+    MONGO_COLLECTION_EVENT_ROWS,
+    MONGO_COLLECTION_MONITORS,
+    MongodbBackend,
+)
 from waterdip.server.db.repositories.alert_repository import AlertRepository
+from waterdip.server.db.repositories.baseline_repository import (
+    BaselineHistogramRepository,
+)
 from waterdip.server.db.repositories.dataset_repository import DatasetRepository
 from waterdip.server.db.repositories.integration_repository import IntegrationRepository
+from waterdip.server.db.repositories.model_repository import (
+    ModelRepository,
+    ModelVersionRepository,
+)
+from waterdip.server.db.repositories.monitor_lease_repository import (
+    MonitorLeaseRepository,
+)
+from waterdip.server.db.repositories.performance_count_repository import (
+    PerformanceCountRepository,
+)
 from waterdip.server.services.integration_service import IntegrationService
 
 
@@ -80,16 +113,439 @@ class TestMonitorProcessor:
             severity="LOW",
         )
 
+        # a backfilled alert of the same violation does not suppress the live one
+        alert_repo = AlertRepository(mongodb=mock_mongo_backend)
+        alert_repo.upsert_backfill_alerts(
+            [
+                BaseAlertDB(
+                    model_id=monitor_db.monitor_identification.model_id,
+                    alert_id=uuid.uuid4(),
+                    monitor_id=monitor_db.monitor_id,
+                    monitor_type=MonitorType.DATA_QUALITY,
+                    alert_identification=monitor_db.monitor_identification.dict(),
+                    created_at=datetime.datetime(2021, 7, 31),
+                    violation={
+                        "field": "f1",
+                        "max_threshold": 10,
+                        "model_version_id": str(
+                            monitor_db.monitor_identification.model_version_id
+                        ),
+                        "focal_time_window": condition.evaluation_window,
+                        "focal_value": 11,
+                        "evaluated_at": datetime.datetime(2021, 7, 31),
+                        "backfilled": True,
+                    },
+                )
+            ]
+        )
+
         monitor_processor = MonitorProcessor(
             monitor=monitor_db.dict(),
             mongodb_backend=mock_mongo_backend,
-            alert_repo=AlertRepository.get_instance(mongodb=mock_mongo_backend),
-            dataset_repo=DatasetRepository.get_instance(mongodb=mock_mongo_backend),
-            integration_service=IntegrationService.get_instance(
-                repository=IntegrationRepository.get_instance(
-                    mongodb=mock_mongo_backend
-                )
+            alert_repo=alert_repo,
+            dataset_repo=DatasetRepository(mongodb=mock_mongo_backend),
+            integration_service=IntegrationService(
+                repository=IntegrationRepository(mongodb=mock_mongo_backend)
             ),
         )
         violation = monitor_processor.process()
         assert len(violation) == 1
+        assert monitor_processor.rows_scanned == 1000
+        assert monitor_processor.alerts_sent == 1
+
+    def test_should_reject_last_run_update_of_stale_lease(
+        self, mock_mongo_backend: MongodbBackendTesting
+    ):
+        monitor_id = str(uuid.uuid4())
+        mock_mongo_backend.database[MONGO_COLLECTION_MONITORS].insert_one(
+            {"monitor_id": monitor_id, "lease_fence": 5}
+        )
+        condition = BaseMonitorCondition(
+            threshold=MonitorThreshold(threshold="gt", value=10),
+            evaluation_metric=DataQualityMetric.EMPTY_VALUE,
+            dimensions=MonitorDimensions(features=["f1"]),
+        )
+        monitor_db = BaseMonitorDB(
+            monitor_id=monitor_id,
+            monitor_name="M1",
+            monitor_identification=MonitorIdentification(
+                model_id=uuid.uuid4(), model_version_id=uuid.uuid4()
+            ),
+            monitor_type=MonitorType.DATA_QUALITY,
+            monitor_condition=condition,
+            created_at="2021-08-01T00:00:00Z",
+            severity="LOW",
+        )
+
+        def monitor_processor(fence_token: int) -> MonitorProcessor:
+            return MonitorProcessor(
+                monitor=monitor_db.dict(),
+                mongodb_backend=mock_mongo_backend,
+                alert_repo=AlertRepository(mongodb=mock_mongo_backend),
+                dataset_repo=DatasetRepository(mongodb=mock_mongo_backend),
+                integration_service=IntegrationService(
+                    repository=IntegrationRepository(mongodb=mock_mongo_backend)
+                ),
+                fence_token=fence_token,
+            )
+
+        assert monitor_processor(fence_token=4)._update_last_run() is False
+        assert monitor_processor(fence_token=6)._update_last_run() is True
+        monitor_in_db = mock_mongo_backend.database[MONGO_COLLECTION_MONITORS].find_one(
+            {"monitor_id": monitor_id}
+        )
+        assert monitor_in_db["lease_fence"] == 6
+        assert monitor_in_db["last_run"] is not None
+
+    def test_should_not_alert_when_lease_was_taken_over(
+        self, mocker, mock_mongo_backend: MongodbBackendTesting
+    ):
+        mocker.patch(
+            "waterdip.processor.monitors.monitor_processor.MonitorProcessor._get_event_dataset",
+            return_value=BaseDatasetDB(
+                dataset_id=uuid.uuid4(),
+                dataset_name="name",
+                environment=Environment.PRODUCTION,
+                created_at=datetime.datetime.now(),
+                dataset_type=DatasetType.EVENT,
+                model_id=uuid.uuid4(),
+                model_version_id=uuid.uuid4(),
+            ),
+        )
+        mocker.patch(
+            "waterdip.core.metrics.data_metrics.CountEmptyHistogram.aggregation_result",
+            return_value={
+                "f1": {"empty_count": 11, "empty_percentage": 1.1, "total_count": 1000}
+            },
+        )
+        monitor_id = uuid.uuid4()
+        lease_repo = MonitorLeaseRepository(mongodb=mock_mongo_backend)
+        stale_lease = lease_repo.acquire_lease(monitor_id=monitor_id, owner="r1", ttl=0)
+        assert lease_repo.acquire_lease(monitor_id=monitor_id, owner="r2") is not None
+        monitor_db = BaseMonitorDB(
+            monitor_id=monitor_id,
+            monitor_name="M1",
+            monitor_identification=MonitorIdentification(
+                model_id=uuid.uuid4(), model_version_id=uuid.uuid4()
+            ),
+            monitor_type=MonitorType.DATA_QUALITY,
+            monitor_condition=BaseMonitorCondition(
+                threshold=MonitorThreshold(threshold="gt", value=10),
+                evaluation_metric=DataQualityMetric.EMPTY_VALUE,
+                dimensions=MonitorDimensions(features=["f1"]),
+            ),
+            created_at="2021-08-01T00:00:00Z",
+            severity="LOW",
+        )
+        alert_repo = AlertRepository(mongodb=mock_mongo_backend)
+        insert_alert = mocker.spy(alert_repo, "insert_alert")
+
+        monitor_processor = MonitorProcessor(
+            monitor=monitor_db.dict(),
+            mongodb_backend=mock_mongo_backend,
+            alert_repo=alert_repo,
+            dataset_repo=DatasetRepository(mongodb=mock_mongo_backend),
+            integration_service=IntegrationService(
+                repository=IntegrationRepository(mongodb=mock_mongo_backend)
+            ),
+            fence_token=stale_lease.fence_token,
+            monitor_lease_repo=lease_repo,
+        )
+
+        assert len(monitor_processor.process()) == 1
+        assert monitor_processor.alerts_sent == 0
+        insert_alert.assert_not_called()
+
+    def test_should_process_drift_monitor_with_cached_baseline(
+        self, mocker, mock_mongo_backend: MongodbBackendTesting
+    ):
+        model_id, model_version_id = uuid.uuid4(), uuid.uuid4()
+        model_version_repo = ModelVersionRepository(mongodb=mock_mongo_backend)
+        model_version_repo.register_model_version(
+            BaseModelVersionDB(
+                model_version_id=model_version_id,
+                model_version="v1",
+                model_id=model_id,
+                version_schema=ModelVersionSchemaInDB(
+                    **METRICS_MODEL_VERSION_V1_SCHEMA
+                ),
+            )
+        )
+        dataset_repo = DatasetRepository(mongodb=mock_mongo_backend)
+        for dataset_type, environment in [
+            (DatasetType.BATCH, Environment.TRAINING),
+            (DatasetType.EVENT, Environment.PRODUCTION),
+        ]:
+            dataset_repo.create_dataset(
+                BaseDatasetDB(
+                    dataset_id=uuid.uuid4(),
+                    dataset_name=environment.value,
+                    environment=environment,
+                    created_at=datetime.datetime.now(),
+                    dataset_type=dataset_type,
+                    model_id=model_id,
+                    model_version_id=model_version_id,
+                )
+            )
+        baseline_distribution = mocker.patch(
+            "waterdip.core.metrics.drift_psi.PSIMetrics.baseline_distribution",
+            return_value={"numeric": {}, "categorical": {}},
+        )
+        feature_psi = mocker.patch(
+            "waterdip.core.metrics.drift_psi.PSIMetrics.feature_psi",
+            return_value={"length": 0.4, "cap-shape": 0.1},
+        )
+        baseline_histogram_repo = BaselineHistogramRepository(
+            mongodb=mock_mongo_backend
+        )
+
+        def monitor_processor(monitor_name: str) -> MonitorProcessor:
+            monitor_db = BaseMonitorDB(
+                monitor_id=uuid.uuid4(),
+                monitor_name=monitor_name,
+                monitor_identification=MonitorIdentification(
+                    model_id=model_id, model_version_id=model_version_id
+                ),
+                monitor_type=MonitorType.DRIFT,
+                monitor_condition=BaseMonitorCondition(
+                    threshold=MonitorThreshold(threshold="gt", value=0.2),
+                    evaluation_metric=DriftMetric.PSI,
+                    dimensions=MonitorDimensions(features=["length", "cap-shape"]),
+                    baseline=ModelBaseline(dataset_env=Environment.TRAINING),
+                ),
+                created_at="2021-08-01T00:00:00Z",
+                severity="LOW",
+            )
+            return MonitorProcessor(
+                monitor=monitor_db.dict(),
+                mongodb_backend=mock_mongo_backend,
+                alert_repo=AlertRepository(mongodb=mock_mongo_backend),
+                dataset_repo=dataset_repo,
+                integration_service=IntegrationService(
+                    repository=IntegrationRepository(mongodb=mock_mongo_backend)
+                ),
+                model_version_repo=model_version_repo,
+                baseline_histogram_repo=baseline_histogram_repo,
+            )
+
+        for processor in [monitor_processor("M1"), monitor_processor("M2")]:
+            for _ in range(2):
+                violations = processor.process()
+                assert [violation["dimension"] for violation in violations] == [
+                    "length"
+                ]
+
+        assert baseline_distribution.call_count == 1
+        assert feature_psi.call_count == 4
+        assert feature_psi.call_args.kwargs["numeric_columns"] == ["length"]
+        assert feature_psi.call_args.kwargs["categorical_columns"] == ["cap-shape"]
+
+    def test_should_process_performance_monitor_incrementally(
+        self, mocker, mock_mongo_backend: MongodbBackendTesting
+    ):
+        model_id, model_version_id, dataset_id = (
+            uuid.uuid4(),
+            uuid.uuid4(),
+            uuid.uuid4(),
+        )
+        model_repo = ModelRepository(mongodb=mock_mongo_backend)
+        model_repo.register_model(
+            BaseModelDB(
+                model_id=model_id, model_name="M", positive_class={"name": "true"}
+            )
+        )
+        dataset_repo = DatasetRepository(mongodb=mock_mongo_backend)
+        dataset_repo.create_dataset(
+            BaseDatasetDB(
+                dataset_id=dataset_id,
+                dataset_name="production",
+                environment=Environment.PRODUCTION,
+                created_at=datetime.datetime.now(),
+                dataset_type=DatasetType.EVENT,
+                model_id=model_id,
+                model_version_id=model_version_id,
+            )
+        )
+
+        def log_events(created_at: datetime.datetime, predictions: list):
+            mock_mongo_backend.database[MONGO_COLLECTION_EVENT_ROWS].insert_many(
+                [
+                    BaseClassificationEventRowDB(
+                        row_id=uuid.uuid4(),
+                        dataset_id=dataset_id,
+                        model_id=model_id,
+                        model_version_id=model_version_id,
+                        columns=[],
+                        created_at=created_at,
+                        prediction_cf=[prediction],
+                        actual_cf=["true"],
+                        is_match=prediction == "true",
+                    ).dict()
+                    for prediction in predictions
+                ]
+            )
+
+        start_day = datetime.datetime(year=2023, month=1, day=1)
+        first_run_end = datetime.datetime(year=2023, month=1, day=3, hour=10)
+        log_events(datetime.datetime(year=2023, month=1, day=1, hour=5), ["true"])
+        log_events(datetime.datetime(year=2023, month=1, day=3, hour=9), ["true"])
+        log_events(first_run_end + datetime.timedelta(minutes=30), ["false"] * 2)
+
+        mocker.patch(
+            "waterdip.core.monitors.evaluators.performance.PerformanceEvaluator.get_evaluation_window_timerange",
+            side_effect=[
+                TimeRange(start_time=start_day, end_time=first_run_end),
+                TimeRange(
+                    start_time=start_day,
+                    end_time=first_run_end + datetime.timedelta(hours=1),
+                ),
+            ],
+        )
+        confusion_counts = mocker.spy(
+            ClassificationDateHistogramDBMetrics, "confusion_counts"
+        )
+        monitor_db = BaseMonitorDB(
+            monitor_id=uuid.uuid4(),
+            monitor_name="M1",
+            monitor_identification=MonitorIdentification(
+                model_id=model_id, model_version_id=model_version_id
+            ),
+            monitor_type=MonitorType.PERFORMANCE,
+            monitor_condition=BaseMonitorCondition(
+                threshold=MonitorThreshold(threshold="lt", value=0.6),
+                evaluation_metric=PerformanceMetric.ACCURACY,
+                evaluation_window="30d",
+            ),
+            created_at="2021-08-01T00:00:00Z",
+            severity="LOW",
+        )
+        monitor_processor = MonitorProcessor(
+            monitor=monitor_db.dict(),
+            mongodb_backend=mock_mongo_backend,
+            alert_repo=AlertRepository(mongodb=mock_mongo_backend),
+            dataset_repo=dataset_repo,
+            integration_service=IntegrationService(
+                repository=IntegrationRepository(mongodb=mock_mongo_backend)
+            ),
+            model_repo=model_repo,
+            performance_count_repo=PerformanceCountRepository(
+                mongodb=mock_mongo_backend
+            ),
+        )
+
+        assert monitor_processor.process() == []
+        violations = monitor_processor.process()
+
+        assert violations[0]["dimension"] == "ACCURACY"
+        assert violations[0]["metric_value"] == 0.5
+        # the last hour of the first run is counted again
+        assert monitor_processor.rows_scanned == 3
+        assert confusion_counts.call_count == 2
+        assert confusion_counts.call_args.kwargs[
+            "start_time"
+        ] == first_run_end - datetime.timedelta(hours=1)
+        assert confusion_counts.call_args.kwargs[
+            "end_time"
+        ] == first_run_end + datetime.timedelta(hours=1)
+
+    def test_should_count_performance_rows_logged_late(
+        self, mocker, mock_mongo_backend: MongodbBackendTesting
+    ):
+        model_id, model_version_id, dataset_id = (
+            uuid.uuid4(),
+            uuid.uuid4(),
+            uuid.uuid4(),
+        )
+        model_repo = ModelRepository(mongodb=mock_mongo_backend)
+        model_repo.register_model(
+            BaseModelDB(
+                model_id=model_id, model_name="M", positive_class={"name": "true"}
+            )
+        )
+        dataset_repo = DatasetRepository(mongodb=mock_mongo_backend)
+        dataset_repo.create_dataset(
+            BaseDatasetDB(
+                dataset_id=dataset_id,
+                dataset_name="production",
+                environment=Environment.PRODUCTION,
+                created_at=datetime.datetime.now(),
+                dataset_type=DatasetType.EVENT,
+                model_id=model_id,
+                model_version_id=model_version_id,
+            )
+        )
+
+        def log_events(created_at: datetime.datetime, predictions: list):
+            mock_mongo_backend.database[MONGO_COLLECTION_EVENT_ROWS].insert_many(
+                [
+                    BaseClassificationEventRowDB(
+                        row_id=uuid.uuid4(),
+                        dataset_id=dataset_id,
+                        model_id=model_id,
+                        model_version_id=model_version_id,
+                        columns=[],
+                        created_at=created_at,
+                        prediction_cf=[prediction],
+                        actual_cf=["true"],
+                        is_match=prediction == "true",
+                    ).dict()
+                    for prediction in predictions
+                ]
+            )
+
+        start_day = datetime.datetime(year=2023, month=1, day=1)
+        first_run_end = datetime.datetime(year=2023, month=1, day=3, hour=10, minute=30)
+        mocker.patch(
+            "waterdip.core.monitors.evaluators.performance.PerformanceEvaluator.get_evaluation_window_timerange",
+            side_effect=[
+                TimeRange(start_time=start_day, end_time=first_run_end),
+                TimeRange(
+                    start_time=start_day,
+                    end_time=first_run_end + datetime.timedelta(hours=1),
+                ),
+            ],
+        )
+        monitor_db = BaseMonitorDB(
+            monitor_id=uuid.uuid4(),
+            monitor_name="M1",
+            monitor_identification=MonitorIdentification(
+                model_id=model_id, model_version_id=model_version_id
+            ),
+            monitor_type=MonitorType.PERFORMANCE,
+            monitor_condition=BaseMonitorCondition(
+                threshold=MonitorThreshold(threshold="lt", value=0.6),
+                evaluation_metric=PerformanceMetric.ACCURACY,
+                evaluation_window="30d",
+            ),
+            created_at="2021-08-01T00:00:00Z",
+            severity="LOW",
+        )
+        count_repo = PerformanceCountRepository(mongodb=mock_mongo_backend)
+        monitor_processor = MonitorProcessor(
+            monitor=monitor_db.dict(),
+            mongodb_backend=mock_mongo_backend,
+            alert_repo=AlertRepository(mongodb=mock_mongo_backend),
+            dataset_repo=dataset_repo,
+            integration_service=IntegrationService(
+                repository=IntegrationRepository(mongodb=mock_mongo_backend)
+            ),
+            model_repo=model_repo,
+            performance_count_repo=count_repo,
+        )
+
+        log_events(first_run_end - datetime.timedelta(minutes=20), ["true"])
+        assert monitor_processor.process() == []
+        # logged after the first run, created in the hour it counted
+        log_events(first_run_end - datetime.timedelta(minutes=10), ["false"] * 2)
+        violations = monitor_processor.process()
+
+        assert violations[0]["metric_value"] == pytest.approx(1 / 3)
+        assert (
+            count_repo.sum_counts(
+                dataset_id=dataset_id,
+                positive_class="true",
+                start_day=start_day,
+                end_time=first_run_end + datetime.timedelta(hours=1),
+            )["total"]
+            == 3
+        )
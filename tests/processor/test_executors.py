@@ -0,0 +1,128 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List
+
+from waterdip.processor.executors import (
+    CeleryMonitorExecutor,
+    MonitorExecutor,
+    ProcessPoolMonitorExecutor,
+)
+from waterdip.processor.scheduler import MonitorScheduler
+
+
+def _slow_task(monitor: Dict, run_id: str):
+    time.sleep(0.5)
+
+
+class TestProcessPoolMonitorExecutor:
+    def test_should_bound_pending_monitor_jobs(self):
+        executor = ProcessPoolMonitorExecutor(
+            max_workers=1, max_pending=2, task=_slow_task
+        )
+
+        assert executor.submit({"monitor_id": "m1"}) is True
+        assert executor.submit({"monitor_id": "m1"}) is False
+        assert executor.submit({"monitor_id": "m2"}) is True
+        assert executor.submit({"monitor_id": "m3"}) is False
+        assert executor.queue_depth() == 2
+
+        executor.shutdown(wait=True)
+
+    def test_should_cancel_jobs_not_started_on_shutdown(self):
+        executor = ProcessPoolMonitorExecutor(
+            max_workers=1, max_pending=10, task=_slow_task
+        )
+        for monitor_id in ["m1", "m2", "m3", "m4"]:
+            executor.submit({"monitor_id": monitor_id})
+        futures = list(executor._pending.values())
+        time.sleep(0.2)
+
+        executor.shutdown(wait=True)
+
+        assert any(future.cancelled() for future in futures)
+        assert executor.pending == 0
+        assert executor.submit({"monitor_id": "m5"}) is False
+
+        assert executor.submit({"monitor_id": "m3"}) is False
+        assert executor.pending == 0
+
+    def test_should_release_monitor_rejected_by_pool(self, mocker):
+        executor = ProcessPoolMonitorExecutor(
+            max_workers=1, max_pending=10, task=_slow_task
+        )
+        pool_submit = mocker.patch.object(
+            executor._pool, "submit", side_effect=BrokenProcessPool("broken")
+        )
+
+        assert executor.submit({"monitor_id": "m1"}) is False
+        assert executor.pending == 0
+
+        pool_submit.side_effect = None
+        assert executor.submit({"monitor_id": "m1"}) is True
+        assert executor.pending == 1
+
+        executor.shutdown(wait=True)
+
+
+class TestCeleryMonitorExecutor:
+    def test_should_cache_queue_depth_for_ttl(self, mocker):
+        read_queue_depth = mocker.patch.object(
+            CeleryMonitorExecutor, "_read_queue_depth", side_effect=[3, 5]
+        )
+        executor = CeleryMonitorExecutor(queue_depth_ttl=0.2)
+
+        assert executor.queue_depth() == 3
+        assert executor.queue_depth() == 3
+        assert read_queue_depth.call_count == 1
+        time.sleep(0.25)
+        assert executor.queue_depth() == 5
+        assert read_queue_depth.call_count == 2
+
+
+class _RecordingExecutor(MonitorExecutor):
+    def __init__(self):
+        self.generations: List[str] = []
+        self.is_shutdown = False
+        self.generated = threading.Event()
+
+    def submit(self, monitor: Dict) -> bool:
+        return True
+
+    def generate_monitor_jobs(self) -> str:
+        self.generations.append("job")
+        self.generated.set()
+        return "job"
+
+    def queue_depth(self) -> int:
+        return 0
+
+    def shutdown(self, wait: bool = True):
+        self.is_shutdown = True
+
+
+class TestMonitorScheduler:
+    def test_should_generate_jobs_until_stopped(self):
+        executor = _RecordingExecutor()
+        scheduler = MonitorScheduler(executor=executor, interval=3600)
+
+        scheduler.start()
+        assert executor.generated.wait(timeout=5)
+        scheduler.stop()
+
+        assert executor.generations == ["job"]
+        assert executor.is_shutdown is True
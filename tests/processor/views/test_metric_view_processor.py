@@ -0,0 +1,302 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+
+import uuid
+from datetime import datetime, timedelta
+from functools import partial
+from uuid import UUID
+
+import pytest
+
+from tests.testing_helpers import MongodbBackendTesting
+from waterdip.core.commons.models import (
+    ColumnDataType,
+    ColumnMappingType,
+    DatasetType,
+    Environment,
+    MetricView,
+    TimeRange,
+)
+from waterdip.core.metrics.classification_metrics import (
+    ClassificationDateHistogramDBMetrics,
+)
+from waterdip.core.metrics.drift_psi import PSIMetrics
+from waterdip.processor.views.metric_view_processor import MetricViewProcessor
+from waterdip.server.commons.config import settings
+from waterdip.server.db.models.dataset_rows import (
+    BaseClassificationEventRowDB,
+    EventDataColumnDB,
+)
+from waterdip.server.db.models.datasets import BaseDatasetDB
+from waterdip.server.db.models.models import (
+    BaseModelDB,
+    BaseModelVersionDB,
+    ModelVersionSchemaFieldDetails,
+    ModelVersionSchemaInDB,
+)
+from waterdip.server.db.mongodb import (
+    MONGO_COLLECTION_EVENT_ROWS,
+    MONGO_COLLECTION_METRIC_VIEWS,
+    MONGO_COLLECTION_MODEL_VERSIONS,
+    MONGO_COLLECTION_MODELS,
+)
+from waterdip.server.db.repositories.dataset_row_repository import (
+    EventDatasetRowRepository,
+)
+from waterdip.server.db.repositories.metric_view_repository import MetricViewRepository
+from waterdip.server.db.repositories.model_repository import ModelVersionRepository
+from waterdip.server.services.row_service import EventDatasetRowService
+
+MODEL_ID = UUID("6c1b3a40-7a1f-4a33-b7b1-37a603aadd51")
+MODEL_VERSION_ID = UUID("6c1b3a40-7a1f-4a33-b7b1-37a603aadd52")
+DATASET_ID = UUID("6c1b3a40-7a1f-4a33-b7b1-37a603aadd53")
+FIRST_DAY = datetime(year=2023, month=1, day=1)
+LENGTH_EDGES = [2.5, 5.0, 7.5]
+
+event_dataset = BaseDatasetDB(
+    dataset_id=DATASET_ID,
+    model_id=MODEL_ID,
+    model_version_id=MODEL_VERSION_ID,
+    dataset_type=DatasetType.EVENT,
+    environment=Environment.PRODUCTION,
+    created_at=FIRST_DAY,
+)
+
+
+def setup_model(mongodb: MongodbBackendTesting):
+    """Classification model with a categorical and a numeric feature, 4 rows a day"""
+    mongodb.database[MONGO_COLLECTION_MODELS].insert_one(
+        BaseModelDB(
+            model_id=MODEL_ID,
+            model_name="view_model",
+            positive_class={"name": "true"},
+        ).dict()
+    )
+    mongodb.database[MONGO_COLLECTION_MODEL_VERSIONS].insert_one(
+        BaseModelVersionDB(
+            model_version_id=MODEL_VERSION_ID,
+            model_version="v1",
+            model_id=MODEL_ID,
+            version_schema=ModelVersionSchemaInDB(
+                features={
+                    "color": ModelVersionSchemaFieldDetails(
+                        data_type=ColumnDataType.CATEGORICAL
+                    ),
+                    "length": ModelVersionSchemaFieldDetails(
+                        data_type=ColumnDataType.NUMERIC
+                    ),
+                },
+                predictions={},
+            ),
+        ).dict()
+    )
+    ModelVersionRepository(mongodb=mongodb).update_bin_edges(
+        model_version_id=MODEL_VERSION_ID,
+        bin_edges={"features": {"length": LENGTH_EDGES}},
+    )
+
+    rows = []
+    for day in range(5):
+        for hour in [1, 7, 13, 19]:
+            prediction = "true" if (day + hour) % 3 else "false"
+            rows.append(
+                BaseClassificationEventRowDB(
+                    row_id=uuid.uuid4(),
+                    dataset_id=DATASET_ID,
+                    model_id=MODEL_ID,
+                    model_version_id=MODEL_VERSION_ID,
+                    columns=[
+                        EventDataColumnDB(
+                            name="color",
+                            value_categorical=["red", "blue", "green"][
+                                (day * hour) % 3
+                            ],
+                            data_type=ColumnDataType.CATEGORICAL,
+                            mapping_type=ColumnMappingType.FEATURE,
+                        ),
+                        EventDataColumnDB(
+                            name="length",
+                            value_numeric=(day * hour) % 10,
+                            data_type=ColumnDataType.NUMERIC,
+                            mapping_type=ColumnMappingType.FEATURE,
+                        ),
+                    ],
+                    created_at=FIRST_DAY + timedelta(days=day, hours=hour),
+                    prediction_cf=[prediction],
+                    actual_cf=["true" if hour < 12 else "false"],
+                    is_match=prediction == ("true" if hour < 12 else "false"),
+                ).dict()
+            )
+    mongodb.database[MONGO_COLLECTION_EVENT_ROWS].insert_many(rows)
+
+
+def refresh_views(
+    mongodb: MongodbBackendTesting, mocker, refresh_end: datetime, max_days: int = 31
+):
+    """Refreshes the views up to refresh_end, at most max_days per view"""
+    mocker.patch(
+        "waterdip.processor.views.metric_view_processor.datetime",
+        **{"utcnow.return_value": refresh_end},
+    )
+    return MetricViewProcessor(
+        dataset=event_dataset,
+        mongodb_backend=mongodb,
+        owner=str(uuid.uuid4()),
+        refresh_lag=0,
+        max_days=max_days,
+    ).process()
+
+
+@pytest.mark.usefixtures("mock_mongo_backend")
+class TestMetricViewProcessor:
+    def test_should_refresh_views_from_watermark(
+        self, mock_mongo_backend: MongodbBackendTesting, mocker
+    ):
+        setup_model(mock_mongo_backend)
+        view_repo = MetricViewRepository(mongodb=mock_mongo_backend)
+
+        refresh_end = FIRST_DAY + timedelta(days=5)
+        first = refresh_views(mock_mongo_backend, mocker, refresh_end, max_days=2)
+        second = refresh_views(mock_mongo_backend, mocker, refresh_end, max_days=2)
+
+        assert first == {view: 2 for view in MetricView}
+        assert second == {view: 2 for view in MetricView}
+        watermark = view_repo.find_watermark(
+            MetricView.PREDICTION_COUNTS, key=str(MODEL_ID)
+        )
+        assert watermark.view_start == FIRST_DAY
+        assert watermark.watermark == FIRST_DAY + timedelta(days=4)
+
+        predictions = view_repo.read_view(
+            MetricView.PREDICTION_COUNTS,
+            key=str(MODEL_ID),
+            time_range=TimeRange(
+                start_time=FIRST_DAY, end_time=FIRST_DAY + timedelta(days=5)
+            ),
+        )
+        assert predictions.days == {
+            FIRST_DAY + timedelta(days=day): {"count": 4} for day in range(4)
+        }
+        categorical = view_repo.read_view(
+            MetricView.CATEGORICAL_DATE_HISTOGRAM,
+            key=str(DATASET_ID),
+            time_range=TimeRange(
+                start_time=FIRST_DAY,
+                end_time=FIRST_DAY + timedelta(days=1, milliseconds=-1),
+            ),
+        )
+        assert sum(categorical.days[FIRST_DAY]["color"]["count"]) == 4
+
+    def test_should_not_refresh_claimed_view(
+        self, mock_mongo_backend: MongodbBackendTesting, mocker
+    ):
+        setup_model(mock_mongo_backend)
+        view_repo = MetricViewRepository(mongodb=mock_mongo_backend)
+        view_repo.claim_refresh(
+            MetricView.PREDICTION_COUNTS, key=str(MODEL_ID), owner="other"
+        )
+
+        refreshed = refresh_views(
+            mock_mongo_backend, mocker, FIRST_DAY + timedelta(days=5)
+        )
+
+        assert refreshed[MetricView.PREDICTION_COUNTS] == 0
+        assert refreshed[MetricView.CATEGORICAL_DATE_HISTOGRAM] == 5
+        assert (
+            mock_mongo_backend.database[MONGO_COLLECTION_METRIC_VIEWS].count_documents(
+                {"view": MetricView.PREDICTION_COUNTS.value}
+            )
+            == 0
+        )
+
+    def test_should_read_views_and_tail_rows(
+        self, mock_mongo_backend: MongodbBackendTesting, mocker
+    ):
+        setup_model(mock_mongo_backend)
+        view_repo = MetricViewRepository(mongodb=mock_mongo_backend)
+        collection = mock_mongo_backend.database[MONGO_COLLECTION_EVENT_ROWS]
+        # the watermark is in the middle of the third day, the rest is the tail
+        refresh_views(
+            mock_mongo_backend, mocker, FIRST_DAY + timedelta(days=2, hours=10)
+        )
+        time_range = TimeRange(
+            start_time=FIRST_DAY,
+            end_time=FIRST_DAY + timedelta(days=5) - timedelta(milliseconds=1),
+        )
+
+        psi_kwargs = dict(
+            collection=collection,
+            dataset_id=DATASET_ID,
+            baseline_dataset_id=DATASET_ID,
+            baseline_collection=collection,
+            baseline_time_range=time_range,
+            bin_edges={"length": LENGTH_EDGES},
+        )
+        # the baseline is aggregated once, before rows are deleted below
+        baseline = PSIMetrics(**psi_kwargs).baseline_distribution(
+            numeric_columns=["length"]
+        )
+
+        def psi_metrics(views):
+            return PSIMetrics(**psi_kwargs, baseline_distribution=baseline, views=views)
+
+        hist = ClassificationDateHistogramDBMetrics(
+            collection, dataset_id=DATASET_ID, positive_class="true"
+        )
+        row_service = EventDatasetRowService(
+            repository=EventDatasetRowRepository(mongodb=mock_mongo_backend),
+            model_version_repository=ModelVersionRepository(mongodb=mock_mongo_backend),
+            metric_view_repository=view_repo,
+        )
+
+        def results(views):
+            psi = psi_metrics(views)
+            classification_view = None
+            if views is not None:
+                classification_view = view_repo.read_view(
+                    MetricView.CLASSIFICATION_COUNTS,
+                    key=MetricViewRepository.classification_key(DATASET_ID, "true"),
+                    time_range=time_range,
+                )
+            return (
+                psi.aggregation_result(
+                    numeric_columns=["length"],
+                    categorical_columns=["color"],
+                    time_range=time_range,
+                ),
+                psi.feature_psi(
+                    numeric_columns=["length"],
+                    categorical_columns=["color"],
+                    time_range=time_range,
+                ),
+                hist.aggregation_result(
+                    time_range=time_range, view=classification_view
+                ),
+                row_service.prediction_histogram(str(MODEL_ID)),
+            )
+
+        rows_results = results(views=None)
+        # the rows of the first day are now only in the views
+        collection.delete_many({"created_at": {"$lt": FIRST_DAY + timedelta(days=1)}})
+        mocker.patch.object(settings, "metric_views_enabled", True)
+        view_results = results(views=partial(view_repo.read_view, key=str(DATASET_ID)))
+
+        assert view_results[0].keys() == rows_results[0].keys()
+        for date, psi_values in rows_results[0].items():
+            assert view_results[0][date] == pytest.approx(psi_values)
+        assert view_results[1] == pytest.approx(rows_results[1])
+        assert view_results[2] == rows_results[2]
+        assert view_results[3] == rows_results[3]
+        assert view_results[3].val == [4] * 5
@@ -0,0 +1,58 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from waterdip.server.db.telemetry import CommandTelemetry
+
+
+@pytest.mark.usefixtures("test_client")
+class TestInternalMetrics:
+    def test_should_return_command_stats(self, test_client: TestClient):
+        telemetry = CommandTelemetry.get_instance()
+        event = SimpleNamespace(
+            command_name="find",
+            command={"find": "wd_models", "filter": {"model_id": "1"}},
+            request_id=-1,
+            connection_id=("localhost", 27017),
+            duration_micros=1500,
+            reply={"cursor": {"firstBatch": [{}]}},
+        )
+        telemetry.started(event)
+        telemetry.succeeded(event)
+
+        response = test_client.get(url="/v1/metrics.internal")
+        response_data = response.json()
+
+        assert response.status_code == 200
+        assert response_data["slow_command_ms"] == telemetry.slow_command_ms
+        assert any(
+            command["collection"] == "wd_models" and command["docs_returned"] >= 1
+            for command in response_data["commands"]
+        )
+
+    def test_should_expose_prometheus_metrics(self, test_client: TestClient):
+        test_client.get(url="/v1/list.models")
+
+        response = test_client.get(url="/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert (
+            'waterdip_http_request_duration_seconds_count{route="list:models"'
+            in response.text
+        )
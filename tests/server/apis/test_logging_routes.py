@@ -26,8 +26,12 @@ from tests.testing_helpers import (
     MODEL_VERSION_V1_SCHEMA,
     MongodbBackendTesting,
 )
+from waterdip.server.commons.config import settings
 from waterdip.server.db.models.models import BaseModelVersionDB, ModelVersionSchemaInDB
-from waterdip.server.db.mongodb import MONGO_COLLECTION_MODEL_VERSIONS
+from waterdip.server.db.mongodb import (
+    MONGO_COLLECTION_DATASET_PROFILES,
+    MONGO_COLLECTION_MODEL_VERSIONS,
+)
 
 
 @pytest.mark.usefixtures("test_client")
@@ -62,7 +66,9 @@ class TestLogDataset:
             filter={"model_version_id": str(cls.LOCAL_MODEL_VERSION)}
         )
 
-    def test_should_log_batch_dataset(self, test_client: TestClient):
+    def test_should_log_batch_dataset(self, mocker, test_client: TestClient):
+        # mongomock does not support $stdDevPop
+        mocker.patch.object(settings, "is_testing", "true")
 
         request_body = {
             "model_version_id": str(self.LOCAL_MODEL_VERSION),
@@ -76,6 +82,24 @@ class TestLogDataset:
 
         assert response.status_code == 200
 
+        database = MongodbBackendTesting.get_instance().database
+        version_schema = database[MONGO_COLLECTION_MODEL_VERSIONS].find_one(
+            filter={"model_version_id": str(self.LOCAL_MODEL_VERSION)}
+        )["version_schema"]
+        assert version_schema["features"]["f1"]["bin_edges"][0] == 10.0
+        assert version_schema["features"]["f1"]["bin_edges"][-1] > 100.0
+        assert version_schema["predictions"]["p1"]["bin_edges"][0] == 0.0
+        assert "bin_edges" not in version_schema["features"]["f2"]
+
+        profile = database[MONGO_COLLECTION_DATASET_PROFILES].find_one(
+            filter={"model_version_id": str(self.LOCAL_MODEL_VERSION)}
+        )
+        numeric_stats = {
+            column["column_name"]: column for column in profile["numeric_column_stats"]
+        }
+        assert numeric_stats["f1"]["total"] == 2
+        assert sum(numeric_stats["f1"]["histogram"]["val"]) == 2
+
     def test_should_through_error_for_multiple_dataset_for_same_env(
         self, test_client: TestClient
     ):
@@ -21,6 +21,8 @@ from tests.testing_helper_metrics_data import (
     METRICS_MODEL_ID,
     METRICS_MODEL_VERSION_ID_V1,
 )
+from waterdip.core.metrics.data_metrics import CategoricalCountHistogram
+from waterdip.server.commons.config import settings
 
 
 @pytest.mark.usefixtures("test_client")
@@ -54,3 +56,100 @@ class TestDatasetMetrics:
         response = test_client.get(url="/v1/metrics.dataset", params=params)
         response_data = response.json()
         print(response_data)
+
+    def test_should_return_same_metrics_for_column_groups(
+        self, mocker, test_client: TestClient
+    ):
+        mocker.patch(
+            "waterdip.core.metrics.data_metrics.NumericCountHistogram.aggregation_result",
+            return_value={},
+        )
+        params = {
+            "model_id": METRICS_MODEL_ID,
+            "model_version_id": METRICS_MODEL_VERSION_ID_V1,
+            "dataset_id": METRICS_DATASET_EVENT_ID_V1,
+            "start_time": "2022-11-30T00:00:00",
+            "end_time": "2022-12-30T00:00:00",
+        }
+        # mongomock does not support $stdDevPop
+        mocker.patch.object(settings, "is_testing", "true")
+        single = test_client.get(url="/v1/metrics.dataset", params=params)
+        mocker.patch.object(settings, "metric_column_group_threshold", 0)
+        grouped = test_client.get(url="/v1/metrics.dataset", params=params)
+
+        assert grouped.status_code == 200
+        assert grouped.json() == single.json()
+        assert len(grouped.json()["numeric_column_stats"]) > 0
+
+    def test_should_serve_batch_dataset_metrics_from_profile(
+        self, mocker, test_client: TestClient
+    ):
+        mocker.patch(
+            "waterdip.core.metrics.data_metrics.NumericCountHistogram.aggregation_result",
+            return_value={},
+        )
+        params = {
+            "model_id": METRICS_MODEL_ID,
+            "model_version_id": METRICS_MODEL_VERSION_ID_V1,
+            "dataset_id": METRICS_DATASET_BATCH_ID_V1_1,
+        }
+        # mongomock does not support $stdDevPop
+        mocker.patch.object(settings, "is_testing", "true")
+        histogram = mocker.spy(CategoricalCountHistogram, "aggregation_result")
+
+        profiled = test_client.get(
+            url="/v1/metrics.dataset", params={**params, "refresh_profile": True}
+        )
+        served = test_client.get(url="/v1/metrics.dataset", params=params)
+        sampled = test_client.get(
+            url="/v1/metrics.dataset", params={**params, "sample_rate": 0.5}
+        )
+
+        assert profiled.status_code == 200
+        assert histogram.call_count == 1
+        assert served.json() == profiled.json()
+        assert sampled.json() == profiled.json()
+        assert len(served.json()["categorical_column_stats"]) > 0
+
+        test_client.get(
+            url="/v1/metrics.dataset", params={**params, "refresh_profile": True}
+        )
+        assert histogram.call_count == 2
+
+    def test_should_approximate_metrics_on_a_row_sample(
+        self, mocker, test_client: TestClient
+    ):
+        mocker.patch(
+            "waterdip.core.metrics.data_metrics.NumericCountHistogram.aggregation_result",
+            return_value={},
+        )
+        params = {
+            "model_id": METRICS_MODEL_ID,
+            "model_version_id": METRICS_MODEL_VERSION_ID_V1,
+            "dataset_id": METRICS_DATASET_EVENT_ID_V1,
+            "start_time": "2022-11-30T00:00:00",
+            "end_time": "2022-12-30T00:00:00",
+        }
+        # mongomock does not support $stdDevPop
+        mocker.patch.object(settings, "is_testing", "true")
+        exact = test_client.get(url="/v1/metrics.dataset", params=params).json()
+        full_sample = test_client.get(
+            url="/v1/metrics.dataset", params={**params, "sample_rate": 1}
+        ).json()
+        sampled = test_client.get(
+            url="/v1/metrics.dataset", params={**params, "sample_rate": 0.5}
+        )
+        invalid = test_client.get(
+            url="/v1/metrics.dataset", params={**params, "sample_rate": 0}
+        )
+
+        assert exact["sampling"] is None
+        assert full_sample["sampling"] == {"rate": 1.0, "confidence": 0.95}
+        for column_stats in full_sample["categorical_column_stats"]:
+            if column_stats["histogram"] is not None:
+                assert column_stats["histogram_error"] == [0.0] * len(
+                    column_stats["histogram"]["val"]
+                )
+        assert sampled.status_code == 200
+        assert sampled.json()["sampling"]["rate"] == 0.5
+        assert invalid.status_code == 422
@@ -12,14 +12,25 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+from datetime import datetime, timedelta
 from uuid import uuid4
 
 import pytest
 from fastapi.testclient import TestClient
 
-from tests.testing_helpers import MODEL_ID, MODEL_VERSION_ID_V1, MongodbBackendTesting
+from tests.testing_helpers import (
+    DATASET_EVENT_ID_V1,
+    MODEL_ID,
+    MODEL_VERSION_ID_V1,
+    MongodbBackendTesting,
+)
 from waterdip.core.commons.models import MonitorSeverity
-from waterdip.server.db.mongodb import MONGO_COLLECTION_MONITORS
+from waterdip.server.db.mongodb import (
+    MONGO_COLLECTION_ALERTS,
+    MONGO_COLLECTION_EVENT_ROWS,
+    MONGO_COLLECTION_MONITOR_RUNS,
+    MONGO_COLLECTION_MONITORS,
+)
 
 
 @pytest.mark.usefixtures("test_client")
@@ -170,3 +181,142 @@ class TestMonitorCreate:
         assert response.status_code == 200
         assert response_data["monitor_list"][0]["monitor_name"] == monitor_name
         assert len(list(response_data["monitor_list"])) == 1
+
+    def test_should_return_monitor_runs_list(self, test_client: TestClient):
+        monitor_id = str(uuid4())
+        collection = MongodbBackendTesting.get_instance().database[
+            MONGO_COLLECTION_MONITOR_RUNS
+        ]
+        collection.insert_many(
+            [
+                {
+                    "run_id": str(uuid4()),
+                    "monitor_id": monitor_id,
+                    "model_id": MODEL_ID,
+                    "monitor_type": "DATA_QUALITY",
+                    "status": "SUCCESS",
+                    "started_at": datetime.utcnow() - timedelta(hours=3 - hour),
+                    "duration": 0.5,
+                    "rows_scanned": 100,
+                    "violations": hour,
+                    "alerts_sent": 0,
+                }
+                for hour in range(3)
+            ]
+        )
+
+        response = test_client.get(
+            url="/v1/list.monitor.runs", params={"monitor_id": monitor_id, "limit": 2}
+        )
+        response_data = response.json()
+
+        assert response.status_code == 200
+        assert [run["violations"] for run in response_data["run_list"]] == [2, 1]
+        assert response_data["meta"]["total"] == 3
+        collection.delete_many(filter={"monitor_id": monitor_id})
+
+    def test_should_backfill_empty_value_monitor(self, test_client: TestClient):
+        database = MongodbBackendTesting.get_instance().database
+        monitor_id = str(uuid4())
+        database[MONGO_COLLECTION_MONITORS].insert_one(
+            {
+                "monitor_id": monitor_id,
+                "monitor_name": "backfill_monitor",
+                "monitor_type": "DATA_QUALITY",
+                "monitor_identification": {
+                    "model_id": MODEL_ID,
+                    "model_version_id": MODEL_VERSION_ID_V1,
+                },
+                "monitor_condition": {
+                    "evaluation_metric": "EMPTY_VALUE",
+                    "dimensions": {"features": ["backfill_f1"]},
+                    "threshold": {"threshold": "gt", "value": 1},
+                    "evaluation_window": "1d",
+                },
+                "created_at": datetime.utcnow(),
+                "severity": "LOW",
+            }
+        )
+        row_ids = [str(uuid4()) for _ in range(3)]
+        database[MONGO_COLLECTION_EVENT_ROWS].insert_many(
+            [
+                {
+                    "row_id": row_id,
+                    "dataset_id": DATASET_EVENT_ID_V1,
+                    "created_at": datetime.utcnow() - timedelta(days=2),
+                    "columns": [
+                        {
+                            "name": "backfill_f1",
+                            "value_numeric": None,
+                            "data_type": "NUMERIC",
+                            "mapping_type": "FEATURE",
+                        }
+                    ],
+                }
+                for row_id in row_ids
+            ]
+        )
+
+        response = test_client.post(
+            url="/v1/monitor.backfill",
+            json={"monitor_id": monitor_id, "days": 5, "create_alerts": True},
+        )
+        response_data = response.json()
+
+        assert response.status_code == 200
+        assert len(response_data["violations"]) == 1
+        assert response_data["violations"][0]["dimension"] == "backfill_f1"
+        assert response_data["violations"][0]["metric_value"] == 3
+        assert response_data["alerts_created"] == 1
+        assert (
+            datetime.fromisoformat(response_data["violations"][0]["evaluated_at"])
+            <= datetime.utcnow()
+        )
+
+        response = test_client.post(
+            url="/v1/monitor.backfill",
+            json={"monitor_id": monitor_id, "days": 5, "create_alerts": True},
+        )
+
+        assert response.json()["alerts_created"] == 0
+        assert (
+            database[MONGO_COLLECTION_ALERTS].count_documents(
+                {"monitor_id": monitor_id}
+            )
+            == 1
+        )
+
+        database[MONGO_COLLECTION_ALERTS].delete_many({"monitor_id": monitor_id})
+        database[MONGO_COLLECTION_EVENT_ROWS].delete_many({"row_id": {"$in": row_ids}})
+        database[MONGO_COLLECTION_MONITORS].delete_one({"monitor_id": monitor_id})
+
+    def test_should_reject_backfill_of_unsupported_monitor(
+        self, test_client: TestClient
+    ):
+        database = MongodbBackendTesting.get_instance().database
+        monitor_id = str(uuid4())
+        database[MONGO_COLLECTION_MONITORS].insert_one(
+            {
+                "monitor_id": monitor_id,
+                "monitor_name": "backfill_drift_monitor",
+                "monitor_type": "DRIFT",
+                "monitor_identification": {
+                    "model_id": MODEL_ID,
+                    "model_version_id": MODEL_VERSION_ID_V1,
+                },
+                "monitor_condition": {
+                    "evaluation_metric": "PSI",
+                    "dimensions": {"features": ["f1"]},
+                    "threshold": {"threshold": "gt", "value": 1},
+                },
+                "created_at": datetime.utcnow(),
+                "severity": "LOW",
+            }
+        )
+
+        response = test_client.post(
+            url="/v1/monitor.backfill", json={"monitor_id": monitor_id}
+        )
+
+        assert response.status_code == 400
+        database[MONGO_COLLECTION_MONITORS].delete_one({"monitor_id": monitor_id})
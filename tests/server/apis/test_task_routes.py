@@ -0,0 +1,49 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import pytest
+from fastapi.testclient import TestClient
+
+from waterdip.server.commons.config import settings
+
+
+@pytest.mark.usefixtures("test_client")
+class TestTaskStatus:
+    def test_should_not_look_up_status_without_task_results(
+        self, test_client: TestClient, mocker
+    ):
+        mocker.patch.object(settings, "celery_task_results_enabled", False)
+
+        response = test_client.get(url="/v1/task.status", params={"job_id": "1"})
+
+        assert response.status_code == 501
+        assert "WD_CELERY_TASK_RESULTS_ENABLED" in response.json()["detail"]
+
+    def test_should_return_status_with_task_results(
+        self, test_client: TestClient, mocker
+    ):
+        mocker.patch.object(settings, "celery_task_results_enabled", True)
+        task_result = mocker.patch(
+            "waterdip.server.apis.routes.task_routes.AsyncResult"
+        ).return_value
+        task_result.status, task_result.result = "SUCCESS", 3
+
+        response = test_client.get(url="/v1/task.status", params={"job_id": "1"})
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "task_id": "1",
+            "task_status": "SUCCESS",
+            "task_result": 3,
+        }
@@ -138,6 +138,55 @@ class TestAlertRepository:
         ].count_documents({"model_id": str(self.model_ids[0])})
         assert count == 0
 
+    def test_should_upsert_backfill_alerts_per_evaluated_day(self):
+        monitor_id = uuid.uuid4()
+
+        def backfill_alert(evaluated_at: datetime.datetime, focal_value: int):
+            return BaseAlertDB(
+                monitor_type=MonitorType.DATA_QUALITY,
+                model_id=self.model_ids[0],
+                alert_id=uuid.uuid4(),
+                monitor_id=monitor_id,
+                created_at=evaluated_at,
+                violation={
+                    "field": "f1",
+                    "max_threshold": 1,
+                    "focal_time_window": "1d",
+                    "focal_value": focal_value,
+                    "evaluated_at": evaluated_at,
+                    "backfilled": True,
+                },
+            )
+
+        inserted = self.alert_repository.upsert_backfill_alerts(
+            [
+                backfill_alert(datetime.datetime(2022, 1, 2), 2),
+                backfill_alert(datetime.datetime(2022, 1, 2, 10), 3),
+            ]
+        )
+        # the current day is backfilled again later that day
+        upserted = self.alert_repository.upsert_backfill_alerts(
+            [
+                backfill_alert(datetime.datetime(2022, 1, 2), 2),
+                backfill_alert(datetime.datetime(2022, 1, 2, 12), 5),
+            ]
+        )
+
+        alerts = list(
+            self.mock_mongo_backend.database[MONGO_COLLECTION_ALERTS]
+            .find({"monitor_id": str(monitor_id)})
+            .sort("violation.evaluated_at", 1)
+        )
+        assert inserted == 2
+        assert upserted == 0
+        assert [alert["violation"]["evaluated_at"] for alert in alerts] == [
+            datetime.datetime(2022, 1, 2),
+            datetime.datetime(2022, 1, 2, 12),
+        ]
+        assert alerts[1]["violation"]["focal_value"] == 5
+        assert alerts[1]["violation"]["backfilled"] is True
+        assert alerts[1]["model_id"] == str(self.model_ids[0])
+
     @classmethod
     def teardown_class(cls):
         cls.mock_mongo_backend.database[MONGO_COLLECTION_ALERTS].drop()
@@ -0,0 +1,54 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import uuid
+from datetime import datetime
+
+import pytest
+
+from tests.testing_helpers import MongodbBackendTesting
+from waterdip.server.db.models.baselines import BaseBaselineHistogramDB
+from waterdip.server.db.repositories.baseline_repository import (
+    BaselineHistogramRepository,
+)
+
+
+@pytest.mark.usefixtures("mock_mongo_backend")
+class TestBaselineHistogramRepository:
+    def test_should_save_and_replace_baseline_histogram(
+        self, mock_mongo_backend: MongodbBackendTesting
+    ):
+        baseline_repo = BaselineHistogramRepository(mongodb=mock_mongo_backend)
+        model_version_id = uuid.uuid4()
+        baseline_key = f"{model_version_id}:{uuid.uuid4()}"
+
+        for count in [1, 2]:
+            baseline_repo.save_baseline_histogram(
+                BaseBaselineHistogramDB(
+                    baseline_key=baseline_key,
+                    model_version_id=model_version_id,
+                    numeric={"f1": {"bins": [0, 5], "count": [count]}},
+                    categorical={},
+                    created_at=datetime.utcnow(),
+                )
+            )
+        baseline = baseline_repo.find_baseline_histogram(baseline_key=baseline_key)
+
+        assert baseline.numeric["f1"]["count"] == [2]
+        assert baseline_repo.find_baseline_histogram(baseline_key="missing") is None
+
+        baseline_repo.delete_baseline_histograms_by_model_version_id(
+            str(model_version_id)
+        )
+        assert baseline_repo.find_baseline_histogram(baseline_key=baseline_key) is None
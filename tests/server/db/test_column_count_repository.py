@@ -0,0 +1,59 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from tests.testing_helpers import MongodbBackendTesting
+from waterdip.core.commons.models import TimeRange
+from waterdip.core.metrics.data_metrics import CountEmptyHourlyCounters
+from waterdip.server.db.repositories.column_count_repository import (
+    ColumnCountRepository,
+)
+
+
+@pytest.mark.usefixtures("mock_mongo_backend")
+class TestColumnCountRepository:
+    def test_should_increment_hourly_counters(
+        self, mock_mongo_backend: MongodbBackendTesting
+    ):
+        count_repo = ColumnCountRepository(mongodb=mock_mongo_backend)
+        dataset_id = uuid.uuid4()
+        hour = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+
+        assert count_repo.increment_counts(dataset_id, {}) == 0
+        count_repo.increment_counts(
+            dataset_id, {("f1", hour): (1, 3), ("f2", hour): (0, 3)}
+        )
+        count_repo.increment_counts(
+            dataset_id,
+            {("f1", hour): (2, 2), ("f1", hour - timedelta(hours=5)): (4, 4)},
+        )
+
+        assert count_repo.collection.count_documents({}) == 3
+        metric = CountEmptyHourlyCounters(
+            collection=count_repo.collection, dataset_id=dataset_id
+        )
+        empties = metric.aggregation_result(
+            time_range=TimeRange(
+                start_time=hour - timedelta(hours=1, minutes=30),
+                end_time=datetime.utcnow(),
+            )
+        )
+        assert empties["f1"]["empty_count"] == 3
+        assert empties["f1"]["total_count"] == 5
+        assert empties["f1"]["empty_percentage"] == 60.0
+        assert empties["f2"]["empty_count"] == 0
@@ -19,11 +19,16 @@ import pytest
 from fastapi import Depends
 
 from waterdip.core.commons.models import ColumnDataType, ColumnMappingType
+from waterdip.server.commons.config import settings
 from waterdip.server.db.models.dataset_rows import (
     BaseDatasetBatchRowDB,
     BaseEventRowDB,
     EventDataColumnDB,
 )
+from waterdip.server.db.models.models import (
+    ModelVersionSchemaFieldDetails,
+    ModelVersionSchemaInDB,
+)
 from waterdip.server.db.mongodb import (
     MONGO_COLLECTION_BATCH_ROWS,
     MONGO_COLLECTION_EVENT_ROWS,
@@ -64,6 +69,65 @@ class TestEventDatasetRowRepository:
         created_rows = event_repo.insert_rows(rows=rows)
         assert len(created_rows) == len(rows)
 
+    def test_should_insert_compact_rows(
+        self, mock_mongo_backend: MongodbBackend, mocker
+    ):
+        mocker.patch.object(settings, "event_row_layout", "v2")
+        event_repo = EventDatasetRowRepository(mongodb=mock_mongo_backend)
+        mongo_db = mock_mongo_backend.database[MONGO_COLLECTION_EVENT_ROWS]
+        model_id = uuid.uuid4()
+        version_schema = ModelVersionSchemaInDB(
+            features={
+                "f1": ModelVersionSchemaFieldDetails(data_type=ColumnDataType.NUMERIC),
+                "f2": ModelVersionSchemaFieldDetails(
+                    data_type=ColumnDataType.CATEGORICAL
+                ),
+            },
+            predictions={
+                "p1": ModelVersionSchemaFieldDetails(
+                    data_type=ColumnDataType.CATEGORICAL
+                )
+            },
+        )
+        row = BaseEventRowDB(
+            row_id=uuid.uuid4(),
+            dataset_id=uuid.uuid4(),
+            model_id=model_id,
+            model_version_id=uuid.uuid4(),
+            columns=[
+                EventDataColumnDB(
+                    name="p1",
+                    value_categorical="yes",
+                    data_type=ColumnDataType.CATEGORICAL,
+                    mapping_type=ColumnMappingType.PREDICTION,
+                ),
+                EventDataColumnDB(
+                    name="f2",
+                    value_categorical="red",
+                    data_type=ColumnDataType.CATEGORICAL,
+                    mapping_type=ColumnMappingType.FEATURE,
+                ),
+                EventDataColumnDB(
+                    name="f1",
+                    value_numeric=1,
+                    data_type=ColumnDataType.NUMERIC,
+                    mapping_type=ColumnMappingType.FEATURE,
+                ),
+            ],
+            created_at=datetime.utcnow(),
+        )
+
+        event_repo.insert_rows(rows=[row], version_schema=version_schema)
+        stored = mongo_db.find_one(
+            {"model_id": event_repo.row_reader().id_value(model_id)}
+        )
+
+        assert stored["v"] == 2
+        assert "columns" not in stored
+        assert stored["n"] == [[0, 1]]
+        assert stored["c"] == [[2, "yes"], [1, "red"]]
+        assert event_repo.count_prediction_by_model_id(model_id=str(model_id)) == 1
+
     def test_count_prediction_by_model_id(self, mock_mongo_backend: MongodbBackend):
         event_repo = EventDatasetRowRepository(mongodb=mock_mongo_backend)
         mongo_db = mock_mongo_backend.database[MONGO_COLLECTION_EVENT_ROWS]
@@ -202,7 +266,6 @@ class TestEventDatasetRowRepository:
         assert count == len(rows)
 
     def test_should_delete_event_dataset_row(self, mock_mongo_backend: MongodbBackend):
-
         event_repo = EventDatasetRowRepository(mongodb=mock_mongo_backend)
         mongo_db = mock_mongo_backend.database[MONGO_COLLECTION_EVENT_ROWS]
         mongo_db.delete_many({})
@@ -0,0 +1,127 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from tests.testing_helpers import MongodbBackendTesting
+from waterdip.core.commons.models import MetricView, TimeRange
+from waterdip.server.db.models.metric_views import BaseMetricViewDB
+from waterdip.server.db.repositories.metric_view_repository import MetricViewRepository
+
+DAY = datetime(year=2023, month=1, day=1)
+
+
+def prediction_counts(start_time: datetime, end_time: datetime, count: int):
+    return BaseMetricViewDB(
+        view=MetricView.PREDICTION_COUNTS,
+        key="model",
+        day=start_time.replace(hour=0),
+        start_time=start_time,
+        end_time=end_time,
+        value={"count": count},
+    )
+
+
+@pytest.mark.usefixtures("mock_mongo_backend")
+class TestMetricViewRepository:
+    def test_should_claim_refresh_once(self, mock_mongo_backend: MongodbBackendTesting):
+        view_repo = MetricViewRepository(mongodb=mock_mongo_backend)
+
+        claim = view_repo.claim_refresh(
+            MetricView.PREDICTION_COUNTS, "model", owner="a"
+        )
+
+        assert claim.owner == "a"
+        assert claim.watermark is None
+        assert (
+            view_repo.claim_refresh(MetricView.PREDICTION_COUNTS, "model", owner="b")
+            is None
+        )
+        assert view_repo.release_refresh(claim)
+        assert (
+            view_repo.claim_refresh(
+                MetricView.PREDICTION_COUNTS, "model", owner="b"
+            ).owner
+            == "b"
+        )
+
+    def test_should_not_complete_refresh_of_expired_claim(
+        self, mock_mongo_backend: MongodbBackendTesting
+    ):
+        view_repo = MetricViewRepository(mongodb=mock_mongo_backend)
+        expired = view_repo.claim_refresh(
+            MetricView.PREDICTION_COUNTS, "model", owner="a", ttl=-1
+        )
+        claim = view_repo.claim_refresh(
+            MetricView.PREDICTION_COUNTS, "model", owner="b"
+        )
+
+        assert not view_repo.complete_refresh(
+            expired,
+            views=[prediction_counts(DAY, DAY + timedelta(hours=12), 3)],
+            view_start=DAY,
+            watermark=DAY + timedelta(hours=12),
+        )
+        assert view_repo.complete_refresh(
+            claim,
+            views=[prediction_counts(DAY, DAY + timedelta(hours=10), 2)],
+            view_start=DAY,
+            watermark=DAY + timedelta(hours=10),
+        )
+        assert view_repo.find_watermark(
+            MetricView.PREDICTION_COUNTS, "model"
+        ).watermark == DAY + timedelta(hours=10)
+
+    def test_should_read_intervals_by_day(
+        self, mock_mongo_backend: MongodbBackendTesting
+    ):
+        view_repo = MetricViewRepository(mongodb=mock_mongo_backend)
+        time_range = TimeRange(start_time=DAY, end_time=DAY + timedelta(days=3))
+        assert (
+            view_repo.read_view(MetricView.PREDICTION_COUNTS, "model", time_range)
+            is None
+        )
+
+        for views, watermark in [
+            (
+                [prediction_counts(DAY, DAY + timedelta(hours=12), 3)],
+                DAY + timedelta(hours=12),
+            ),
+            (
+                [
+                    prediction_counts(
+                        DAY + timedelta(hours=12), DAY + timedelta(days=1), 2
+                    ),
+                    prediction_counts(
+                        DAY + timedelta(days=1), DAY + timedelta(days=1, hours=6), 1
+                    ),
+                ],
+                DAY + timedelta(days=1, hours=6),
+            ),
+        ]:
+            claim = view_repo.claim_refresh(
+                MetricView.PREDICTION_COUNTS, "model", owner="a"
+            )
+            assert view_repo.complete_refresh(
+                claim, views=views, view_start=DAY, watermark=watermark
+            )
+
+        view = view_repo.read_view(MetricView.PREDICTION_COUNTS, "model", time_range)
+
+        assert view.start_time == DAY
+        assert view.end_time == DAY + timedelta(days=1, hours=6)
+        assert view.days == {DAY: {"count": 5}, DAY + timedelta(days=1): {"count": 1}}
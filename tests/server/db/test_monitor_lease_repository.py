@@ -0,0 +1,79 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import uuid
+
+import pytest
+
+from tests.testing_helpers import MongodbBackendTesting
+from waterdip.server.db.mongodb import MONGO_COLLECTION_MONITOR_LEASES
+from waterdip.server.db.repositories.monitor_lease_repository import (
+    MonitorLeaseRepository,
+)
+
+
+@pytest.mark.usefixtures("mock_mongo_backend")
+class TestMonitorLeaseRepository:
+    def test_should_acquire_lease(self, mock_mongo_backend: MongodbBackendTesting):
+        lease_repo = MonitorLeaseRepository(mongodb=mock_mongo_backend)
+        monitor_id = uuid.uuid4()
+
+        lease = lease_repo.acquire_lease(monitor_id=monitor_id, owner="worker-1")
+
+        lease_in_db = mock_mongo_backend.database[
+            MONGO_COLLECTION_MONITOR_LEASES
+        ].find_one({"monitor_id": str(monitor_id)})
+        assert lease is not None
+        assert lease_in_db["owner"] == "worker-1"
+        assert lease_in_db["fence_token"] == lease.fence_token
+
+    def test_should_not_acquire_held_lease(
+        self, mock_mongo_backend: MongodbBackendTesting
+    ):
+        lease_repo = MonitorLeaseRepository(mongodb=mock_mongo_backend)
+        monitor_id = uuid.uuid4()
+
+        lease = lease_repo.acquire_lease(monitor_id=monitor_id, owner="worker-1")
+        overlapping_lease = lease_repo.acquire_lease(
+            monitor_id=monitor_id, owner="worker-2"
+        )
+
+        assert lease is not None
+        assert overlapping_lease is None
+
+    def test_should_take_over_expired_lease_with_higher_fence_token(
+        self, mock_mongo_backend: MongodbBackendTesting
+    ):
+        lease_repo = MonitorLeaseRepository(mongodb=mock_mongo_backend)
+        monitor_id = uuid.uuid4()
+
+        expired_lease = lease_repo.acquire_lease(
+            monitor_id=monitor_id, owner="worker-1", ttl=-1
+        )
+        lease = lease_repo.acquire_lease(monitor_id=monitor_id, owner="worker-2")
+
+        assert lease.owner == "worker-2"
+        assert lease.fence_token > expired_lease.fence_token
+        assert lease_repo.release_lease(expired_lease) is False
+
+    def test_should_release_lease(self, mock_mongo_backend: MongodbBackendTesting):
+        lease_repo = MonitorLeaseRepository(mongodb=mock_mongo_backend)
+        monitor_id = uuid.uuid4()
+
+        lease = lease_repo.acquire_lease(monitor_id=monitor_id, owner="worker-1")
+        released = lease_repo.release_lease(lease)
+        next_lease = lease_repo.acquire_lease(monitor_id=monitor_id, owner="worker-2")
+
+        assert released is True
+        assert next_lease.fence_token == lease.fence_token + 1
@@ -0,0 +1,66 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from tests.testing_helpers import MongodbBackendTesting
+from waterdip.core.commons.models import MonitorType
+from waterdip.server.db.models.monitors import BaseMonitorRunDB
+from waterdip.server.db.mongodb import MONGO_COLLECTION_MONITOR_RUNS
+from waterdip.server.db.repositories.monitor_run_repository import MonitorRunRepository
+
+
+@pytest.mark.usefixtures("mock_mongo_backend")
+class TestMonitorRunRepository:
+    def test_should_insert_and_find_latest_runs(
+        self, mock_mongo_backend: MongodbBackendTesting
+    ):
+        run_repo = MonitorRunRepository(mongodb=mock_mongo_backend)
+        monitor_id = uuid.uuid4()
+        started_at = datetime.utcnow() - timedelta(days=1)
+
+        for i in range(3):
+            run_repo.insert_run(
+                BaseMonitorRunDB(
+                    run_id=str(i),
+                    monitor_id=monitor_id,
+                    model_id=uuid.uuid4(),
+                    monitor_type=MonitorType.DRIFT,
+                    status="SUCCESS",
+                    started_at=started_at + timedelta(hours=i),
+                    duration=1.5,
+                    rows_scanned=10,
+                )
+            )
+        runs = run_repo.find_runs(filters={"monitor_id": str(monitor_id)}, limit=2)
+
+        assert [run.run_id for run in runs] == ["2", "1"]
+        assert run_repo.count_runs(filters={"monitor_id": str(monitor_id)}) == 3
+
+    def test_should_expire_runs_after_retention(
+        self, mock_mongo_backend: MongodbBackendTesting
+    ):
+        run_repo = MonitorRunRepository(mongodb=mock_mongo_backend)
+        monitor_id = uuid.uuid4()
+        mock_mongo_backend.database[MONGO_COLLECTION_MONITOR_RUNS].insert_one(
+            {
+                "monitor_id": str(monitor_id),
+                "started_at": datetime.utcnow() - timedelta(days=365),
+            }
+        )
+
+        assert run_repo.count_runs(filters={"monitor_id": str(monitor_id)}) == 0
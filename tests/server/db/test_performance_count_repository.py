@@ -0,0 +1,108 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from tests.testing_helpers import MongodbBackendTesting
+from waterdip.server.db.models.performance_counts import BasePerformanceCountDB
+from waterdip.server.db.repositories.performance_count_repository import (
+    PerformanceCountRepository,
+)
+
+
+@pytest.mark.usefixtures("mock_mongo_backend")
+class TestPerformanceCountRepository:
+    def test_should_store_counted_interval_once(
+        self, mock_mongo_backend: MongodbBackendTesting
+    ):
+        count_repo = PerformanceCountRepository(mongodb=mock_mongo_backend)
+        dataset_id = uuid.uuid4()
+
+        def counts(start_hour: int, end_hour: int, total: int):
+            return BasePerformanceCountDB(
+                dataset_id=dataset_id,
+                positive_class="true",
+                day=datetime(year=2023, month=1, day=1),
+                start_time=datetime(year=2023, month=1, day=1, hour=start_hour),
+                end_time=datetime(year=2023, month=1, day=1, hour=end_hour),
+                total=total,
+            )
+
+        assert count_repo.find_counted_range(dataset_id, "true") is None
+        assert count_repo.insert_counts([counts(0, 10, 5), counts(10, 11, 2)]) == 2
+        assert count_repo.insert_counts([counts(10, 11, 2), counts(11, 12, 1)]) == 1
+
+        counted = count_repo.find_counted_range(dataset_id, "true")
+        summed = count_repo.sum_counts(
+            dataset_id=dataset_id,
+            positive_class="true",
+            start_day=datetime(year=2023, month=1, day=1),
+            end_time=datetime(year=2023, month=1, day=1, hour=12),
+        )
+        assert counted.start_time == datetime(year=2023, month=1, day=1)
+        assert counted.end_time == datetime(year=2023, month=1, day=1, hour=12)
+        assert summed["total"] == 8
+
+    def test_should_replace_counted_intervals_by_start(
+        self, mock_mongo_backend: MongodbBackendTesting
+    ):
+        count_repo = PerformanceCountRepository(mongodb=mock_mongo_backend)
+        dataset_id = uuid.uuid4()
+
+        def counts(start_minute: int, end_minute: int, total: int):
+            return BasePerformanceCountDB(
+                dataset_id=dataset_id,
+                positive_class="true",
+                day=datetime(year=2023, month=1, day=1),
+                start_time=datetime(year=2023, month=1, day=1, hour=10)
+                + timedelta(minutes=start_minute),
+                end_time=datetime(year=2023, month=1, day=1, hour=10)
+                + timedelta(minutes=end_minute),
+                total=total,
+            )
+
+        count_repo.insert_counts([counts(0, 30, 1), counts(30, 60, 1)])
+        recount_start = count_repo.find_recount_start(
+            dataset_id,
+            "true",
+            counted_after=datetime(year=2023, month=1, day=1, hour=10),
+        )
+        assert recount_start == datetime(year=2023, month=1, day=1, hour=10)
+
+        # the interval starting at 10:30 overlaps the recounted hour and is removed
+        assert (
+            count_repo.replace_counts(
+                dataset_id,
+                "true",
+                start_time=recount_start,
+                end_time=datetime(year=2023, month=1, day=1, hour=11, minute=30),
+                counts=[counts(0, 60, 3), counts(60, 90, 1)],
+            )
+            == 2
+        )
+
+        counted = count_repo.find_counted_range(dataset_id, "true")
+        summed = count_repo.sum_counts(
+            dataset_id=dataset_id,
+            positive_class="true",
+            start_day=datetime(year=2023, month=1, day=1),
+            end_time=datetime(year=2023, month=1, day=1, hour=12),
+        )
+        assert counted.end_time == datetime(
+            year=2023, month=1, day=1, hour=11, minute=30
+        )
+        assert summed["total"] == 4
@@ -0,0 +1,439 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+
+"""
+Query plan regression tests of the built-in aggregation pipelines.
+
+Each case runs a metric or service against a seeded database and captures the
+pipelines it sends. The keys of the leading $match of every pipeline must form
+a prefix of a compound index of the collection, starting with an equality. When WD_TEST_MONGO_URL points to a mongodb the
+pipelines are also explained there, the plan must use an IXSCAN without any
+COLLSCAN and examine at most MAX_DOCS_EXAMINED_PER_RESULT documents per
+document returned by the leading $match
+"""
+
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Set, Tuple
+from unittest.mock import Mock
+
+import mongomock
+import pytest
+from pymongo import MongoClient
+
+from waterdip.core.commons.models import TimeRange
+from waterdip.core.metrics.classification_metrics import (
+    ClassificationDateHistogramDBMetrics,
+)
+from waterdip.core.metrics.data_metrics import (
+    CardinalityCategorical,
+    CategoricalCountHistogram,
+    CategoricalNestedDateCountHistogram,
+    CountEmptyDateHistogram,
+    CountEmptyHistogram,
+    CountEmptyHourlyCounters,
+    NumericBasicMetrics,
+    NumericCountHistogram,
+    NumericNestedCountDateHistogram,
+)
+from waterdip.core.metrics.drift_psi import PSIMetrics
+from waterdip.server.db.models.alerts import BaseAlertDB
+from waterdip.server.db.models.dataset_rows import (
+    BaseClassificationEventRowDB,
+    BaseDatasetBatchRowDB,
+)
+from waterdip.server.db.mongodb import (
+    MONGO_COLLECTION_ALERTS,
+    MONGO_COLLECTION_BATCH_ROWS,
+    MONGO_COLLECTION_EVENT_ROWS,
+    MONGO_COLLECTION_MONITORS,
+    MongodbBackend,
+)
+from waterdip.server.db.repositories.alert_repository import AlertRepository
+from waterdip.server.db.repositories.column_count_repository import (
+    ColumnCountRepository,
+)
+from waterdip.server.db.repositories.dataset_row_repository import (
+    BatchDatasetRowRepository,
+    EventDatasetRowRepository,
+)
+from waterdip.server.services.alert_service import AlertService
+from waterdip.server.services.row_service import EventDatasetRowService
+
+MAX_DOCS_EXAMINED_PER_RESULT = 1.5
+QUERY_PLAN_DATABASE = "wd_query_plan_test"
+
+MODEL_IDS = [str(uuid.uuid4()) for _ in range(3)]
+EVENT_DATASET_IDS = [str(uuid.uuid4()) for _ in range(3)]
+BATCH_DATASET_IDS = [str(uuid.uuid4()) for _ in range(3)]
+NUMERIC_COLUMNS = ["length", "height"]
+CATEGORICAL_COLUMNS = ["color", "class"]
+NOW = datetime.utcnow().replace(microsecond=0)
+TIME_RANGE = TimeRange(start_time=NOW - timedelta(days=3), end_time=NOW)
+
+
+class RecordingCollection:
+    """Delegates to the collection and keeps every pipeline aggregated on it"""
+
+    def __init__(self, collection, pipelines: List[Tuple[str, List[Dict]]]):
+        self._collection = collection
+        self._pipelines = pipelines
+
+    def aggregate(self, pipeline: List[Dict], *args, **kwargs):
+        self._pipelines.append((self._collection.name, pipeline))
+        return self._collection.aggregate(pipeline, *args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._collection, name)
+
+
+class RecordingDatabase:
+    def __init__(self, database, pipelines: List[Tuple[str, List[Dict]]]):
+        self._database = database
+        self._pipelines = pipelines
+
+    def __getitem__(self, name: str) -> RecordingCollection:
+        return RecordingCollection(self._database[name], self._pipelines)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._database, name)
+
+
+class RecordingBackend(MongodbBackend):
+    def __init__(self, mongo_client, mongo_database: str):
+        super().__init__(mongo_client=mongo_client, mongo_database=mongo_database)
+        self.pipelines: List[Tuple[str, List[Dict]]] = []
+
+    @property
+    def database(self) -> RecordingDatabase:
+        return RecordingDatabase(self._client[self._database_name], self.pipelines)
+
+
+def _event_rows(model_id: str, dataset_id: str) -> List[Dict]:
+    rows = []
+    for i in range(60):
+        label = "yes" if i % 3 else "no"
+        rows.append(
+            BaseClassificationEventRowDB(
+                row_id=uuid.uuid4(),
+                dataset_id=dataset_id,
+                model_id=model_id,
+                model_version_id=model_id,
+                created_at=NOW - timedelta(hours=i),
+                columns=[
+                    {
+                        "name": "length",
+                        "value_numeric": i,
+                        "data_type": "NUMERIC",
+                        "mapping_type": "FEATURE",
+                    },
+                    {
+                        "name": "height",
+                        "value_numeric": None if i % 7 == 0 else i % 11,
+                        "data_type": "NUMERIC",
+                        "mapping_type": "FEATURE",
+                    },
+                    {
+                        "name": "color",
+                        "value_categorical": ["red", "blue", "green"][i % 3],
+                        "data_type": "CATEGORICAL",
+                        "mapping_type": "FEATURE",
+                    },
+                    {
+                        "name": "class",
+                        "value_categorical": label,
+                        "data_type": "CATEGORICAL",
+                        "mapping_type": "PREDICTION",
+                    },
+                ],
+                prediction_cf=[label],
+                actual_cf=["yes"],
+                is_match=label == "yes",
+            ).dict()
+        )
+    return rows
+
+
+def _batch_rows(model_id: str, dataset_id: str) -> List[Dict]:
+    return [
+        BaseDatasetBatchRowDB(
+            row_id=uuid.uuid4(),
+            dataset_id=dataset_id,
+            model_id=model_id,
+            model_version_id=model_id,
+            created_at=NOW,
+            columns=[
+                {"name": "length", "value_numeric": i, "data_type": "NUMERIC"},
+                {"name": "height", "value_numeric": i % 5, "data_type": "NUMERIC"},
+                {
+                    "name": "color",
+                    "value_categorical": ["red", "blue"][i % 2],
+                    "data_type": "CATEGORICAL",
+                },
+                {
+                    "name": "class",
+                    "value_categorical": "yes",
+                    "data_type": "CATEGORICAL",
+                },
+            ],
+        ).dict()
+        for i in range(30)
+    ]
+
+
+def _alerts(model_id: str) -> List[Dict]:
+    return [
+        BaseAlertDB(
+            model_id=model_id,
+            alert_id=uuid.uuid4(),
+            monitor_id=uuid.uuid4(),
+            monitor_type="DRIFT",
+            created_at=NOW - timedelta(days=i),
+        ).dict()
+        for i in range(10)
+    ]
+
+
+@pytest.fixture(scope="module")
+def plan_backend() -> RecordingBackend:
+    mongo_url = os.environ.get("WD_TEST_MONGO_URL")
+    client = MongoClient(mongo_url) if mongo_url else mongomock.MongoClient()
+    client.drop_database(QUERY_PLAN_DATABASE)
+    backend = RecordingBackend(mongo_client=client, mongo_database=QUERY_PLAN_DATABASE)
+
+    # the repositories create the indexes of their collections
+    EventDatasetRowRepository(mongodb=backend)
+    BatchDatasetRowRepository(mongodb=backend)
+    AlertRepository(mongodb=backend)
+    column_counts = ColumnCountRepository(mongodb=backend)
+
+    database = client[QUERY_PLAN_DATABASE]
+    for model_id, event_dataset_id, batch_dataset_id in zip(
+        MODEL_IDS, EVENT_DATASET_IDS, BATCH_DATASET_IDS
+    ):
+        events = _event_rows(model_id, event_dataset_id)
+        database[MONGO_COLLECTION_EVENT_ROWS].insert_many(events)
+        database[MONGO_COLLECTION_BATCH_ROWS].insert_many(
+            _batch_rows(model_id, batch_dataset_id)
+        )
+        alerts = _alerts(model_id)
+        database[MONGO_COLLECTION_ALERTS].insert_many(alerts)
+        database[MONGO_COLLECTION_MONITORS].insert_many(
+            [
+                {"monitor_id": alert["monitor_id"], "monitor_name": "drift"}
+                for alert in alerts
+            ]
+        )
+        column_counts.increment_counts(
+            dataset_id=event_dataset_id,
+            counts={
+                (column["name"], event["created_at"]): (0, 1)
+                for event in events
+                for column in event["columns"]
+            },
+        )
+    yield backend
+    client.drop_database(QUERY_PLAN_DATABASE)
+
+
+def _events(backend: MongodbBackend):
+    return backend.database[MONGO_COLLECTION_EVENT_ROWS]
+
+
+def _metric(cls: type, **kwargs) -> Callable[[MongodbBackend], Any]:
+    return lambda backend: cls(
+        collection=_events(backend), dataset_id=EVENT_DATASET_IDS[0]
+    ).aggregation_result(time_range=TIME_RANGE, **kwargs)
+
+
+def _row_service(backend: MongodbBackend) -> EventDatasetRowService:
+    model_version_repository = Mock()
+    model_version_repository.find_by_id.return_value.model_version = "v1"
+    return EventDatasetRowService(
+        repository=EventDatasetRowRepository(mongodb=backend),
+        model_version_repository=model_version_repository,
+    )
+
+
+def _alert_service(backend: MongodbBackend) -> AlertService:
+    return AlertService(repository=AlertRepository(mongodb=backend))
+
+
+PIPELINE_CASES = {
+    "CategoricalCountHistogram": _metric(CategoricalCountHistogram),
+    "CategoricalNestedDateCountHistogram": _metric(CategoricalNestedDateCountHistogram),
+    "NumericCountHistogram": _metric(
+        NumericCountHistogram, numeric_columns=NUMERIC_COLUMNS
+    ),
+    "NumericNestedCountDateHistogram": _metric(
+        NumericNestedCountDateHistogram, numeric_columns=NUMERIC_COLUMNS
+    ),
+    "CountEmptyHistogram": _metric(CountEmptyHistogram),
+    "CountEmptyDateHistogram": _metric(CountEmptyDateHistogram),
+    "CountEmptyHourlyCounters": lambda backend: CountEmptyHourlyCounters(
+        collection=ColumnCountRepository(mongodb=backend).collection,
+        dataset_id=EVENT_DATASET_IDS[0],
+    ).aggregation_result(time_range=TIME_RANGE),
+    "CardinalityCategorical": _metric(CardinalityCategorical),
+    "NumericBasicMetrics": _metric(NumericBasicMetrics),
+    "ClassificationDateHistogramDBMetrics": lambda backend: ClassificationDateHistogramDBMetrics(
+        collection=_events(backend),
+        dataset_id=EVENT_DATASET_IDS[0],
+        positive_class="yes",
+    ).aggregation_result(
+        time_range=TIME_RANGE
+    ),
+    "PSIMetrics": lambda backend: PSIMetrics(
+        collection=_events(backend),
+        dataset_id=EVENT_DATASET_IDS[0],
+        baseline_dataset_id=BATCH_DATASET_IDS[0],
+        baseline_collection=backend.database[MONGO_COLLECTION_BATCH_ROWS],
+    ).aggregation_result(
+        numeric_columns=NUMERIC_COLUMNS,
+        categorical_columns=CATEGORICAL_COLUMNS,
+        time_range=TIME_RANGE,
+    ),
+    "EventDatasetRowService.week_prediction_stats": lambda backend: _row_service(
+        backend
+    ).week_prediction_stats(MODEL_IDS[0]),
+    "EventDatasetRowService.prediction_histogram": lambda backend: _row_service(
+        backend
+    ).prediction_histogram(MODEL_IDS[0]),
+    "EventDatasetRowService.prediction_histogram_version": lambda backend: _row_service(
+        backend
+    ).prediction_histogram_version(MODEL_IDS[0]),
+    "AlertService.get_alerts": lambda backend: _alert_service(backend).get_alerts(
+        [MODEL_IDS[0]]
+    ),
+    "AlertService.alert_week_stats": lambda backend: _alert_service(
+        backend
+    ).alert_week_stats(MODEL_IDS[0]),
+    "AlertService.find_alerts_by_filter": lambda backend: _alert_service(
+        backend
+    ).find_alerts_by_filter({"model_id": MODEL_IDS[0]}, 5),
+}
+
+# AlertService.list_alerts pages through every alert without a filter, there is
+# no $match for an index to back
+
+
+def _capture(backend: RecordingBackend, case: Callable) -> List[Tuple[str, List]]:
+    backend.pipelines.clear()
+    try:
+        case(backend)
+    except NotImplementedError:
+        # mongomock lacks some operators, the pipeline is captured before it runs
+        pass
+    return list(backend.pipelines)
+
+
+def _index_fields(collection) -> List[List[str]]:
+    return [
+        [field for field, _ in index["key"]]
+        for index in collection.index_information().values()
+    ]
+
+
+def _is_equality(condition: Any) -> bool:
+    """Point lookups, a value or an $eq / $in condition"""
+    if not isinstance(condition, dict):
+        return True
+    return set(condition) <= {"$eq", "$in"}
+
+
+def _index_prefix_backs(fields: List[str], match: Dict[str, Any]) -> bool:
+    """The match keys are the leading fields of the index, an equality first"""
+    prefix = fields[: len(match)]
+    return (
+        fields != ["_id"]
+        and set(prefix) == set(match)
+        and _is_equality(match[prefix[0]])
+    )
+
+
+def _plan_values(plan: Any, key: str) -> List[Any]:
+    """All the values of `key` anywhere in the explain output"""
+    values = []
+    if isinstance(plan, dict):
+        for name, value in plan.items():
+            if name == key:
+                values.append(value)
+            values.extend(_plan_values(value, key))
+    elif isinstance(plan, list):
+        for value in plan:
+            values.extend(_plan_values(value, key))
+    return values
+
+
+RANGE = {"$gte": NOW}
+
+
+@pytest.mark.parametrize(
+    "fields,match,backed",
+    [
+        (["dataset_id", "created_at"], {"dataset_id": "d", "created_at": RANGE}, True),
+        (["model_id", "created_at"], {"model_id": {"$in": ["m"]}}, True),
+        (
+            ["dataset_id", "column_name", "hour"],
+            {"dataset_id": "d", "hour": RANGE},
+            False,
+        ),
+        (["created_at", "dataset_id"], {"dataset_id": "d", "created_at": RANGE}, False),
+        (["dataset_id"], {"dataset_id": "d", "created_at": RANGE}, False),
+        (["_id"], {"_id": "i"}, False),
+    ],
+)
+def test_index_prefix_should_back_match(fields, match, backed):
+    assert _index_prefix_backs(fields, match) is backed
+
+
+@pytest.mark.parametrize("case_name", list(PIPELINE_CASES))
+def test_leading_match_should_be_index_backed(plan_backend, case_name):
+    pipelines = _capture(plan_backend, PIPELINE_CASES[case_name])
+
+    assert pipelines, f"{case_name} did not run any aggregation"
+    database = plan_backend.client[QUERY_PLAN_DATABASE]
+    for collection_name, pipeline in pipelines:
+        assert "$match" in pipeline[0], f"{case_name} does not start with $match"
+        match = pipeline[0]["$match"]
+        indexes = _index_fields(database[collection_name])
+        assert any(
+            _index_prefix_backs(fields, match) for fields in indexes
+        ), f"{case_name}: {list(match)} is not a prefix of the indexes {indexes}"
+
+
+@pytest.mark.skipif(
+    not os.environ.get("WD_TEST_MONGO_URL"),
+    reason="explain needs a mongodb, set WD_TEST_MONGO_URL",
+)
+@pytest.mark.parametrize("case_name", list(PIPELINE_CASES))
+def test_pipeline_plan_should_use_index_scan(plan_backend, case_name):
+    database = plan_backend.client[QUERY_PLAN_DATABASE]
+    for collection_name, pipeline in _capture(plan_backend, PIPELINE_CASES[case_name]):
+        explain = database.command(
+            "explain",
+            {"aggregate": collection_name, "pipeline": pipeline, "cursor": {}},
+            verbosity="executionStats",
+        )
+        stages: Set[str] = set(_plan_values(explain, "stage"))
+        assert "IXSCAN" in stages, f"{case_name}: {stages}"
+        assert "COLLSCAN" not in stages, f"{case_name}: {stages}"
+
+        matched = database[collection_name].count_documents(pipeline[0]["$match"])
+        docs_examined = max(_plan_values(explain, "totalDocsExamined") or [0])
+        assert docs_examined <= MAX_DOCS_EXAMINED_PER_RESULT * max(
+            matched, 1
+        ), f"{case_name} examined {docs_examined} documents for {matched} results"
@@ -0,0 +1,95 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from types import SimpleNamespace
+
+from waterdip.server.db.telemetry import (
+    CommandTelemetry,
+    command_fingerprint,
+    reset_command_origin,
+    set_command_origin,
+)
+
+
+def _events(request_id, command_name, command, duration_micros, reply):
+    started = SimpleNamespace(
+        command_name=command_name,
+        command=command,
+        request_id=request_id,
+        connection_id=("localhost", 27017),
+    )
+    finished = SimpleNamespace(
+        command_name=command_name,
+        request_id=request_id,
+        connection_id=("localhost", 27017),
+        duration_micros=duration_micros,
+        reply=reply,
+    )
+    return started, finished
+
+
+def _aggregate(dataset_id: str):
+    return {
+        "aggregate": "wd_dataset_event_rows",
+        "pipeline": [
+            {"$match": {"dataset_id": dataset_id}},
+            {"$unwind": "$columns"},
+            {"$group": {"_id": "$columns.name", "count": {"$sum": 1}}},
+        ],
+    }
+
+
+class TestCommandTelemetry:
+    def test_should_fingerprint_query_shape(self):
+        assert command_fingerprint("aggregate", _aggregate("a")) == command_fingerprint(
+            "aggregate", _aggregate("b")
+        )
+        assert command_fingerprint("aggregate", _aggregate("a")) != command_fingerprint(
+            "aggregate", {"pipeline": [{"$match": {"x": 1}}]}
+        )
+
+    def test_should_group_command_durations(self):
+        telemetry = CommandTelemetry(slow_command_ms=50, samples=10)
+        token = set_command_origin("route:/v1/model.overview")
+        for request_id in range(4):
+            started, succeeded = _events(
+                request_id,
+                "aggregate",
+                _aggregate(str(request_id)),
+                duration_micros=(request_id + 1) * 10000,
+                reply={"cursor": {"firstBatch": [{}, {}]}},
+            )
+            telemetry.started(started)
+            telemetry.succeeded(succeeded)
+        reset_command_origin(token)
+
+        started, failed = _events(9, "find", {"find": "wd_models"}, 1000, {})
+        telemetry.started(started)
+        telemetry.failed(failed)
+        started, _ = _events(10, "hello", {"hello": 1}, 1000, {})
+        telemetry.started(started)
+
+        aggregate, find = telemetry.snapshot()
+        assert aggregate["origin"] == "route:/v1/model.overview"
+        assert aggregate["collection"] == "wd_dataset_event_rows"
+        assert aggregate["count"] == 4
+        assert aggregate["docs_returned"] == 8
+        assert aggregate["total_ms"] == 100.0
+        assert aggregate["max_ms"] == 40.0
+        assert aggregate["p50_ms"] == 25.0
+        assert find["origin"] == "unknown"
+        assert find["failures"] == 1
+
+        telemetry.reset()
+        assert telemetry.snapshot() == []
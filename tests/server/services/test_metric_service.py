@@ -35,12 +35,21 @@ from tests.testing_helpers import (
 )
 from waterdip.core.commons.models import (
     ColumnDataType,
+    ColumnMappingType,
     Environment,
     FixedTimeWindow,
+    TimeGranularity,
     TimeRange,
 )
+from waterdip.core.metrics.drift_psi import PSIMetrics
+from waterdip.core.metrics.sketches import FixedEdgeHistogram
 from waterdip.server.apis.models.metrics import PSIFeatureBreakdown, PSIMetricResponse
-from waterdip.server.db.models.dataset_rows import BaseEventRowDB, EventDataColumnDB
+from waterdip.server.db.models.dataset_rows import (
+    BaseDatasetBatchRowDB,
+    BaseEventRowDB,
+    DataColumn,
+    EventDataColumnDB,
+)
 from waterdip.server.db.models.datasets import BaseDatasetDB
 from waterdip.server.db.models.models import (
     BaseModelDB,
@@ -52,6 +61,8 @@ from waterdip.server.db.models.models import (
     ModelVersionSchemaInDB,
 )
 from waterdip.server.db.mongodb import (
+    MONGO_COLLECTION_BATCH_ROWS,
+    MONGO_COLLECTION_EVENT_ROWS,
     MONGO_COLLECTION_MODEL_VERSIONS,
     MONGO_COLLECTION_MODELS,
 )
@@ -244,38 +255,38 @@ class TestMetricService:
         )
         self.metricResponse = {
             "accuracy": {
-                "29-01-2023": 0.5,
+                1674950400000: 0.5,
             },
             "true_positive": {
-                "29-01-2023": 0.5,
+                1674950400000: 0.5,
             },
             "false_negative": {
-                "29-01-2023": 0.5,
+                1674950400000: 0.5,
             },
             "true_negative": {
-                "29-01-2023": 0.5,
+                1674950400000: 0.5,
             },
             "false_positive": {
-                "29-01-2023": 0.5,
+                1674950400000: 0.5,
             },
             "precision": {
-                "29-01-2023": 0.5,
+                1674950400000: 0.5,
             },
             "recall": {
-                "29-01-2023": 0.5,
+                1674950400000: 0.5,
             },
             "sensitivity": {
-                "29-01-2023": 0.5,
+                1674950400000: 0.5,
             },
             "specificity": {
-                "29-01-2023": 0.5,
+                1674950400000: 0.5,
             },
             "f1": {
-                "29-01-2023": 0.5,
+                1674950400000: 0.5,
             },
         }
         self.psiMetricResponse = {
-            "22-02-2023": {
+            1677024000000: {
                 "psi": 0.5,
             }
         }
@@ -558,6 +569,143 @@ class TestMetricService:
         )
         assert psi_metric == self.psiMetricServiceResponse
 
+    def test_should_return_psi_metric_by_hour_in_timezone(
+        self, mocker, mock_mongo_backend
+    ):
+        aggregation_result = mocker.patch(
+            "waterdip.core.metrics.drift_psi.PSIMetrics.aggregation_result",
+            return_value={1677024000000: {"psi": 0.5}, 1677027600000: {"psi": 0.25}},
+        )
+        mocker.patch(
+            "waterdip.server.services.dataset_service.DatasetService.find_dataset_by_filter",
+            return_value=self.dataset,
+        )
+        mocker.patch(
+            "waterdip.server.services.dataset_service.DatasetService.find_event_dataset_by_model_version_id",
+            return_value=self.dataset,
+        )
+        psi_metric = self.psi_metric_service.metric_psi(
+            model_id=MODEL_ID_5,
+            model_version_id=MODEL_VERSION_ID_V5,
+            time_range=TimeRange(
+                start_time="2023-02-22T00:00:00", end_time="2023-02-22T01:59:59"
+            ),
+            granularity=TimeGranularity.HOUR,
+            timezone="Asia/Kolkata",
+        )
+
+        assert psi_metric.time_buckets == ["22-02-2023 05:30", "22-02-2023 06:30"]
+        assert psi_metric.data == [0.5, 0.25]
+        assert aggregation_result.call_count == 1
+
+    def test_should_reject_psi_metric_in_unknown_timezone(self, mock_mongo_backend):
+        with pytest.raises(HTTPException) as e:
+            self.psi_metric_service.metric_psi(
+                model_id=MODEL_ID_5,
+                model_version_id=MODEL_VERSION_ID_V5,
+                time_range=TimeRange(
+                    start_time="2023-02-22T00:00:00", end_time="2023-02-22T01:59:59"
+                ),
+                timezone="Mars/Olympus_Mons",
+            )
+        assert e.value.status_code == 400
+
+    def test_should_bin_psi_on_stored_bin_edges(self, mocker):
+        model_id, model_version_id = uuid.uuid4(), uuid.uuid4()
+        baseline_dataset_id, event_dataset_id = uuid.uuid4(), uuid.uuid4()
+        edges = [2.5, 5.0, 7.5]
+        self.mock_mongo_backend.database[MONGO_COLLECTION_MODELS].insert_one(
+            BaseModelDB(
+                model_id=model_id,
+                model_name="binned_model",
+                baseline=ModelBaseline(dataset_env=Environment.TRAINING),
+            ).dict()
+        )
+        self.mock_mongo_backend.database[MONGO_COLLECTION_MODEL_VERSIONS].insert_one(
+            BaseModelVersionDB(
+                model_version_id=model_version_id,
+                model_id=model_id,
+                model_version="v1",
+                version_schema=ModelVersionSchemaInDB(
+                    features={
+                        "length": ModelVersionSchemaFieldDetails(
+                            data_type=ColumnDataType.NUMERIC
+                        ),
+                    },
+                    predictions={},
+                ),
+            ).dict()
+        )
+        ModelVersionRepository(mongodb=self.mock_mongo_backend).update_bin_edges(
+            model_version_id=model_version_id,
+            bin_edges={"features": {"length": edges}},
+        )
+        for collection, dataset_id in [
+            (MONGO_COLLECTION_BATCH_ROWS, baseline_dataset_id),
+            (MONGO_COLLECTION_EVENT_ROWS, event_dataset_id),
+        ]:
+            self.mock_mongo_backend.database[collection].insert_many(
+                [
+                    BaseDatasetBatchRowDB(
+                        row_id=uuid.uuid4(),
+                        dataset_id=dataset_id,
+                        model_id=model_id,
+                        model_version_id=model_version_id,
+                        columns=[
+                            DataColumn(
+                                name="length",
+                                value_numeric=value,
+                                data_type=ColumnDataType.NUMERIC,
+                                mapping_type=ColumnMappingType.FEATURE,
+                            )
+                        ],
+                        created_at=datetime(year=2023, month=1, day=27),
+                    ).dict()
+                    for value in range(10)
+                ]
+            )
+        mocker.patch(
+            "waterdip.server.services.dataset_service.DatasetService.find_dataset_by_filter",
+            return_value=BaseDatasetDB(
+                dataset_id=baseline_dataset_id,
+                dataset_name="training",
+                dataset_type="BATCH",
+                model_id=model_id,
+                model_version_id=model_version_id,
+                environment="TRAINING",
+            ),
+        )
+        mocker.patch(
+            "waterdip.server.services.dataset_service.DatasetService.find_event_dataset_by_model_version_id",
+            return_value=BaseDatasetDB(
+                dataset_id=event_dataset_id,
+                dataset_name="production",
+                dataset_type="EVENT",
+                model_id=model_id,
+                model_version_id=model_version_id,
+                environment="PRODUCTION",
+            ),
+        )
+        baseline = mocker.spy(PSIMetrics, "_numeric_baseline_distribution")
+
+        psi_metric = self.psi_metric_service.metric_psi(
+            model_id=model_id,
+            model_version_id=model_version_id,
+            time_range=TimeRange(
+                start_time="2023-01-27T00:00:00", end_time="2023-01-27T23:59:59"
+            ),
+        )
+
+        baseline_histogram, bin_edges = baseline.spy_return
+        assert bin_edges["length"] == edges
+        assert (
+            baseline_histogram["length"]["bins"]
+            == FixedEdgeHistogram(edges).to_dict()["bins"]
+        )
+        assert baseline_histogram["length"]["count"] == [3, 2, 3, 2]
+        # the production rows are binned on the same edges, no drift
+        assert psi_metric.feat_breakdown[0].driftscore == 0
+
     @classmethod
     def teardown_class(self):
         self.mock_mongo_backend.database[MONGO_COLLECTION_MODELS].delete_many({})
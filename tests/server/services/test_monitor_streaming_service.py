@@ -0,0 +1,154 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import uuid
+from datetime import datetime
+
+import mongomock
+import pytest
+
+from tests.testing_helpers import MongodbBackendTesting
+from waterdip.core.commons.models import (
+    ColumnDataType,
+    ColumnMappingType,
+    DatasetType,
+    Environment,
+    MonitorType,
+)
+from waterdip.server.commons.config import settings
+from waterdip.server.db.models.dataset_rows import BaseEventRowDB, EventDataColumnDB
+from waterdip.server.db.models.datasets import BaseDatasetDB
+from waterdip.server.db.models.monitors import BaseMonitorDB, MonitorIdentification
+from waterdip.server.db.mongodb import (
+    MONGO_COLLECTION_ALERTS,
+    MONGO_COLLECTION_MONITORS,
+)
+from waterdip.server.db.repositories.alert_repository import AlertRepository
+from waterdip.server.db.repositories.column_count_repository import (
+    ColumnCountRepository,
+)
+from waterdip.server.db.repositories.dataset_repository import DatasetRepository
+from waterdip.server.db.repositories.integration_repository import IntegrationRepository
+from waterdip.server.db.repositories.monitor_repository import MonitorRepository
+from waterdip.server.services.integration_service import IntegrationService
+from waterdip.server.services.monitor_streaming_service import MonitorStreamingService
+
+
+@pytest.mark.usefixtures("mock_mongo_backend")
+class TestMonitorStreamingService:
+    def test_should_alert_empty_values_on_ingest(
+        self, mock_mongo_backend: MongodbBackendTesting, monkeypatch, mocker
+    ):
+        monkeypatch.setattr(settings, "streaming_monitors_enabled", True)
+        model_id, model_version_id = uuid.uuid4(), uuid.uuid4()
+        dataset_id = uuid.uuid4()
+        DatasetRepository(mongodb=mock_mongo_backend).create_dataset(
+            BaseDatasetDB(
+                dataset_id=dataset_id,
+                dataset_name="production",
+                created_at=datetime.utcnow(),
+                model_id=model_id,
+                model_version_id=model_version_id,
+                dataset_type=DatasetType.EVENT,
+                environment=Environment.PRODUCTION,
+            )
+        )
+        monitor_id = uuid.uuid4()
+        MonitorRepository(mongodb=mock_mongo_backend).insert_monitor(
+            BaseMonitorDB(
+                monitor_id=monitor_id,
+                monitor_name="empty_f1",
+                monitor_identification=MonitorIdentification(
+                    model_id=model_id, model_version_id=model_version_id
+                ),
+                monitor_type=MonitorType.DATA_QUALITY,
+                monitor_condition={
+                    "evaluation_metric": "EMPTY_VALUE",
+                    "dimensions": {"features": ["f1"]},
+                    "threshold": {"threshold": "gt", "value": 2},
+                },
+                created_at=datetime.utcnow(),
+            )
+        )
+        service = MonitorStreamingService(
+            mongodb=mock_mongo_backend,
+            column_count_repository=ColumnCountRepository(mongodb=mock_mongo_backend),
+            monitor_repository=MonitorRepository(mongodb=mock_mongo_backend),
+            alert_repository=AlertRepository(mongodb=mock_mongo_backend),
+            dataset_repository=DatasetRepository(mongodb=mock_mongo_backend),
+            integration_service=IntegrationService(
+                repository=IntegrationRepository(mongodb=mock_mongo_backend)
+            ),
+        )
+
+        def rows(count: int):
+            return [
+                BaseEventRowDB(
+                    row_id=uuid.uuid4(),
+                    dataset_id=dataset_id,
+                    model_id=model_id,
+                    model_version_id=model_version_id,
+                    columns=[
+                        EventDataColumnDB(
+                            name="f1",
+                            value_numeric=None,
+                            data_type=ColumnDataType.NUMERIC,
+                            mapping_type=ColumnMappingType.FEATURE,
+                        )
+                    ],
+                    created_at=datetime.utcnow(),
+                )
+                for _ in range(count)
+            ]
+
+        assert service.observe(dataset_id, model_version_id, rows(2)) == 0
+        # the repositories of the monitor processors are shared across requests
+        create_index = mocker.spy(mongomock.collection.Collection, "create_index")
+        find_datasets = mocker.spy(DatasetRepository, "find_datasets")
+        assert service.observe(dataset_id, model_version_id, rows(1)) == 1
+        assert create_index.call_count == 0
+        assert find_datasets.call_count == 0
+        assert service.observe(dataset_id, model_version_id, rows(1)) == 0
+
+        database = mock_mongo_backend.database
+        alerts = list(database[MONGO_COLLECTION_ALERTS].find({}))
+        assert len(alerts) == 1
+        assert alerts[0]["violation"]["focal_value"] == 3
+        assert database[MONGO_COLLECTION_MONITORS].find_one()["last_run"] is None
+
+    def test_should_not_count_when_disabled(
+        self, mock_mongo_backend: MongodbBackendTesting
+    ):
+        count_repo = ColumnCountRepository(mongodb=mock_mongo_backend)
+        service = MonitorStreamingService(
+            mongodb=mock_mongo_backend,
+            column_count_repository=count_repo,
+            monitor_repository=MonitorRepository(mongodb=mock_mongo_backend),
+            alert_repository=AlertRepository(mongodb=mock_mongo_backend),
+            dataset_repository=DatasetRepository(mongodb=mock_mongo_backend),
+            integration_service=IntegrationService(
+                repository=IntegrationRepository(mongodb=mock_mongo_backend)
+            ),
+        )
+        row = BaseEventRowDB(
+            row_id=uuid.uuid4(),
+            dataset_id=uuid.uuid4(),
+            model_id=uuid.uuid4(),
+            model_version_id=uuid.uuid4(),
+            columns=[],
+            created_at=datetime.utcnow(),
+        )
+
+        assert service.observe(row.dataset_id, row.model_version_id, [row]) == 0
+        assert count_repo.collection.count_documents({}) == 0
@@ -0,0 +1,74 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from waterdip.core.commons.models import MonitorType
+from waterdip.utils.instrumentation import MetricsRegistry
+
+
+class TestMetricsRegistry:
+    def test_should_render_text_exposition_format(self):
+        registry = MetricsRegistry()
+        rows = registry.counter("rows_total", "Logged rows", labels=("kind",))
+        latency = registry.histogram(
+            "latency_seconds", "Latency", labels=("route",), buckets=(0.1, 1.0)
+        )
+        depth = registry.gauge("queue_depth", "Queue depth")
+
+        rows.inc(5, kind="event")
+        rows.inc(kind="event")
+        latency.observe(0.05, route="log:events")
+        latency.observe(0.5, route="log:events")
+        latency.observe(5, route="log:events")
+        depth.set_function(lambda: 7)
+
+        assert registry.counter("rows_total", "Logged rows") is rows
+        assert registry.render().splitlines() == [
+            "# HELP rows_total Logged rows",
+            "# TYPE rows_total counter",
+            'rows_total{kind="event"} 6',
+            "# HELP latency_seconds Latency",
+            "# TYPE latency_seconds histogram",
+            'latency_seconds_bucket{route="log:events",le="0.1"} 1',
+            'latency_seconds_bucket{route="log:events",le="1.0"} 2',
+            'latency_seconds_bucket{route="log:events",le="+Inf"} 3',
+            'latency_seconds_sum{route="log:events"} 5.55',
+            'latency_seconds_count{route="log:events"} 3',
+            "# HELP queue_depth Queue depth",
+            "# TYPE queue_depth gauge",
+            "queue_depth 7",
+        ]
+
+    def test_should_keep_last_gauge_value_when_function_fails(self, mocker):
+        warning = mocker.patch("waterdip.utils.instrumentation.logger.warning")
+        registry = MetricsRegistry()
+        depth = registry.gauge("queue_depth", "Queue depth")
+        depth.set(4)
+
+        def unreachable_broker():
+            raise ConnectionError("broker unreachable")
+
+        depth.set_function(unreachable_broker)
+
+        assert "queue_depth 4" in registry.render()
+        warning.assert_called_once()
+
+    def test_should_escape_label_values(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("runs_total", "Runs", labels=("monitor_type",))
+
+        counter.inc(monitor_type=MonitorType.DRIFT)
+        counter.inc(monitor_type='a"b')
+
+        assert counter.value(monitor_type="DRIFT") == 1
+        assert 'runs_total{monitor_type="a\\"b"} 1' in registry.render()
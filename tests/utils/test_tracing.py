@@ -0,0 +1,118 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import json
+from types import SimpleNamespace
+
+import mongomock
+import pytest
+from fastapi.testclient import TestClient
+
+from waterdip.core.metrics.data_metrics import CountEmptyHistogram
+from waterdip.server.db.telemetry import CommandTelemetry
+from waterdip.utils.tracing import JsonFileSpanExporter, Tracer, traced_service
+
+
+@traced_service
+class _Service:
+    def outer(self, metric: CountEmptyHistogram):
+        return self.inner(metric)
+
+    def inner(self, metric: CountEmptyHistogram):
+        return metric.aggregation_result()
+
+    @classmethod
+    def get_instance(cls):
+        return cls()
+
+
+def _read_traces(path):
+    with open(path) as trace_file:
+        return [json.loads(line) for line in trace_file]
+
+
+class TestTracer:
+    def test_should_export_span_tree(self, tmp_path):
+        path = tmp_path / "traces.jsonl"
+        tracer = Tracer(sample_rate=1.0, exporter=JsonFileSpanExporter(str(path)))
+        metric = CountEmptyHistogram(
+            collection=mongomock.MongoClient().db.rows, dataset_id="d1"
+        )
+        telemetry = CommandTelemetry(slow_command_ms=1000, samples=10)
+        event = SimpleNamespace(
+            command_name="find",
+            command={"find": "wd_models"},
+            request_id=1,
+            connection_id=("localhost", 27017),
+            duration_micros=2000,
+            reply={"cursor": {"firstBatch": []}},
+        )
+
+        with tracer.trace("route:/v1/test", "route"):
+            _Service.get_instance().outer(metric)
+            telemetry.started(event)
+            telemetry.succeeded(event)
+
+        (root,) = _read_traces(path)
+        outer, mongo = root["children"]
+        assert root["name"] == "route:/v1/test"
+        assert outer["name"] == "_Service.outer"
+        assert outer["children"][0]["name"] == "_Service.inner"
+        assert outer["children"][0]["children"][0]["name"] == (
+            "metric:count_empty_hist"
+        )
+        assert mongo["kind"] == "mongo"
+        assert mongo["duration_ms"] == 2.0
+        assert mongo["attributes"]["collection"] == "wd_models"
+
+    def test_should_not_record_unsampled_traces(self, tmp_path):
+        path = tmp_path / "traces.jsonl"
+        tracer = Tracer(sample_rate=0.0, exporter=JsonFileSpanExporter(str(path)))
+
+        with tracer.trace("route:/v1/test", "route") as root:
+            assert root is None
+
+        assert not path.exists()
+
+    def test_should_record_error_of_span(self, tmp_path):
+        path = tmp_path / "traces.jsonl"
+        tracer = Tracer(sample_rate=1.0, exporter=JsonFileSpanExporter(str(path)))
+
+        with pytest.raises(ValueError):
+            with tracer.trace("task:process_monitor", "task"):
+                raise ValueError("failed")
+
+        assert "ValueError" in _read_traces(path)[0]["error"]
+
+
+@pytest.mark.usefixtures("test_client")
+class TestRouteTracing:
+    def test_should_trace_route_and_services(
+        self, test_client: TestClient, tmp_path, monkeypatch
+    ):
+        path = tmp_path / "traces.jsonl"
+        monkeypatch.setattr(
+            Tracer,
+            "_INSTANCE",
+            Tracer(sample_rate=1.0, exporter=JsonFileSpanExporter(str(path))),
+        )
+
+        test_client.get(url="/v1/list.models")
+
+        (root,) = _read_traces(path)
+        assert root["name"] == "route:/v1/list.models"
+        assert root["attributes"]["status"] == 200
+        assert "ModelService.list_models" in [
+            child["name"] for child in root["children"]
+        ]
@@ -77,6 +77,7 @@ class DataQualityMetric(str, Enum):
 
 
 class PerformanceMetric(str, Enum):
+    ACCURACY = "ACCURACY"
     PRECISION = "PRECISION"
     RECALL = "RECALL"
     F1 = "F1"
@@ -103,6 +104,46 @@ class TimeRange(BaseModel):
         ]
 
 
+class TimeGranularity(str, Enum):
+    """
+    Size of the time buckets of the date histograms
+    Attributes:
+    ------------------
+    HOUR:
+        one bucket per hour
+    DAY:
+        one bucket per day
+    WEEK:
+        one bucket per week, weeks start on monday
+    """
+
+    HOUR = "HOUR"
+    DAY = "DAY"
+    WEEK = "WEEK"
+
+
+class MetricView(str, Enum):
+    """
+    Metric results materialized by day in the metric views
+    Attributes:
+    ------------------
+    CATEGORICAL_DATE_HISTOGRAM:
+        count histograms of the categorical columns of an event dataset
+    NUMERIC_DATE_HISTOGRAM:
+        count histograms of the numeric columns of an event dataset, on the
+        bin edges of the model version schema
+    CLASSIFICATION_COUNTS:
+        confusion counts of the rows of an event dataset for a positive class
+    PREDICTION_COUNTS:
+        number of predictions of a model
+    """
+
+    CATEGORICAL_DATE_HISTOGRAM = "CATEGORICAL_DATE_HISTOGRAM"
+    NUMERIC_DATE_HISTOGRAM = "NUMERIC_DATE_HISTOGRAM"
+    CLASSIFICATION_COUNTS = "CLASSIFICATION_COUNTS"
+    PREDICTION_COUNTS = "PREDICTION_COUNTS"
+
+
 class ModelBaselineTimeWindowType(str, Enum):
     """
     Model baseline time window type.
@@ -137,6 +178,17 @@ class MovingTimeWindow(BaseModel):
         default="7d", description="Moving time window time period. Default is 7d"
     )
 
+    def get_time_range(self, current_time: datetime) -> TimeRange:
+        """
+        Resolves the moving time window to a time range relative to current_time.
+        The window ends skip_period days before current_time and spans time_period days
+        """
+        end_time = current_time - timedelta(days=int(self.skip_period[:-1]))
+        return TimeRange(
+            start_time=end_time - timedelta(days=int(self.time_period[:-1])),
+            end_time=end_time,
+        )
+
 
 class FixedTimeWindow(BaseModel):
     """
@@ -12,19 +12,136 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+import functools
+import time
 from abc import ABC, abstractmethod
-from datetime import timedelta
-from typing import Any, Dict, List
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Union
 
+from dateutil import tz
 from pymongo.collection import Collection
 
-from waterdip.core.commons.models import TimeRange
+from waterdip.core.commons.models import TimeGranularity, TimeRange
+from waterdip.utils.instrumentation import METRIC_COMPUTATION_DURATION
+from waterdip.utils.tracing import span
+
+EPOCH = datetime(1970, 1, 1)
+GRANULARITY_MS = {
+    TimeGranularity.HOUR: 3600 * 1000,
+    TimeGranularity.DAY: 24 * 3600 * 1000,
+    TimeGranularity.WEEK: 7 * 24 * 3600 * 1000,
+}
+# the epoch is a thursday, weeks are shifted to start on monday
+WEEK_START_SHIFT_MS = 3 * 24 * 3600 * 1000
+
+
+class TimeBuckets:
+    """
+    Epoch aligned hour, day or week buckets of created_at in a timezone. A
+    bucket is the epoch milliseconds of its start, buckets are computed in the
+    aggregation pipeline with date arithmetic, without formatting dates
+
+    The UTC offset of the timezone is taken at the start of the time range, the
+    buckets of a time range across a daylight saving change are shifted by the
+    difference after the change
+
+    Attributes:
+    ------------------
+    granularity:
+        size of the buckets
+    timezone:
+        IANA name of the timezone days and weeks start in
+    at:
+        time the UTC offset of the timezone is taken at, now when None
+
+    Examples:
+        >>> buckets = TimeBuckets(TimeGranularity.HOUR, timezone="Asia/Kolkata")
+        >>> {"$group": {"_id": {"bucket": buckets.expression()}, "count": {"$sum": 1}}}
+        >>> buckets.start_time(1677609000000) # naive UTC datetime of the bucket start
+    """
+
+    def __init__(
+        self,
+        granularity: Union[TimeGranularity, str] = TimeGranularity.DAY,
+        timezone: str = "UTC",
+        at: Optional[datetime] = None,
+    ):
+        self.granularity = TimeGranularity(granularity)
+        self.timezone = tz.gettz(timezone)
+        if self.timezone is None:
+            raise ValueError(f"Unknown timezone {timezone}")
+        offset = self.timezone.utcoffset(at or datetime.utcnow())
+        self.offset_ms = int(offset.total_seconds() * 1000) if offset else 0
+        self.size_ms = GRANULARITY_MS[self.granularity]
+        self._shift_ms = self.offset_ms + (
+            WEEK_START_SHIFT_MS if self.granularity == TimeGranularity.WEEK else 0
+        )
+
+    def __repr__(self) -> str:
+        return f"TimeBuckets({self.granularity.value}, offset_ms={self.offset_ms})"
+
+    def expression(self, field: str = "$created_at") -> Dict[str, Any]:
+        """Aggregation expression of the bucket of a date field"""
+        epoch_ms = {"$subtract": [field, EPOCH]}
+        return {
+            "$subtract": [
+                epoch_ms,
+                {"$mod": [{"$add": [epoch_ms, self._shift_ms]}, self.size_ms]},
+            ]
+        }
+
+    def bucket(self, created_at: datetime) -> int:
+        """Bucket of a naive UTC datetime"""
+        epoch_ms = (created_at - EPOCH) // timedelta(milliseconds=1)
+        return epoch_ms - (epoch_ms + self._shift_ms) % self.size_ms
+
+    def buckets(self, time_range: TimeRange) -> List[int]:
+        """All the buckets of the time range, in order"""
+        return list(
+            range(
+                self.bucket(time_range.start_time),
+                self.bucket(time_range.end_time) + 1,
+                self.size_ms,
+            )
+        )
+
+    @staticmethod
+    def start_time(bucket: Union[int, float]) -> datetime:
+        """Naive UTC datetime of the start of a bucket"""
+        return EPOCH + timedelta(milliseconds=int(bucket))
+
+    def local_start_time(self, bucket: Union[int, float]) -> datetime:
+        """Naive datetime of the start of a bucket in the timezone of the buckets"""
+        return self.start_time(bucket) + timedelta(milliseconds=self.offset_ms)
+
+
+def _timed_aggregation(aggregation_result):
+    @functools.wraps(aggregation_result)
+    def timed(self, *args, **kwargs):
+        started_at = time.perf_counter()
+        try:
+            with span(f"metric:{self.metric_name}", "metric"):
+                return aggregation_result(self, *args, **kwargs)
+        finally:
+            METRIC_COMPUTATION_DURATION.observe(
+                time.perf_counter() - started_at, metric=self.metric_name
+            )
+
+    return timed
 
 
 class MongoMetric(ABC):
     def __init__(self, collection: Collection):
         self._collection = collection
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # every metric implementation reports the duration of its aggregations
+        if "aggregation_result" in cls.__dict__:
+            cls.aggregation_result = _timed_aggregation(
+                cls.__dict__["aggregation_result"]
+            )
+
     @property
     @abstractmethod
     def metric_name(self) -> str:
@@ -49,21 +166,3 @@ class MongoMetric(ABC):
                 }
             }
         return time_filter
-
-    @staticmethod
-    def _date_histogram_bin_format(day: int, month: int, year: int):
-        hist_bin_day = f"{'0' if day < 10 else ''}{day}"
-        hist_bin_month = f"{'0' if month < 10 else ''}{month}"
-        return f"{hist_bin_day}-{hist_bin_month}-{year}"
-
-    def _get_date_hist_bins(self, time_range: TimeRange) -> List[str]:
-        buckets: List[str] = []
-        delta = time_range.end_time - time_range.start_time
-        for i in range(delta.days + 1):
-            delta_day = time_range.start_time + timedelta(days=i)
-            bucket = self._date_histogram_bin_format(
-                day=delta_day.day, month=delta_day.month, year=delta_day.year
-            )
-            buckets.append(bucket)
-
-        return buckets
\ No newline at end of file
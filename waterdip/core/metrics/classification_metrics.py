@@ -11,14 +11,16 @@
 #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
-from datetime import timedelta
-from typing import Any, Dict, List
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
 from uuid import UUID
 
 from pymongo.collection import Collection
 
-from waterdip.core.commons.models import TimeRange
-from waterdip.core.metrics.base import MongoMetric
+from waterdip.core.commons.models import TimeGranularity, TimeRange
+from waterdip.core.metrics.base import MongoMetric, TimeBuckets
+from waterdip.core.metrics.rows import RowReader
+from waterdip.core.metrics.views import MaterializedView
 
 
 class ClassificationDateHistogramDBMetrics(MongoMetric):
@@ -29,14 +31,33 @@ class ClassificationDateHistogramDBMetrics(MongoMetric):
         mongo collection
     dataset_id: UUID
         dataset id on which the metric calculation will be applied
+    row_reader: RowReader
+        reader of the rows in their storage layout. v1 rows only when None
 
     """
 
-    def __init__(self, collection: Collection, dataset_id: UUID, positive_class: str):
+    # Name of each confusion count and the facet of _aggregation_query it comes from
+    CONFUSION_COUNT_FACETS = {
+        "total": "total_hist",
+        "is_match": "is_match_count_hist",
+        "true_positive": "tp_count_hist",
+        "false_negative": "fn_count_hist",
+        "true_negative": "tn_count_hist",
+        "false_positive": "fp_count_hist",
+    }
+
+    def __init__(
+        self,
+        collection: Collection,
+        dataset_id: UUID,
+        positive_class: str,
+        row_reader: Optional[RowReader] = None,
+    ):
         super().__init__(collection)
         self._dataset_id = dataset_id
         self._positive_class = positive_class
         self._class_position = 0
+        self._row_reader = row_reader or RowReader()
 
     @staticmethod
     def _time_filter_builder(time_range: TimeRange = None):
@@ -61,15 +82,9 @@ class ClassificationDateHistogramDBMetrics(MongoMetric):
         return dct
 
     def _date_histogram_converter(
-        self, histograms: List, histogram_buckets: List[str]
+        self, histogram: Dict[int, int], histogram_buckets: List[int]
     ) -> Dict:
-        date_histogram = {}
-        for item in histograms:
-            date_id = item["_id"]
-            date_key = self._date_histogram_bin_format(
-                day=date_id["day"], month=date_id["month"], year=date_id["year"]
-            )
-            date_histogram[date_key] = item["count"]
+        date_histogram = dict(histogram)
 
         for histogram_bucket in histogram_buckets:
             if histogram_bucket not in date_histogram:
@@ -77,13 +92,15 @@ class ClassificationDateHistogramDBMetrics(MongoMetric):
 
         return date_histogram
 
-
     @property
     def metric_name(self) -> str:
         return "classification_date_hist"
 
     def _histogram_ratio(
-        self, numerators: List, denominators: List, histogram_buckets: List[str]
+        self,
+        numerators: Dict[int, int],
+        denominators: Dict[int, int],
+        histogram_buckets: List[int],
     ) -> Dict:
         is_match_count_date_hist = self._date_histogram_converter(
             numerators, histogram_buckets
@@ -173,32 +190,54 @@ class ClassificationDateHistogramDBMetrics(MongoMetric):
                 f1_hist[key] = None
         return f1_hist
 
-    def aggregation_result(self, time_range: TimeRange, **kwargs) -> Dict[str, Any]:
-        hist_buckets = self._get_date_hist_bins(time_range=time_range)
-        agg_query = self._aggregation_query(
-            positive_class=self._positive_class,
-            time_filter=self._time_filter_builder(time_range=time_range),
-            **kwargs,
+    def aggregation_result(
+        self,
+        time_range: TimeRange,
+        granularity: TimeGranularity = TimeGranularity.DAY,
+        timezone: str = "UTC",
+        view: Optional[MaterializedView] = None,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """
+        Will return the classification metrics of every hour, day or week of the
+        time range, keyed by the epoch milliseconds of the bucket start
+        Args:
+            time_range: TimeRange
+            granularity: TimeGranularity
+                size of the time buckets
+            timezone: str
+                timezone the days and weeks start in
+            view: MaterializedView
+                materialized daily UTC confusion counts, only for the DAY
+                granularity in UTC. The days of the view are not aggregated
+                from the rows
+        Returns:
+            date_hist_metrics: Dict[str, Dict[int, Optional[float]]]
+                {"accuracy": {1671753600000: 0.33, ...}, "precision": {...}, ...}
+        """
+        time_buckets = TimeBuckets(
+            granularity, timezone=timezone, at=time_range.start_time
         )
+        hist_buckets = time_buckets.buckets(time_range)
+        if view is None:
+            counts = self.bucket_counts(time_range, time_buckets, **kwargs)
+        else:
+            counts = self._view_bucket_counts(view, time_range, time_buckets)
 
-        facets = self._collection.aggregate(agg_query).next()
+        total_hist = counts["total"]
 
-        total_hist = facets["total_hist"]
-
-        accuracy = self._histogram_ratio(
-            facets["is_match_count_hist"], total_hist, hist_buckets
-        )
+        accuracy = self._histogram_ratio(counts["is_match"], total_hist, hist_buckets)
         true_positive = self._histogram_ratio(
-            facets["tp_count_hist"], total_hist, hist_buckets
+            counts["true_positive"], total_hist, hist_buckets
         )
         false_negative = self._histogram_ratio(
-            facets["fn_count_hist"], total_hist, hist_buckets
+            counts["false_negative"], total_hist, hist_buckets
         )
         true_negative = self._histogram_ratio(
-            facets["tn_count_hist"], total_hist, hist_buckets
+            counts["true_negative"], total_hist, hist_buckets
         )
         false_positive = self._histogram_ratio(
-            facets["fp_count_hist"], total_hist, hist_buckets
+            counts["false_positive"], total_hist, hist_buckets
         )
         precision = self._precision(
             true_positive_hist=true_positive, false_positive_hist=false_positive
@@ -229,16 +268,132 @@ class ClassificationDateHistogramDBMetrics(MongoMetric):
 
         return date_hist_metrics
 
+    def bucket_counts(
+        self, time_range: TimeRange, time_buckets: TimeBuckets, **kwargs
+    ) -> Dict[str, Dict[int, int]]:
+        """
+        Will return the confusion counts of every bucket with rows in the time range
+        Returns:
+            bucket_counts: Dict[str, Dict[int, int]]
+                {"total": {1671753600000: 10, ...}, "is_match": {...}, ...}
+        """
+        agg_query = self._aggregation_query(
+            positive_class=self._positive_class,
+            time_filter=self._time_filter_builder(time_range=time_range),
+            time_buckets=time_buckets,
+            **kwargs,
+        )
+        facets = self._collection.aggregate(agg_query).next()
+        return {
+            count_name: {
+                int(item["_id"]["bucket"]): item["count"] for item in facets[facet_name]
+            }
+            for count_name, facet_name in self.CONFUSION_COUNT_FACETS.items()
+        }
+
+    def _view_bucket_counts(
+        self, view: MaterializedView, time_range: TimeRange, time_buckets: TimeBuckets
+    ) -> Dict[str, Dict[int, int]]:
+        """
+        Confusion counts of every day bucket, from the view for the days it covers
+        and from the rows for the rest of the time range
+        """
+        counts: Dict[str, Dict[int, int]] = {
+            count_name: {} for count_name in self.CONFUSION_COUNT_FACETS
+        }
+
+        def add(count_name: str, bucket: int, count: int):
+            counts[count_name][bucket] = counts[count_name].get(bucket, 0) + count
+
+        for day, day_counts in view.days.items():
+            for count_name in self.CONFUSION_COUNT_FACETS:
+                add(count_name, time_buckets.bucket(day), day_counts.get(count_name, 0))
+        for uncovered in view.uncovered(time_range):
+            for count_name, histogram in self.bucket_counts(
+                uncovered, time_buckets
+            ).items():
+                for bucket, count in histogram.items():
+                    add(count_name, bucket, count)
+        return counts
+
+    def confusion_counts(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        time_buckets: Optional[TimeBuckets] = None,
+    ) -> Dict[datetime, Dict[str, int]]:
+        """
+        Will return the confusion counts of each day for the rows created
+        in [start_time, end_time). Unlike aggregation_result the counts are not
+        converted to ratios, so counts of different runs can be summed
+        Args:
+            start_time: datetime
+            end_time: datetime
+            time_buckets: TimeBuckets
+                buckets the rows are counted in, UTC days when None
+        Returns:
+            day_counts: Dict[datetime, Dict[str, int]]
+                {day: {"total": 10, "is_match": 8, "true_positive": 5, ...}}
+        """
+        agg_query = self._aggregation_query(
+            positive_class=self._positive_class,
+            time_filter={"created_at": {"$gte": start_time, "$lt": end_time}},
+            time_buckets=time_buckets,
+        )
+        facets = self._collection.aggregate(agg_query).next()
+
+        day_counts: Dict[datetime, Dict[str, int]] = {}
+        for count_name, facet_name in self.CONFUSION_COUNT_FACETS.items():
+            for item in facets[facet_name]:
+                day = TimeBuckets.start_time(item["_id"]["bucket"])
+                if day not in day_counts:
+                    day_counts[day] = {name: 0 for name in self.CONFUSION_COUNT_FACETS}
+                day_counts[day][count_name] = item["count"]
+        return day_counts
+
+    @staticmethod
+    def metrics_from_counts(counts: Dict[str, int]) -> Dict[str, Optional[float]]:
+        """
+        Will calculate accuracy, precision, recall and f1 from confusion counts
+        Args:
+            counts: Dict[str, int]
+                confusion counts as returned by confusion_counts for a single day
+                or summed over several days
+        Returns:
+            metrics: Dict[str, Optional[float]]
+                None for metrics whose denominator is 0
+        """
+
+        def ratio(numerator: int, denominator: int) -> Optional[float]:
+            return numerator / denominator if denominator else None
+
+        tp, fp = counts.get("true_positive", 0), counts.get("false_positive", 0)
+        fn = counts.get("false_negative", 0)
+        precision = ratio(tp, tp + fp)
+        recall = ratio(tp, tp + fn)
+        f1 = None
+        if precision is not None and recall is not None:
+            f1 = ratio(2 * precision * recall, precision + recall)
+
+        return {
+            "accuracy": ratio(counts.get("is_match", 0), counts.get("total", 0)),
+            "precision": precision,
+            "recall": recall,
+            "f1": f1,
+        }
+
     def _aggregation_query(
         self,
         time_filter: Dict,
         positive_class: str,
         class_position: int = 0,
+        time_buckets: Optional[TimeBuckets] = None,
         **kwargs,
     ) -> List[Dict[str, Any]]:
+        time_buckets = time_buckets or TimeBuckets()
         count_group_query = {
             "$group": {
-                "_id": {"year": "$year", "month": "$month", "day": "$day"},
+                "_id": {"bucket": "$bucket"},
                 "count": {"$sum": 1},
             }
         }
@@ -286,16 +441,10 @@ class ClassificationDateHistogramDBMetrics(MongoMetric):
         return [
             {
                 "$match": {
-                    "dataset_id": str(self._dataset_id),
+                    "dataset_id": self._row_reader.id_value(self._dataset_id),
                     **(time_filter if time_filter is not None else {}),
                 }
             },
-            {
-                "$addFields": {
-                    "year": {"$year": "$created_at"},
-                    "month": {"$month": "$created_at"},
-                    "day": {"$dayOfMonth": "$created_at"},
-                }
-            },
+            {"$addFields": {"bucket": time_buckets.expression()}},
             {"$facet": facets},
         ]
@@ -11,15 +11,49 @@
 #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
+import hashlib
+import json
+import math
+import sys
 from abc import ABC
-from datetime import timedelta
-from typing import Any, Dict, List
+from datetime import datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Union
 from uuid import UUID
 
+import numpy as np
 from pymongo.collection import Collection
+from pymongo.command_cursor import CommandCursor
 
 from waterdip.core.commons.models import TimeRange
-from waterdip.core.metrics.base import MongoMetric
+from waterdip.core.metrics.base import MongoMetric, TimeBuckets
+from waterdip.core.metrics.rows import RowReader
+from waterdip.core.metrics.sampling import RowSample
+from waterdip.core.metrics.sketches import (
+    DEFAULT_RELATIVE_ACCURACY,
+    OTHER_BIN,
+    CategoricalCounter,
+    FixedEdgeHistogram,
+    HyperLogLog,
+    MomentsAccumulator,
+    QuantileSketch,
+    Sketch,
+    TopK,
+    merge_daily_sketches,
+    percentile_name,
+)
+
+# Number of bins of the numeric histograms, outlier bins not included
+NUMERIC_HISTOGRAM_BINS = 9
+# Size of a grouped document of an aggregation result, like a bin count or a
+# quantile bucket count of a column
+RESULT_ENTRY_BYTES = 128
+# Decades of magnitude the values of a numeric column are assumed to span in a
+# day, the number of quantile buckets of a column is not known before the scan
+QUANTILE_VALUE_DECADES = 4
+# Counters of the top-K sketches per reported top value
+TOP_K_CAPACITY_FACTOR = 10
+# Day of the rows, the date bins of the date histograms
+CREATED_AT_DATE_STR = {"$dateToString": {"format": "%d-%m-%Y", "date": "$created_at"}}
 
 
 class DataMetrics(MongoMetric, ABC):
@@ -30,12 +64,124 @@ class DataMetrics(MongoMetric, ABC):
         mongo collection
     dataset_id: UUID
         dataset id on which the metric calculation will be applied
+    columns: List[str]
+        allow-list of the column names the metric is calculated for. The other
+        columns are dropped from the rows before they are unwound. All columns
+        when None
+    aggregate_options: Dict
+        options of the aggregate command, like allowDiskUse and maxTimeMS
+    sample: RowSample
+        sample of the rows the metric is calculated on. Counts of the result
+        are the counts of the sample, not scaled. All rows when None
+    row_reader: RowReader
+        reader of the rows in their storage layout. v1 rows only when None
 
     """
 
-    def __init__(self, collection: Collection, dataset_id: UUID):
+    # Estimated size of the aggregation result per column, used to size the
+    # column groups of wide models. None if the result is not a single document
+    facet_bytes_per_column: Optional[int] = None
+
+    @classmethod
+    def result_bytes_per_column(cls, **aggregation_kwargs) -> Optional[int]:
+        """
+        Estimated size of the aggregation result per column for the kwargs of
+        aggregation_result, facet_bytes_per_column unless the metric derives it
+        from the kwargs
+        """
+        return cls.facet_bytes_per_column
+
+    def __init__(
+        self,
+        collection: Collection,
+        dataset_id: UUID,
+        columns: Optional[List[str]] = None,
+        aggregate_options: Optional[Dict[str, Any]] = None,
+        sample: Optional[RowSample] = None,
+        row_reader: Optional[RowReader] = None,
+    ):
         super().__init__(collection)
         self._dataset_id = dataset_id
+        self._columns = columns
+        self._aggregate_options = aggregate_options or {}
+        self._sample = sample
+        self._row_reader = row_reader or RowReader()
+
+    def _time_filter_builder(self, time_range: TimeRange = None) -> Dict[str, Any]:
+        """Filter of the rows of the time range, in the row sample if any"""
+        time_filter = super()._time_filter_builder(time_range=time_range)
+        if self._sample is not None:
+            time_filter.update(self._row_reader.sample_filter(self._sample))
+        return time_filter
+
+    def _aggregate(self, pipeline: List[Dict[str, Any]], **options) -> CommandCursor:
+        return self._collection.aggregate(
+            pipeline, **{**options, **self._aggregate_options}
+        )
+
+    def _dataset_filter(self) -> Dict[str, Any]:
+        return {"dataset_id": self._row_reader.id_value(self._dataset_id)}
+
+    def _unwind_columns(self) -> List[Dict[str, Any]]:
+        """Stages unwinding the columns of the rows, pruned to the allow-list"""
+        return self._row_reader.unwind_columns(columns=self._columns)
+
+    def partition_cache_key(self, **aggregation_kwargs) -> Optional[str]:
+        """
+        Cache key of the time partition results of the metric for the
+        aggregation kwargs. None for a row sample, sampled results are not cached
+        """
+        if self._sample is not None:
+            return None
+        kwargs = json.dumps(
+            {
+                "dataset_id": self._dataset_id,
+                "columns": self._columns,
+                **aggregation_kwargs,
+            },
+            sort_keys=True,
+            default=repr,
+        )
+        return f"{self.metric_name}:{hashlib.sha1(kwargs.encode()).hexdigest()}"
+
+
+def fold_categories(
+    hist: Dict[str, Dict],
+    top_k: Optional[int] = None,
+    categories: Optional[Dict[str, List[str]]] = None,
+) -> Dict[str, Dict]:
+    """
+    Bounds the bins of categorical histograms. A column keeps the given
+    categories, or else its top_k most frequent ones, the counts of the other
+    values are folded into the OTHER_BIN bin, which is always the last bin
+
+    Args:
+        hist: {column: {"bins": [...], "count": [...]}}
+        top_k: number of most frequent categories kept
+        categories: categories kept per column, usually the bins of the baseline
+    Returns:
+        histograms of the same structure, columns without a bound are unchanged
+    """
+    folded = {}
+    for column, column_hist in hist.items():
+        counter = CategoricalCounter.from_dict(column_hist)
+        if categories is not None and column in categories:
+            kept = categories[column]
+        elif top_k is not None:
+            kept = counter.top(top_k)
+        else:
+            folded[column] = column_hist
+            continue
+        folded[column] = counter.rebin(kept, other=OTHER_BIN).to_dict()
+    return folded
+
+
+def kept_categories(hist: Dict[str, Dict]) -> Dict[str, List[str]]:
+    """The categories of histograms bounded by fold_categories()"""
+    return {
+        column: [bin_ for bin_ in column_hist["bins"] if bin_ != OTHER_BIN]
+        for column, column_hist in hist.items()
+    }
 
 
 class CategoricalCountHistogram(DataMetrics):
@@ -60,6 +206,7 @@ class CategoricalCountHistogram(DataMetrics):
         >>> )
         >>> hist_result = hist.aggregation_result() # returns histogram result
         >>> # res structure -> { "column_name": { "bins": ["<bin1>"], "count": ["<bin1_count>"] } }
+        >>> hist_result = hist.aggregation_result(top_k=10) # 10 most frequent bins and "__other__"
     """
 
     @property
@@ -74,7 +221,7 @@ class CategoricalCountHistogram(DataMetrics):
             time_filter=self._time_filter_builder(time_range=time_range), kwargs=kwargs
         )
 
-        for doc in self._collection.aggregate(agg_query):
+        for doc in self._aggregate(agg_query):
             column_name = doc["_id"]["column_name"]
             column_value = doc["_id"]["column_value"]
             count = doc["count"]
@@ -82,6 +229,10 @@ class CategoricalCountHistogram(DataMetrics):
                 hist[column_name] = {"bins": [], "count": []}
             hist[column_name]["bins"].append(column_value)
             hist[column_name]["count"].append(count)
+        if kwargs.get("top_k") is not None or kwargs.get("categories") is not None:
+            hist = fold_categories(
+                hist, top_k=kwargs.get("top_k"), categories=kwargs.get("categories")
+            )
         return hist
 
     def _aggregation_query(
@@ -90,11 +241,11 @@ class CategoricalCountHistogram(DataMetrics):
         return [
             {
                 "$match": {
-                    "dataset_id": str(self._dataset_id),
+                    **self._dataset_filter(),
                     **(time_filter if time_filter is not None else {}),
                 }
             },
-            {"$unwind": "$columns"},
+            *self._unwind_columns(),
             {
                 "$match": {
                     "columns.data_type": "CATEGORICAL",
@@ -118,6 +269,10 @@ class CategoricalNestedDateCountHistogram(DataMetrics):
     The categorical nested date count histogram feature
     measures count of each categorical column for every date
 
+    With the time_buckets kwarg, a TimeBuckets, the counts are of every hour,
+    day or week bucket instead of every UTC date, keyed by the bucket start in
+    epoch milliseconds
+
     ...
 
     Methods:
@@ -150,12 +305,16 @@ class CategoricalNestedDateCountHistogram(DataMetrics):
         self, time_range: TimeRange = None, **kwargs
     ) -> Dict[str, Dict]:
         hist = {}
+        time_buckets: Optional[TimeBuckets] = kwargs.get("time_buckets")
         agg_query = self._aggregation_query(
-            time_filter=self._time_filter_builder(time_range=time_range), kwargs=kwargs
+            time_filter=self._time_filter_builder(time_range=time_range),
+            time_buckets=time_buckets,
         )
 
-        for doc in self._collection.aggregate(agg_query):
+        for doc in self._aggregate(agg_query):
             date_str = doc["_id"]["date_str"]
+            if time_buckets is not None:
+                date_str = int(date_str)
             column_name = doc["_id"]["column_name"]
             column_value = doc["_id"]["column_value"]
             count = doc["count"]
@@ -165,26 +324,38 @@ class CategoricalNestedDateCountHistogram(DataMetrics):
                 hist[date_str][column_name] = {"bins": [], "count": []}
             hist[date_str][column_name]["bins"].append(column_value)
             hist[date_str][column_name]["count"].append(count)
+        if kwargs.get("top_k") is not None or kwargs.get("categories") is not None:
+            hist = {
+                date_str: fold_categories(
+                    date_hist,
+                    top_k=kwargs.get("top_k"),
+                    categories=kwargs.get("categories"),
+                )
+                for date_str, date_hist in hist.items()
+            }
         return hist
 
     def _aggregation_query(
-        self, time_filter: Dict = None, **kwargs
+        self,
+        time_filter: Dict = None,
+        time_buckets: Optional[TimeBuckets] = None,
+        **kwargs,
     ) -> List[Dict[str, Any]]:
         return [
             {
                 "$match": {
-                    "dataset_id": str(self._dataset_id),
+                    **self._dataset_filter(),
                     **(time_filter if time_filter is not None else {}),
                 }
             },
             {
                 "$addFields": {
-                    "date_str": {
-                        "$dateToString": {"format": "%d-%m-%Y", "date": "$created_at"}
-                    }
+                    "date_str": time_buckets.expression()
+                    if time_buckets is not None
+                    else CREATED_AT_DATE_STR
                 }
             },
-            {"$unwind": "$columns"},
+            *self._unwind_columns(),
             {
                 "$match": {
                     "columns.data_type": "CATEGORICAL",
@@ -204,11 +375,113 @@ class CategoricalNestedDateCountHistogram(DataMetrics):
         ]
 
 
+def numeric_bin_edges(
+    values: List[Union[int, float]], bins: int = NUMERIC_HISTOGRAM_BINS
+) -> Optional[List[float]]:
+    """
+    Quantile bin edges of the values. The last edge is just above the maximum,
+    so every value of the sample falls into one of the bins between the edges
+
+    Args:
+        values: sample of the column, usually the baseline dataset
+        bins: number of bins
+    Returns:
+        sorted edges, None if there are no values
+    """
+    if len(values) == 0:
+        return None
+    edges = np.unique(
+        np.quantile(np.array(values, dtype=float), np.linspace(0, 1, bins + 1))
+    )
+    if len(edges) == 1:
+        edges = np.append(edges, edges[0])
+    edges[-1] = np.nextafter(edges[-1], np.inf)
+    return edges.tolist()
+
+
+def _numeric_bucket_stage(
+    column: str, bin_edges: Optional[Dict[str, List[float]]] = None
+) -> Dict[str, Any]:
+    """
+    The bucket stage of a numeric column histogram. Fixed bin edges are used
+    with an underflow and an overflow bucket, $bucketAuto is the fallback
+    """
+    if bin_edges is not None and column in bin_edges:
+        return {
+            "$bucket": {
+                "groupBy": "$columns.value_numeric",
+                "boundaries": [-sys.float_info.max]
+                + bin_edges[column]
+                + [sys.float_info.max],
+            }
+        }
+    return {
+        "$bucketAuto": {
+            "groupBy": "$columns.value_numeric",
+            "buckets": NUMERIC_HISTOGRAM_BINS,
+        }
+    }
+
+
+def _numeric_column_match(column: str) -> Dict[str, Any]:
+    # $bucket without a default fails on empty values, $bucketAuto would count
+    # them in its first bucket
+    return {"$match": {"columns.name": column, "columns.value_numeric": {"$ne": None}}}
+
+
+def _edge_histogram(docs: List[Dict], edges: List[float]) -> Dict[str, List]:
+    """
+    Histogram of $bucket docs on fixed edges. Every bin is present, empty bins
+    with a zero count, so histograms on the same edges can be added bin by bin
+    """
+    return FixedEdgeHistogram.from_bucket_docs(edges, docs).to_dict()
+
+
+def _auto_histogram(docs: List[Dict]) -> Dict[str, List]:
+    """
+    Histogram of $bucketAuto docs. The bins are labelled by their lower limit,
+    the last one by its maximum. The edges are the lower limit of every bin
+    and the maximum of the last one
+    """
+    nbins, count, edges = [], [], []
+    for k, doc in enumerate(docs):
+        count.append(doc["count"])
+        lower_limit = 0 if not doc["_id"]["min"] else doc["_id"]["min"]
+        nbins.append(lower_limit)
+        edges.append(doc["_id"]["min"])
+        if k == len(docs) - 1:
+            nbins[k] = doc["_id"]["max"]
+            edges.append(doc["_id"]["max"])
+    return {"bins": nbins, "count": count, "edges": edges}
+
+
+def auto_histogram_edges(histogram: Dict[str, List]) -> Optional[List[float]]:
+    """
+    Fixed bin edges of a $bucketAuto histogram. The last edge is just above the
+    maximum, so every bin of the histogram lies between two edges
+
+    Args:
+        histogram: histogram of a numeric count metric without bin edges
+    Returns:
+        sorted edges, None if the histogram has no edges
+    """
+    edges = histogram.get("edges")
+    if not edges:
+        return None
+    edges = [float(edge) for edge in edges]
+    edges[-1] = float(np.nextafter(edges[-1], np.inf))
+    return edges
+
+
 class NumericNestedCountDateHistogram(DataMetrics):
     """
     The numeric nested date count histogram feature
     measures count of each numeric column for every date
 
+    With the time_buckets kwarg, a TimeBuckets, the counts are of every hour,
+    day or week bucket instead of every UTC date, keyed by the bucket start in
+    epoch milliseconds
+
     ...
     Methods:
     --------
@@ -278,97 +551,101 @@ class NumericNestedCountDateHistogram(DataMetrics):
         return agg
 
     def _get_mongo_response(self, query: List[Dict[str, Any]]) -> Dict[str, Any]:
-        return self._collection.aggregate(query).next()
+        return self._aggregate(query).next()
 
     def aggregation_result(
         self, numeric_columns: List, time_range: TimeRange = None, **kwargs
     ) -> Dict[str, Any]:
-        hist: Dict[str, Dict] = {}
+        hist: Dict[Union[str, int], Dict] = {}
 
+        time_buckets: Optional[TimeBuckets] = kwargs.get("time_buckets")
         agg_query = self._aggregation_query(
             numeric_columns=numeric_columns,
             time_filter=self._time_filter_builder(time_range=time_range),
-            date_list=time_range.get_date_list,
-            kwargs=kwargs,
+            date_list=time_range.get_date_list
+            if time_buckets is None
+            else time_buckets.buckets(time_range),
+            **kwargs,
         )
         facets_response = self._get_mongo_response(query=agg_query)
 
         facets_date_agg: Dict[str, Dict] = self._facet_to_date_agg(
             facets=facets_response
         )
+        if time_buckets is not None:
+            facets_date_agg = {
+                int(bucket): facets_agg_value
+                for bucket, facets_agg_value in facets_date_agg.items()
+            }
 
+        bin_edges: Dict[str, List[float]] = kwargs.get("bin_edges") or {}
         for agg_date, facets_agg_value in facets_date_agg.items():
             hist[agg_date] = {}
-            for numeric_column in facets_agg_value.keys():
-                hist[agg_date][numeric_column] = {}
-                nbins, count = [], []
-                for k, doc in enumerate(facets_agg_value[numeric_column]):
-                    count.append(doc["count"])
-                    lower_limit = 0 if not doc["_id"]["min"] else doc["_id"]["min"]
-                    nbins.append(lower_limit)
-                    if k == len(facets_agg_value[numeric_column]) - 1:
-                        nbins[k] = doc["_id"]["max"]
-
-                hist[agg_date][numeric_column]["bins"] = nbins
-                hist[agg_date][numeric_column]["count"] = count
+            for numeric_column, docs in facets_agg_value.items():
+                if numeric_column in bin_edges:
+                    hist[agg_date][numeric_column] = _edge_histogram(
+                        docs, bin_edges[numeric_column]
+                    )
+                else:
+                    hist[agg_date][numeric_column] = _auto_histogram(docs)
 
         return hist
 
     def _aggregation_query(
         self,
         numeric_columns: List[str],
-        date_list: List[str],
+        date_list: List[Union[str, int]],
         time_filter: Dict = None,
         **kwargs,
     ) -> List[Dict[str, Any]]:
         facet_query = {}
-        bins: Dict[str, List[str]] = kwargs.get("bins", None)
+        bin_edges: Dict[str, List[float]] = kwargs.get("bin_edges", None)
 
         for date_str in date_list:
             for column in numeric_columns:
-                query = [{"$match": {"columns.name": column, "date_str": date_str}}]
-                if bins is None:
-                    query.append(
-                        {
-                            "$bucketAuto": {
-                                "groupBy": "$columns.value_numeric",
-                                "buckets": 9,
-                            }
-                        }
-                    )
-                else:
-                    query.append(
-                        {
-                            "$bucket": {
-                                "groupBy": "$columns.value_numeric",
-                                "boundaries": bins[column],
-                                "default": bins[column][-1],
-                            }
-                        }
-                    )
-                facet_query[f"{date_str}:{column}"] = query
+                match = _numeric_column_match(column)
+                match["$match"]["date_str"] = date_str
+                facet_query[f"{date_str}:{column}"] = [
+                    match,
+                    _numeric_bucket_stage(column, bin_edges=bin_edges),
+                ]
 
         return [
             {
                 "$match": {
-                    "dataset_id": str(self._dataset_id),
+                    **self._dataset_filter(),
                     **(time_filter if time_filter is not None else {}),
                 }
             },
             {
                 "$addFields": {
-                    "date_str": {
-                        "$dateToString": {"format": "%d-%m-%Y", "date": "$created_at"}
-                    }
+                    "date_str": kwargs["time_buckets"].expression()
+                    if kwargs.get("time_buckets") is not None
+                    else CREATED_AT_DATE_STR
                 }
             },
-            {"$unwind": "$columns"},
+            *self._unwind_columns(),
             {"$match": {"columns.data_type": "NUMERIC"}},
             {"$facet": facet_query},
         ]
 
 
 class NumericCountHistogram(DataMetrics):
+    facet_bytes_per_column = (NUMERIC_HISTOGRAM_BINS + 2) * RESULT_ENTRY_BYTES
+
+    @classmethod
+    def result_bytes_per_column(cls, **aggregation_kwargs) -> Optional[int]:
+        """
+        A bin count per bin. Columns with stored bin edges have a bin more than
+        edges, the other ones the automatic bins and the two outlier bins
+        """
+        bin_edges: Dict[str, List[float]] = aggregation_kwargs.get("bin_edges") or {}
+        bins = max(
+            [len(edges) + 1 for edges in bin_edges.values()],
+            default=0,
+        )
+        return max(bins * RESULT_ENTRY_BYTES, cls.facet_bytes_per_column)
+
     @property
     def metric_name(self) -> str:
         return "numeric_count_hist"
@@ -381,62 +658,37 @@ class NumericCountHistogram(DataMetrics):
         agg_query = self._aggregation_query(
             numeric_columns=numeric_columns,
             time_filter=self._time_filter_builder(time_range=time_range),
-            kwargs=kwargs,
+            **kwargs,
         )
-        facets = self._collection.aggregate(agg_query).next()
-        for numeric_column in facets:
-            hist[numeric_column] = {}
-            nbins = []
-            count = []
-            for k, doc in enumerate(facets[numeric_column]):
-                count.append(doc["count"])
-                lower_limit = 0 if not doc["_id"]["min"] else doc["_id"]["min"]
-                nbins.append(lower_limit)
-                if k == len(facets[numeric_column]) - 1:
-                    nbins[k] = doc["_id"]["max"]
-
-            hist[numeric_column]["bins"] = nbins
-            hist[numeric_column]["count"] = count
+        facets = self._aggregate(agg_query).next()
+        bin_edges: Dict[str, List[float]] = kwargs.get("bin_edges") or {}
+        for numeric_column, docs in facets.items():
+            if numeric_column in bin_edges:
+                hist[numeric_column] = _edge_histogram(docs, bin_edges[numeric_column])
+            else:
+                hist[numeric_column] = _auto_histogram(docs)
         return hist
 
     def _aggregation_query(
         self, numeric_columns: List, time_filter: Dict = None, **kwargs
     ) -> List[Dict[str, Any]]:
-        facet_query = {}
-        bins: Dict[str, List[str]] = kwargs.get("bins", None)
-
-        if bins is None:
-            for column in numeric_columns:
-                facet_query[column] = [
-                    {"$match": {"columns.name": column}},
-                    {
-                        "$bucketAuto": {
-                            "groupBy": "$columns.value_numeric",
-                            "buckets": 9,
-                        }
-                    },
-                ]
-        else:
-            for column in numeric_columns:
-                facet_query[column] = [
-                    {"$match": {"columns.name": column}},
-                    {
-                        "$bucket": {
-                            "groupBy": "$columns.value_numeric",
-                            "boundaries": bins[column],
-                            "default": bins[column][-1],
-                        }
-                    },
-                ]
+        bin_edges: Dict[str, List[float]] = kwargs.get("bin_edges", None)
+        facet_query = {
+            column: [
+                _numeric_column_match(column),
+                _numeric_bucket_stage(column, bin_edges=bin_edges),
+            ]
+            for column in numeric_columns
+        }
 
         return [
             {
                 "$match": {
-                    "dataset_id": str(self._dataset_id),
+                    **self._dataset_filter(),
                     **(time_filter if time_filter is not None else {}),
                 }
             },
-            {"$unwind": "$columns"},
+            *self._unwind_columns(),
             {"$match": {"columns.data_type": "NUMERIC"}},
             {"$facet": facet_query},
         ]
@@ -455,6 +707,9 @@ class CountEmptyHistogram(DataMetrics):
 
     """
 
+    # the empty and the total count of a column
+    facet_bytes_per_column = 2 * RESULT_ENTRY_BYTES
+
     @property
     def metric_name(self) -> str:
         return "count_empty_hist"
@@ -465,7 +720,7 @@ class CountEmptyHistogram(DataMetrics):
         agg_query = self._aggregation_query(
             time_filter=self._time_filter_builder(time_range=time_range)
         )
-        facets = self._collection.aggregate(agg_query).next()
+        facets = self._aggregate(agg_query).next()
 
         empty_columns, total_sum = facets["empty_columns"], facets["total_sum"]
 
@@ -492,11 +747,11 @@ class CountEmptyHistogram(DataMetrics):
         return [
             {
                 "$match": {
-                    "dataset_id": str(self._dataset_id),
+                    **self._dataset_filter(),
                     **(time_filter if time_filter is not None else {}),
                 }
             },
-            {"$unwind": "$columns"},
+            *self._unwind_columns(),
             {
                 "$facet": {
                     "empty_columns": [
@@ -534,18 +789,195 @@ class CountEmptyHistogram(DataMetrics):
         ]
 
 
-class CardinalityCategorical(DataMetrics):
+class CountEmptyDateHistogram(DataMetrics):
+    """
+    Per day count of empty values and of all values of each column.
+    Days without rows are part of the result with 0 counts, so the series of
+    every column has one value for each day of the time range
+
+    Methods:
+    --------
+    aggregation_result()
+        returns {"dates": [day, ...], "columns": {column: {"empty_count": [...],
+        "total_count": [...]}}}
+
+    """
+
     @property
     def metric_name(self) -> str:
-        return "categorical_cardinality"
+        return "count_empty_date_hist"
 
-    def aggregation_result(self, time_range: TimeRange = None) -> Dict[str, Any]:
-        cardinality = {}
+    def aggregation_result(self, time_range: TimeRange) -> Dict[str, Any]:
+        start_day = datetime.combine(time_range.start_time.date(), time.min)
+        dates = [
+            start_day + timedelta(days=i)
+            for i in range((time_range.end_time.date() - start_day.date()).days + 1)
+        ]
+        date_index = {date: i for i, date in enumerate(dates)}
+        columns: Dict[str, Dict[str, List[int]]] = {}
 
         agg_query = self._aggregation_query(
             time_filter=self._time_filter_builder(time_range=time_range)
         )
-        for doc in self._collection.aggregate(agg_query):
+        for doc in self._aggregate(agg_query):
+            _id = doc["_id"]
+            day = datetime(year=_id["year"], month=_id["month"], day=_id["day"])
+            if day not in date_index:
+                continue
+            if _id["column_name"] not in columns:
+                columns[_id["column_name"]] = {
+                    "empty_count": [0] * len(dates),
+                    "total_count": [0] * len(dates),
+                }
+            column = columns[_id["column_name"]]
+            column["empty_count"][date_index[day]] = doc["empty_count"]
+            column["total_count"][date_index[day]] = doc["total_count"]
+
+        return {"dates": dates, "columns": columns}
+
+    def _aggregation_query(self, time_filter: Dict = None) -> List[Dict[str, Any]]:
+        def is_empty(data_type: str, value_field: str) -> Dict:
+            return {
+                "$and": [
+                    {"$eq": ["$columns.data_type", data_type]},
+                    {"$eq": [{"$ifNull": [f"$columns.{value_field}", None]}, None]},
+                ]
+            }
+
+        return [
+            {
+                "$match": {
+                    **self._dataset_filter(),
+                    **(time_filter if time_filter is not None else {}),
+                }
+            },
+            *self._unwind_columns(),
+            {
+                "$group": {
+                    "_id": {
+                        "column_name": "$columns.name",
+                        "year": {"$year": "$created_at"},
+                        "month": {"$month": "$created_at"},
+                        "day": {"$dayOfMonth": "$created_at"},
+                    },
+                    "empty_count": {
+                        "$sum": {
+                            "$cond": [
+                                {
+                                    "$or": [
+                                        is_empty("CATEGORICAL", "value_categorical"),
+                                        is_empty("NUMERIC", "value_numeric"),
+                                    ]
+                                },
+                                1,
+                                0,
+                            ]
+                        }
+                    },
+                    "total_count": {"$sum": 1},
+                }
+            },
+        ]
+
+
+class CountEmptyHourlyCounters(DataMetrics):
+    """
+    Count of empty values of each column computed from running hourly counters
+    instead of the dataset rows. Counter documents hold the empty_count and
+    total_count of a column for the rows created in one hour.
+    The time range is widened to whole hours
+
+    Methods:
+    --------
+    aggregation_result()
+        returns the same result as CountEmptyHistogram
+
+    """
+
+    @property
+    def metric_name(self) -> str:
+        return "count_empty_hourly_counters"
+
+    def aggregation_result(self, time_range: TimeRange = None) -> Dict[str, Any]:
+        hist: Dict[str, Any] = {}
+        time_filter = {}
+        if time_range is not None:
+            time_filter = {
+                "hour": {
+                    "$gte": time_range.start_time.replace(
+                        minute=0, second=0, microsecond=0
+                    ),
+                    "$lte": time_range.end_time,
+                }
+            }
+        for column in self._aggregate(self._aggregation_query(time_filter=time_filter)):
+            total_count, empty_count = column["total_count"], column["empty_count"]
+            if total_count == 0:
+                continue
+            hist[column["_id"]] = {
+                "empty_count": empty_count,
+                "empty_percentage": float(empty_count) * (100.0 / float(total_count)),
+                "total_count": total_count,
+            }
+        return hist
+
+    def _aggregation_query(self, time_filter: Dict = None) -> List[Dict[str, Any]]:
+        return [
+            {
+                "$match": {
+                    "dataset_id": str(self._dataset_id),
+                    **(time_filter if time_filter is not None else {}),
+                    **(
+                        {"column_name": {"$in": list(self._columns)}}
+                        if self._columns is not None
+                        else {}
+                    ),
+                }
+            },
+            {
+                "$group": {
+                    "_id": "$column_name",
+                    "empty_count": {"$sum": "$empty_count"},
+                    "total_count": {"$sum": "$total_count"},
+                }
+            },
+        ]
+
+
+class CardinalityCategorical(DataMetrics):
+    """
+    Distinct values and the most frequent value of the categorical columns
+
+    In approximate mode the distinct (column, value) counts of the time range
+    are streamed from the database into a HyperLogLog and a top-K sketch per
+    column, instead of pushing every distinct value of a column into a single
+    document. The memory of the client is bounded per column, values lists only
+    the top-K values
+
+    The sketches are not built in the pipeline: the aggregation language has no
+    hash function matching the one of HyperLogLog, whose registers are merged
+    with the sketches of other runs. The database still groups every distinct
+    (column, value) pair, spilling to disk, and every distinct value leaves the
+    server once
+    """
+
+    @property
+    def metric_name(self) -> str:
+        return "categorical_cardinality"
+
+    def aggregation_result(
+        self,
+        time_range: TimeRange = None,
+        approximate: bool = False,
+        top_k: int = 10,
+    ) -> Dict[str, Any]:
+        time_filter = self._time_filter_builder(time_range=time_range)
+        if approximate:
+            return self._approximate_result(time_filter=time_filter, top_k=top_k)
+
+        cardinality = {}
+        agg_query = self._aggregation_query(time_filter=time_filter)
+        for doc in self._aggregate(agg_query, allowDiskUse=True):
             column, values = doc["_id"], doc["value_counts"]
             values.sort(key=lambda x: x["count"], reverse=True)
             cardinality[column] = {
@@ -556,15 +988,70 @@ class CardinalityCategorical(DataMetrics):
             }
         return cardinality
 
+    def _approximate_result(self, time_filter: Dict, top_k: int) -> Dict[str, Any]:
+        # the days are not grouped, a value is streamed once for the time range
+        distinct_sketches = self.daily_cardinality_sketches(
+            self._aggregate(
+                self._value_counts_query(time_filter=time_filter), allowDiskUse=True
+            ),
+            top_k=top_k,
+        )
+        distinct_values = merge_daily_sketches(distinct_sketches["distinct"])
+        top_values = merge_daily_sketches(distinct_sketches["top"])
+
+        cardinality = {}
+        for column, hll in distinct_values.items():
+            values = top_values[column].top(top_k)
+            cardinality[column] = {
+                "values": values,
+                "unique_values": hll.cardinality(),
+                "top_value": values[0]["value"],
+                "top_value_count": values[0]["count"],
+            }
+        return cardinality
+
+    @staticmethod
+    def daily_cardinality_sketches(
+        docs: Iterable[Dict], top_k: int = 10
+    ) -> Dict[str, Dict[Optional[str], Dict[str, Sketch]]]:
+        """
+        HyperLogLog (distinct) and top-K (top) sketches per day and per column
+        of the value counts. The day is None when the rows are not grouped by day
+        """
+        sketches: Dict[str, Dict[Optional[str], Dict[str, Sketch]]] = {
+            "distinct": {},
+            "top": {},
+        }
+        for doc in docs:
+            day, column = doc["_id"].get("date_str"), doc["_id"]["name"]
+            distinct = sketches["distinct"].setdefault(day, {})
+            top = sketches["top"].setdefault(day, {})
+            if column not in distinct:
+                distinct[column] = HyperLogLog()
+                # a few times more counters than reported values keeps the
+                # counts of the reported values close to exact
+                top[column] = TopK(capacity=TOP_K_CAPACITY_FACTOR * top_k)
+            distinct[column].add([doc["_id"]["value"]])
+            top[column].add(doc["_id"]["value"], doc["count"])
+        return sketches
+
+    def _value_counts_query(self, time_filter: Dict = None) -> List[Dict[str, Any]]:
+        group_id = {"name": "$columns.name", "value": "$columns.value_categorical"}
+        # the match, unwind and categorical match stages of the aggregation query
+        stages = len(self._unwind_columns()) + 2
+        return self._aggregation_query(time_filter=time_filter)[:stages] + [
+            {"$group": {"_id": group_id, "count": {"$sum": 1}}}
+        ]
+
     def _aggregation_query(self, time_filter: Dict = None) -> List[Dict[str, Any]]:
         return [
             {
                 "$match": {
-                    "dataset_id": str(self._dataset_id),
+                    **self._dataset_filter(),
                     **(time_filter if time_filter is not None else {}),
                 }
             },
-            {"$unwind": {"path": "$columns"}},
+            *self._unwind_columns(),
             {
                 "$match": {
                     "columns.data_type": "CATEGORICAL",
@@ -592,6 +1079,39 @@ class CardinalityCategorical(DataMetrics):
 
 
 class NumericBasicMetrics(DataMetrics):
+    """
+    Basic statistics of the numeric columns of a dataset
+
+    Percentiles are estimated with quantile sketches when the percentiles kwarg
+    is given. The sketches are built from bucket counts per column and per day,
+    aggregated in the same scan as the other statistics, and merged over the
+    days of the time range
+
+    With the moments kwarg, the statistics of every column also come as a
+    MomentsAccumulator, and the percentiles as the merged quantile sketch, so
+    results of time partitions can be combined
+    """
+
+    # the total, average, min, max, zero count and standard deviation of a column
+    facet_bytes_per_column = 6 * RESULT_ENTRY_BYTES
+
+    @classmethod
+    def result_bytes_per_column(cls, **aggregation_kwargs) -> Optional[int]:
+        """
+        The quantile bucket counts dominate with percentiles. They are counted
+        per day of the time range, a column has a bucket per relative_accuracy
+        step of the QUANTILE_VALUE_DECADES its values span, on both signs
+        """
+        if not aggregation_kwargs.get("percentiles"):
+            return cls.facet_bytes_per_column
+        time_range: Optional[TimeRange] = aggregation_kwargs.get("time_range")
+        days = len(time_range.get_date_list) if time_range is not None else 1
+        gamma = QuantileSketch(
+            aggregation_kwargs.get("relative_accuracy", DEFAULT_RELATIVE_ACCURACY)
+        ).gamma
+        buckets = 2 * math.ceil(QUANTILE_VALUE_DECADES * math.log(10) / math.log(gamma))
+        return cls.facet_bytes_per_column + days * buckets * RESULT_ENTRY_BYTES
+
     @property
     def metric_name(self) -> str:
         return "numeric_basic"
@@ -603,7 +1123,7 @@ class NumericBasicMetrics(DataMetrics):
         agg_query = self._aggregation_query(
             time_filter=self._time_filter_builder(time_range=time_range), **kwargs
         )
-        facets = self._collection.aggregate(agg_query).next()
+        facets = self._aggregate(agg_query).next()
         total_values = facets["total"]
         average_values = facets["average_values"]
         min_values = facets["min_values"]
@@ -637,8 +1157,85 @@ class NumericBasicMetrics(DataMetrics):
                 std_dev_value["std_dev"] ** 2
             )
 
+        if kwargs.get("moments"):
+            std_devs = {
+                doc["_id"]["column_name"]: doc["std_dev"] for doc in std_dev_values
+            }
+            for average_value in average_values:
+                column_name = average_value["_id"]["column_name"]
+                column_metrics = basic_metrics[column_name]
+                column_metrics["moments"] = MomentsAccumulator(
+                    count=column_metrics["total"],
+                    mean=average_value["avg"],
+                    m2=std_devs.get(column_name, 0) ** 2 * column_metrics["total"],
+                    min=column_metrics["min"],
+                    max=column_metrics["max"],
+                    zeros=column_metrics.get("zeros", 0),
+                )
+
+        percentiles: List[float] = kwargs.get("percentiles") or []
+        if "quantile_buckets" in facets:
+            daily_sketches = self.daily_quantile_sketches(
+                facets["quantile_buckets"],
+                relative_accuracy=kwargs.get(
+                    "relative_accuracy", DEFAULT_RELATIVE_ACCURACY
+                ),
+            )
+            for column_name, sketch in merge_daily_sketches(daily_sketches).items():
+                basic_metrics[column_name]["percentiles"] = {
+                    percentile_name(q): sketch.quantile(q) for q in percentiles
+                }
+                if kwargs.get("moments"):
+                    basic_metrics[column_name]["quantile_sketch"] = sketch
+
         return basic_metrics
 
+    @staticmethod
+    def daily_quantile_sketches(
+        docs: List[Dict], relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY
+    ) -> Dict[Optional[str], Dict[str, QuantileSketch]]:
+        """
+        Quantile sketches per day and per column of the quantile bucket counts.
+        The day is None when the rows are not grouped by day
+        """
+        sketches: Dict[Optional[str], Dict[str, QuantileSketch]] = {}
+        for doc in docs:
+            day_sketches = sketches.setdefault(doc["_id"].get("date_str"), {})
+            sketch = day_sketches.setdefault(
+                doc["_id"]["column_name"],
+                QuantileSketch(relative_accuracy=relative_accuracy),
+            )
+            sketch.add_bucket(doc["_id"]["sign"], doc["_id"]["key"], doc["count"])
+        return sketches
+
+    @staticmethod
+    def _quantile_bucket_facet(
+        relative_accuracy: float, daily: bool
+    ) -> List[Dict[str, Any]]:
+        # the bucket key of QuantileSketch.key(), computed by the database
+        value = "$columns.value_numeric"
+        log_gamma = math.log(QuantileSketch(relative_accuracy).gamma)
+        group_id = {
+            "column_name": "$columns.name",
+            "sign": {
+                "$cond": [
+                    {"$gt": [value, 0]},
+                    1,
+                    {"$cond": [{"$lt": [value, 0]}, -1, 0]},
+                ]
+            },
+            "key": {
+                "$cond": [
+                    {"$eq": [value, 0]},
+                    None,
+                    {"$ceil": {"$divide": [{"$ln": {"$abs": value}}, log_gamma]}},
+                ]
+            },
+        }
+        if daily:
+            group_id["date_str"] = CREATED_AT_DATE_STR
+        return [{"$group": {"_id": group_id, "count": {"$sum": 1}}}]
+
     def _aggregation_query(
         self, time_filter: Dict = None, **kwargs
     ) -> List[Dict[str, Any]]:
@@ -694,15 +1291,22 @@ class NumericBasicMetrics(DataMetrics):
                     }
                 }
             ]
+        if kwargs.get("percentiles"):
+            facets["quantile_buckets"] = self._quantile_bucket_facet(
+                relative_accuracy=kwargs.get(
+                    "relative_accuracy", DEFAULT_RELATIVE_ACCURACY
+                ),
+                daily="created_at" in (time_filter or {}),
+            )
 
         return [
             {
                 "$match": {
-                    "dataset_id": str(self._dataset_id),
+                    **self._dataset_filter(),
                     **(time_filter if time_filter is not None else {}),
                 }
             },
-            {"$unwind": "$columns"},
+            *self._unwind_columns(),
             {
                 "$match": {
                     "columns.data_type": "NUMERIC",
@@ -12,20 +12,34 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
-from typing import Any, Dict, List
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 from uuid import UUID
 
 import numpy as np
 from pymongo.collection import Collection
 
-from waterdip.core.commons.models import TimeRange
-from waterdip.core.metrics.base import MongoMetric
+from waterdip.core.commons.models import MetricView, TimeGranularity, TimeRange
+from waterdip.core.metrics.base import MongoMetric, TimeBuckets
 from waterdip.core.metrics.data_metrics import (
     CategoricalCountHistogram,
     CategoricalNestedDateCountHistogram,
+    DataMetrics,
     NumericCountHistogram,
     NumericNestedCountDateHistogram,
+    auto_histogram_edges,
+    fold_categories,
+    kept_categories,
 )
+from waterdip.core.metrics.executor import (
+    TimePartitionExecutor,
+    combine_count_histograms,
+    combine_date_results,
+)
+from waterdip.core.metrics.rows import RowReader
+from waterdip.core.metrics.sampling import RowSample, bootstrap_counts
+from waterdip.core.metrics.sketches import FixedEdgeHistogram
+from waterdip.core.metrics.views import MetricViewReader, combine_date_histograms
 
 
 class PSIMetrics(MongoMetric):
@@ -53,8 +67,42 @@ class PSIMetrics(MongoMetric):
         The collection object for the baseline dataset
     baseline_time_range:
         The time range for the baseline dataset
+    baseline_distribution:
+        Precomputed baseline distribution as returned by baseline_distribution().
+        When provided, the baseline dataset is not aggregated again
+    bin_edges:
+        Fixed bin edges of the numeric columns stored with the model version schema.
+        Baseline and production histograms of these columns are computed on them
+    top_k:
+        Number of categories kept per categorical column, chosen from the baseline.
+        The other values of the baseline and production histograms are counted in
+        an "__other__" bin. All categories are kept when None
+    time_partitions:
+        Executor aggregating the production dataset in day or week partitions of
+        the time range, in parallel. The partition results are cached when the
+        executor has a cache. A single pipeline is used when None
+    sample:
+        Sample of the production rows the PSI is approximated on. The confidence
+        intervals of the PSI values of the last aggregation_result call are kept
+        in psi_intervals. All production rows when None
+    views:
+        Reader of the materialized views of the production dataset. The days
+        covered by the categorical and numeric date histogram views are read
+        from the views, numeric ones when every column has bin_edges. Not used
+        with a sample
+    row_reader, baseline_row_reader:
+        Readers of the production and baseline rows in their storage layout.
+        v1 rows only when None
+    time_buckets:
+        Hour, day or week buckets the PSI values are computed for, keyed by the
+        bucket start in epoch milliseconds. UTC dates keyed by "%d-%m-%Y" when
+        None. The day views are only read for day and week buckets in UTC
     """
 
+    # Density used for bins which are empty in one of the distributions,
+    # keeps the log term of the PSI finite
+    EMPTY_BIN_DENSITY = 0.0001
+
     def __init__(
         self,
         collection: Collection,
@@ -62,6 +110,15 @@ class PSIMetrics(MongoMetric):
         baseline_dataset_id: UUID,
         baseline_collection: Collection,
         baseline_time_range: TimeRange = None,
+        baseline_distribution: Optional[Dict[str, Dict]] = None,
+        bin_edges: Optional[Dict[str, List[float]]] = None,
+        top_k: Optional[int] = None,
+        time_partitions: Optional[TimePartitionExecutor] = None,
+        sample: Optional[RowSample] = None,
+        views: Optional[MetricViewReader] = None,
+        row_reader: Optional[RowReader] = None,
+        baseline_row_reader: Optional[RowReader] = None,
+        time_buckets: Optional[TimeBuckets] = None,
     ):
         super().__init__(collection)
         self._dataset_id = dataset_id
@@ -69,58 +126,233 @@ class PSIMetrics(MongoMetric):
         self._baseline_dataset_id = baseline_dataset_id
         self._baseline_collection = baseline_collection
         self._baseline_time_range = baseline_time_range
+        self._baseline_distribution = baseline_distribution
+        self._bin_edges = bin_edges
+        self._top_k = top_k
+        self._time_partitions = time_partitions
+        self._sample = sample
+        self._views = views
+        self._row_reader = row_reader
+        self._time_buckets = time_buckets
+        # number of production rows aggregated by the last feature_psi call
+        self.rows_scanned: Optional[int] = None
+        # confidence interval of every PSI value of the last aggregation_result
+        # call, by date and column, when the production rows are sampled
+        self.psi_intervals: Dict[str, Dict[str, Tuple[float, float]]] = {}
 
         self._cat_count_date_histogram = CategoricalNestedDateCountHistogram(
-            collection=self._collection, dataset_id=self._dataset_id
+            collection=self._collection,
+            dataset_id=self._dataset_id,
+            sample=sample,
+            row_reader=row_reader,
         )
         self._numeric_count_date_histogram = NumericNestedCountDateHistogram(
-            collection=self._collection, dataset_id=self._dataset_id
+            collection=self._collection,
+            dataset_id=self._dataset_id,
+            sample=sample,
+            row_reader=row_reader,
         )
 
         self._cat_count_histogram_baseline = CategoricalCountHistogram(
-            collection=self._baseline_collection, dataset_id=self._baseline_dataset_id
+            collection=self._baseline_collection,
+            dataset_id=self._baseline_dataset_id,
+            row_reader=baseline_row_reader,
         )
         self._numeric_count_histogram_baseline = NumericCountHistogram(
-            collection=self._baseline_collection, dataset_id=self._baseline_dataset_id
+            collection=self._baseline_collection,
+            dataset_id=self._baseline_dataset_id,
+            row_reader=baseline_row_reader,
         )
 
     @property
     def metric_name(self) -> str:
         return "drift_psi"
 
+    def _date_key(self, day: datetime) -> Union[str, int]:
+        """Key of the results of a UTC day, its bucket with time_buckets"""
+        if self._time_buckets is None:
+            return day.strftime("%d-%m-%Y")
+        return self._time_buckets.bucket(day)
+
+    def _date_keys(self, time_range: TimeRange) -> List[Union[str, int]]:
+        if self._time_buckets is None:
+            return time_range.get_date_list
+        return self._time_buckets.buckets(time_range)
+
+    def _date_kwargs(self) -> Dict[str, Any]:
+        """
+        Kwargs of the production date histograms. Week buckets may span two
+        time partitions, the histograms of the same bucket are added
+        """
+        if self._time_buckets is None:
+            return {"combine": combine_date_results}
+        return {"combine": combine_date_histograms, "time_buckets": self._time_buckets}
+
+    def _reads_views(self, view_dates: bool = True) -> bool:
+        """
+        The views hold UTC days, by date they only add up to UTC day and week
+        buckets
+        """
+        if self._views is None or self._sample is not None:
+            return False
+        return (
+            not view_dates
+            or self._time_buckets is None
+            or (
+                self._time_buckets.offset_ms == 0
+                and self._time_buckets.granularity != TimeGranularity.HOUR
+            )
+        )
+
+    def _production_result(
+        self,
+        metric: DataMetrics,
+        time_range: TimeRange,
+        combine: Callable[[Dict, Dict], Dict],
+        view: Optional[MetricView] = None,
+        view_dates: bool = True,
+        **aggregation_kwargs,
+    ) -> Dict[str, Dict]:
+        """
+        Histograms of a production dataset metric, by date when view_dates. The
+        days covered by the materialized view of the metric are read from the
+        view, the rest of the time range is aggregated from the rows
+        """
+        materialized = None
+        if view is not None and self._reads_views(view_dates):
+            materialized = self._views(view=view, time_range=time_range)
+        if materialized is None:
+            return self._rows_result(
+                metric, time_range=time_range, combine=combine, **aggregation_kwargs
+            )
+
+        columns = aggregation_kwargs.get("numeric_columns")
+        categories = aggregation_kwargs.get("categories")
+        days: Dict[str, Dict] = {}
+        for day, histograms in materialized.days.items():
+            if columns is not None:
+                histograms = {
+                    column: histogram
+                    for column, histogram in histograms.items()
+                    if column in columns
+                }
+            # the views keep every category, bounded the same way as the rows
+            if categories is not None:
+                histograms = fold_categories(histograms, categories=categories)
+            days = combine_date_histograms(days, {self._date_key(day): histograms})
+
+        if view_dates:
+            result, add = days, combine_date_histograms
+        else:
+            result, add = {}, combine_count_histograms
+            for histograms in days.values():
+                result = combine_count_histograms(result, histograms)
+        for uncovered in materialized.uncovered(time_range):
+            result = add(
+                result,
+                self._rows_result(
+                    metric, time_range=uncovered, combine=combine, **aggregation_kwargs
+                ),
+            )
+        return result
+
+    def _rows_result(
+        self,
+        metric: DataMetrics,
+        time_range: TimeRange,
+        combine: Callable[[Dict, Dict], Dict],
+        **aggregation_kwargs,
+    ) -> Dict[str, Dict]:
+        """
+        Aggregation result of a production dataset metric, combined from the
+        time partitions when there is a partition executor. Closed partitions
+        are read from the cache of the executor, if any
+        """
+        if self._time_partitions is None:
+            return metric.aggregation_result(
+                time_range=time_range, **aggregation_kwargs
+            )
+        return self._time_partitions.run_metric(
+            metric,
+            time_range=time_range,
+            combine=combine,
+            cache_key=metric.partition_cache_key(**aggregation_kwargs),
+            **aggregation_kwargs,
+        )
+
+    def _numeric_view(self, numeric_columns: List[str]) -> Optional[MetricView]:
+        """The numeric histograms are materialized on the bin edges of the columns"""
+        if self._bin_edges and all(
+            column in self._bin_edges for column in numeric_columns
+        ):
+            return MetricView.NUMERIC_DATE_HISTOGRAM
+        return None
+
+    def _numeric_baseline_histograms(self, numeric_columns: List) -> Dict[str, Dict]:
+        """
+        Count histogram of each numeric column of the baseline dataset, on the
+        bin_edges of the column or on $bucketAuto bins
+        """
+        if self._baseline_distribution is not None:
+            return {
+                column: histogram
+                for column, histogram in self._baseline_distribution["numeric"].items()
+                if column in numeric_columns
+            }
+        return self._numeric_count_histogram_baseline.aggregation_result(
+            numeric_columns=numeric_columns,
+            time_range=self._baseline_time_range,
+            bin_edges=self._bin_edges,
+        )
+
     def _numeric_baseline_distribution(
         self, numeric_columns: List
-    ) -> (Dict[str, Dict], Dict[str, List[str]]):
+    ) -> (Dict[str, Dict], Dict[str, List[float]]):
         """
-        Will return count histogram for each feature
+        Will return count histogram for each feature on fixed bin edges.
+        Columns without bin_edges use the edges of their $bucketAuto bins, with
+        an empty underflow and overflow bin
         Args:
             numeric_columns:
                 List of numeric columns
         Returns:
             columns_histogram: Dict[str, Dict]
                 Count histogram for each feature
-            bins: Dict[str, List[str]]
-                Bins for each numeric column
+            bin_edges: Dict[str, List[float]]
+                Bin edges for each numeric column, the production histograms
+                are computed on them
         """
-        columns_histogram = self._numeric_count_histogram_baseline.aggregation_result(
-            numeric_columns=numeric_columns, time_range=self._baseline_time_range
-        )
-        bins: Dict[str, List[str]] = {}
-        for column_name, column_histogram in columns_histogram.items():
-            bins[column_name] = column_histogram["bins"]
-
-        return columns_histogram, bins
+        bin_edges = self._bin_edges or {}
+        columns_histogram: Dict[str, Dict] = {}
+        edges: Dict[str, List[float]] = {}
+        for column, histogram in self._numeric_baseline_histograms(
+            numeric_columns
+        ).items():
+            if column in bin_edges:
+                columns_histogram[column], edges[column] = histogram, bin_edges[column]
+                continue
+            column_edges = auto_histogram_edges(histogram)
+            if column_edges is None:
+                continue
+            columns_histogram[column] = FixedEdgeHistogram(
+                column_edges, [0] + histogram["count"] + [0]
+            ).to_dict()
+            edges[column] = column_edges
+        return columns_histogram, edges
 
     def _numeric_production_distribution(
-        self, numeric_columns: List, bins: Dict[str, List[str]], time_range: TimeRange
+        self,
+        numeric_columns: List,
+        bin_edges: Dict[str, List[float]],
+        time_range: TimeRange,
     ) -> Dict[str, Dict]:
         """
         Will return count histogram for each feature
         Args:
             numeric_columns:
                 List of numeric columns
-            bins:
-                Bins for each numeric column, already calculated in baseline
+            bin_edges:
+                Bin edges for each numeric column, already calculated in baseline
             time_range:
                 Time range for the production dataset
 
@@ -128,8 +360,13 @@ class PSIMetrics(MongoMetric):
             columns_histogram: Dict[str, Dict]
                 Count histogram for each feature
         """
-        columns_histogram = self._numeric_count_date_histogram.aggregation_result(
-            numeric_columns=numeric_columns, time_range=time_range, bins=bins
+        columns_histogram = self._production_result(
+            self._numeric_count_date_histogram,
+            time_range=time_range,
+            view=self._numeric_view(numeric_columns),
+            numeric_columns=numeric_columns,
+            bin_edges=bin_edges,
+            **self._date_kwargs(),
         )
         return columns_histogram
 
@@ -141,23 +378,64 @@ class PSIMetrics(MongoMetric):
                 Count histogram for each feature
 
         """
+        if self._baseline_distribution is not None:
+            return self._baseline_distribution["categorical"]
         return self._cat_count_histogram_baseline.aggregation_result(
-            time_range=self._baseline_time_range
+            time_range=self._baseline_time_range, top_k=self._top_k
         )
 
+    def baseline_distribution(self, numeric_columns: List) -> Dict[str, Dict]:
+        """
+        Will return the count histograms of the baseline dataset.
+        The result can be stored and passed back as baseline_distribution so that
+        the baseline dataset is aggregated only once
+        Args:
+            numeric_columns: List[str]
+                List of numeric columns
+        Returns:
+            baseline_distribution: Dict[str, Dict]
+                {"numeric": {column: histogram}, "categorical": {column: histogram}}
+        """
+        numeric_distribution = {}
+        if numeric_columns:
+            numeric_distribution = self._numeric_baseline_histograms(
+                numeric_columns=numeric_columns
+            )
+        return {
+            "numeric": numeric_distribution,
+            "categorical": self._categorical_baseline_distribution(),
+        }
+
     def _categorical_production_distribution(
-        self, time_range: TimeRange
+        self, time_range: TimeRange, categories: Optional[Dict[str, List[str]]] = None
     ) -> Dict[str, Dict]:
         """
         Will return count histogram for each feature for the production dataset
         Args:
             time_range:
                 Time range for the production dataset
+            categories:
+                Categories kept for each column, the other values are folded
+                into the "__other__" bin
         Returns:
             columns_histogram: Dict[str, Dict]
                 Count histogram for each feature
         """
-        return self._cat_count_date_histogram.aggregation_result(time_range=time_range)
+        return self._production_result(
+            self._cat_count_date_histogram,
+            time_range=time_range,
+            view=MetricView.CATEGORICAL_DATE_HISTOGRAM,
+            categories=categories,
+            **self._date_kwargs(),
+        )
+
+    def _baseline_categories(
+        self, categorical_baseline: Dict[str, Dict]
+    ) -> Optional[Dict[str, List[str]]]:
+        """The categories of the bounded baseline histograms, None if unbounded"""
+        if self._top_k is None:
+            return None
+        return kept_categories(categorical_baseline)
 
     @staticmethod
     def count_to_density(count_array: List[int]) -> List[float]:
@@ -197,6 +475,184 @@ class PSIMetrics(MongoMetric):
             ]
         ).tolist()
 
+    @classmethod
+    def psi_from_histograms(
+        cls, baseline_histogram: Dict, production_histogram: Dict
+    ) -> float:
+        """
+        Will calculate the PSI value of two count histograms aligned by bin.
+        Bins which are missing in one of the histograms get EMPTY_BIN_DENSITY
+
+        Args:
+            baseline_histogram: Dict
+                {"bins": [...], "count": [...]} of the baseline dataset
+            production_histogram: Dict
+                {"bins": [...], "count": [...]} of the production dataset
+        Returns:
+            psi_value: float
+        """
+        baseline_counts = dict(
+            zip(baseline_histogram["bins"], baseline_histogram["count"])
+        )
+        production_counts = dict(
+            zip(production_histogram["bins"], production_histogram["count"])
+        )
+        bins = list(baseline_counts.keys()) + [
+            bin_ for bin_ in production_counts.keys() if bin_ not in baseline_counts
+        ]
+        baseline_density = np.array(
+            cls.count_to_density([baseline_counts.get(bin_, 0) for bin_ in bins])
+        )
+        production_density = np.array(
+            cls.count_to_density([production_counts.get(bin_, 0) for bin_ in bins])
+        )
+        baseline_density[baseline_density == 0] = cls.EMPTY_BIN_DENSITY
+        production_density[production_density == 0] = cls.EMPTY_BIN_DENSITY
+        return cls.psi_from_bins(
+            baseline_density=baseline_density.tolist(),
+            production_density=production_density.tolist(),
+        )
+
+    @classmethod
+    def psi_interval(
+        cls,
+        baseline_histogram: Dict,
+        production_histogram: Dict,
+        sample: RowSample,
+        iterations: int = 200,
+    ) -> Tuple[float, float]:
+        """
+        Will calculate the confidence interval of the PSI value of a sampled
+        production histogram, from the PSI values of bootstrap resamples of it
+
+        Args:
+            baseline_histogram: Dict
+                {"bins": [...], "count": [...]} of the baseline dataset
+            production_histogram: Dict
+                {"bins": [...], "count": [...]} of the sampled production rows
+            sample: RowSample
+                sample of the production rows
+            iterations: int
+                number of bootstrap resamples
+        Returns:
+            psi_interval: Tuple[float, float]
+        """
+        baseline_counts = dict(
+            zip(baseline_histogram["bins"], baseline_histogram["count"])
+        )
+        production_counts = dict(
+            zip(production_histogram["bins"], production_histogram["count"])
+        )
+        bins = list(baseline_counts.keys()) + [
+            bin_ for bin_ in production_counts.keys() if bin_ not in baseline_counts
+        ]
+        baseline_density = np.array(
+            cls.count_to_density([baseline_counts.get(bin_, 0) for bin_ in bins])
+        )
+        baseline_density[baseline_density == 0] = cls.EMPTY_BIN_DENSITY
+        resamples = bootstrap_counts(
+            [production_counts.get(bin_, 0) for bin_ in bins], iterations=iterations
+        )
+        totals = resamples.sum(axis=1, keepdims=True)
+        production_density = np.divide(
+            resamples, totals, out=np.zeros_like(resamples), where=totals > 0
+        )
+        production_density[production_density == 0] = cls.EMPTY_BIN_DENSITY
+        psi_values = np.sum(
+            (production_density - baseline_density)
+            * np.log(production_density / baseline_density),
+            axis=1,
+        )
+        return sample.interval(psi_values)
+
+    def _record_psi_intervals(
+        self,
+        date_str: str,
+        psi_values: Dict[str, float],
+        baseline_distribution: Dict[str, Dict],
+        production_distribution: Dict[str, Dict],
+    ):
+        """Keeps the confidence intervals of the PSI values of a date"""
+        if self._sample is None:
+            return
+        date_intervals = self.psi_intervals.setdefault(date_str, {})
+        for column in psi_values:
+            date_intervals[column] = self.psi_interval(
+                baseline_distribution[column],
+                production_distribution[column],
+                sample=self._sample,
+            )
+
+    def feature_psi(
+        self, numeric_columns: List, categorical_columns: List, time_range: TimeRange
+    ) -> Dict[str, float]:
+        """
+        Will calculate the PSI value for each column over the whole time range of the
+        production dataset, using the bins of the baseline dataset
+
+        Args:
+            numeric_columns: List[str]
+            categorical_columns: List[str]
+            time_range: TimeRange
+                Time range for the production dataset
+        Returns:
+            psi_values: Dict[str, float]
+                PSI value for each column
+        """
+        psi_values: Dict[str, float] = {}
+        self.rows_scanned = 0
+        if numeric_columns:
+            numeric_baseline, bin_edges = self._numeric_baseline_distribution(
+                numeric_columns=numeric_columns
+            )
+            if bin_edges:
+                numeric_production = self._production_result(
+                    NumericCountHistogram(
+                        collection=self._collection,
+                        dataset_id=self._dataset_id,
+                        sample=self._sample,
+                        row_reader=self._row_reader,
+                    ),
+                    time_range=time_range,
+                    combine=combine_count_histograms,
+                    view=self._numeric_view(list(bin_edges.keys())),
+                    view_dates=False,
+                    numeric_columns=list(bin_edges.keys()),
+                    bin_edges=bin_edges,
+                )
+                for column, histogram in numeric_production.items():
+                    psi_values[column] = self.psi_from_histograms(
+                        numeric_baseline[column], histogram
+                    )
+                    self.rows_scanned = max(self.rows_scanned, sum(histogram["count"]))
+
+        if categorical_columns:
+            categorical_baseline = self._categorical_baseline_distribution()
+            categorical_production = self._production_result(
+                CategoricalCountHistogram(
+                    collection=self._collection,
+                    dataset_id=self._dataset_id,
+                    sample=self._sample,
+                    row_reader=self._row_reader,
+                ),
+                time_range=time_range,
+                combine=combine_count_histograms,
+                view=MetricView.CATEGORICAL_DATE_HISTOGRAM,
+                view_dates=False,
+                categories=self._baseline_categories(categorical_baseline),
+            )
+            for column in categorical_columns:
+                if column in categorical_production:
+                    self.rows_scanned = max(
+                        self.rows_scanned, sum(categorical_production[column]["count"])
+                    )
+                if column in categorical_baseline and column in categorical_production:
+                    psi_values[column] = self.psi_from_histograms(
+                        categorical_baseline[column], categorical_production[column]
+                    )
+
+        return psi_values
+
     def _calculate_psi_value(
         self,
         columns: List[str],
@@ -249,12 +705,14 @@ class PSIMetrics(MongoMetric):
         """
         psi_numeric_date_agg = {}
 
-        numeric_baseline_distribution, bins = self._numeric_baseline_distribution(
+        numeric_baseline_distribution, bin_edges = self._numeric_baseline_distribution(
             numeric_columns=numeric_columns
         )
         numeric_production_distribution_date_agg = (
             self._numeric_production_distribution(
-                numeric_columns=numeric_columns, bins=bins, time_range=time_range
+                numeric_columns=list(bin_edges.keys()),
+                bin_edges=bin_edges,
+                time_range=time_range,
             )
         )
 
@@ -262,8 +720,19 @@ class PSIMetrics(MongoMetric):
             date_str,
             numeric_production_distribution,
         ) in numeric_production_distribution_date_agg.items():
-            numeric_psi_values_ny_columns = self._calculate_psi_value(
-                columns=numeric_columns,
+            # histograms on fixed edges share their bins, some of them empty
+            numeric_psi_values_ny_columns = {
+                column: self.psi_from_histograms(
+                    numeric_baseline_distribution[column],
+                    numeric_production_distribution[column],
+                )
+                for column in numeric_columns
+                if column in numeric_baseline_distribution
+                and column in numeric_production_distribution
+            }
+            self._record_psi_intervals(
+                date_str,
+                numeric_psi_values_ny_columns,
                 baseline_distribution=numeric_baseline_distribution,
                 production_distribution=numeric_production_distribution,
             )
@@ -287,16 +756,37 @@ class PSIMetrics(MongoMetric):
         psi_cat_date_agg = {}
         categorical_baseline_distribution = self._categorical_baseline_distribution()
 
+        categories = self._baseline_categories(categorical_baseline_distribution)
         categorical_production_distribution_date_agg = (
-            self._categorical_production_distribution(time_range=time_range)
+            self._categorical_production_distribution(
+                time_range=time_range, categories=categories
+            )
         )
 
         for (
             date_str,
             categorical_production_distribution,
         ) in categorical_production_distribution_date_agg.items():
-            categorical_psi_values_ny_columns = self._calculate_psi_value(
-                columns=categorical_columns,
+            if categories is not None:
+                # bounded histograms share their bins, days may have empty bins
+                categorical_psi_values_ny_columns = {
+                    column: self.psi_from_histograms(
+                        categorical_baseline_distribution[column],
+                        categorical_production_distribution[column],
+                    )
+                    for column in categorical_columns
+                    if column in categorical_baseline_distribution
+                    and column in categorical_production_distribution
+                }
+            else:
+                categorical_psi_values_ny_columns = self._calculate_psi_value(
+                    columns=categorical_columns,
+                    baseline_distribution=categorical_baseline_distribution,
+                    production_distribution=categorical_production_distribution,
+                )
+            self._record_psi_intervals(
+                date_str,
+                categorical_psi_values_ny_columns,
                 baseline_distribution=categorical_baseline_distribution,
                 production_distribution=categorical_production_distribution,
             )
@@ -309,7 +799,7 @@ class PSIMetrics(MongoMetric):
         numeric_columns: List,
         categorical_columns: List,
         time_range: TimeRange,
-        **kwargs
+        **kwargs,
     ) -> Dict[str, Dict[str, float]]:
         """
         Will calculate the PSI value for each column for each date in the production dataset
@@ -327,6 +817,7 @@ class PSIMetrics(MongoMetric):
         """
         psi_date_agg: Dict[str, Dict[str, float]] = {}
         psi_numeric_date_agg = {}
+        self.psi_intervals = {}
         if numeric_columns:
             psi_numeric_date_agg = self._psi_numeric_date_agg(
                 numeric_columns=numeric_columns, time_range=time_range
@@ -335,7 +826,7 @@ class PSIMetrics(MongoMetric):
             categorical_columns=categorical_columns, time_range=time_range
         )
 
-        for date_str in time_range.get_date_list:
+        for date_str in self._date_keys(time_range):
             psi_date_agg[date_str] = {}
             if date_str in psi_numeric_date_agg and numeric_columns:
                 psi_date_agg[date_str].update(psi_numeric_date_agg[date_str])
@@ -389,3 +880,44 @@ class PSIMetrics(MongoMetric):
             else:
                 average_psi_date_agg[date_str] = 0
         return average_psi_date_agg
+
+    @staticmethod
+    def _average_interval_column_agg(
+        psi_intervals: Dict[str, Dict[str, Tuple[float, float]]]
+    ) -> Dict[str, Tuple[float, float]]:
+        """
+        Will calculate the interval of the average PSI value of each column, from
+        the average bounds of the intervals of its dates
+        Args:
+            psi_intervals: Dict[str, Dict[str, Tuple[float, float]]]
+                PSI interval for each column for each date
+        Returns:
+            average_interval_column_agg: Dict[str, Tuple[float, float]]
+        """
+        column_intervals: Dict[str, List[Tuple[float, float]]] = {}
+        for date_intervals in psi_intervals.values():
+            for column, interval in date_intervals.items():
+                column_intervals.setdefault(column, []).append(interval)
+        return {
+            column: tuple(np.mean(intervals, axis=0).tolist())
+            for column, intervals in column_intervals.items()
+        }
+
+    @staticmethod
+    def _average_interval_date_agg(
+        psi_intervals: Dict[str, Dict[str, Tuple[float, float]]]
+    ) -> Dict[str, Tuple[float, float]]:
+        """
+        Will calculate the interval of the average PSI value of each date, from
+        the average bounds of the intervals of its columns
+        Args:
+            psi_intervals: Dict[str, Dict[str, Tuple[float, float]]]
+                PSI interval for each column for each date
+        Returns:
+            average_interval_date_agg: Dict[str, Tuple[float, float]]
+        """
+        return {
+            date_str: tuple(np.mean(list(date_intervals.values()), axis=0).tolist())
+            for date_str, date_intervals in psi_intervals.items()
+            if date_intervals
+        }
@@ -0,0 +1,536 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import copy
+import math
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time, timedelta
+from time import monotonic
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    MutableMapping,
+    Optional,
+    Tuple,
+    Type,
+)
+
+from waterdip.core.commons.models import TimeRange
+from waterdip.core.metrics.base import MongoMetric
+from waterdip.core.metrics.data_metrics import DataMetrics
+from waterdip.core.metrics.sketches import (
+    MomentsAccumulator,
+    QuantileSketch,
+    percentile_name,
+)
+
+# Result documents are capped at 16MB, groups are sized to half of it
+MAX_RESULT_BYTES = 8 * 1024 * 1024
+
+PARTITION_DAY = "day"
+PARTITION_WEEK = "week"
+PARTITION_GRANULARITIES = {PARTITION_DAY: 1, PARTITION_WEEK: 7}
+# created_at is stored with millisecond precision, a partition ends one
+# millisecond before the next one starts
+PARTITION_RESOLUTION = timedelta(milliseconds=1)
+
+
+class ColumnGroupExecutor:
+    """
+    Runs a data metric for groups of columns in parallel and merges the
+    results. Metrics aggregating all columns into a single $facet document hit
+    the 16MB document limit on wide models, and run as one single threaded
+    pipeline. Every group runs its own pipeline, on its own Mongo connection
+
+    Attributes:
+    ------------------
+    workers:
+        number of group pipelines running at the same time
+    max_group_columns:
+        maximum number of columns of a group, on top of the result size bound
+    max_time_ms:
+        time limit of every group pipeline, None for no limit
+    allow_disk_use:
+        whether group pipelines may spill to disk
+
+    Examples:
+        >>> executor = ColumnGroupExecutor(workers=4, max_time_ms=60000)
+        >>> basic_metrics = executor.run_metric(
+        >>>     NumericBasicMetrics,
+        >>>     columns=numeric_columns,
+        >>>     metric_kwargs={"collection": collection, "dataset_id": dataset_id},
+        >>>     aggregation_kwargs={"time_range": time_range},
+        >>> )
+        >>> # same structure as NumericBasicMetrics(...).aggregation_result(...)
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        max_group_columns: Optional[int] = None,
+        max_time_ms: Optional[int] = None,
+        allow_disk_use: bool = True,
+    ):
+        self.workers = max(int(workers), 1)
+        self.max_group_columns = max_group_columns
+        self.max_time_ms = max_time_ms
+        self.allow_disk_use = allow_disk_use
+
+    @property
+    def aggregate_options(self) -> Dict[str, Any]:
+        options: Dict[str, Any] = {"allowDiskUse": self.allow_disk_use}
+        if self.max_time_ms is not None:
+            options["maxTimeMS"] = self.max_time_ms
+        return options
+
+    def column_groups(
+        self, columns: List[str], bytes_per_column: Optional[int] = None
+    ) -> List[List[str]]:
+        """
+        Splits the columns into groups of equal size. There are at least as
+        many groups as workers, and groups are small enough for their result
+        to stay well below the document size limit
+        """
+        if len(columns) == 0:
+            return []
+        max_columns = len(columns)
+        if bytes_per_column:
+            max_columns = max(MAX_RESULT_BYTES // bytes_per_column, 1)
+        if self.max_group_columns is not None:
+            max_columns = min(max_columns, self.max_group_columns)
+        n_groups = max(
+            math.ceil(len(columns) / max_columns), min(self.workers, len(columns))
+        )
+        size = math.ceil(len(columns) / n_groups)
+        return [columns[i : i + size] for i in range(0, len(columns), size)]
+
+    def run_metric(
+        self,
+        metric_class: Type[DataMetrics],
+        columns: List[str],
+        metric_kwargs: Dict[str, Any],
+        aggregation_kwargs: Optional[Dict[str, Any]] = None,
+        columns_kwarg: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Runs a data metric for every column group, pruned to the group columns
+
+        Args:
+            metric_class: the data metric
+            columns: all the columns
+            metric_kwargs: constructor kwargs of the metric, collection and dataset_id
+            aggregation_kwargs: kwargs of aggregation_result
+            columns_kwarg: aggregation_result kwarg taking the group columns,
+                like numeric_columns
+        Returns:
+            merged result of the groups
+        """
+
+        def group_metric(group: List[str]) -> Dict[str, Any]:
+            kwargs = dict(aggregation_kwargs or {})
+            if columns_kwarg is not None:
+                kwargs[columns_kwarg] = group
+            return metric_class(
+                columns=group, aggregate_options=self.aggregate_options, **metric_kwargs
+            ).aggregation_result(**kwargs)
+
+        return self.run(
+            group_metric,
+            columns=columns,
+            bytes_per_column=metric_class.result_bytes_per_column(
+                **(aggregation_kwargs or {})
+            ),
+        )
+
+    def run(
+        self,
+        group_metric: Callable[[List[str]], Dict[str, Any]],
+        columns: List[str],
+        bytes_per_column: Optional[int] = None,
+        merge: Optional[Callable[[Dict, Dict], Dict]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Runs group_metric for every column group and merges the results
+
+        Args:
+            group_metric: the metric result of a group of columns
+            columns: all the columns
+            bytes_per_column: estimated result size per column
+            merge: merges a group result into the merged result, results keyed
+                by column are merged with dict.update by default
+        Returns:
+            merged result, in the structure of the group results
+        """
+        groups = self.column_groups(columns, bytes_per_column=bytes_per_column)
+        merge = merge or _merge_column_results
+        merged: Dict[str, Any] = {}
+        if len(groups) == 1:
+            return merge(merged, group_metric(groups[0]))
+        with ThreadPoolExecutor(
+            max_workers=min(self.workers, len(groups)),
+            thread_name_prefix="wd-column-group",
+        ) as pool:
+            # results are merged in group order, a failed group fails the run
+            for result in pool.map(group_metric, groups):
+                merged = merge(merged, result)
+        return merged
+
+
+def _merge_column_results(merged: Dict, result: Dict) -> Dict:
+    merged.update(result)
+    return merged
+
+
+class PartitionCache(MutableMapping):
+    """
+    Partition results of a TimePartitionExecutor, shared by the runs of a
+    process. The least recently used results are evicted above max_entries, and
+    results expire after ttl seconds so that rows logged late for a closed
+    partition are counted again. Results are copied in and out, callers may
+    modify them. Safe to use from several threads
+
+    Attributes:
+    ------------------
+    max_entries:
+        number of partition results kept
+    ttl:
+        seconds a partition result is kept, None to keep it until evicted
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None):
+        self.max_entries = max(int(max_entries), 1)
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key: str) -> Any:
+        with self._lock:
+            expires_at, value = self._entries[key]
+            if expires_at is not None and expires_at <= monotonic():
+                del self._entries[key]
+                raise KeyError(key)
+            self._entries.move_to_end(key)
+        return copy.deepcopy(value)
+
+    def __setitem__(self, key: str, value: Any):
+        expires_at = monotonic() + self.ttl if self.ttl is not None else None
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __delitem__(self, key: str):
+        with self._lock:
+            del self._entries[key]
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class TimePartitionExecutor:
+    """
+    Runs a metric for day or week partitions of a time range in parallel and
+    combines the partial results. Long time ranges are aggregated by as many
+    pipelines as there are partitions instead of a single one. Results of
+    partitions which ended before the run can be kept in a cache, and are not
+    aggregated again by later runs
+
+    Attributes:
+    ------------------
+    granularity:
+        "day" or "week", week partitions start on monday
+    workers:
+        number of partition pipelines running at the same time
+    min_range_days:
+        time ranges of fewer days are aggregated as a single partition
+    cache:
+        partition results by cache key, None to aggregate every partition
+
+    Examples:
+        >>> executor = TimePartitionExecutor(granularity="day", workers=4)
+        >>> hist = executor.run_metric(
+        >>>     NumericNestedCountDateHistogram(collection=collection, dataset_id=dataset_id),
+        >>>     time_range=time_range,
+        >>>     combine=combine_date_results,
+        >>>     numeric_columns=numeric_columns,
+        >>> )
+        >>> # same structure as the aggregation_result of the metric
+    """
+
+    def __init__(
+        self,
+        granularity: str = PARTITION_DAY,
+        workers: int = 4,
+        min_range_days: int = 0,
+        cache: Optional[MutableMapping[str, Any]] = None,
+    ):
+        if granularity not in PARTITION_GRANULARITIES:
+            raise ValueError(
+                f"Partition granularity must be one of {list(PARTITION_GRANULARITIES)}"
+            )
+        self.granularity = granularity
+        self.workers = max(int(workers), 1)
+        self.min_range_days = min_range_days
+        self.cache = cache
+
+    def partitions(self, time_range: TimeRange) -> List[TimeRange]:
+        """
+        Splits the time range on day or week boundaries. The partitions cover
+        the time range without overlapping, the first and the last ones can be
+        shorter than a day or a week
+        """
+        if time_range.end_time - time_range.start_time < timedelta(
+            days=self.min_range_days
+        ):
+            return [time_range]
+        step = timedelta(days=PARTITION_GRANULARITIES[self.granularity])
+        boundary = datetime.combine(
+            time_range.start_time.date(), time.min, tzinfo=time_range.start_time.tzinfo
+        )
+        if self.granularity == PARTITION_WEEK:
+            boundary -= timedelta(days=boundary.weekday())
+        partitions: List[TimeRange] = []
+        start_time = time_range.start_time
+        while start_time <= time_range.end_time:
+            boundary += step
+            partitions.append(
+                TimeRange(
+                    start_time=start_time,
+                    end_time=min(boundary - PARTITION_RESOLUTION, time_range.end_time),
+                )
+            )
+            start_time = boundary
+        return partitions
+
+    def run_metric(
+        self,
+        metric: MongoMetric,
+        time_range: TimeRange,
+        combine: Callable[[Dict, Dict], Dict],
+        cache_key: Optional[str] = None,
+        **aggregation_kwargs,
+    ) -> Dict[str, Any]:
+        """
+        Runs the aggregation_result of a metric for every partition
+
+        Args:
+            metric: the metric, aggregation_result takes a time_range kwarg
+            time_range: time range of the metric
+            combine: combines a partition result into the combined result
+            cache_key: key of the metric and its kwargs, the partition results
+                are not cached when None
+            aggregation_kwargs: other kwargs of aggregation_result
+        Returns:
+            combined result of the partitions
+        """
+        return self.run(
+            lambda partition: metric.aggregation_result(
+                time_range=partition, **aggregation_kwargs
+            ),
+            time_range=time_range,
+            combine=combine,
+            cache_key=cache_key,
+        )
+
+    def run(
+        self,
+        partition_metric: Callable[[TimeRange], Dict[str, Any]],
+        time_range: TimeRange,
+        combine: Callable[[Dict, Dict], Dict],
+        cache_key: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Runs partition_metric for every partition which is not cached and
+        combines the results in partition order
+
+        Args:
+            partition_metric: the metric result of a partition
+            time_range: time range of the metric
+            combine: combines a partition result into the combined result, without
+                modifying the partition result
+            cache_key: key of the metric and its kwargs, the partition results
+                are not cached when None
+        Returns:
+            combined result, in the structure of the partition results
+        """
+        partitions = self.partitions(time_range)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(partitions)
+        pending: List[int] = []
+        for i, partition in enumerate(partitions):
+            key = self._partition_key(cache_key, partition)
+            cached = self.cache.get(key) if key is not None else None
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append(i)
+
+        started_at = datetime.utcnow()
+        if len(pending) == 1:
+            results[pending[0]] = partition_metric(partitions[pending[0]])
+        elif pending:
+            with ThreadPoolExecutor(
+                max_workers=min(self.workers, len(pending)),
+                thread_name_prefix="wd-time-partition",
+            ) as pool:
+                # a failed partition fails the run
+                for i, result in zip(
+                    pending,
+                    pool.map(lambda i: partition_metric(partitions[i]), pending),
+                ):
+                    results[i] = result
+
+        for i in pending:
+            key = self._partition_key(cache_key, partitions[i])
+            # rows of open partitions are still being logged
+            if key is not None and partitions[i].end_time.replace(
+                tzinfo=None
+            ) < started_at.replace(tzinfo=None):
+                self.cache[key] = results[i]
+
+        combined: Dict[str, Any] = {}
+        for result in results:
+            combined = combine(combined, result)
+        return combined
+
+    def _partition_key(
+        self, cache_key: Optional[str], partition: TimeRange
+    ) -> Optional[str]:
+        if self.cache is None or cache_key is None:
+            return None
+        return (
+            f"{cache_key}:{partition.start_time.isoformat()}"
+            f":{partition.end_time.isoformat()}"
+        )
+
+
+def combine_date_results(combined: Dict, result: Dict) -> Dict:
+    """Combines results keyed by date, the dates of the partitions are disjoint"""
+    return {**combined, **result}
+
+
+def combine_count_histograms(combined: Dict, result: Dict) -> Dict:
+    """
+    Combines count histograms keyed by column, {"bins": [...], "count": [...]},
+    by adding the counts of the same bin
+    """
+    combined = dict(combined)
+    for column, histogram in result.items():
+        if column not in combined:
+            combined[column] = histogram
+            continue
+        counts = dict(zip(combined[column]["bins"], combined[column]["count"]))
+        for bin_, count in zip(histogram["bins"], histogram["count"]):
+            counts[bin_] = counts.get(bin_, 0) + count
+        combined[column] = {"bins": list(counts.keys()), "count": list(counts.values())}
+    return combined
+
+
+def combine_empty_counts(combined: Dict, result: Dict) -> Dict:
+    """
+    Combines CountEmptyHistogram results by adding the empty and total counts
+    of every column, the empty percentage is computed on the sums
+    """
+    combined = dict(combined)
+    for column, counts in result.items():
+        empty_count = counts["empty_count"]
+        total_count = counts["total_count"]
+        if column in combined:
+            empty_count += combined[column]["empty_count"]
+            total_count += combined[column]["total_count"]
+        combined[column] = {
+            "empty_count": empty_count,
+            "empty_percentage": float(empty_count) * (100.0 / float(total_count))
+            if empty_count
+            else 0.0,
+            "total_count": total_count,
+        }
+    return combined
+
+
+def combine_empty_date_histograms(combined: Dict, result: Dict) -> Dict:
+    """
+    Combines CountEmptyDateHistogram results by appending the days of the
+    partition. Columns without rows in a partition get 0 counts for its days
+    """
+    if not combined:
+        return result
+    dates = combined["dates"] + result["dates"]
+    columns: Dict[str, Dict[str, List[int]]] = {}
+    for column in {**combined["columns"], **result["columns"]}:
+        columns[column] = {
+            counter: combined["columns"]
+            .get(column, {})
+            .get(counter, [0] * len(combined["dates"]))
+            + result["columns"].get(column, {}).get(counter, [0] * len(result["dates"]))
+            for counter in ("empty_count", "total_count")
+        }
+    return {"dates": dates, "columns": columns}
+
+
+def combine_basic_metrics(
+    combined: Dict, result: Dict, percentiles: Optional[List[float]] = None
+) -> Dict:
+    """
+    Combines NumericBasicMetrics results aggregated with moments=True. Counts
+    are added, min and max are kept, mean and variance are merged from the
+    moments of the partitions, and the percentiles from their quantile
+    sketches. Partial results keep the moments and the sketch of every column
+    """
+    combined = dict(combined)
+    for column, metrics in result.items():
+        moments: MomentsAccumulator = metrics["moments"]
+        sketch: Optional[QuantileSketch] = metrics.get("quantile_sketch")
+        if column in combined:
+            moments = combined[column]["moments"].merge(moments)
+            previous = combined[column].get("quantile_sketch")
+            if previous is not None and sketch is not None:
+                sketch = previous.merge(sketch)
+            elif sketch is None:
+                sketch = previous
+        column_metrics = {**moments.to_basic_metrics(), "moments": moments}
+        # without the standard deviation facet the partitions have no m2
+        if "std_dev" not in metrics:
+            column_metrics.pop("std_dev", None)
+            column_metrics.pop("variance", None)
+        if sketch is not None:
+            column_metrics["quantile_sketch"] = sketch
+            if percentiles:
+                column_metrics["percentiles"] = {
+                    percentile_name(q): sketch.quantile(q) for q in percentiles
+                }
+        combined[column] = column_metrics
+    return combined
+
+
+def strip_basic_metrics_moments(basic_metrics: Dict) -> Dict:
+    """NumericBasicMetrics results without the moments and sketches of the columns"""
+    return {
+        column: {
+            stat: value
+            for stat, value in metrics.items()
+            if stat not in ("moments", "quantile_sketch")
+        }
+        for column, metrics in basic_metrics.items()
+    }
@@ -0,0 +1,215 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+
+from typing import Any, Dict, List, Optional, Tuple, Union
+from uuid import UUID
+
+from bson.binary import UUID_SUBTYPE, Binary
+
+from waterdip.core.commons.models import ColumnDataType, ColumnMappingType
+from waterdip.core.metrics.sampling import RowSample
+
+# Version of the compact row layout, in the v field of the compact rows
+COMPACT_ROW_VERSION = 2
+# Fields of the compact rows with the [column id, value] pairs of the columns
+NUMERIC_VALUES_FIELD = "n"
+CATEGORICAL_VALUES_FIELD = "c"
+# Fields of the rows holding uuids, binary uuids in the compact rows
+UUID_FIELDS = ["row_id", "dataset_id", "model_id", "model_version_id"]
+
+# (name, mapping type) of the columns of a model version, by column id
+ColumnDictionary = List[Tuple[str, str]]
+
+
+def binary_uuid(value: Union[UUID, str]) -> Binary:
+    return Binary.from_uuid(value if isinstance(value, UUID) else UUID(value))
+
+
+def uuid_str(value: Union[Binary, UUID, str]) -> str:
+    """String of a uuid read from the rows, binary in the compact rows"""
+    if isinstance(value, Binary):
+        return str(value.as_uuid())
+    return str(value)
+
+
+def compact_row(row: Dict[str, Any], column_dictionary: ColumnDictionary) -> Dict:
+    """
+    Compact layout of a v1 row. The columns are [column id, value] pairs of the
+    column dictionary, numeric and categorical values in their own arrays, the
+    uuids are binary and the empty fields are dropped. Raises a ValueError
+    naming the row and the column if a column is not in the column dictionary
+
+    Examples:
+        >>> compact_row(
+        ...     {"row_id": "8b3c...", "columns": [
+        ...         {"name": "age", "data_type": "NUMERIC", "value_numeric": 42.0, "mapping_type": "FEATURE"},
+        ...         {"name": "color", "data_type": "CATEGORICAL", "value_categorical": "red", "mapping_type": "FEATURE"},
+        ...     ], ...},
+        ...     column_dictionary=[("age", "FEATURE"), ("color", "FEATURE")],
+        ... )
+        {"v": 2, "row_id": Binary(...), "n": [[0, 42.0]], "c": [[1, "red"]], ...}
+    """
+    column_ids = {
+        column: column_id for column_id, column in enumerate(column_dictionary)
+    }
+    compact: Dict[str, Any] = {"v": COMPACT_ROW_VERSION}
+    for field, value in row.items():
+        if field == "columns" or value is None:
+            continue
+        compact[field] = binary_uuid(str(value)) if field in UUID_FIELDS else value
+
+    numeric, categorical = [], []
+    for column in row["columns"]:
+        column_id = column_ids.get((column["name"], column["mapping_type"]))
+        if column_id is None:
+            raise ValueError(
+                f"Column [{column['name']}] of type "
+                f"[{ColumnMappingType(column['mapping_type']).value}] of row "
+                f"[{row.get('row_id')}] is not in the column dictionary"
+            )
+        if column["data_type"] == ColumnDataType.NUMERIC:
+            numeric.append([column_id, column.get("value_numeric")])
+        else:
+            categorical.append([column_id, column.get("value_categorical")])
+    compact[NUMERIC_VALUES_FIELD] = numeric
+    compact[CATEGORICAL_VALUES_FIELD] = categorical
+    return compact
+
+
+class RowReader:
+    """
+    Reader of the rows of a dataset, the metrics match and unwind the rows
+    through it. The rows are stored in the v1 layout, every column a
+    subdocument with its name and types, or in the compact layout of
+    compact_row, while the rows of a dataset are migrated both at once
+
+    The columns of the compact rows are decoded into v1 columns right before
+    they are unwound, so the stages after the unwind read a single layout
+
+    Attributes:
+    ------------------
+    compact:
+        rows of the dataset may be compact. Only v1 rows are read when False
+    column_dictionary:
+        columns of the model version of the dataset by column id, decodes the
+        columns of the compact rows
+    """
+
+    def __init__(
+        self,
+        compact: bool = False,
+        column_dictionary: Optional[ColumnDictionary] = None,
+    ):
+        self.compact = compact
+        self.column_dictionary = column_dictionary or []
+
+    def id_value(self, value: Union[UUID, str]) -> Any:
+        """Filter value of a uuid field of the rows"""
+        if not self.compact:
+            return str(value)
+        return {"$in": [str(value), binary_uuid(str(value))]}
+
+    def sample_filter(self, sample: RowSample) -> Dict[str, Any]:
+        """
+        Filter of the sampled rows. The prefix of binary row ids is compared byte
+        by byte, the same rows are sampled in both layouts
+        """
+        row_filter = sample.row_filter
+        if not self.compact or not row_filter:
+            return row_filter
+        prefix = bytes.fromhex(row_filter["row_id"]["$lt"])
+        threshold = Binary(prefix + bytes(16 - len(prefix)), UUID_SUBTYPE)
+        return {"$or": [row_filter, {"row_id": {"$lt": threshold}}]}
+
+    def _decoded_columns(
+        self, field: str, data_type: str, allowed_ids: Optional[List[int]]
+    ) -> Dict[str, Any]:
+        pairs: Dict[str, Any] = {"$ifNull": [f"${field}", []]}
+        if allowed_ids is not None:
+            pairs = {
+                "$filter": {
+                    "input": pairs,
+                    "as": "pair",
+                    "cond": {"$in": [{"$arrayElemAt": ["$$pair", 0]}, allowed_ids]},
+                }
+            }
+        column_id = {"$arrayElemAt": ["$$pair", 0]}
+        value_field = (
+            "value_numeric"
+            if data_type == ColumnDataType.NUMERIC
+            else "value_categorical"
+        )
+        names = [name for name, _ in self.column_dictionary]
+        mapping_types = [mapping_type for _, mapping_type in self.column_dictionary]
+        return {
+            "$map": {
+                "input": pairs,
+                "as": "pair",
+                "in": {
+                    "name": {"$arrayElemAt": [{"$literal": names}, column_id]},
+                    "data_type": data_type.value,
+                    value_field: {"$arrayElemAt": ["$$pair", 1]},
+                    "mapping_type": {
+                        "$arrayElemAt": [{"$literal": mapping_types}, column_id]
+                    },
+                },
+            }
+        }
+
+    def unwind_columns(self, columns: Optional[List[str]] = None) -> List[Dict]:
+        """Stages unwinding the columns of the rows, pruned to the allow-list"""
+        stages: List[Dict[str, Any]] = []
+        if self.compact:
+            allowed_ids = (
+                [
+                    column_id
+                    for column_id, (name, _) in enumerate(self.column_dictionary)
+                    if name in columns
+                ]
+                if columns is not None
+                else None
+            )
+            decoded = {
+                "$concatArrays": [
+                    self._decoded_columns(
+                        NUMERIC_VALUES_FIELD, ColumnDataType.NUMERIC, allowed_ids
+                    ),
+                    self._decoded_columns(
+                        CATEGORICAL_VALUES_FIELD,
+                        ColumnDataType.CATEGORICAL,
+                        allowed_ids,
+                    ),
+                ]
+            }
+            stages += [
+                {"$addFields": {"columns": {"$ifNull": ["$columns", decoded]}}},
+                {"$project": {NUMERIC_VALUES_FIELD: 0, CATEGORICAL_VALUES_FIELD: 0}},
+            ]
+        if columns is not None:
+            stages.append(
+                {
+                    "$addFields": {
+                        "columns": {
+                            "$filter": {
+                                "input": "$columns",
+                                "as": "column",
+                                "cond": {"$in": ["$$column.name", list(columns)]},
+                            }
+                        }
+                    }
+                }
+            )
+        stages.append({"$unwind": "$columns"})
+        return stages
@@ -0,0 +1,118 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+
+import math
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_CONFIDENCE = 0.95
+# row ids are uuid4, the first 8 hex digits of a row id are uniformly distributed
+ROW_ID_PREFIX_DIGITS = 8
+ROW_ID_PREFIX_RANGE = 16**ROW_ID_PREFIX_DIGITS
+
+
+class RowSample:
+    """
+    Deterministic sample of the rows of a dataset, by row id. A row is part of
+    the sample when the first hex digits of its random uuid4 row id are below
+    the rate, so the same rows are sampled by every metric and every request,
+    and the sample filter is a range on row_id
+
+    Counts of the sample are scaled by the inverse of the rate. The errors are
+    half widths of the confidence interval of the estimates
+
+    Attributes:
+    ------------------
+    rate:
+        fraction of the rows in the sample, in (0, 1]
+    confidence:
+        confidence level of the intervals
+
+    Examples:
+        >>> sample = RowSample(rate=0.1)
+        >>> {"$match": {"dataset_id": dataset_id, **sample.row_filter}}
+        >>> sample.scale_count(120) # 1200
+        >>> sample.count_error(120) # 95% of the estimates are within 1200 +/- 208
+    """
+
+    def __init__(self, rate: float, confidence: float = DEFAULT_CONFIDENCE):
+        if not 0 < rate <= 1:
+            raise ValueError("Sample rate must be in (0, 1]")
+        if not 0 < confidence < 1:
+            raise ValueError("Confidence must be in (0, 1)")
+        self._threshold = max(int(rate * ROW_ID_PREFIX_RANGE), 1)
+        # rate of the sample the row id prefix actually selects
+        self.rate = self._threshold / ROW_ID_PREFIX_RANGE
+        self.confidence = confidence
+        self.z = NormalDist().inv_cdf((1 + confidence) / 2)
+
+    @property
+    def row_filter(self) -> Dict[str, Any]:
+        """Filter of the sampled rows, empty for a full sample"""
+        if self._threshold >= ROW_ID_PREFIX_RANGE:
+            return {}
+        return {"row_id": {"$lt": f"{self._threshold:0{ROW_ID_PREFIX_DIGITS}x}"}}
+
+    def scale_count(self, count: Optional[int]) -> Optional[int]:
+        """Estimate of the count of all the rows from the count of the sample"""
+        if count is None:
+            return None
+        return int(round(count / self.rate))
+
+    def count_error(self, count: int) -> float:
+        """
+        Error of the scaled count. Every row is sampled independently with
+        probability rate, the variance of the scaled count is
+        count * (1 - rate) / rate ** 2
+        """
+        return self.z * math.sqrt(count * (1 - self.rate)) / self.rate
+
+    def mean_error(self, std_dev: Optional[float], count: int) -> Optional[float]:
+        """Error of the mean of count sampled values"""
+        if std_dev is None or count == 0:
+            return None
+        return self.z * std_dev / math.sqrt(count)
+
+    def scale_histogram(self, histogram: Dict[str, List]) -> Dict[str, List]:
+        """Scaled count histogram, with the error of every bin count"""
+        return {
+            "bins": histogram["bins"],
+            "count": [self.scale_count(count) for count in histogram["count"]],
+            "error": [self.count_error(count) for count in histogram["count"]],
+        }
+
+    def interval(self, estimates: np.ndarray) -> Tuple[float, float]:
+        """Percentile interval of bootstrap estimates"""
+        tail = (1 - self.confidence) / 2 * 100
+        low, high = np.percentile(estimates, [tail, 100 - tail])
+        return float(low), float(high)
+
+
+def bootstrap_counts(
+    counts: List[int], iterations: int = 200, seed: int = 0
+) -> np.ndarray:
+    """
+    Bootstrap resamples of a count histogram, one row per resample. The
+    resamples are drawn from the multinomial of the histogram densities with
+    a fixed seed, so the intervals are reproducible
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    total = int(counts.sum())
+    if total == 0:
+        return np.zeros((iterations, len(counts)))
+    rng = np.random.default_rng(seed)
+    return rng.multinomial(total, counts / total, size=iterations).astype(np.float64)
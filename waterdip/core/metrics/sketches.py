@@ -0,0 +1,779 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import hashlib
+import math
+import struct
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Type, Union
+
+import numpy as np
+from bson import Binary
+
+from waterdip.core.commons.models import Histogram
+
+# Bins of the values below the first and above the last bin edge
+UNDERFLOW_BIN = "underflow"
+OVERFLOW_BIN = "overflow"
+# Bin of the categories which are not kept by a bounded categorical histogram
+OTHER_BIN = "__other__"
+# Relative error of the quantile estimates of the quantile sketches
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+
+class Sketch(ABC):
+    """
+    A compact, mergeable summary of the values of one column
+
+    Sketches of the same column computed on different datasets or time windows
+    can be merged into the sketch of the union, and stored as bytes or as a
+    BSON sub document
+    """
+
+    _REGISTRY: Dict[str, Type["Sketch"]] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        Sketch._REGISTRY[cls.sketch_type()] = cls
+
+    @classmethod
+    def sketch_type(cls) -> str:
+        return cls.__name__
+
+    @abstractmethod
+    def merge(self, other: "Sketch") -> "Sketch":
+        """Sketch of the union of the values of both sketches"""
+        pass
+
+    @abstractmethod
+    def to_bytes(self) -> bytes:
+        pass
+
+    @classmethod
+    @abstractmethod
+    def from_bytes(cls, data: bytes) -> "Sketch":
+        pass
+
+    def to_bson(self) -> Dict[str, Any]:
+        return {"type": self.sketch_type(), "data": Binary(self.to_bytes())}
+
+    @staticmethod
+    def from_bson(document: Dict[str, Any]) -> "Sketch":
+        sketch_class = Sketch._REGISTRY.get(document.get("type"))
+        if sketch_class is None:
+            raise ValueError(f"Unknown sketch type {document.get('type')}")
+        return sketch_class.from_bytes(bytes(document["data"]))
+
+    def __add__(self, other: "Sketch") -> "Sketch":
+        return self.merge(other)
+
+    def _check_mergeable(self, other: "Sketch"):
+        if not isinstance(other, type(self)):
+            raise TypeError(
+                f"Can not merge {type(other).__name__} into {type(self).__name__}"
+            )
+
+
+class FixedEdgeHistogram(Sketch):
+    """
+    Count histogram of a numeric column on fixed bin edges
+
+    The first bin counts the values below the first edge, the last bin the
+    values from the last edge on, so there is one bin more than edges
+
+    Attributes:
+    ------------------
+    edges:
+        sorted bin edges
+    counts:
+        count of the values in every bin, underflow and overflow bins included
+    """
+
+    _HEADER = struct.Struct("<I")
+
+    def __init__(self, edges: Sequence[float], counts: Optional[Sequence[int]] = None):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        if len(self.edges) == 0 or np.any(np.diff(self.edges) <= 0):
+            raise ValueError("Bin edges must be non empty and strictly increasing")
+        self.counts = (
+            np.zeros(len(self.edges) + 1, dtype=np.int64)
+            if counts is None
+            else np.asarray(counts, dtype=np.int64).copy()
+        )
+        if len(self.counts) != len(self.edges) + 1:
+            raise ValueError("A histogram has one count more than bin edges")
+
+    @classmethod
+    def from_bucket_docs(
+        cls, edges: Sequence[float], docs: Iterable[Dict[str, Any]]
+    ) -> "FixedEdgeHistogram":
+        """
+        Histogram of the result of a $bucket stage with the boundaries
+        [-max float] + edges + [max float], which returns the lower boundary as _id
+        """
+        hist = cls(edges)
+        positions = {edge: i + 1 for i, edge in enumerate(hist.edges.tolist())}
+        for doc in docs:
+            hist.counts[positions.get(doc["_id"], 0)] += doc["count"]
+        return hist
+
+    def add(self, values: Iterable[Union[int, float]]) -> "FixedEdgeHistogram":
+        """Count the values in place, empty values are ignored"""
+        array = np.asarray([v for v in values if v is not None], dtype=np.float64)
+        positions = np.searchsorted(self.edges, array, side="right")
+        self.counts += np.bincount(positions, minlength=len(self.counts))
+        return self
+
+    def merge(self, other: "FixedEdgeHistogram") -> "FixedEdgeHistogram":
+        self._check_mergeable(other)
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Can not merge histograms with different bin edges")
+        return FixedEdgeHistogram(self.edges, self.counts + other.counts)
+
+    def rebin(self, edges: Sequence[float]) -> "FixedEdgeHistogram":
+        """
+        Histogram on coarser bin edges. The edges must be a subset of the
+        current edges, so the counts are exact
+        """
+        new_edges = np.asarray(edges, dtype=np.float64)
+        if not np.all(np.isin(new_edges, self.edges)):
+            raise ValueError("Can only rebin onto a subset of the bin edges")
+        lower_edges = np.concatenate(([-np.inf], self.edges))
+        positions = np.searchsorted(new_edges, lower_edges, side="right")
+        counts = np.zeros(len(new_edges) + 1, dtype=np.int64)
+        np.add.at(counts, positions, self.counts)
+        return FixedEdgeHistogram(new_edges, counts)
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def to_bytes(self) -> bytes:
+        return (
+            self._HEADER.pack(len(self.edges))
+            + self.edges.astype("<f8").tobytes()
+            + self.counts.astype("<i8").tobytes()
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "FixedEdgeHistogram":
+        (n_edges,) = cls._HEADER.unpack_from(data)
+        offset = cls._HEADER.size
+        edges = np.frombuffer(data, dtype="<f8", count=n_edges, offset=offset)
+        offset += 8 * n_edges
+        counts = np.frombuffer(data, dtype="<i8", count=n_edges + 1, offset=offset)
+        return cls(edges, counts)
+
+    def to_dict(self) -> Dict[str, List]:
+        """The bins and count dict of the numeric histogram metrics"""
+        return {
+            "bins": [UNDERFLOW_BIN] + self.edges[:-1].tolist() + [OVERFLOW_BIN],
+            "count": self.counts.tolist(),
+        }
+
+    def to_histogram(self) -> Histogram:
+        hist = self.to_dict()
+        return Histogram(bins=hist["bins"], val=hist["count"])
+
+
+class CategoricalCounter(Sketch):
+    """
+    Count histogram of a categorical column. The categories are dictionary
+    encoded, the counts are kept in an array indexed by the category code
+
+    Attributes:
+    ------------------
+    categories:
+        the distinct categories, in the order of their code
+    counts:
+        count of every category
+    """
+
+    _LENGTH = struct.Struct("<I")
+
+    def __init__(
+        self,
+        categories: Optional[Sequence[str]] = None,
+        counts: Optional[Sequence[int]] = None,
+    ):
+        self.categories: List[str] = list(categories or [])
+        self._index: Dict[str, int] = {c: i for i, c in enumerate(self.categories)}
+        if len(self._index) != len(self.categories):
+            raise ValueError("Categories must be distinct")
+        self.counts = (
+            np.zeros(len(self.categories), dtype=np.int64)
+            if counts is None
+            else np.asarray(counts, dtype=np.int64).copy()
+        )
+        if len(self.counts) != len(self.categories):
+            raise ValueError("A counter has one count per category")
+
+    @classmethod
+    def from_dict(cls, histogram: Dict[str, List]) -> "CategoricalCounter":
+        """Counter of the bins and count dict of the categorical histogram metrics"""
+        return cls(
+            categories=[str(b) for b in histogram["bins"]], counts=histogram["count"]
+        )
+
+    def code(self, category: str) -> int:
+        """Code of the category, a new code is assigned to unseen categories"""
+        code = self._index.get(category)
+        if code is None:
+            code = len(self.categories)
+            self._index[category] = code
+            self.categories.append(category)
+            self.counts = np.append(self.counts, np.int64(0))
+        return code
+
+    def add(self, values: Iterable[Optional[str]]) -> "CategoricalCounter":
+        """Count the values in place, empty values are ignored"""
+        codes = [self.code(str(v)) for v in values if v is not None]
+        self.counts += np.bincount(codes, minlength=len(self.counts)).astype(np.int64)
+        return self
+
+    def merge(self, other: "CategoricalCounter") -> "CategoricalCounter":
+        self._check_mergeable(other)
+        merged = CategoricalCounter(self.categories, self.counts)
+        codes = [merged.code(category) for category in other.categories]
+        np.add.at(merged.counts, codes, other.counts)
+        return merged
+
+    def rebin(
+        self, categories: Sequence[str], other: Optional[str] = None
+    ) -> "CategoricalCounter":
+        """
+        Counter on the given categories, in their order. The counts of the
+        remaining categories are folded into the other bin when it is given,
+        dropped otherwise
+        """
+        kept = list(categories)
+        counts = [self.count(c) for c in kept]
+        if other is not None:
+            kept.append(other)
+            counts.append(self.total - sum(counts))
+        return CategoricalCounter(kept, counts)
+
+    def count(self, category: str) -> int:
+        code = self._index.get(category)
+        return 0 if code is None else int(self.counts[code])
+
+    def top(self, k: int) -> List[str]:
+        """The k most frequent categories, ties in the order of their code"""
+        order = np.argsort(-self.counts, kind="stable")[:k]
+        return [self.categories[i] for i in order]
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def to_bytes(self) -> bytes:
+        encoded = [c.encode("utf-8") for c in self.categories]
+        return b"".join(
+            [self._LENGTH.pack(len(encoded))]
+            + [self._LENGTH.pack(len(e)) + e for e in encoded]
+            + [self.counts.astype("<i8").tobytes()]
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CategoricalCounter":
+        (n_categories,) = cls._LENGTH.unpack_from(data)
+        offset = cls._LENGTH.size
+        categories = []
+        for _ in range(n_categories):
+            (length,) = cls._LENGTH.unpack_from(data, offset)
+            offset += cls._LENGTH.size
+            categories.append(data[offset : offset + length].decode("utf-8"))
+            offset += length
+        counts = np.frombuffer(data, dtype="<i8", count=n_categories, offset=offset)
+        return cls(categories, counts)
+
+    def to_dict(self) -> Dict[str, List]:
+        """The bins and count dict of the categorical histogram metrics"""
+        return {"bins": list(self.categories), "count": self.counts.tolist()}
+
+    def to_histogram(self) -> Histogram:
+        return Histogram(bins=list(self.categories), val=self.counts.tolist())
+
+
+class MomentsAccumulator(Sketch):
+    """
+    Running count, mean, variance, min, max and zero count of a numeric column.
+    Accumulators are merged with the parallel variance algorithm of Chan et al.
+
+    Attributes:
+    ------------------
+    count:
+        number of values
+    mean:
+        mean of the values
+    m2:
+        sum of the squared differences from the mean
+    min:
+        smallest value
+    max:
+        largest value
+    zeros:
+        number of zero values
+    """
+
+    _FORMAT = struct.Struct("<qddddq")
+
+    def __init__(
+        self,
+        count: int = 0,
+        mean: float = 0.0,
+        m2: float = 0.0,
+        min: float = math.inf,
+        max: float = -math.inf,
+        zeros: int = 0,
+    ):
+        self.count = int(count)
+        self.mean = float(mean)
+        self.m2 = float(m2)
+        self.min = float(min)
+        self.max = float(max)
+        self.zeros = int(zeros)
+
+    def add(self, values: Iterable[Union[int, float]]) -> "MomentsAccumulator":
+        """Accumulate the values in place, empty values are ignored"""
+        array = np.asarray([v for v in values if v is not None], dtype=np.float64)
+        if len(array) == 0:
+            return self
+        batch = MomentsAccumulator(
+            count=len(array),
+            mean=array.mean(),
+            m2=((array - array.mean()) ** 2).sum(),
+            min=array.min(),
+            max=array.max(),
+            zeros=int((array == 0).sum()),
+        )
+        merged = self.merge(batch)
+        self.__dict__.update(merged.__dict__)
+        return self
+
+    def merge(self, other: "MomentsAccumulator") -> "MomentsAccumulator":
+        self._check_mergeable(other)
+        count = self.count + other.count
+        if count == 0:
+            return MomentsAccumulator()
+        delta = other.mean - self.mean
+        return MomentsAccumulator(
+            count=count,
+            mean=self.mean + delta * other.count / count,
+            m2=self.m2 + other.m2 + delta**2 * self.count * other.count / count,
+            min=min(self.min, other.min),
+            max=max(self.max, other.max),
+            zeros=self.zeros + other.zeros,
+        )
+
+    @property
+    def variance(self) -> Optional[float]:
+        """Population variance, as $stdDevPop"""
+        return None if self.count == 0 else self.m2 / self.count
+
+    @property
+    def std_dev(self) -> Optional[float]:
+        return None if self.count == 0 else math.sqrt(self.variance)
+
+    def to_bytes(self) -> bytes:
+        return self._FORMAT.pack(
+            self.count, self.mean, self.m2, self.min, self.max, self.zeros
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "MomentsAccumulator":
+        return cls(*cls._FORMAT.unpack(data))
+
+    def to_basic_metrics(self) -> Dict[str, Any]:
+        """The per column dict of the numeric basic metrics"""
+        if self.count == 0:
+            return {}
+        return {
+            "avg": round(self.mean, 2),
+            "total": self.count,
+            "min": self.min,
+            "max": self.max,
+            "zeros": self.zeros,
+            "std_dev": round(self.std_dev, 2),
+            "variance": round(self.variance),
+        }
+
+
+class QuantileSketch(Sketch):
+    """
+    Quantile sketch of a numeric column with a relative error guarantee,
+    following DDSketch (Masson et al., 2019). Values are counted in
+    logarithmic buckets, the quantile estimates are within relative_accuracy
+    of the exact quantile as long as no bucket has been collapsed. When there
+    are more than max_buckets buckets, the buckets of the values closest to
+    zero are collapsed, so the memory is bounded and the upper quantiles keep
+    their accuracy
+
+    Attributes:
+    ------------------
+    relative_accuracy:
+        relative error of the quantile estimates
+    max_buckets:
+        maximum number of positive and negative buckets
+    positive:
+        count of the positive values per bucket key
+    negative:
+        count of the negative values per bucket key of their absolute value
+    zero_count:
+        number of zero values
+    """
+
+    _HEADER = struct.Struct("<dIqII")
+
+    def __init__(
+        self,
+        relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+        max_buckets: int = 2048,
+        positive: Optional[Dict[int, int]] = None,
+        negative: Optional[Dict[int, int]] = None,
+        zero_count: int = 0,
+    ):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("Relative accuracy must be between 0 and 1")
+        if max_buckets < 2:
+            raise ValueError("A quantile sketch needs at least two buckets")
+        self.relative_accuracy = float(relative_accuracy)
+        self.max_buckets = int(max_buckets)
+        self.gamma = (1 + self.relative_accuracy) / (1 - self.relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive: Dict[int, int] = dict(positive or {})
+        self.negative: Dict[int, int] = dict(negative or {})
+        self.zero_count = int(zero_count)
+        self._collapse()
+
+    def key(self, value: float) -> int:
+        """Bucket key of the absolute value, value must not be zero"""
+        return math.ceil(math.log(abs(value)) / self._log_gamma)
+
+    def value(self, key: int) -> float:
+        """Estimate of the absolute values in the bucket"""
+        return 2 * self.gamma**key / (self.gamma + 1)
+
+    def add(self, values: Iterable[Union[int, float]]) -> "QuantileSketch":
+        """Count the values in place, empty values are ignored"""
+        for v in values:
+            if v is None:
+                continue
+            if v == 0:
+                self.zero_count += 1
+                continue
+            store = self.positive if v > 0 else self.negative
+            key = self.key(v)
+            store[key] = store.get(key, 0) + 1
+        self._collapse()
+        return self
+
+    def add_bucket(self, sign: int, key: Optional[int], count: int):
+        """
+        Count the values of a bucket computed outside the sketch, like the
+        bucket keys of an aggregation on the same relative accuracy
+        """
+        if sign == 0:
+            self.zero_count += int(count)
+            return
+        store = self.positive if sign > 0 else self.negative
+        store[int(key)] = store.get(int(key), 0) + int(count)
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        self._check_mergeable(other)
+        if self.relative_accuracy != other.relative_accuracy:
+            raise ValueError("Can not merge sketches with different accuracies")
+        merged = QuantileSketch(
+            self.relative_accuracy,
+            max(self.max_buckets, other.max_buckets),
+            self.positive,
+            self.negative,
+            self.zero_count + other.zero_count,
+        )
+        for sign, store in ((1, other.positive), (-1, other.negative)):
+            for key, count in store.items():
+                merged.add_bucket(sign, key, count)
+        merged._collapse()
+        return merged
+
+    @property
+    def count(self) -> int:
+        return (
+            sum(self.positive.values()) + sum(self.negative.values()) + self.zero_count
+        )
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate of the q quantile, None for an empty sketch"""
+        if not 0 <= q <= 1:
+            raise ValueError("Quantile must be between 0 and 1")
+        total = self.count
+        if total == 0:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self.value(key)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self.value(key)
+        return self.value(max(self.positive))
+
+    def _collapse(self):
+        # the bucket closest to zero is folded into its neighbour of the same sign
+        while len(self.positive) + len(self.negative) > self.max_buckets:
+            stores = [
+                store for store in (self.positive, self.negative) if len(store) > 1
+            ]
+            store = min(stores, key=min)
+            lowest, neighbour = sorted(store)[:2]
+            store[neighbour] += store.pop(lowest)
+
+    def to_bytes(self) -> bytes:
+        parts = [
+            self._HEADER.pack(
+                self.relative_accuracy,
+                self.max_buckets,
+                self.zero_count,
+                len(self.positive),
+                len(self.negative),
+            )
+        ]
+        for store in (self.positive, self.negative):
+            keys = sorted(store)
+            parts.append(np.asarray(keys, dtype="<i4").tobytes())
+            parts.append(np.asarray([store[k] for k in keys], dtype="<i8").tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "QuantileSketch":
+        (
+            relative_accuracy,
+            max_buckets,
+            zero_count,
+            n_positive,
+            n_negative,
+        ) = cls._HEADER.unpack_from(data)
+        offset = cls._HEADER.size
+        stores = []
+        for n in (n_positive, n_negative):
+            keys = np.frombuffer(data, dtype="<i4", count=n, offset=offset)
+            offset += 4 * n
+            counts = np.frombuffer(data, dtype="<i8", count=n, offset=offset)
+            offset += 8 * n
+            stores.append(dict(zip(keys.tolist(), counts.tolist())))
+        return cls(relative_accuracy, max_buckets, stores[0], stores[1], zero_count)
+
+
+def percentile_name(q: float) -> str:
+    """Name of the quantile as a percentile, like p50 for 0.5"""
+    return f"p{q * 100:g}"
+
+
+def merge_daily_sketches(
+    daily_sketches: Dict[Any, Dict[str, Sketch]]
+) -> Dict[str, Sketch]:
+    """Merge the sketches of every column over the days"""
+    merged: Dict[str, Sketch] = {}
+    for column_sketches in daily_sketches.values():
+        for column, sketch in column_sketches.items():
+            merged[column] = (
+                merged[column].merge(sketch) if column in merged else sketch
+            )
+    return merged
+
+
+def _hash64(value: str) -> int:
+    # stable across processes, unlike hash()
+    return int.from_bytes(
+        hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+
+
+class HyperLogLog(Sketch):
+    """
+    Distinct count sketch (Flajolet et al., 2007) with 2^precision one byte
+    registers. The standard error of the estimate is 1.04 / sqrt(2^precision),
+    0.8% for the default precision, at 16KB per sketch
+
+    Attributes:
+    ------------------
+    precision:
+        number of hash bits indexing the registers
+    registers:
+        maximum rank seen by every register
+    """
+
+    _HEADER = struct.Struct("<B")
+
+    def __init__(self, precision: int = 14, registers: Optional[np.ndarray] = None):
+        if not 4 <= precision <= 18:
+            raise ValueError("Precision must be between 4 and 18")
+        self.precision = int(precision)
+        self.registers = (
+            np.zeros(1 << self.precision, dtype=np.uint8)
+            if registers is None
+            else np.asarray(registers, dtype=np.uint8).copy()
+        )
+        if len(self.registers) != 1 << self.precision:
+            raise ValueError("A HyperLogLog has 2^precision registers")
+
+    def add(self, values: Iterable[Optional[str]]) -> "HyperLogLog":
+        """Count the values in place, empty values are ignored"""
+        bits = 64 - self.precision
+        for value in values:
+            if value is None:
+                continue
+            hashed = _hash64(str(value))
+            index = hashed >> bits
+            rank = bits - (hashed & ((1 << bits) - 1)).bit_length() + 1
+            if rank > self.registers[index]:
+                self.registers[index] = rank
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        self._check_mergeable(other)
+        if self.precision != other.precision:
+            raise ValueError("Can not merge sketches with different precisions")
+        return HyperLogLog(self.precision, np.maximum(self.registers, other.registers))
+
+    def cardinality(self) -> int:
+        """Estimate of the number of distinct values"""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(float)))
+        empty = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and empty > 0:
+            # linear counting is more accurate for small cardinalities
+            estimate = m * math.log(m / empty)
+        return int(round(estimate))
+
+    def to_bytes(self) -> bytes:
+        return self._HEADER.pack(self.precision) + self.registers.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        (precision,) = cls._HEADER.unpack_from(data)
+        registers = np.frombuffer(data, dtype=np.uint8, offset=cls._HEADER.size)
+        return cls(precision, registers)
+
+
+class TopK(Sketch):
+    """
+    Heavy hitters of a categorical column with the Space-Saving algorithm
+    (Metwally et al., 2005). At most capacity values are counted, the count of
+    a value is overestimated by at most its error, which is at most the total
+    count divided by the capacity
+
+    Attributes:
+    ------------------
+    capacity:
+        maximum number of counted values
+    counts:
+        estimated count of every counted value
+    errors:
+        maximum overestimation of every count
+    """
+
+    _LENGTH = struct.Struct("<I")
+
+    def __init__(
+        self,
+        capacity: int = 100,
+        counts: Optional[Dict[str, int]] = None,
+        errors: Optional[Dict[str, int]] = None,
+    ):
+        if capacity < 1:
+            raise ValueError("Capacity must be positive")
+        self.capacity = int(capacity)
+        self.counts: Dict[str, int] = dict(counts or {})
+        self.errors: Dict[str, int] = {
+            value: (errors or {}).get(value, 0) for value in self.counts
+        }
+
+    def add(self, value: Optional[str], count: int = 1) -> "TopK":
+        """Count the value count times in place, empty values are ignored"""
+        if value is None:
+            return self
+        value = str(value)
+        if value in self.counts:
+            self.counts[value] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[value] = count
+            self.errors[value] = 0
+        else:
+            # the value replaces the least counted one, inheriting its count
+            evicted = min(self.counts, key=self.counts.get)
+            floor = self.counts.pop(evicted)
+            self.errors.pop(evicted)
+            self.counts[value] = floor + count
+            self.errors[value] = floor
+        return self
+
+    def merge(self, other: "TopK") -> "TopK":
+        self._check_mergeable(other)
+        counts, errors = dict(self.counts), dict(self.errors)
+        for value, count in other.counts.items():
+            counts[value] = counts.get(value, 0) + count
+            errors[value] = errors.get(value, 0) + other.errors[value]
+        kept = sorted(counts, key=lambda v: (-counts[v], v))[
+            : max(self.capacity, other.capacity)
+        ]
+        return TopK(
+            max(self.capacity, other.capacity),
+            {v: counts[v] for v in kept},
+            {v: errors[v] for v in kept},
+        )
+
+    def top(self, k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """The k most frequent values with their estimated count, most frequent first"""
+        ordered = sorted(self.counts, key=lambda v: (-self.counts[v], v))
+        return [
+            {"value": value, "count": self.counts[value]}
+            for value in ordered[: k if k is not None else len(ordered)]
+        ]
+
+    def to_bytes(self) -> bytes:
+        values = list(self.counts)
+        encoded = [v.encode("utf-8") for v in values]
+        return b"".join(
+            [self._LENGTH.pack(self.capacity), self._LENGTH.pack(len(values))]
+            + [self._LENGTH.pack(len(e)) + e for e in encoded]
+            + [np.asarray([self.counts[v] for v in values], dtype="<i8").tobytes()]
+            + [np.asarray([self.errors[v] for v in values], dtype="<i8").tobytes()]
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "TopK":
+        capacity, n_values = struct.unpack_from("<II", data)
+        offset = 2 * cls._LENGTH.size
+        values = []
+        for _ in range(n_values):
+            (length,) = cls._LENGTH.unpack_from(data, offset)
+            offset += cls._LENGTH.size
+            values.append(data[offset : offset + length].decode("utf-8"))
+            offset += length
+        counts = np.frombuffer(data, dtype="<i8", count=n_values, offset=offset)
+        offset += 8 * n_values
+        errors = np.frombuffer(data, dtype="<i8", count=n_values, offset=offset)
+        return cls(
+            capacity,
+            dict(zip(values, counts.tolist())),
+            dict(zip(values, errors.tolist())),
+        )
@@ -0,0 +1,130 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from waterdip.core.commons.models import MetricView, TimeRange
+from waterdip.core.metrics.executor import (
+    PARTITION_RESOLUTION,
+    combine_count_histograms,
+)
+
+
+def day_start(time: datetime) -> datetime:
+    """Start of the UTC day of a naive UTC time"""
+    return time.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def combine_counts(combined: Dict, result: Dict) -> Dict:
+    """Combines counts keyed by name by adding the counts of the same name"""
+    combined = dict(combined)
+    for name, count in result.items():
+        combined[name] = combined.get(name, 0) + count
+    return combined
+
+
+def combine_date_histograms(combined: Dict, result: Dict) -> Dict:
+    """
+    Combines count histograms keyed by date, then by column. Unlike
+    combine_date_results the dates may overlap, the histograms of the same date
+    are added
+    """
+    combined = dict(combined)
+    for date, histograms in result.items():
+        combined[date] = combine_count_histograms(combined.get(date, {}), histograms)
+    return combined
+
+
+# Combines the results of two intervals of the same day of a view
+VIEW_COMBINE: Dict[MetricView, Callable[[Dict, Dict], Dict]] = {
+    MetricView.CATEGORICAL_DATE_HISTOGRAM: combine_count_histograms,
+    MetricView.NUMERIC_DATE_HISTOGRAM: combine_count_histograms,
+    MetricView.CLASSIFICATION_COUNTS: combine_counts,
+    MetricView.PREDICTION_COUNTS: combine_counts,
+}
+
+
+class MaterializedView:
+    """
+    Day results of a metric read from its materialized view, for the part of a
+    time range the view covers. The rest of the time range, the uncovered head
+    and the tail after the view watermark, is aggregated from the rows
+
+    Attributes:
+    ------------------
+    start_time:
+        start of the rows the day results are computed on, inclusive. Always the
+        start of a day
+    end_time:
+        end of the rows the day results are computed on, exclusive. The start of
+        a day, or the watermark of the view
+    days:
+        result of every day of [start_time, end_time), keyed by the start of the day
+
+    Examples:
+        >>> view = repository.read_view(MetricView.PREDICTION_COUNTS, model_id, time_range)
+        >>> result = dict(view.days)
+        >>> for uncovered in view.uncovered(time_range):
+        >>>     result = combine(result, metric.aggregation_result(uncovered))
+    """
+
+    def __init__(
+        self, start_time: datetime, end_time: datetime, days: Dict[datetime, Dict]
+    ):
+        self.start_time = start_time
+        self.end_time = end_time
+        self.days = days
+
+    @staticmethod
+    def window(
+        time_range: TimeRange, view_start: datetime, watermark: datetime
+    ) -> Optional[Tuple[datetime, datetime]]:
+        """
+        Part of the time range served by a view of the rows created in
+        [view_start, watermark): the whole days of the time range in the view,
+        and the last day of the view up to the watermark. None if the view covers
+        no whole day of the time range
+        """
+        range_end = time_range.end_time + PARTITION_RESOLUTION
+        start_time = day_start(time_range.start_time)
+        if start_time < time_range.start_time:
+            start_time += timedelta(days=1)
+        start_time = max(start_time, view_start)
+        end_time = watermark if watermark <= range_end else day_start(range_end)
+        if start_time >= end_time:
+            return None
+        return start_time, end_time
+
+    def uncovered(self, time_range: TimeRange) -> List[TimeRange]:
+        """Parts of the time range outside of the view, to aggregate from the rows"""
+        time_ranges = []
+        if time_range.start_time < self.start_time:
+            time_ranges.append(
+                TimeRange(
+                    start_time=time_range.start_time,
+                    end_time=self.start_time - PARTITION_RESOLUTION,
+                )
+            )
+        if self.end_time <= time_range.end_time:
+            time_ranges.append(
+                TimeRange(start_time=self.end_time, end_time=time_range.end_time)
+            )
+        return time_ranges
+
+
+# Reads the materialized view of a metric for a time range, None when the view
+# covers no whole day of the time range
+MetricViewReader = Callable[..., Optional[MaterializedView]]
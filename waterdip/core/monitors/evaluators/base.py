@@ -13,6 +13,7 @@
 #  limitations under the License.
 
 from abc import ABC, abstractmethod
+from typing import List, Optional
 
 from waterdip.core.metrics.base import MongoMetric
 from waterdip.core.monitors.models import MonitorCondition
@@ -24,6 +25,27 @@ class MonitorEvaluator(ABC):
     def __init__(self, monitor_condition: MonitorCondition, metric: MongoMetric):
         self.monitor_condition = monitor_condition
         self.metric = metric
+        # number of rows aggregated by the last evaluation, None if not known
+        self.rows_scanned: Optional[int] = None
+
+    def _get_columns(self) -> List[str]:
+        columns = []
+        if self.monitor_condition.dimensions.features:
+            columns.extend(self.monitor_condition.dimensions.features)
+        if self.monitor_condition.dimensions.predictions:
+            columns.extend(self.monitor_condition.dimensions.predictions)
+        return columns
+
+    def _does_violate_threshold(self, value) -> bool:
+        threshold = self.monitor_condition.threshold
+        threshold_type, threshold_value = threshold.threshold, threshold.value
+        if threshold_type == "gt":
+            if value > threshold_value:
+                return True
+        elif threshold_type == "lt":
+            if value < threshold_value:
+                return True
+        return False
 
     @abstractmethod
     def evaluate(self, **kwargs) -> bool:
@@ -14,12 +14,22 @@
 
 from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
+import numpy as np
 from loguru import logger
 
 from waterdip.core.commons.models import TimeRange
-from waterdip.core.metrics.data_metrics import CountEmptyHistogram, DataMetrics
+from waterdip.core.metrics.data_metrics import (
+    CountEmptyDateHistogram,
+    CountEmptyHistogram,
+    DataMetrics,
+)
+from waterdip.core.metrics.executor import (
+    TimePartitionExecutor,
+    combine_empty_counts,
+    combine_empty_date_histograms,
+)
 from waterdip.core.monitors.evaluators.base import MonitorEvaluator
 from waterdip.core.monitors.models import DataQualityBaseMonitorCondition
 
@@ -32,25 +42,6 @@ class DataQualityMonitorEvaluator(MonitorEvaluator, ABC):
     ):
         super().__init__(monitor_condition, metrics)
 
-    def _get_columns(self):
-        columns = []
-        if self.monitor_condition.dimensions.features:
-            columns.extend(self.monitor_condition.dimensions.features)
-        if self.monitor_condition.dimensions.predictions:
-            columns.extend(self.monitor_condition.dimensions.predictions)
-        return columns
-
-    def _does_violate_threshold(self, value) -> bool:
-        threshold = self.monitor_condition.threshold
-        threshold_type, threshold_value = threshold.threshold, threshold.value
-        if threshold_type == "gt":
-            if value > threshold_value:
-                return True
-        elif threshold_type == "lt":
-            if value < threshold_value:
-                return True
-        return False
-
     def _get_evaluation_window_timerange(self) -> TimeRange:
         evaluation_window = self.monitor_condition.evaluation_window
         no_of_days, day_unit = evaluation_window[:-1], evaluation_window[-1]
@@ -66,22 +57,43 @@ class DataQualityMonitorEvaluator(MonitorEvaluator, ABC):
 
 
 class EmptyValueEvaluator(DataQualityMonitorEvaluator):
-    """ """
+    """
+    Evaluates an empty value monitor on the evaluation window ending now
+
+    Attributes
+    ----------
+    time_partitions:
+        executor aggregating the empty counts in partitions of the evaluation
+        window, in parallel. The counts of the days before the run are read from
+        the cache of the executor, if any. A single pipeline is used when None
+    """
 
     def __init__(
         self,
         monitor_condition: DataQualityBaseMonitorCondition,
         metric: CountEmptyHistogram,
+        time_partitions: Optional[TimePartitionExecutor] = None,
     ):
         super().__init__(monitor_condition, metric)
+        self._time_partitions = time_partitions
 
     def _get_metrics(self, **kwargs) -> Dict[str, Any]:
         evaluation_window = self._get_evaluation_window_timerange()
+        if self._time_partitions is not None:
+            return self._time_partitions.run_metric(
+                self.metric,
+                time_range=evaluation_window,
+                combine=combine_empty_counts,
+                cache_key=self.metric.partition_cache_key(),
+            )
         return self.metric.aggregation_result(time_range=evaluation_window)
 
     def evaluate(self, **kwargs) -> List[Dict]:
         empties = self._get_metrics()
         logger.debug(f"Empties we got : [{empties}]")
+        self.rows_scanned = max(
+            [empty["total_count"] for empty in empties.values()], default=0
+        )
         violations: List[Dict] = []
         for col in self._get_columns():
             empty = empties.get(col)
@@ -97,3 +109,97 @@ class EmptyValueEvaluator(DataQualityMonitorEvaluator):
                         }
                     )
         return violations
+
+
+class EmptyValueBackfillEvaluator(DataQualityMonitorEvaluator):
+    """
+    Evaluates an empty value monitor at the end of every day of a past time range.
+    The empty counts are aggregated once as a per day series, and the evaluation
+    window is slid over the series instead of aggregating every window
+
+    Attributes
+    ----------
+    time_range:
+        days the monitor is evaluated for
+    time_partitions:
+        executor aggregating the per day series in partitions of the time range,
+        in parallel. The series of the days before the run are read from the
+        cache of the executor, if any. A single pipeline is used when None
+    """
+
+    def __init__(
+        self,
+        monitor_condition: DataQualityBaseMonitorCondition,
+        metric: CountEmptyDateHistogram,
+        time_range: TimeRange,
+        time_partitions: Optional[TimePartitionExecutor] = None,
+    ):
+        super().__init__(monitor_condition, metric)
+        self._time_range = time_range
+        self._time_partitions = time_partitions
+
+    def _get_window_days(self) -> int:
+        return max(int(self.monitor_condition.evaluation_window[:-1]), 1)
+
+    def _get_metrics(self, **kwargs) -> Dict[str, Any]:
+        # the first evaluated day needs the days of a full window before it
+        time_range = TimeRange(
+            start_time=self._time_range.start_time
+            - timedelta(days=self._get_window_days() - 1),
+            end_time=self._time_range.end_time,
+        )
+        if self._time_partitions is not None:
+            return self._time_partitions.run_metric(
+                self.metric,
+                time_range=time_range,
+                combine=combine_empty_date_histograms,
+                cache_key=self.metric.partition_cache_key(),
+            )
+        return self.metric.aggregation_result(time_range=time_range)
+
+    def _violation_mask(self, values: np.ndarray) -> np.ndarray:
+        threshold = self.monitor_condition.threshold
+        if threshold.threshold == "gt":
+            return values > threshold.value
+        return values < threshold.value
+
+    def evaluate(self, **kwargs) -> List[Dict]:
+        """
+        Returns the violations ordered by column and evaluation time.
+        evaluated_at is the end of the day the window ends at, the end of the
+        time range for the current day
+        """
+        histogram = self._get_metrics()
+        window = self._get_window_days()
+        evaluated_at = [
+            min(date + timedelta(days=1), self._time_range.end_time)
+            for date in histogram["dates"][window - 1 :]
+        ]
+        self.rows_scanned = max(
+            [sum(series["total_count"]) for series in histogram["columns"].values()],
+            default=0,
+        )
+        violations: List[Dict] = []
+        for col in self._get_columns():
+            series = histogram["columns"].get(col)
+            if series is None:
+                continue
+            windows = {}
+            for name in ["empty_count", "total_count"]:
+                cumsum = np.concatenate([[0], np.cumsum(series[name])])
+                windows[name] = cumsum[window:] - cumsum[:-window]
+            # windows without any row of the column are not evaluated,
+            # same as the column missing from the live evaluation
+            mask = self._violation_mask(windows["empty_count"]) & (
+                windows["total_count"] > 0
+            )
+            for i in np.flatnonzero(mask):
+                violations.append(
+                    {
+                        "metric_value": int(windows["empty_count"][i]),
+                        "threshold": self.monitor_condition.threshold,
+                        "dimension": col,
+                        "evaluated_at": evaluated_at[i],
+                    }
+                )
+        return violations
@@ -0,0 +1,100 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from loguru import logger
+
+from waterdip.core.commons.models import TimeRange
+from waterdip.core.metrics.drift_psi import PSIMetrics
+from waterdip.core.monitors.evaluators.base import MonitorEvaluator
+from waterdip.core.monitors.models import DriftBaseMonitorCondition
+
+
+class DriftMonitorEvaluator(MonitorEvaluator, ABC):
+    """ """
+
+    def __init__(
+        self, monitor_condition: DriftBaseMonitorCondition, metric: PSIMetrics
+    ):
+        super().__init__(monitor_condition, metric)
+
+    def _get_evaluation_window_timerange(self) -> TimeRange:
+        """
+        The evaluation window ends skip_period days before the current time
+        """
+        evaluation_window = self.monitor_condition.evaluation_window
+        skip_period = self.monitor_condition.skip_period
+        end_time = datetime.utcnow() - timedelta(days=int(skip_period[:-1]))
+
+        return TimeRange(
+            start_time=end_time - timedelta(days=int(evaluation_window[:-1])),
+            end_time=end_time,
+        )
+
+    @abstractmethod
+    def _get_metrics(self, **kwargs) -> Dict[str, Any]:
+        pass
+
+
+class PSIEvaluator(DriftMonitorEvaluator):
+    """
+    Evaluates PSI of every monitored column over the evaluation window
+    against the baseline of the monitor
+
+    Attributes
+    ----------
+    numeric_columns:
+        numeric columns of the model version
+    categorical_columns:
+        categorical columns of the model version
+    """
+
+    def __init__(
+        self,
+        monitor_condition: DriftBaseMonitorCondition,
+        metric: PSIMetrics,
+        numeric_columns: List[str],
+        categorical_columns: List[str],
+    ):
+        super().__init__(monitor_condition, metric)
+        self._numeric_columns = numeric_columns
+        self._categorical_columns = categorical_columns
+
+    def _get_metrics(self, **kwargs) -> Dict[str, Any]:
+        columns = self._get_columns()
+        return self.metric.feature_psi(
+            numeric_columns=[c for c in self._numeric_columns if c in columns],
+            categorical_columns=[c for c in self._categorical_columns if c in columns],
+            time_range=self._get_evaluation_window_timerange(),
+        )
+
+    def evaluate(self, **kwargs) -> List[Dict]:
+        psi_values = self._get_metrics()
+        logger.debug(f"PSI values we got : [{psi_values}]")
+        self.rows_scanned = self.metric.rows_scanned
+        violations: List[Dict] = []
+        for col in self._get_columns():
+            psi_value = psi_values.get(col)
+            if psi_value is not None and self._does_violate_threshold(psi_value):
+                violations.append(
+                    {
+                        "metric_value": psi_value,
+                        "threshold": self.monitor_condition.threshold,
+                        "dimension": col,
+                    }
+                )
+        return violations
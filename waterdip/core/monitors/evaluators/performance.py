@@ -0,0 +1,83 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from loguru import logger
+
+from waterdip.core.commons.models import TimeRange
+from waterdip.core.metrics.classification_metrics import (
+    ClassificationDateHistogramDBMetrics,
+)
+from waterdip.core.monitors.evaluators.base import MonitorEvaluator
+from waterdip.core.monitors.models import PerformanceBaseMonitorCondition
+
+
+class PerformanceEvaluator(MonitorEvaluator):
+    """
+    Evaluates accuracy, precision, recall or f1 of a classification model
+    over the evaluation window
+
+    Attributes
+    ----------
+    count_loader:
+        returns the confusion counts summed over the given time range. The counts
+        are kept per day, so the evaluation window starts at the beginning of a day
+    """
+
+    def __init__(
+        self,
+        monitor_condition: PerformanceBaseMonitorCondition,
+        metric: ClassificationDateHistogramDBMetrics,
+        count_loader: Callable[[TimeRange], Dict[str, int]],
+    ):
+        super().__init__(monitor_condition, metric)
+        self._count_loader = count_loader
+
+    def get_evaluation_window_timerange(self) -> TimeRange:
+        """
+        The evaluation window ends at the last full hour skip_period days before the
+        current time and starts at the beginning of the first day of the window
+        """
+        evaluation_window = self.monitor_condition.evaluation_window
+        skip_period = self.monitor_condition.skip_period
+        end_time = datetime.utcnow().replace(
+            minute=0, second=0, microsecond=0
+        ) - timedelta(days=int(skip_period[:-1]))
+        start_time = end_time - timedelta(days=int(evaluation_window[:-1]))
+
+        return TimeRange(
+            start_time=start_time.replace(hour=0),
+            end_time=end_time,
+        )
+
+    def _get_metrics(self, **kwargs) -> Dict[str, Optional[float]]:
+        counts = self._count_loader(self.get_evaluation_window_timerange())
+        return self.metric.metrics_from_counts(counts)
+
+    def evaluate(self, **kwargs) -> List[Dict]:
+        metrics = self._get_metrics()
+        logger.debug(f"Performance metrics we got : [{metrics}]")
+        evaluation_metric = self.monitor_condition.evaluation_metric
+        metric_value = metrics.get(evaluation_metric.value.lower())
+        if metric_value is None or not self._does_violate_threshold(metric_value):
+            return []
+        return [
+            {
+                "metric_value": metric_value,
+                "threshold": self.monitor_condition.threshold,
+                "dimension": evaluation_metric.value,
+            }
+        ]
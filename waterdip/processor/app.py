@@ -13,21 +13,52 @@
 #  limitations under the License.
 
 from celery import Celery
+from celery.signals import worker_process_init
 
 from waterdip.server.commons.config import settings
+from waterdip.utils.instrumentation import start_metrics_server
 
-celery_app = Celery(__name__, include=["waterdip.processor.tasks.monitors"])
+celery_app = Celery(
+    __name__,
+    include=[
+        "waterdip.processor.tasks.monitors",
+        "waterdip.processor.tasks.metric_views",
+    ],
+)
 
 celery_app.conf.broker_url = settings.redis_url
-celery_app.conf.result_backend = settings.mongo_url
-celery_app.conf.mongodb_backend_settings = {"database": settings.mongo_database}
-celery_app.conf.result_extended = True
+if settings.celery_task_results_enabled:
+    celery_app.conf.result_backend = settings.mongo_url
+    celery_app.conf.mongodb_backend_settings = {"database": settings.mongo_database}
+    celery_app.conf.result_extended = True
+else:
+    # Monitor runs are recorded in the monitor run history, task results
+    # are only persisted on demand
+    celery_app.conf.task_ignore_result = True
 
 celery_app.autodiscover_tasks()
 
+
+@worker_process_init.connect
+def serve_worker_metrics(**kwargs):
+    """
+    Serves the prometheus metrics of each worker process on its own port
+    """
+    if settings.worker_metrics_port is None:
+        return
+    from billiard.process import current_process
+
+    start_metrics_server(port=settings.worker_metrics_port + current_process().index)
+
+
 celery_app.conf.beat_schedule = {
     "generate_monitor_jobs_every_hour": {
         "task": "create_process_monitor_jobs",
-        "schedule": 3600,
+        "schedule": settings.monitor_schedule_interval,
     }
 }
+if settings.metric_views_enabled:
+    celery_app.conf.beat_schedule["refresh_metric_views"] = {
+        "task": "create_refresh_metric_view_jobs",
+        "schedule": settings.metric_view_refresh_interval,
+    }
@@ -0,0 +1,224 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import multiprocessing
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+from loguru import logger
+
+from waterdip.server.commons.config import settings
+
+
+class MonitorExecutor(ABC):
+    """
+    Runs monitor jobs. The executor is selected with the monitor_executor setting
+    """
+
+    _INSTANCE: "MonitorExecutor" = None
+
+    @classmethod
+    def get_instance(cls) -> "MonitorExecutor":
+        if MonitorExecutor._INSTANCE is None:
+            if settings.monitor_executor == "process_pool":
+                MonitorExecutor._INSTANCE = ProcessPoolMonitorExecutor(
+                    max_workers=settings.monitor_executor_workers,
+                    max_pending=settings.monitor_executor_max_pending,
+                )
+            else:
+                MonitorExecutor._INSTANCE = CeleryMonitorExecutor(
+                    queue_depth_ttl=settings.monitor_queue_depth_ttl
+                )
+        return MonitorExecutor._INSTANCE
+
+    @abstractmethod
+    def submit(self, monitor: Dict) -> bool:
+        """
+        Submit a monitor job, returns False if the job was not accepted
+        """
+        pass
+
+    @abstractmethod
+    def generate_monitor_jobs(self) -> str:
+        """
+        Submit a job for every monitor, returns the id of the generation
+        """
+        pass
+
+    @abstractmethod
+    def queue_depth(self) -> int:
+        """
+        Number of monitor jobs waiting to be processed
+        """
+        pass
+
+    def shutdown(self, wait: bool = True):
+        pass
+
+
+class CeleryMonitorExecutor(MonitorExecutor):
+    """
+    Queues monitor jobs to the celery worker
+
+    Attributes
+    ----------
+    queue_depth_ttl:
+        seconds the length of the celery queue is cached for, so that the
+        scrapes of the queue depth gauge do not all go to the broker
+    """
+
+    def __init__(self, queue_depth_ttl: float = 5.0):
+        self.queue_depth_ttl = queue_depth_ttl
+        # expiry and value of the cached queue depth
+        self._queue_depth: Optional[Tuple[float, int]] = None
+        self._queue_depth_lock = threading.Lock()
+
+    def submit(self, monitor: Dict) -> bool:
+        from waterdip.processor.tasks.monitors import process_monitor
+
+        process_monitor.apply_async(kwargs={"monitor": monitor})
+        return True
+
+    def generate_monitor_jobs(self) -> str:
+        from waterdip.processor.tasks.monitors import generate_monitor_jobs
+
+        return generate_monitor_jobs.delay().id
+
+    def queue_depth(self) -> int:
+        with self._queue_depth_lock:
+            if (
+                self._queue_depth is not None
+                and self._queue_depth[0] > time.monotonic()
+            ):
+                return self._queue_depth[1]
+            depth = self._read_queue_depth()
+            self._queue_depth = (time.monotonic() + self.queue_depth_ttl, depth)
+            return depth
+
+    @staticmethod
+    def _read_queue_depth() -> int:
+        """Length of the celery queue, read on a connection of the broker pool"""
+        from waterdip.processor.app import celery_app
+
+        with celery_app.pool.acquire(block=True, timeout=1) as connection:
+            return connection.default_channel.client.llen(
+                celery_app.conf.task_default_queue
+            )
+
+
+class ProcessPoolMonitorExecutor(MonitorExecutor):
+    """
+    Runs monitor jobs in a pool of worker processes of the current node.
+    Workers are spawned, so no mongo client is shared with the parent process
+
+    Attributes
+    ----------
+    max_workers:
+        number of worker processes, defaults to the number of cores
+    max_pending:
+        maximum number of submitted jobs which are not finished yet. Jobs submitted
+        above the limit are rejected and picked again by the next schedule
+    task:
+        function running a single job, called with the monitor and a run id
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_pending: int = 1000,
+        task: Optional[Callable[[Dict, str], None]] = None,
+    ):
+        if task is None:
+            from waterdip.processor.tasks.monitors import run_monitor
+
+            task = run_monitor
+        self._task = task
+        self._max_pending = max_pending
+        self._pool = ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        self._lock = threading.Lock()
+        # future of every pending job by monitor id, None until it is submitted
+        self._pending: Dict[str, Optional[Future]] = {}
+        self._is_shutdown = False
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def queue_depth(self) -> int:
+        # jobs running in the pool are pending until they finish
+        return self.pending
+
+    def submit(self, monitor: Dict) -> bool:
+        monitor_id = str(monitor["monitor_id"])
+        with self._lock:
+            if self._is_shutdown:
+                return False
+            if monitor_id in self._pending:
+                logger.info(f"Skipping monitor job: [{monitor_id}], already pending")
+                return False
+            if len(self._pending) >= self._max_pending:
+                logger.warning(
+                    f"Skipping monitor job: [{monitor_id}], "
+                    f"[{self._max_pending}] jobs are already pending"
+                )
+                return False
+            self._pending[monitor_id] = None
+
+        try:
+            future = self._pool.submit(self._task, monitor, str(uuid.uuid4()))
+        except Exception as e:
+            # a broken or shut down pool rejects the job, it is picked again by the
+            # next schedule
+            with self._lock:
+                self._pending.pop(monitor_id, None)
+            logger.error(f"Skipping monitor job: [{monitor_id}], submit failed [{e}]")
+            return False
+        with self._lock:
+            self._pending[monitor_id] = future
+        future.add_done_callback(lambda f: self._on_done(monitor_id, f))
+        return True
+
+    def _on_done(self, monitor_id: str, future: Future):
+        with self._lock:
+            self._pending.pop(monitor_id, None)
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(
+                f"Monitor job: [{monitor_id}] failed with [{future.exception()}]"
+            )
+
+    def generate_monitor_jobs(self) -> str:
+        from waterdip.processor.tasks.monitors import find_monitor_jobs
+
+        for monitor in find_monitor_jobs():
+            self.submit(monitor)
+        return str(uuid.uuid4())
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stops accepting jobs and cancels the jobs which have not started yet.
+        With wait, blocks until the running jobs are finished
+        """
+        with self._lock:
+            self._is_shutdown = True
+            futures = [future for future in self._pending.values() if future]
+        # shutdown(cancel_futures=True) is not available before python 3.9
+        for future in futures:
+            future.cancel()
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,153 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import argparse
+import sys
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from loguru import logger
+from pymongo import MongoClient, ReplaceOne
+
+from waterdip.core.metrics.rows import ColumnDictionary, compact_row
+from waterdip.server.commons.config import settings
+from waterdip.server.db.mongodb import MONGO_COLLECTION_EVENT_ROWS, MongodbBackend
+from waterdip.server.db.repositories.model_repository import ModelVersionRepository
+from waterdip.server.errors.base_errors import EntityNotFoundError
+
+# v1 rows hold their columns as subdocuments, compact rows do not have the field
+V1_ROWS_FILTER = {"columns": {"$exists": True}}
+
+
+class EventRowLayoutMigration:
+    """
+    Event Row Layout Migration rewrites the v1 event rows of the datasets in the
+    compact v2 layout, one batch of rows at a time. A row is only replaced while
+    it is still a v1 row, so the migration runs next to the logging of new rows
+    and can be stopped and resumed at any batch. The metrics read both layouts
+    when event_row_layout is v2, which must be set before migrating
+
+    Attributes
+    ----------
+    batch_size:
+        rows rewritten by each bulk write
+    """
+
+    def __init__(
+        self,
+        mongodb_backend: MongodbBackend,
+        batch_size: Optional[int] = None,
+        model_version_repo: Optional[ModelVersionRepository] = None,
+    ):
+        self._collection = mongodb_backend.database[MONGO_COLLECTION_EVENT_ROWS]
+        self._model_version_repo = model_version_repo or ModelVersionRepository(
+            mongodb=mongodb_backend
+        )
+        self.batch_size = batch_size or settings.row_migration_batch_size
+
+    def _column_dictionary(self, model_version_id: str) -> ColumnDictionary:
+        model_version = self._model_version_repo.find_by_id(
+            model_version_id=model_version_id
+        )
+        if model_version is None:
+            raise EntityNotFoundError(name=str(model_version_id), type="Model Version")
+        return model_version.version_schema.column_dictionary()
+
+    def migrate_dataset(self, dataset_id: UUID) -> int:
+        """
+        Rewrites the v1 rows of the dataset. Rows with a column missing from the
+        schema of the model version are logged and kept in the v1 layout.
+        Returns the number of rows rewritten
+        """
+        rows_filter = {"dataset_id": str(dataset_id), **V1_ROWS_FILTER}
+        column_dictionary = None
+        migrated = 0
+        while True:
+            # batches follow the _id order, skipped rows are not read again
+            rows = list(
+                self._collection.find(rows_filter).sort("_id", 1).limit(self.batch_size)
+            )
+            if not rows:
+                return migrated
+            rows_filter["_id"] = {"$gt": rows[-1]["_id"]}
+            if column_dictionary is None:
+                column_dictionary = self._column_dictionary(rows[0]["model_version_id"])
+            replacements = []
+            for row in rows:
+                try:
+                    compact = compact_row(row, column_dictionary=column_dictionary)
+                except ValueError as e:
+                    logger.warning(
+                        f"Row of Dataset ID [{dataset_id}] not migrated: {e}"
+                    )
+                    continue
+                replacements.append(
+                    ReplaceOne({"_id": row["_id"], **V1_ROWS_FILTER}, compact)
+                )
+            if replacements:
+                result = self._collection.bulk_write(replacements, ordered=False)
+                migrated += result.modified_count
+            logger.info(f"Migrated [{migrated}] rows of Dataset ID [{dataset_id}]")
+
+    def migrate(self, dataset_ids: Optional[List[UUID]] = None) -> Dict[str, int]:
+        """
+        Rewrites the v1 rows of the datasets, all datasets with v1 rows when None.
+        Returns the number of rows rewritten by dataset id
+        """
+        if dataset_ids is None:
+            dataset_ids = self._collection.distinct("dataset_id", V1_ROWS_FILTER)
+        return {
+            str(dataset_id): self.migrate_dataset(dataset_id)
+            for dataset_id in dataset_ids
+        }
+
+
+def _parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m waterdip.processor.migrations.event_row_layout",
+        description="Rewrite the v1 event rows in the compact v2 row layout",
+    )
+    parser.add_argument("--mongo-url", default=settings.mongo_url)
+    parser.add_argument("--database", default=settings.mongo_database)
+    parser.add_argument(
+        "--batch-size", type=int, default=settings.row_migration_batch_size
+    )
+    parser.add_argument(
+        "--dataset-id",
+        action="append",
+        default=None,
+        help="dataset to migrate, repeatable. All datasets with v1 rows by default",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    if settings.event_row_layout != "v2":
+        # v1 readers do not read the compact rows, set the layout first
+        print("WD_EVENT_ROW_LAYOUT must be v2 before the rows are migrated")
+        return 1
+    migration = EventRowLayoutMigration(
+        mongodb_backend=MongodbBackend(
+            mongo_client=MongoClient(args.mongo_url), mongo_database=args.database
+        ),
+        batch_size=args.batch_size,
+    )
+    for dataset_id, migrated in migration.migrate(args.dataset_id).items():
+        print(f"{dataset_id:<40} {migrated:>10} rows migrated")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
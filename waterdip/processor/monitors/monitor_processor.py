@@ -14,26 +14,72 @@
 
 import datetime
 import uuid
-from typing import Dict, List, Union
+from functools import partial
+from typing import Dict, List, Optional, Union
 from uuid import UUID
 
 from loguru import logger
 
-from waterdip.core.commons.models import DataQualityMetric, DatasetType, MonitorType
+from waterdip.core.commons.models import (
+    ColumnDataType,
+    DataQualityMetric,
+    DatasetType,
+    DriftMetric,
+    ModelBaselineTimeWindowType,
+    MonitorType,
+    PerformanceMetric,
+    TimeGranularity,
+    TimeRange,
+)
+from waterdip.core.metrics.base import TimeBuckets
+from waterdip.core.metrics.classification_metrics import (
+    ClassificationDateHistogramDBMetrics,
+)
 from waterdip.core.metrics.data_metrics import CountEmptyHistogram
+from waterdip.core.metrics.drift_psi import PSIMetrics
+from waterdip.core.metrics.rows import RowReader
 from waterdip.core.monitors.evaluators.data_quality import EmptyValueEvaluator
-from waterdip.core.monitors.models import DataQualityBaseMonitorCondition
+from waterdip.core.monitors.evaluators.drift import PSIEvaluator
+from waterdip.core.monitors.evaluators.performance import PerformanceEvaluator
+from waterdip.core.monitors.models import (
+    DataQualityBaseMonitorCondition,
+    DriftBaseMonitorCondition,
+    PerformanceBaseMonitorCondition,
+)
+from waterdip.server.commons.config import settings
 from waterdip.server.db.models.alerts import AlertDB, AlertIdentification, BaseAlertDB
+from waterdip.server.db.models.baselines import BaseBaselineHistogramDB
 from waterdip.server.db.models.datasets import BaseDatasetDB
+from waterdip.server.db.models.models import BaseModelVersionDB
+from waterdip.server.db.models.performance_counts import BasePerformanceCountDB
 from waterdip.server.db.mongodb import (
+    MONGO_COLLECTION_BATCH_ROWS,
     MONGO_COLLECTION_EVENT_ROWS,
     MONGO_COLLECTION_MONITORS,
     MongodbBackend,
 )
 from waterdip.server.db.repositories.alert_repository import AlertRepository
+from waterdip.server.db.repositories.baseline_repository import (
+    BaselineHistogramRepository,
+)
 from waterdip.server.db.repositories.dataset_repository import DatasetRepository
+from waterdip.server.db.repositories.dataset_row_repository import (
+    EventDatasetRowRepository,
+)
+from waterdip.server.db.repositories.metric_view_repository import MetricViewRepository
+from waterdip.server.db.repositories.model_repository import (
+    ModelRepository,
+    ModelVersionRepository,
+)
+from waterdip.server.db.repositories.monitor_lease_repository import (
+    MonitorLeaseRepository,
+)
+from waterdip.server.db.repositories.performance_count_repository import (
+    PerformanceCountRepository,
+)
 from waterdip.server.errors.base_errors import EntityNotFoundError
 from waterdip.server.services.integration_service import IntegrationService
+from waterdip.server.services.metrics_service import time_partition_executor
 
 
 class MonitorProcessor:
@@ -45,6 +91,26 @@ class MonitorProcessor:
     ----------
     monitor:
         Monitor data in json dictionary format
+    fence_token:
+        Fence token of the monitor lease held by the caller. When provided, the
+        alerts are only created and sent if no newer lease was acquired during
+        the evaluation, and last_run is only updated if no newer lease holder
+        has updated it yet
+    monitor_lease_repo:
+        Leases of the monitors, checked against the fence token before alerting
+    baseline_histogram_repo:
+        Cache of baseline histograms used by drift monitors. Baseline histograms are
+        computed once per resolved baseline and shared by all runs and monitors
+    performance_count_repo:
+        Per day confusion counts used by performance monitors. Each run only
+        aggregates the rows created since the counts were last updated
+    event_row_repo:
+        Event rows of the monitored model, its row reader reads the rows in the
+        configured row layout
+    rows_scanned:
+        number of rows aggregated by the last process call, None if not known
+    alerts_sent:
+        number of new alerts raised by the last process call
     """
 
     def __init__(
@@ -54,6 +120,13 @@ class MonitorProcessor:
         alert_repo: AlertRepository,
         dataset_repo: DatasetRepository,
         integration_service: IntegrationService,
+        fence_token: Optional[int] = None,
+        model_version_repo: Optional[ModelVersionRepository] = None,
+        baseline_histogram_repo: Optional[BaselineHistogramRepository] = None,
+        model_repo: Optional[ModelRepository] = None,
+        performance_count_repo: Optional[PerformanceCountRepository] = None,
+        event_row_repo: Optional[EventDatasetRowRepository] = None,
+        monitor_lease_repo: Optional[MonitorLeaseRepository] = None,
     ):
         self.monitor_type: MonitorType = MonitorType(monitor["monitor_type"])
         self._mongo_backend = mongodb_backend
@@ -68,7 +141,40 @@ class MonitorProcessor:
             self.monitor_condition = DataQualityBaseMonitorCondition(
                 **monitor["monitor_condition"]
             )
+        elif self.monitor_type == MonitorType.DRIFT:
+            self.monitor_condition = DriftBaseMonitorCondition(
+                **monitor["monitor_condition"]
+            )
+        elif self.monitor_type == MonitorType.PERFORMANCE:
+            self.monitor_condition = PerformanceBaseMonitorCondition(
+                **monitor["monitor_condition"]
+            )
         self._integration_service = integration_service
+        self._fence_token = fence_token
+        self._model_version_repo = (
+            model_version_repo
+            or ModelVersionRepository.get_instance(mongodb=mongodb_backend)
+        )
+        self._baseline_histogram_repo = (
+            baseline_histogram_repo
+            or BaselineHistogramRepository.get_instance(mongodb=mongodb_backend)
+        )
+        self.rows_scanned: Optional[int] = None
+        self.alerts_sent: int = 0
+        self._model_repo = model_repo or ModelRepository.get_instance(
+            mongodb=mongodb_backend
+        )
+        self._performance_count_repo = (
+            performance_count_repo
+            or PerformanceCountRepository.get_instance(mongodb=mongodb_backend)
+        )
+        self._event_row_repo = event_row_repo or EventDatasetRowRepository.get_instance(
+            mongodb=mongodb_backend
+        )
+        self._monitor_lease_repo = (
+            monitor_lease_repo
+            or MonitorLeaseRepository.get_instance(mongodb=mongodb_backend)
+        )
 
     def _data_quality_processor(self) -> List[Dict]:
         """
@@ -76,11 +182,129 @@ class MonitorProcessor:
         Selects the Evaluator type based on evaluation_metric type
         """
         if self.monitor_condition.evaluation_metric == DataQualityMetric.EMPTY_VALUE:
+            dimensions = self.monitor_condition.dimensions
             evaluator = EmptyValueEvaluator(
                 monitor_condition=self.monitor_condition,
                 metric=CountEmptyHistogram(
                     collection=self._database[MONGO_COLLECTION_EVENT_ROWS],
                     dataset_id=self._get_event_dataset().dataset_id,
+                    columns=(dimensions.features or [])
+                    + (dimensions.predictions or []),
+                    row_reader=self._row_reader(),
+                ),
+                time_partitions=time_partition_executor(),
+            )
+        else:
+            raise NotImplementedError()
+
+        violations = evaluator.evaluate()
+        self.rows_scanned = evaluator.rows_scanned
+        return violations
+
+    def _drift_processor(self) -> List[Dict]:
+        """
+        Processor for drift monitors.
+        Selects the Evaluator type based on evaluation_metric type
+        """
+        if self.monitor_condition.evaluation_metric == DriftMetric.PSI:
+            model_version = self._model_version_repo.find_by_id(
+                model_version_id=self._model_version_id
+            )
+            if model_version is None:
+                raise EntityNotFoundError(
+                    type="Model Version", name=str(self._model_version_id)
+                )
+            numeric_columns, categorical_columns = [], []
+            for columns in [
+                model_version.version_schema.features,
+                model_version.version_schema.predictions,
+            ]:
+                for name, details in columns.items():
+                    if details.data_type == ColumnDataType.NUMERIC:
+                        numeric_columns.append(name)
+                    elif details.data_type == ColumnDataType.CATEGORICAL:
+                        categorical_columns.append(name)
+
+            event_dataset = self._get_event_dataset()
+            bin_edges = model_version.version_schema.bin_edges()
+            row_reader = self._row_reader(model_version=model_version)
+            baseline = self._resolve_baseline(event_dataset=event_dataset)
+            if bin_edges:
+                # histograms on fixed edges are not interchangeable with $bucketAuto ones
+                baseline["baseline_key"] = f"{baseline['baseline_key']}:edges"
+            else:
+                # $bucketAuto histograms cached before they kept their bin edges
+                baseline["baseline_key"] = f"{baseline['baseline_key']}:auto-edges"
+            top_k = settings.categorical_histogram_top_k
+            if top_k is not None:
+                baseline["baseline_key"] = f"{baseline['baseline_key']}:top{top_k}"
+            baseline_distribution = self._baseline_distribution(
+                baseline=baseline,
+                numeric_columns=numeric_columns,
+                bin_edges=bin_edges,
+                top_k=top_k,
+                row_reader=row_reader,
+            )
+            evaluator = PSIEvaluator(
+                monitor_condition=self.monitor_condition,
+                metric=PSIMetrics(
+                    collection=self._database[MONGO_COLLECTION_EVENT_ROWS],
+                    dataset_id=event_dataset.dataset_id,
+                    baseline_dataset_id=baseline["dataset_id"],
+                    baseline_collection=baseline["collection"],
+                    baseline_time_range=baseline["time_range"],
+                    baseline_distribution=baseline_distribution,
+                    row_reader=row_reader,
+                    bin_edges=bin_edges,
+                    top_k=top_k,
+                    time_partitions=time_partition_executor(),
+                    views=partial(
+                        MetricViewRepository(mongodb=self._mongo_backend).read_view,
+                        key=str(event_dataset.dataset_id),
+                    )
+                    if settings.metric_views_enabled
+                    else None,
+                ),
+                numeric_columns=numeric_columns,
+                categorical_columns=categorical_columns,
+            )
+        else:
+            raise NotImplementedError()
+
+        violations = evaluator.evaluate()
+        self.rows_scanned = evaluator.rows_scanned
+        return violations
+
+    def _performance_processor(self) -> List[Dict]:
+        """
+        Processor for performance monitors.
+        Selects the Evaluator type based on evaluation_metric type
+        """
+        if self.monitor_condition.evaluation_metric in list(PerformanceMetric):
+            model = self._model_repo.find_by_id(model_id=self.model_id)
+            if model is None:
+                raise EntityNotFoundError(type="Model", name=str(self.model_id))
+            if model.positive_class is None:
+                logger.warning(
+                    f"Positive class is not set for Model ID [{self.model_id}], "
+                    f"skipping Monitor ID [{self.monitor_id}]"
+                )
+                return []
+            dataset_id = self._get_event_dataset().dataset_id
+            metric = ClassificationDateHistogramDBMetrics(
+                collection=self._database[MONGO_COLLECTION_EVENT_ROWS],
+                dataset_id=dataset_id,
+                positive_class=model.positive_class["name"],
+                row_reader=self._row_reader(),
+            )
+            evaluator = PerformanceEvaluator(
+                monitor_condition=self.monitor_condition,
+                metric=metric,
+                count_loader=lambda time_range: self._load_confusion_counts(
+                    metric=metric,
+                    dataset_id=dataset_id,
+                    positive_class=model.positive_class["name"],
+                    time_range=time_range,
                 ),
             )
         else:
@@ -88,6 +312,206 @@ class MonitorProcessor:
 
         return evaluator.evaluate()
 
+    def _load_confusion_counts(
+        self,
+        metric: ClassificationDateHistogramDBMetrics,
+        dataset_id: UUID,
+        positive_class: str,
+        time_range: TimeRange,
+    ) -> Dict[str, int]:
+        """
+        Returns the confusion counts summed over time_range. Only the parts of
+        time_range which are not counted yet are aggregated from the event rows,
+        for an hourly monitor that is the last hour of data.
+
+        Rows are counted by their created_at, which is set by the client. The
+        hours counted less than performance_count_grace_period seconds before
+        the end of time_range are counted again, so that rows logged late into
+        them are counted as well
+        """
+        counted = self._performance_count_repo.find_counted_range(
+            dataset_id=dataset_id, positive_class=positive_class
+        )
+        gaps = []
+        if counted is None:
+            recount_start = time_range.start_time
+        else:
+            if time_range.start_time < counted.start_time:
+                gaps.append((time_range.start_time, counted.start_time))
+            recount_start = (
+                self._performance_count_repo.find_recount_start(
+                    dataset_id=dataset_id,
+                    positive_class=positive_class,
+                    counted_after=time_range.end_time
+                    - datetime.timedelta(
+                        seconds=settings.performance_count_grace_period
+                    ),
+                )
+                or counted.end_time
+            )
+        if recount_start < time_range.end_time:
+            gaps.append((recount_start, time_range.end_time))
+
+        self.rows_scanned = 0
+        for gap_start, gap_end in gaps:
+            hour_counts = metric.confusion_counts(
+                start_time=gap_start,
+                end_time=gap_end,
+                time_buckets=TimeBuckets(TimeGranularity.HOUR),
+            )
+            self.rows_scanned += sum(counts["total"] for counts in hour_counts.values())
+            counts: List[BasePerformanceCountDB] = []
+            # every hour of the gap is stored, including hours without rows, so
+            # that the counted range always moves forward and the intervals
+            # counted again start at the same hours
+            hour = gap_start.replace(minute=0, second=0, microsecond=0)
+            while hour < gap_end:
+                next_hour = hour + datetime.timedelta(hours=1)
+                counts.append(
+                    BasePerformanceCountDB(
+                        dataset_id=dataset_id,
+                        positive_class=positive_class,
+                        day=hour.replace(hour=0),
+                        start_time=max(gap_start, hour),
+                        end_time=min(gap_end, next_hour),
+                        **hour_counts.get(hour, {}),
+                    )
+                )
+                hour = next_hour
+            self._performance_count_repo.replace_counts(
+                dataset_id=dataset_id,
+                positive_class=positive_class,
+                start_time=gap_start,
+                end_time=gap_end,
+                counts=counts,
+            )
+
+        return self._performance_count_repo.sum_counts(
+            dataset_id=dataset_id,
+            positive_class=positive_class,
+            start_day=time_range.start_time,
+            end_time=time_range.end_time,
+        )
+
+    def _resolve_baseline(self, event_dataset: BaseDatasetDB) -> Dict:
+        """
+        Resolves the monitor baseline to the dataset, collection and time range it
+        points to. The returned baseline_key is the same for every monitor and run
+        resolving to the same baseline. Moving time windows are aligned to the
+        start of the day, so their histograms are computed at most once a day
+        """
+        baseline = self.monitor_condition.baseline
+        if baseline.dataset_env is not None:
+            batch_datasets: List[BaseDatasetDB] = self._dataset_repo.find_datasets(
+                filters={
+                    "model_version_id": self._model_version_id,
+                    "environment": baseline.dataset_env,
+                    "dataset_type": DatasetType.BATCH,
+                }
+            )
+            if not batch_datasets:
+                raise EntityNotFoundError(
+                    type="baseline_dataset", name=str(self._model_version_id)
+                )
+            dataset_id = batch_datasets[0].dataset_id
+            return {
+                "baseline_key": f"{self._model_version_id}:{dataset_id}",
+                "dataset_id": dataset_id,
+                "collection": self._database[MONGO_COLLECTION_BATCH_ROWS],
+                "time_range": None,
+                "expires_at": None,
+            }
+
+        time_window = baseline.time_window
+        expires_at = None
+        if (
+            time_window.time_window_type
+            == ModelBaselineTimeWindowType.FIXED_TIME_WINDOW
+        ):
+            time_range = TimeRange(
+                start_time=time_window.fixed_time_window.start_time,
+                end_time=time_window.fixed_time_window.end_time,
+            )
+        else:
+            today = datetime.datetime.combine(
+                datetime.datetime.utcnow().date(), datetime.time.min
+            )
+            time_range = time_window.moving_time_window.get_time_range(
+                current_time=today
+            )
+            expires_at = today + datetime.timedelta(
+                seconds=settings.moving_baseline_histogram_retention
+            )
+
+        return {
+            "baseline_key": f"{self._model_version_id}:{event_dataset.dataset_id}:"
+            f"{time_range.start_time.isoformat()}:{time_range.end_time.isoformat()}",
+            "dataset_id": event_dataset.dataset_id,
+            "collection": self._database[MONGO_COLLECTION_EVENT_ROWS],
+            "time_range": time_range,
+            "expires_at": expires_at,
+        }
+
+    def _baseline_distribution(
+        self,
+        baseline: Dict,
+        numeric_columns: List[str],
+        bin_edges: Optional[Dict[str, List[float]]] = None,
+        top_k: Optional[int] = None,
+        row_reader: Optional[RowReader] = None,
+    ) -> Dict[str, Dict]:
+        """
+        Returns the baseline histograms from the cache, computing and storing them
+        if the baseline has not been aggregated yet
+        """
+        cached = self._baseline_histogram_repo.find_baseline_histogram(
+            baseline_key=baseline["baseline_key"]
+        )
+        if cached is not None:
+            return {"numeric": cached.numeric, "categorical": cached.categorical}
+
+        logger.info(f"Computing baseline histograms: [{baseline['baseline_key']}]")
+        distribution = PSIMetrics(
+            collection=self._database[MONGO_COLLECTION_EVENT_ROWS],
+            dataset_id=baseline["dataset_id"],
+            baseline_dataset_id=baseline["dataset_id"],
+            baseline_collection=baseline["collection"],
+            baseline_time_range=baseline["time_range"],
+            row_reader=row_reader,
+            baseline_row_reader=row_reader
+            if baseline["collection"].name == MONGO_COLLECTION_EVENT_ROWS
+            else None,
+            bin_edges=bin_edges,
+            top_k=top_k,
+        ).baseline_distribution(numeric_columns=numeric_columns)
+
+        self._baseline_histogram_repo.save_baseline_histogram(
+            BaseBaselineHistogramDB(
+                baseline_key=baseline["baseline_key"],
+                model_version_id=self._model_version_id,
+                numeric=distribution["numeric"],
+                categorical=distribution["categorical"],
+                created_at=datetime.datetime.utcnow(),
+                expires_at=baseline["expires_at"],
+            )
+        )
+        return distribution
+
+    def _row_reader(
+        self, model_version: Optional[BaseModelVersionDB] = None
+    ) -> RowReader:
+        """
+        Reader of the event rows of the model version. Compact rows are decoded
+        with the column dictionary of the version schema
+        """
+        if model_version is None and settings.event_row_layout == "v2":
+            model_version = self._model_version_repo.find_by_id(
+                model_version_id=self._model_version_id
+            )
+        return self._event_row_repo.row_reader(
+            model_version.version_schema if model_version is not None else None
+        )
+
     def _get_event_dataset(self) -> Union[BaseDatasetDB, None]:
         """
         Get event dataset for the model version id
@@ -124,13 +548,25 @@ class MonitorProcessor:
         """
         Process the monitor. Selects the processor type based on MonitorType
         """
+        self.rows_scanned, self.alerts_sent = None, 0
         if self.monitor_type == MonitorType.DATA_QUALITY:
             violations = self._data_quality_processor()
+        elif self.monitor_type == MonitorType.DRIFT:
+            violations = self._drift_processor()
+        elif self.monitor_type == MonitorType.PERFORMANCE:
+            violations = self._performance_processor()
         else:
             raise NotImplementedError()
         logger.info(
             f"evaluation done for Monitor ID [{self.monitor_id}] number of violations: [{len(violations)}]"
         )
+        # the evaluation may outlast the lease, a newer lease holder alerts instead
+        if not self._holds_lease():
+            logger.warning(
+                f"alerts of Monitor ID [{self.monitor_id}] not created, "
+                f"lease with fence token [{self._fence_token}] is stale"
+            )
+            return violations
 
         for violation in violations:
             agg_pipeline = [
@@ -140,6 +576,7 @@ class MonitorProcessor:
                         "violation.field": violation["dimension"],
                         "violation.focal_time_window": self.monitor_condition.evaluation_window,
                         "violation.max_threshold": violation["threshold"].value,
+                        "violation.backfilled": {"$ne": True},
                     }
                 }
             ]
@@ -153,6 +590,7 @@ class MonitorProcessor:
                     "focal_value": violation["metric_value"],
                 }
                 alert = self._create_alert(_violation)
+                self.alerts_sent += 1
                 if self.integration_id:
                     self._integration_service.send_alert(
                         alert=alert,
@@ -160,8 +598,47 @@ class MonitorProcessor:
                         integration_id=self.integration_id,
                     )
 
-        self._database[MONGO_COLLECTION_MONITORS].update_one(
-            {"monitor_id": self.monitor_id},
-            {"$set": {"last_run": datetime.datetime.utcnow()}},
-        )
+        self._update_last_run()
         return violations
+
+    def _holds_lease(self) -> bool:
+        """
+        Whether no lease newer than the fence token was acquired for the monitor,
+        nor written to it. Always True without a fence token
+        """
+        if self._fence_token is None:
+            return True
+        lease = self._monitor_lease_repo.find_lease(self.monitor_id)
+        if lease is not None and lease.fence_token > self._fence_token:
+            return False
+        monitor = self._database[MONGO_COLLECTION_MONITORS].find_one(
+            {"monitor_id": self.monitor_id}, {"lease_fence": 1}
+        )
+        return (monitor or {}).get(
+            "lease_fence", self._fence_token
+        ) <= self._fence_token
+
+    def _update_last_run(self) -> bool:
+        """
+        Update last_run of the monitor. With a fence token the update is rejected
+        if a worker holding a newer lease has already written to the monitor
+        """
+        monitor_filter = {"monitor_id": self.monitor_id}
+        last_run_update = {"last_run": datetime.datetime.utcnow()}
+        if self._fence_token is not None:
+            monitor_filter["$or"] = [
+                {"lease_fence": {"$exists": False}},
+                {"lease_fence": {"$lt": self._fence_token}},
+            ]
+            last_run_update["lease_fence"] = self._fence_token
+
+        result = self._database[MONGO_COLLECTION_MONITORS].update_one(
+            monitor_filter, {"$set": last_run_update}
+        )
+        if self._fence_token is not None and result.matched_count == 0:
+            logger.warning(
+                f"last_run of Monitor ID [{self.monitor_id}] not updated, "
+                f"lease with fence token [{self._fence_token}] is stale"
+            )
+            return False
+        return True
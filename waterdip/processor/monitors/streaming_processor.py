@@ -0,0 +1,60 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from typing import Dict, List
+from uuid import UUID
+
+from waterdip.core.commons.models import DataQualityMetric
+from waterdip.core.metrics.data_metrics import CountEmptyHourlyCounters
+from waterdip.core.monitors.evaluators.data_quality import EmptyValueEvaluator
+from waterdip.processor.monitors.monitor_processor import MonitorProcessor
+from waterdip.server.db.mongodb import MONGO_COLLECTION_COLUMN_COUNTS
+
+
+class StreamingMonitorProcessor(MonitorProcessor):
+    """
+    Monitor processor run on ingest for empty value monitors.
+    The empty counts of the evaluation window are read from the running hourly
+    column counters, the event rows are not scanned.
+    last_run is not updated, it keeps tracking the scheduled runs
+
+    Attributes:
+    ------------------
+    dataset_id:
+        Event dataset the rows were logged to, its counters are read
+    """
+
+    def __init__(self, monitor: Dict, dataset_id: UUID, **kwargs):
+        super().__init__(monitor=monitor, **kwargs)
+        self._dataset_id = dataset_id
+
+    def _data_quality_processor(self) -> List[Dict]:
+        if self.monitor_condition.evaluation_metric != DataQualityMetric.EMPTY_VALUE:
+            raise NotImplementedError()
+
+        dimensions = self.monitor_condition.dimensions
+        evaluator = EmptyValueEvaluator(
+            monitor_condition=self.monitor_condition,
+            metric=CountEmptyHourlyCounters(
+                collection=self._database[MONGO_COLLECTION_COLUMN_COUNTS],
+                dataset_id=self._dataset_id,
+                columns=(dimensions.features or []) + (dimensions.predictions or []),
+            ),
+        )
+        violations = evaluator.evaluate()
+        self.rows_scanned = evaluator.rows_scanned
+        return violations
+
+    def _update_last_run(self) -> bool:
+        return False
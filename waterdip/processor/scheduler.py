@@ -0,0 +1,71 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import threading
+from typing import Optional
+
+from loguru import logger
+
+from waterdip.processor.executors import MonitorExecutor
+
+
+class MonitorScheduler:
+    """
+    Embedded replacement of celery beat. Generates the monitor jobs every
+    interval seconds from a background thread of the current process
+
+    Attributes
+    ----------
+    executor:
+        executor the monitor jobs are submitted to
+    interval:
+        seconds between two generations of monitor jobs, the first generation
+        runs when the scheduler starts
+    """
+
+    def __init__(self, executor: MonitorExecutor, interval: int):
+        self._executor = executor
+        self._interval = interval
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="wd-monitor-scheduler", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Monitor scheduler started, interval [{self._interval}]s")
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self._executor.generate_monitor_jobs()
+            except Exception as e:
+                logger.error(f"Failed to generate monitor jobs: {e}")
+            if self._stop_event.wait(timeout=self._interval):
+                break
+
+    def stop(self, wait: bool = True):
+        """
+        Stops scheduling and shuts the executor down. With wait, blocks until the
+        running monitor jobs are finished
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._executor.shutdown(wait=wait)
+        logger.info("Monitor scheduler stopped")
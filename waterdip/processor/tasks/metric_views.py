@@ -0,0 +1,87 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+
+from typing import Dict, List
+
+from loguru import logger
+
+from waterdip.core.commons.models import DatasetType
+from waterdip.processor.app import celery_app
+from waterdip.processor.views.metric_view_processor import MetricViewProcessor
+from waterdip.server.db.models.datasets import DatasetDB
+from waterdip.server.db.mongodb import MongodbBackend
+from waterdip.server.db.repositories.dataset_repository import DatasetRepository
+from waterdip.server.db.repositories.metric_view_repository import MetricViewRepository
+from waterdip.server.db.repositories.model_repository import (
+    ModelRepository,
+    ModelVersionRepository,
+)
+from waterdip.server.db.telemetry import set_command_origin
+from waterdip.utils.tracing import Tracer
+
+
+@celery_app.task(name="refresh_metric_views", bind=True)
+def refresh_metric_views(self, dataset_id: str):
+    """
+    Refresh the metric views of a single event dataset using MetricViewProcessor
+    """
+    logger.info(f"Starting metric view refresh of dataset: [{dataset_id}]")
+    set_command_origin("task:refresh_metric_views")
+    with Tracer.get_instance().trace(
+        "task:refresh_metric_views", "task", dataset_id=dataset_id
+    ):
+        run_metric_view_refresh(dataset_id=dataset_id, owner=str(self.request.id))
+
+
+def run_metric_view_refresh(dataset_id: str, owner: str) -> Dict:
+    mongo_backend = MongodbBackend.get_instance()
+    datasets: List[DatasetDB] = DatasetRepository.get_instance(
+        mongodb=mongo_backend
+    ).find_datasets(filters={"dataset_id": dataset_id}, limit=1)
+    if not datasets:
+        logger.info(f"Skipping metric view refresh, dataset [{dataset_id}] not found")
+        return {}
+
+    refreshed = MetricViewProcessor(
+        dataset=datasets[0],
+        mongodb_backend=mongo_backend,
+        owner=owner,
+        metric_view_repo=MetricViewRepository.get_instance(mongodb=mongo_backend),
+        model_version_repo=ModelVersionRepository.get_instance(mongodb=mongo_backend),
+        model_repo=ModelRepository.get_instance(mongodb=mongo_backend),
+    ).process()
+    days = ", ".join(f"{view.value}: {count}" for view, count in refreshed.items())
+    logger.info(f"Refreshed metric views of dataset [{dataset_id}], days [{days}]")
+    return refreshed
+
+
+def find_metric_view_jobs() -> List[str]:
+    """
+    Gets all the event datasets from the datastore, one job per dataset
+    """
+    dataset_repo = DatasetRepository.get_instance(mongodb=MongodbBackend.get_instance())
+    datasets: List[DatasetDB] = dataset_repo.find_datasets(
+        filters={"dataset_type": DatasetType.EVENT}, limit=0
+    )
+    return [str(dataset.dataset_id) for dataset in datasets]
+
+
+@celery_app.task(name="create_refresh_metric_view_jobs", bind=True)
+def generate_metric_view_jobs(self):
+    """
+    Sends a metric view refresh job for every event dataset to the queue
+    """
+    for dataset_id in find_metric_view_jobs():
+        refresh_metric_views.apply_async(kwargs={"dataset_id": dataset_id})
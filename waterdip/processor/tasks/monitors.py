@@ -12,19 +12,37 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
-from typing import List
+from datetime import datetime
+from typing import Dict, List, Optional
 
 from loguru import logger
 
 from waterdip.processor.app import celery_app
 from waterdip.processor.monitors.monitor_processor import MonitorProcessor
-from waterdip.server.db.models.monitors import MonitorDB
+from waterdip.server.db.models.monitors import BaseMonitorRunDB, MonitorDB
 from waterdip.server.db.mongodb import MongodbBackend
 from waterdip.server.db.repositories.alert_repository import AlertRepository
+from waterdip.server.db.repositories.baseline_repository import (
+    BaselineHistogramRepository,
+)
 from waterdip.server.db.repositories.dataset_repository import DatasetRepository
 from waterdip.server.db.repositories.integration_repository import IntegrationRepository
+from waterdip.server.db.repositories.model_repository import (
+    ModelRepository,
+    ModelVersionRepository,
+)
+from waterdip.server.db.repositories.monitor_lease_repository import (
+    MonitorLeaseRepository,
+)
 from waterdip.server.db.repositories.monitor_repository import MonitorRepository
+from waterdip.server.db.repositories.monitor_run_repository import MonitorRunRepository
+from waterdip.server.db.repositories.performance_count_repository import (
+    PerformanceCountRepository,
+)
+from waterdip.server.db.telemetry import set_command_origin
 from waterdip.server.services.integration_service import IntegrationService
+from waterdip.utils.instrumentation import MONITOR_PROCESSING_DURATION
+from waterdip.utils.tracing import Tracer
 
 
 @celery_app.task(name="process_monitor", bind=True)
@@ -32,19 +50,114 @@ def process_monitor(self, monitor):
     """
     Process a single incoming monitor data using MonitorProcessor
     """
+    run_monitor(monitor=monitor, run_id=str(self.request.id))
+
+
+def run_monitor(monitor: Dict, run_id: str):
+    """
+    Process a single monitor using MonitorProcessor. Used by the celery task and by
+    the in-process executors. The monitor lease is acquired before evaluation,
+    if another worker is already processing the monitor the job is skipped
+    """
     logger.info(f"Starting processing monitor job: [{monitor}]")
+    set_command_origin("task:process_monitor")
+    with Tracer.get_instance().trace(
+        "task:process_monitor", "task", monitor_id=monitor["monitor_id"]
+    ):
+        _run_monitor(monitor=monitor, run_id=run_id)
+
+
+def _run_monitor(monitor: Dict, run_id: str):
     mongo_backend = MongodbBackend.get_instance()
 
-    processor = MonitorProcessor(
-        monitor=monitor,
-        mongodb_backend=mongo_backend,
-        alert_repo=AlertRepository.get_instance(mongodb=mongo_backend),
-        dataset_repo=DatasetRepository.get_instance(mongodb=mongo_backend),
-        integration_service=IntegrationService.get_instance(
-            repository=IntegrationRepository.get_instance(mongodb=mongo_backend)
-        ),
+    lease_repo = MonitorLeaseRepository.get_instance(mongodb=mongo_backend)
+    lease = lease_repo.acquire_lease(monitor_id=monitor["monitor_id"], owner=run_id)
+    if lease is None:
+        logger.info(
+            f"Skipping monitor job: [{monitor['monitor_id']}], lease is held by another worker"
+        )
+        return
+
+    run_repo = MonitorRunRepository.get_instance(mongodb=mongo_backend)
+    started_at = datetime.utcnow()
+    processor = None
+    try:
+        processor = MonitorProcessor(
+            monitor=monitor,
+            mongodb_backend=mongo_backend,
+            alert_repo=AlertRepository.get_instance(mongodb=mongo_backend),
+            dataset_repo=DatasetRepository.get_instance(mongodb=mongo_backend),
+            integration_service=IntegrationService.get_instance(
+                repository=IntegrationRepository.get_instance(mongodb=mongo_backend)
+            ),
+            fence_token=lease.fence_token,
+            model_version_repo=ModelVersionRepository.get_instance(
+                mongodb=mongo_backend
+            ),
+            baseline_histogram_repo=BaselineHistogramRepository.get_instance(
+                mongodb=mongo_backend
+            ),
+            model_repo=ModelRepository.get_instance(mongodb=mongo_backend),
+            performance_count_repo=PerformanceCountRepository.get_instance(
+                mongodb=mongo_backend
+            ),
+            monitor_lease_repo=lease_repo,
+        )
+        violations = processor.process()
+        _record_run(run_repo, run_id, monitor, started_at, processor, violations)
+    except Exception as e:
+        _record_run(run_repo, run_id, monitor, started_at, processor, error=e)
+        raise
+    finally:
+        lease_repo.release_lease(lease)
+
+
+def _record_run(
+    run_repo: MonitorRunRepository,
+    run_id: str,
+    monitor: Dict,
+    started_at: datetime,
+    processor: Optional[MonitorProcessor],
+    violations: Optional[List[Dict]] = None,
+    error: Optional[Exception] = None,
+):
+    """
+    Stores the compact record of a monitor run in the monitor run history.
+    Failing to record the run never fails the run itself
+    """
+    duration = (datetime.utcnow() - started_at).total_seconds()
+    MONITOR_PROCESSING_DURATION.observe(
+        duration,
+        monitor_type=monitor["monitor_type"],
+        status="failure" if error is not None else "success",
     )
-    processor.process()
+    try:
+        run_repo.insert_run(
+            BaseMonitorRunDB(
+                run_id=str(run_id),
+                monitor_id=monitor["monitor_id"],
+                model_id=monitor["monitor_identification"]["model_id"],
+                monitor_type=monitor["monitor_type"],
+                status="FAILURE" if error is not None else "SUCCESS",
+                started_at=started_at,
+                duration=duration,
+                rows_scanned=processor.rows_scanned if processor else None,
+                violations=len(violations) if violations else 0,
+                alerts_sent=processor.alerts_sent if processor else 0,
+                error=repr(error) if error is not None else None,
+            )
+        )
+    except Exception as e:
+        logger.error(f"Failed to record run of monitor [{monitor['monitor_id']}]: {e}")
+
+
+def find_monitor_jobs() -> List[Dict]:
+    """
+    Gets all the monitors from the datastore, one job per monitor
+    """
+    monitor_repo = MonitorRepository.get_instance(mongodb=MongodbBackend.get_instance())
+    monitors: List[MonitorDB] = monitor_repo.find_monitors(filters={}, limit=0)
+    return [monitor.dict() for monitor in monitors]
 
 
 @celery_app.task(name="create_process_monitor_jobs", bind=True)
@@ -53,8 +166,6 @@ def generate_monitor_jobs(self):
     Gets all the monitors from the datastore.
     and sends all the monitors to queue to process. process_monitor will pick one monitor at a time to process
     """
-    monitor_repo = MonitorRepository.get_instance(mongodb=MongodbBackend.get_instance())
-    monitors: List[MonitorDB] = monitor_repo.find_monitors(filters={}, limit=0)
-    for monitor in monitors:
-        logger.info(f"Generating monitor job: [{monitor.monitor_name}]")
-        process_monitor.apply_async(kwargs={"monitor": monitor.dict()})
+    for monitor in find_monitor_jobs():
+        logger.info(f"Generating monitor job: [{monitor['monitor_name']}]")
+        process_monitor.apply_async(kwargs={"monitor": monitor})
@@ -0,0 +1,316 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Callable, Dict, List, Optional
+
+from loguru import logger
+
+from waterdip.core.commons.models import ColumnDataType, MetricView, TimeRange
+from waterdip.core.metrics.base import TimeBuckets
+from waterdip.core.metrics.classification_metrics import (
+    ClassificationDateHistogramDBMetrics,
+)
+from waterdip.core.metrics.data_metrics import (
+    CategoricalNestedDateCountHistogram,
+    NumericNestedCountDateHistogram,
+)
+from waterdip.core.metrics.executor import PARTITION_RESOLUTION
+from waterdip.core.metrics.rows import RowReader
+from waterdip.core.metrics.views import day_start
+from waterdip.server.commons.config import settings
+from waterdip.server.db.models.datasets import BaseDatasetDB
+from waterdip.server.db.models.metric_views import BaseMetricViewDB
+from waterdip.server.db.mongodb import MONGO_COLLECTION_EVENT_ROWS, MongodbBackend
+from waterdip.server.db.repositories.dataset_row_repository import (
+    EventDatasetRowRepository,
+)
+from waterdip.server.db.repositories.metric_view_repository import MetricViewRepository
+from waterdip.server.db.repositories.model_repository import (
+    ModelRepository,
+    ModelVersionRepository,
+)
+
+
+class MetricViewProcessor:
+    """
+    Metric View Processor refreshes the metric views of an event dataset: the
+    categorical and numeric date histograms of its rows, the confusion counts of
+    its rows for the positive class of the model, and the prediction counts of
+    its model. A view is refreshed from its watermark one day at a time, the rows
+    created before the watermark are not aggregated again
+
+    Attributes
+    ----------
+    dataset:
+        event dataset the views are refreshed for
+    owner:
+        identifier of the refresh job (task id), claims the refresh of each view
+    refresh_lag:
+        seconds before the refresh the views are refreshed up to, so that rows
+        logged with a small delay are still aggregated from the tail
+    max_days:
+        maximum number of days stored by the refresh of a view, longer histories
+        are materialized over several refreshes
+    """
+
+    def __init__(
+        self,
+        dataset: BaseDatasetDB,
+        mongodb_backend: MongodbBackend,
+        owner: str,
+        metric_view_repo: Optional[MetricViewRepository] = None,
+        model_version_repo: Optional[ModelVersionRepository] = None,
+        model_repo: Optional[ModelRepository] = None,
+        event_row_repo: Optional[EventDatasetRowRepository] = None,
+        refresh_lag: Optional[int] = None,
+        max_days: Optional[int] = None,
+    ):
+        self._dataset = dataset
+        self._collection = mongodb_backend.database[MONGO_COLLECTION_EVENT_ROWS]
+        self._owner = owner
+        self._metric_view_repo = metric_view_repo or MetricViewRepository(
+            mongodb=mongodb_backend
+        )
+        self._model_version_repo = model_version_repo or ModelVersionRepository(
+            mongodb=mongodb_backend
+        )
+        self._model_repo = model_repo or ModelRepository(mongodb=mongodb_backend)
+        self._event_row_repo = event_row_repo or EventDatasetRowRepository(
+            mongodb=mongodb_backend
+        )
+        self._refresh_lag = timedelta(
+            seconds=refresh_lag
+            if refresh_lag is not None
+            else settings.metric_view_refresh_lag
+        )
+        self._max_days = (
+            max_days if max_days is not None else settings.metric_view_refresh_max_days
+        )
+
+    def process(self) -> Dict[MetricView, int]:
+        """
+        Refreshes the views of the dataset.
+        Returns the number of days stored for each refreshed view
+        """
+        dataset_id = str(self._dataset.dataset_id)
+        model_id = str(self._dataset.model_id)
+        model_version = self._model_version_repo.find_by_id(
+            self._dataset.model_version_id
+        )
+        row_reader = self._event_row_repo.row_reader(
+            model_version.version_schema if model_version else None
+        )
+        dataset_filter = {"dataset_id": row_reader.id_value(dataset_id)}
+        refreshed: Dict[MetricView, int] = {}
+
+        refreshed[MetricView.CATEGORICAL_DATE_HISTOGRAM] = self._refresh(
+            MetricView.CATEGORICAL_DATE_HISTOGRAM,
+            key=dataset_id,
+            rows_filter=dataset_filter,
+            interval_result=partial(
+                self._categorical_histograms, row_reader=row_reader
+            ),
+        )
+
+        numeric_columns = self._numeric_columns(model_version)
+        bin_edges = model_version.version_schema.bin_edges() if model_version else {}
+        # histograms are only materialized on the fixed bin edges of every column
+        if numeric_columns and all(column in bin_edges for column in numeric_columns):
+            refreshed[MetricView.NUMERIC_DATE_HISTOGRAM] = self._refresh(
+                MetricView.NUMERIC_DATE_HISTOGRAM,
+                key=dataset_id,
+                rows_filter=dataset_filter,
+                interval_result=partial(
+                    self._numeric_histograms,
+                    numeric_columns=numeric_columns,
+                    bin_edges=bin_edges,
+                    row_reader=row_reader,
+                ),
+            )
+
+        model = self._model_repo.find_by_id(self._dataset.model_id)
+        if model is not None and model.positive_class is not None:
+            positive_class = model.positive_class["name"]
+            refreshed[MetricView.CLASSIFICATION_COUNTS] = self._refresh(
+                MetricView.CLASSIFICATION_COUNTS,
+                key=MetricViewRepository.classification_key(dataset_id, positive_class),
+                rows_filter=dataset_filter,
+                interval_result=partial(
+                    self._confusion_counts,
+                    positive_class=positive_class,
+                    row_reader=row_reader,
+                ),
+            )
+
+        refreshed[MetricView.PREDICTION_COUNTS] = self._refresh(
+            MetricView.PREDICTION_COUNTS,
+            key=model_id,
+            rows_filter={"model_id": row_reader.id_value(model_id)},
+            interval_result=partial(self._prediction_counts, row_reader=row_reader),
+        )
+        return refreshed
+
+    @staticmethod
+    def _numeric_columns(model_version) -> List[str]:
+        if model_version is None:
+            return []
+        return [
+            name
+            for columns in [
+                model_version.version_schema.features,
+                model_version.version_schema.predictions,
+            ]
+            for name, details in columns.items()
+            if details.data_type == ColumnDataType.NUMERIC
+        ]
+
+    def _refresh(
+        self,
+        view: MetricView,
+        key: str,
+        rows_filter: Dict,
+        interval_result: Callable[[datetime, datetime], Dict],
+    ) -> int:
+        """
+        Stores the results of the rows created between the watermark of the view
+        and the refresh end, one result per day, and moves the watermark.
+        The first refresh of a view starts on the day of the first row
+        """
+        claim = self._metric_view_repo.claim_refresh(view, key, owner=self._owner)
+        if claim is None:
+            logger.info(
+                f"Skipping refresh of view [{view.value}:{key}], already claimed"
+            )
+            return 0
+
+        try:
+            view_start, start_time = claim.view_start, claim.watermark
+            if start_time is None:
+                first_row = self._collection.find_one(
+                    rows_filter, sort=[("created_at", 1)]
+                )
+                if first_row is None:
+                    self._metric_view_repo.release_refresh(claim)
+                    return 0
+                view_start = start_time = day_start(first_row["created_at"])
+            end_time = min(
+                datetime.utcnow() - self._refresh_lag,
+                day_start(start_time) + timedelta(days=self._max_days),
+            )
+            if start_time >= end_time:
+                self._metric_view_repo.release_refresh(claim)
+                return 0
+
+            views: List[BaseMetricViewDB] = []
+            day = day_start(start_time)
+            while day < end_time:
+                next_day = day + timedelta(days=1)
+                interval_start = max(start_time, day)
+                interval_end = min(end_time, next_day)
+                views.append(
+                    BaseMetricViewDB(
+                        view=view,
+                        key=key,
+                        day=day,
+                        start_time=interval_start,
+                        end_time=interval_end,
+                        value=interval_result(interval_start, interval_end),
+                    )
+                )
+                day = next_day
+        except Exception:
+            self._metric_view_repo.release_refresh(claim)
+            raise
+
+        if not self._metric_view_repo.complete_refresh(
+            claim, views=views, view_start=view_start, watermark=end_time
+        ):
+            logger.warning(
+                f"Refresh of view [{view.value}:{key}] was claimed by another job"
+            )
+            return 0
+        return len(views)
+
+    @staticmethod
+    def _interval_time_range(start_time: datetime, end_time: datetime) -> TimeRange:
+        """Time range of the rows created in [start_time, end_time)"""
+        return TimeRange(
+            start_time=start_time, end_time=end_time - PARTITION_RESOLUTION
+        )
+
+    def _categorical_histograms(
+        self, start_time: datetime, end_time: datetime, row_reader: RowReader
+    ) -> Dict[str, Dict]:
+        result = CategoricalNestedDateCountHistogram(
+            collection=self._collection,
+            dataset_id=self._dataset.dataset_id,
+            row_reader=row_reader,
+        ).aggregation_result(
+            time_range=self._interval_time_range(start_time, end_time),
+            time_buckets=TimeBuckets(),
+        )
+        return next(iter(result.values()), {})
+
+    def _numeric_histograms(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        numeric_columns: List[str],
+        bin_edges: Dict[str, List[float]],
+        row_reader: RowReader,
+    ) -> Dict[str, Dict]:
+        result = NumericNestedCountDateHistogram(
+            collection=self._collection,
+            dataset_id=self._dataset.dataset_id,
+            row_reader=row_reader,
+        ).aggregation_result(
+            numeric_columns=numeric_columns,
+            time_range=self._interval_time_range(start_time, end_time),
+            bin_edges=bin_edges,
+            time_buckets=TimeBuckets(),
+        )
+        return next(iter(result.values()), {})
+
+    def _confusion_counts(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        positive_class: str,
+        row_reader: RowReader,
+    ) -> Dict[str, int]:
+        return (
+            ClassificationDateHistogramDBMetrics(
+                collection=self._collection,
+                dataset_id=self._dataset.dataset_id,
+                positive_class=positive_class,
+                row_reader=row_reader,
+            )
+            .confusion_counts(start_time=start_time, end_time=end_time)
+            .get(day_start(start_time), {})
+        )
+
+    def _prediction_counts(
+        self, start_time: datetime, end_time: datetime, row_reader: RowReader
+    ) -> Dict[str, int]:
+        return {
+            "count": self._collection.count_documents(
+                {
+                    "model_id": row_reader.id_value(self._dataset.model_id),
+                    "created_at": {"$gte": start_time, "$lt": end_time},
+                }
+            )
+        }
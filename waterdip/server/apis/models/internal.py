@@ -0,0 +1,58 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from typing import List
+
+from pydantic import BaseModel
+
+
+class MongoCommandStats(BaseModel):
+    """
+    Statistics of a group of mongo commands
+    Attributes:
+    ------------------
+    origin:
+        route or task which sent the commands
+    command_name:
+        name of the mongo command, like aggregate or find
+    collection:
+        collection the commands ran on
+    fingerprint:
+        query shape fingerprint, commands which only differ in values share it
+    count:
+        number of commands
+    docs_returned:
+        number of documents returned by the commands
+    total_ms:
+        total duration of the commands in milliseconds
+    """
+
+    origin: str
+    command_name: str
+    collection: str
+    fingerprint: str
+    count: int
+    failures: int
+    docs_returned: int
+    total_ms: float
+    max_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+class InternalMetricsResponse(BaseModel):
+    telemetry_enabled: bool
+    slow_command_ms: int
+    commands: List[MongoCommandStats]
@@ -20,6 +20,23 @@ from pydantic import BaseModel
 from waterdip.core.commons.models import Histogram
 
 
+class SamplingInfo(BaseModel):
+    """
+    Sampling of approximate metrics
+
+    Attributes:
+    ------------------
+    rate:
+        fraction of the rows the metrics are calculated on. Counts are scaled to
+        all the rows, unique counts, min and max are of the sampled rows
+    confidence:
+        confidence level of the errors and intervals of the metrics
+    """
+
+    rate: float
+    confidence: float
+
+
 class NumericColumnStats(BaseModel):
     column_name: str
     missing_total: Optional[int]
@@ -31,7 +48,10 @@ class NumericColumnStats(BaseModel):
     total: Optional[float]
     min: Optional[float]
     max: Optional[float]
+    percentiles: Optional[Dict[str, Optional[float]]]
     histogram: Optional[Histogram]
+    mean_error: Optional[float]
+    histogram_error: Optional[List[float]]
 
 
 class CategoricalColumnStats(BaseModel):
@@ -41,11 +61,13 @@ class CategoricalColumnStats(BaseModel):
     unique: Optional[int]
     top: Optional[str]
     histogram: Optional[Histogram]
+    histogram_error: Optional[List[float]]
 
 
 class DatasetMetricsResponse(BaseModel):
     numeric_column_stats: List[NumericColumnStats]
     categorical_column_stats: List[CategoricalColumnStats]
+    sampling: Optional[SamplingInfo]
 
 
 class PerfomanceMetricResponse(BaseModel):
@@ -98,10 +120,13 @@ class PSIFeatureBreakdown(BaseModel):
         name of the feature
     driftscore:
         driftscore of the feature
+    driftscore_interval:
+        confidence interval of the driftscore of sampled metrics
     """
 
     name: str
     driftscore: float
+    driftscore_interval: Optional[Tuple[float, float]]
 
 
 class PSIMetricResponse(BaseModel):
@@ -112,8 +137,14 @@ class PSIMetricResponse(BaseModel):
     ------------------
     psi:
         psi of the model
+    data_interval:
+        confidence interval of the psi of every time bucket of sampled metrics
+    sampling:
+        sampling of the production rows, None for exact metrics
     """
 
     feat_breakdown: List[PSIFeatureBreakdown]
     data: List[float]
     time_buckets: List[str]
+    data_interval: Optional[List[Optional[Tuple[float, float]]]]
+    sampling: Optional[SamplingInfo]
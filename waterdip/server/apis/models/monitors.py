@@ -16,10 +16,10 @@ from datetime import datetime
 from typing import Dict, List, Optional, Union
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from waterdip.core.commons.models import MonitorSeverity, MonitorType
-from waterdip.core.monitors.models import MonitorCondition
+from waterdip.core.monitors.models import MonitorCondition, MonitorThreshold
 from waterdip.server.db.models.monitors import (
     BaseMonitorCondition,
     MonitorIdentification,
@@ -88,3 +88,88 @@ class MonitorListRow(BaseModel):
 class MonitorListResponse(BaseModel):
     monitor_list: List[MonitorListRow]
     meta: Optional[Dict[str, Union[str, int]]]
+
+
+class MonitorRunRow(BaseModel):
+    """
+    Monitor run list row
+    Attributes:
+    ------------------
+    run_id:
+        id of the run
+    monitor_id:
+        id of the monitor
+    status:
+        SUCCESS or FAILURE
+    started_at:
+        start time of the run
+    duration:
+        duration of the run in seconds
+    rows_scanned:
+        number of rows aggregated by the run
+    violations:
+        number of violations found by the run
+    alerts_sent:
+        number of new alerts raised by the run
+    """
+
+    run_id: str
+    monitor_id: UUID
+    model_id: UUID
+    monitor_type: MonitorType
+    status: str
+    started_at: datetime
+    duration: float
+    rows_scanned: Optional[int]
+    violations: int
+    alerts_sent: int
+    error: Optional[str]
+
+
+class MonitorRunListResponse(BaseModel):
+    run_list: List[MonitorRunRow]
+    meta: Optional[Dict[str, int]]
+
+
+class MonitorBackfillRequest(BaseModel):
+    """
+    Monitor backfill API request
+    Attributes:
+    ------------------
+    monitor_id:
+        id of the monitor
+    days:
+        number of past days the monitor is evaluated for, including today
+    create_alerts:
+        create alerts for the violations found
+    """
+
+    monitor_id: UUID
+    days: int = Field(default=30, ge=1, le=365)
+    create_alerts: bool = Field(default=False)
+
+
+class MonitorBackfillViolation(BaseModel):
+    """
+    Violation found by a backfill evaluation
+    Attributes:
+    ------------------
+    evaluated_at:
+        end of the evaluation window
+    dimension:
+        column that violated the threshold
+    metric_value:
+        value of the metric in the evaluation window
+    threshold:
+        threshold of the monitor
+    """
+
+    evaluated_at: datetime
+    dimension: str
+    metric_value: float
+    threshold: MonitorThreshold
+
+
+class MonitorBackfillResponse(BaseModel):
+    violations: List[MonitorBackfillViolation]
+    alerts_created: int
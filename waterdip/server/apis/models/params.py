@@ -93,3 +93,23 @@ class RequestSort(BaseModel):
             sort_config = self.sort.rsplit("_", 1)
             return sort_config[0]
         return None
+
+
+@dataclass
+class SampleParam:
+    """
+    Query sampling params
+
+    Attributes:
+    ------------------
+    sample_rate:
+        fraction of the rows the metrics are approximated on, exact metrics when
+        not set
+    """
+
+    sample_rate: Optional[float] = Query(
+        default=None,
+        gt=0,
+        le=1,
+        description="Fraction of the rows the metrics are approximated on",
+    )
@@ -0,0 +1,38 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from fastapi import APIRouter
+
+from waterdip.server.apis.models.internal import InternalMetricsResponse
+from waterdip.server.commons.config import settings
+from waterdip.server.db.telemetry import CommandTelemetry
+
+router = APIRouter()
+
+
+@router.get(
+    "/metrics.internal",
+    response_model=InternalMetricsResponse,
+    name="metrics:internal",
+)
+def internal_metrics():
+    """
+    Statistics of the mongo commands sent by this server process
+    """
+    telemetry = CommandTelemetry.get_instance()
+    return InternalMetricsResponse(
+        telemetry_enabled=settings.mongo_telemetry_enabled,
+        slow_command_ms=telemetry.slow_command_ms,
+        commands=telemetry.snapshot(),
+    )
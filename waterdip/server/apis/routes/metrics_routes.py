@@ -18,13 +18,13 @@ from uuid import UUID
 
 from fastapi import APIRouter, Depends
 
-from waterdip.core.commons.models import TimeRange
+from waterdip.core.commons.models import TimeGranularity, TimeRange
 from waterdip.server.apis.models.metrics import (
     DatasetMetricsResponse,
     PerfomanceMetricResponse,
     PSIMetricResponse,
 )
-from waterdip.server.apis.models.params import TimeRangeParam
+from waterdip.server.apis.models.params import SampleParam, TimeRangeParam
 from waterdip.server.services.metrics_service import (
     ClassificationPerformance,
     DatasetMetricsService,
@@ -42,6 +42,8 @@ def model_list(
     model_version_id: UUID,
     dataset_id: UUID,
     time_range_param: TimeRangeParam = Depends(),
+    sample_param: SampleParam = Depends(),
+    refresh_profile: bool = False,
     service: DatasetMetricsService = Depends(DatasetMetricsService.get_instance),
 ):
     time_range = TimeRange(
@@ -53,6 +55,8 @@ def model_list(
         model_version_id=model_version_id,
         dataset_id=dataset_id,
         time_range=time_range,
+        sample_rate=sample_param.sample_rate,
+        refresh_profile=refresh_profile,
     )
 
     return metrics
@@ -67,6 +71,8 @@ def metric_performance(
     model_id: UUID,
     model_version_id: UUID,
     time_range_param: TimeRangeParam = Depends(),
+    granularity: TimeGranularity = TimeGranularity.DAY,
+    timezone: str = "UTC",
     metric_service: ClassificationPerformance = Depends(
         ClassificationPerformance.get_instance
     ),
@@ -79,6 +85,8 @@ def metric_performance(
         model_id=model_id,
         model_version_id=model_version_id,
         time_range=time_range,
+        granularity=granularity,
+        timezone=timezone,
     )
 
 
@@ -91,6 +99,9 @@ def metric_psi(
     model_id: UUID,
     model_version_id: UUID,
     time_range_param: TimeRangeParam = Depends(),
+    sample_param: SampleParam = Depends(),
+    granularity: TimeGranularity = TimeGranularity.DAY,
+    timezone: str = "UTC",
     metric_service: PSIMetricService = Depends(PSIMetricService.get_instance),
 ):
     time_range = TimeRange(
@@ -100,4 +111,7 @@ def metric_psi(
         model_id=model_id,
         model_version_id=model_version_id,
         time_range=time_range,
+        sample_rate=sample_param.sample_rate,
+        granularity=granularity,
+        timezone=timezone,
     )
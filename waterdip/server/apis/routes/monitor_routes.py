@@ -21,9 +21,14 @@ from waterdip.core.commons.models import MonitorType
 from waterdip.server.apis.models.monitors import (
     CreateMonitorRequest,
     CreateMonitorResponse,
+    MonitorBackfillRequest,
+    MonitorBackfillResponse,
     MonitorListResponse,
+    MonitorRunListResponse,
 )
 from waterdip.server.apis.models.params import RequestPagination, RequestSort
+from waterdip.server.services.monitor_backfill_service import MonitorBackfillService
+from waterdip.server.services.monitor_run_service import MonitorRunService
 from waterdip.server.services.monitor_service import MonitorService
 
 router = APIRouter()
@@ -74,6 +79,22 @@ def delete_monitor(
     return service.delete_monitor(monitor_id)
 
 
+@router.post(
+    "/monitor.backfill",
+    response_model=MonitorBackfillResponse,
+    name="monitor:backfill",
+)
+def backfill_monitor(
+    request: MonitorBackfillRequest = Body(..., description="the backfill request"),
+    service: MonitorBackfillService = Depends(MonitorBackfillService.get_instance),
+):
+    return service.backfill_monitor(
+        monitor_id=request.monitor_id,
+        days=request.days,
+        create_alerts=request.create_alerts,
+    )
+
+
 @router.get("/list.monitors", response_model=MonitorListResponse, name="list:monitor")
 def list_monitor(
     pagination: RequestPagination = Depends(),
@@ -97,3 +118,34 @@ def list_monitor(
         },
     )
     return response
+
+
+@router.get(
+    "/list.monitor.runs",
+    response_model=MonitorRunListResponse,
+    name="list:monitor:runs",
+)
+def list_monitor_runs(
+    pagination: RequestPagination = Depends(),
+    sort: RequestSort = Depends(),
+    service: MonitorRunService = Depends(MonitorRunService.get_instance),
+    monitor_id: Optional[UUID] = None,
+    model_id: Optional[UUID] = None,
+):
+    list_runs = service.list_monitor_runs(
+        sort_request=sort,
+        pagination=pagination,
+        monitor_id=monitor_id,
+        model_id=model_id,
+    )
+    response = MonitorRunListResponse(
+        run_list=list_runs,
+        meta={
+            "page": pagination.page,
+            "limit": pagination.limit,
+            "total": service.count_monitor_runs(
+                monitor_id=monitor_id, model_id=model_id
+            ),
+        },
+    )
+    return response
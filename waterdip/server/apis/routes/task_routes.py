@@ -13,14 +13,15 @@
 #  limitations under the License.
 
 from celery.result import AsyncResult
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from starlette.responses import JSONResponse
 
 try:
     from typing import Literal
 except ImportError:
     from typing_extensions import Literal
-from waterdip.processor.tasks.monitors import generate_monitor_jobs
+from waterdip.processor.executors import MonitorExecutor
+from waterdip.server.commons.config import settings
 
 router = APIRouter()
 
@@ -30,14 +31,20 @@ def run_task(
     task_name: Literal["generate_monitor_jobs"] = "generate_monitor_jobs",
 ):
     if task_name == "generate_monitor_jobs":
-        task = generate_monitor_jobs.delay()
+        task_id = MonitorExecutor.get_instance().generate_monitor_jobs()
     else:
         raise NotImplementedError()
-    return JSONResponse({"task_id": task.id})
+    return JSONResponse({"task_id": task_id})
 
 
 @router.get("/task.status", name="task:status")
 def get_status(job_id):
+    # without a result backend celery can not look up the status of a task
+    if not settings.celery_task_results_enabled:
+        raise HTTPException(
+            status_code=501,
+            detail="Task results are disabled, set WD_CELERY_TASK_RESULTS_ENABLED",
+        )
     task_result = AsyncResult(job_id)
     result = {
         "task_id": job_id,
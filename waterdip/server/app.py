@@ -21,14 +21,22 @@ from loguru import logger
 from pydantic import ConfigError
 from starlette.middleware.cors import CORSMiddleware
 from starlette.requests import Request
-from starlette.responses import Response
+from starlette.responses import PlainTextResponse, Response
 from starlette.status import HTTP_500_INTERNAL_SERVER_ERROR
 
 from waterdip import __version__ as wd_version
 from waterdip.server.apis.router import api_router
 from waterdip.server.commons.config import settings
 from waterdip.server.db.mongodb import MongodbBackend
+from waterdip.server.db.telemetry import reset_command_origin, set_command_origin
+from waterdip.utils.instrumentation import (
+    CONTENT_TYPE,
+    HTTP_REQUEST_DURATION,
+    MONITOR_QUEUE_DEPTH,
+    REGISTRY,
+)
 from waterdip.utils.logging import configure_logging
+from waterdip.utils.tracing import Tracer
 
 
 def configure_api_router(app: FastAPI):
@@ -75,15 +83,36 @@ def configure_middleware(app: FastAPI):
         allow_headers=["*"],
     )
 
+    route_names = {}
+
+    def route_name(request: Request) -> str:
+        """Name of the route which handled the request, like log:events"""
+        if not route_names:
+            route_names.update(
+                {
+                    route.endpoint: route.name
+                    for route in app.routes
+                    if hasattr(route, "endpoint")
+                }
+            )
+        return route_names.get(request.scope.get("endpoint"), "unmatched")
+
     @app.middleware("http")
     async def add_process_time_header(request: Request, call_next):
         """
         Middleware to add response time HEADER to the response.
         Every response will have total time taken in millisecond for the API.
         """
+        origin_token = set_command_origin(f"route:{request.url.path}")
+        start_time, status_code = time.time(), HTTP_500_INTERNAL_SERVER_ERROR
         try:
-            start_time = time.time()
-            response = await call_next(request)
+            with Tracer.get_instance().trace(
+                f"route:{request.url.path}", "route", method=request.method
+            ) as route_span:
+                response = await call_next(request)
+                status_code = response.status_code
+                if route_span is not None:
+                    route_span.attributes["status"] = status_code
             process_time = round(round((time.time() - start_time) * 1000, 2))
             response.headers["X-Process-Time"] = str(process_time) + " ms"
             logger.info("{0} took time {1} ms", request.url.path, process_time)
@@ -100,6 +129,51 @@ def configure_middleware(app: FastAPI):
                 ),
                 status_code=HTTP_500_INTERNAL_SERVER_ERROR,
             )
+        finally:
+            reset_command_origin(origin_token)
+            HTTP_REQUEST_DURATION.observe(
+                time.time() - start_time,
+                route=route_name(request),
+                method=request.method,
+                status=status_code,
+            )
+
+
+def configure_instrumentation(app: FastAPI):
+    """
+    Serves the prometheus metrics of the server process at /metrics
+    """
+    if not settings.prometheus_metrics_enabled:
+        return
+
+    from waterdip.processor.executors import MonitorExecutor
+
+    MONITOR_QUEUE_DEPTH.set_function(
+        lambda: MonitorExecutor.get_instance().queue_depth()
+    )
+
+    @app.get("/metrics", include_in_schema=False)
+    def prometheus_metrics():
+        return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+def configure_monitor_scheduler(app: FastAPI):
+    """
+    Configures the embedded monitor scheduler. Only used with the process_pool
+    monitor executor, the celery executor is scheduled by celery beat
+    """
+    if settings.monitor_executor != "process_pool":
+        return
+
+    from waterdip.processor.executors import MonitorExecutor
+    from waterdip.processor.scheduler import MonitorScheduler
+
+    scheduler = MonitorScheduler(
+        executor=MonitorExecutor.get_instance(),
+        interval=settings.monitor_schedule_interval,
+    )
+    app.on_event("startup")(scheduler.start)
+    app.on_event("shutdown")(scheduler.stop)
 
 
 def configure_app_logging(app: FastAPI):
@@ -115,5 +189,11 @@ app = FastAPI(
     openapi_url="/api/docs/spec.json",
 )
 
-for app_configure in [configure_api_router, configure_middleware, configure_database]:
+for app_configure in [
+    configure_api_router,
+    configure_middleware,
+    configure_instrumentation,
+    configure_database,
+    configure_monitor_scheduler,
+]:
     app_configure(app)
@@ -12,7 +12,7 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
-from typing import List
+from typing import List, Literal, Optional
 from urllib.parse import urlparse
 
 from pydantic import BaseSettings
@@ -34,6 +34,107 @@ class ServerSettings(BaseSettings):
     mongo_collection_monitors: str = "wd_monitors"
     mongo_collection_alerts: str = "wd_alerts"
     mongo_collection_integrations: str = "wd_integrations"
+    mongo_collection_monitor_leases: str = "wd_monitor_leases"
+    mongo_collection_baseline_histograms: str = "wd_baseline_histograms"
+    mongo_collection_performance_counts: str = "wd_performance_counts"
+    mongo_collection_monitor_runs: str = "wd_monitor_runs"
+    mongo_collection_column_counts: str = "wd_column_counts"
+    mongo_collection_metric_views: str = "wd_metric_views"
+    mongo_collection_metric_view_watermarks: str = "wd_metric_view_watermarks"
+    mongo_collection_dataset_profiles: str = "wd_dataset_profiles"
+
+    monitor_lease_ttl: int = 900
+    monitor_lease_retention: int = 604800
+    moving_baseline_histogram_retention: int = 172800
+    monitor_run_retention: int = 2592000
+    column_count_retention: int = 7776000
+
+    # evaluate empty value monitors on every event log call from running counters
+    streaming_monitors_enabled: bool = False
+
+    # the hours of confusion counts of performance monitors counted less than
+    # performance_count_grace_period seconds before the end of a run are counted
+    # again by the next run, rows logged late into them are counted
+    performance_count_grace_period: int = 3600
+
+    celery_task_results_enabled: bool = False
+
+    # celery: monitors are queued to the celery worker, scheduled by celery beat
+    # process_pool: monitors run in a process pool scheduled inside the API process
+    monitor_executor: Literal["celery", "process_pool"] = "celery"
+    monitor_executor_workers: Optional[int] = None
+    monitor_executor_max_pending: int = 1000
+    # seconds the length of the celery queue is cached for the queue depth gauge
+    monitor_queue_depth_ttl: float = 5.0
+    monitor_schedule_interval: int = 3600
+
+    # mongo command statistics exposed by /v1/metrics.internal
+    mongo_telemetry_enabled: bool = True
+    mongo_slow_command_ms: int = 500
+    mongo_telemetry_samples: int = 1000
+
+    # prometheus metrics are served by the API at /metrics. Celery worker processes
+    # serve them on worker_metrics_port + the index of the worker process
+    prometheus_metrics_enabled: bool = True
+    worker_metrics_port: Optional[int] = None
+
+    # fraction of the requests and monitor runs traced, traces are appended to
+    # tracing_export_path as one JSON span tree per line
+    tracing_sample_rate: float = 0.0
+    tracing_export_path: str = "waterdip_traces.jsonl"
+
+    # percentiles of the numeric column stats, estimated with quantile sketches
+    # of the given relative error
+    numeric_percentiles: List[float] = [0.5, 0.9, 0.99]
+    quantile_sketch_relative_accuracy: float = 0.01
+
+    # approximate: unique and top values of the categorical column stats come from
+    # HyperLogLog and top-K sketches, with bounded memory per column
+    categorical_cardinality_approximate: bool = False
+    categorical_top_k: int = 10
+    # bins of the categorical histograms and of PSI, the most frequent categories
+    # and an "__other__" bin. All categories are kept when not set
+    categorical_histogram_top_k: Optional[int] = None
+
+    # models with more columns than the threshold are aggregated in column groups,
+    # metric_column_group_workers group pipelines at a time
+    metric_column_group_threshold: int = 200
+    metric_column_group_workers: int = 4
+    metric_column_group_timeout_ms: Optional[int] = None
+
+    # production rows of time ranges of metric_time_partition_min_days or more are
+    # aggregated in "day" or "week" partitions, metric_time_partition_workers at a time
+    metric_time_partition: Optional[str] = "day"
+    metric_time_partition_min_days: int = 28
+    metric_time_partition_workers: int = 4
+    # results of the partitions closed before a run are cached by every process,
+    # the metric_time_partition_cache_size most recent ones for at most
+    # metric_time_partition_cache_ttl seconds, so rows logged late are counted again.
+    # No cache when the size is 0
+    metric_time_partition_cache_size: int = 1024
+    metric_time_partition_cache_ttl: Optional[int] = 3600
+
+    # daily results of the date histograms, confusion counts and prediction counts
+    # are materialized by a celery beat job every metric_view_refresh_interval
+    # seconds, up to metric_view_refresh_lag seconds before the refresh and at most
+    # metric_view_refresh_max_days per refresh. The days covered by the views are
+    # not aggregated from the rows again
+    metric_views_enabled: bool = False
+    metric_view_refresh_interval: int = 3600
+    metric_view_refresh_lag: int = 300
+    metric_view_refresh_max_days: int = 31
+    metric_view_refresh_ttl: int = 900
+
+    # column stats of batch datasets are profiled once, when the batch is logged,
+    # and served from the profile. Batch datasets without a profile are profiled on
+    # their first request
+    batch_dataset_profile_at_log: bool = True
+
+    # v2: event rows are logged in the compact layout, dictionary-encoded columns
+    # and binary uuids. The metrics read both layouts, v1 rows are converted by the
+    # row layout migration in batches of row_migration_batch_size rows
+    event_row_layout: Literal["v1", "v2"] = "v1"
+    row_migration_batch_size: int = 1000
 
     docs_enabled: bool = True
     is_testing: str = "false"
@@ -0,0 +1,54 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from datetime import datetime
+from typing import Dict, Optional, TypeVar
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+
+class BaseBaselineHistogramDB(BaseModel):
+    """
+    Count histograms of a resolved model baseline
+
+    Attributes:
+    ------------------
+    baseline_key:
+        key of the resolved baseline definition. Same baseline dataset or
+        time range of a model version always resolves to the same key
+    model_version_id:
+        model version the baseline belongs to
+    numeric:
+        count histogram of every numeric column
+    categorical:
+        count histogram of every categorical column
+    expires_at:
+        time after which the histograms are removed, None for immutable baselines
+    """
+
+    baseline_key: str = Field(...)
+    model_version_id: UUID = Field(...)
+    numeric: Dict[str, Dict] = Field(default={})
+    categorical: Dict[str, Dict] = Field(default={})
+    created_at: datetime
+    expires_at: Optional[datetime] = Field(default=None)
+
+    def dict(self, *args, **kwargs) -> "DictStrAny":
+        baseline = super().dict(*args, **kwargs)
+        baseline["model_version_id"] = str(baseline["model_version_id"])
+        return baseline
+
+
+BaselineHistogramDB = TypeVar("BaselineHistogramDB", bound=BaseBaselineHistogramDB)
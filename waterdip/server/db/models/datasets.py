@@ -34,7 +34,6 @@ ColumnInfoDB = TypeVar("ColumnInfoDB", bound=BaseColumnInfoDB)
 
 
 class BaseDatasetDB(BaseModel):
-
     dataset_id: UUID = Field(default=None)
     dataset_name: str = Field(default=None)
     created_at: datetime = Field(default=None)
@@ -77,3 +76,37 @@ class BaseDatasetDB(BaseModel):
 
 
 DatasetDB = TypeVar("DatasetDB", bound=BaseDatasetDB)
+
+
+class BaseDatasetProfileDB(BaseModel):
+    """
+    Column stats of a batch dataset, profiled once as batch datasets never change
+
+    Attributes:
+    ------------------
+    dataset_id:
+        profiled batch dataset
+    profiled_at:
+        time of the profiling, profiles are only replaced on explicit request
+    numeric_column_stats:
+        stats of the numeric columns, as served by the dataset metrics
+    categorical_column_stats:
+        stats of the categorical columns, as served by the dataset metrics
+    """
+
+    dataset_id: UUID
+    model_id: UUID
+    model_version_id: UUID
+    profiled_at: datetime
+    numeric_column_stats: List[Dict[str, Any]] = []
+    categorical_column_stats: List[Dict[str, Any]] = []
+
+    def dict(self, *args, **kwargs) -> "DictStrAny":
+        profile = super().dict(*args, **kwargs)
+        profile["dataset_id"] = str(profile["dataset_id"])
+        profile["model_id"] = str(profile["model_id"])
+        profile["model_version_id"] = str(profile["model_version_id"])
+        return profile
+
+
+DatasetProfileDB = TypeVar("DatasetProfileDB", bound=BaseDatasetProfileDB)
@@ -0,0 +1,102 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+
+from datetime import datetime
+from typing import Any, Dict, Optional, TypeVar
+
+from pydantic import BaseModel, Field
+
+from waterdip.core.commons.models import MetricView
+
+
+class BaseMetricViewDB(BaseModel):
+    """
+    Result of a metric for the rows of one day created in [start_time, end_time),
+    stored by a metric view refresh
+
+    Attributes:
+    ------------------
+    view:
+        metric view the result belongs to
+    key:
+        rows the metric is computed on, the event dataset id, the event dataset id
+        and positive class for confusion counts, or the model id for prediction counts
+    day:
+        day of the rows
+    start_time:
+        start of the interval, inclusive
+    end_time:
+        end of the interval, exclusive. Never crosses the end of the day
+    value:
+        result of the metric for the interval
+    """
+
+    view: MetricView = Field(...)
+    key: str = Field(...)
+    day: datetime = Field(...)
+    start_time: datetime = Field(...)
+    end_time: datetime = Field(...)
+    value: Dict[str, Any] = Field(default_factory=dict)
+
+    def dict(self, *args, **kwargs) -> "DictStrAny":
+        view = super().dict(*args, **kwargs)
+        view["view"] = self.view.value
+        return view
+
+
+MetricViewDB = TypeVar("MetricViewDB", bound=BaseMetricViewDB)
+
+
+class BaseMetricViewWatermarkDB(BaseModel):
+    """
+    High-watermark of a metric view, the rows created before the watermark are
+    materialized in the view. A refresh claims the watermark document until it
+    moves the watermark, or until claimed_until
+
+    Attributes:
+    ------------------
+    view:
+        metric view of the watermark
+    key:
+        rows the view is computed on
+    view_start:
+        start of the first materialized day, None before the first refresh
+    watermark:
+        end of the materialized rows, exclusive. None before the first refresh
+    owner:
+        identifier of the job which claimed the last refresh
+    claimed_until:
+        time after which the refresh can be claimed by another job
+    refreshed_at:
+        time of the last completed refresh
+    """
+
+    view: MetricView = Field(...)
+    key: str = Field(...)
+    view_start: Optional[datetime] = Field(default=None)
+    watermark: Optional[datetime] = Field(default=None)
+    owner: Optional[str] = Field(default=None)
+    claimed_until: datetime = Field(...)
+    refreshed_at: Optional[datetime] = Field(default=None)
+
+    def dict(self, *args, **kwargs) -> "DictStrAny":
+        watermark = super().dict(*args, **kwargs)
+        watermark["view"] = self.view.value
+        return watermark
+
+
+MetricViewWatermarkDB = TypeVar(
+    "MetricViewWatermarkDB", bound=BaseMetricViewWatermarkDB
+)
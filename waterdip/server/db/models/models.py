@@ -13,13 +13,14 @@
 #  limitations under the License.
 
 from datetime import datetime
-from typing import Dict, List, Optional, TypeVar, Union
+from typing import Dict, List, Optional, Tuple, TypeVar, Union
 from uuid import UUID
 
 from pydantic import BaseModel, Field, root_validator
 
 from waterdip.core.commons.models import (
     ColumnDataType,
+    ColumnMappingType,
     ModelBaseline,
     ModelBaselineTimeWindow,
     ModelBaselineTimeWindowType,
@@ -62,10 +63,15 @@ class ModelVersionSchemaFieldDetails(BaseModel):
     list_index: int[Optional]:
         index number of the column if multiple prediction columns are present
         This will be used to link between prediction & prediction score, Actual and Actual Score columns
+    bin_edges: List[float][Optional]:
+        histogram bin edges of a numeric column, derived once from the training dataset.
+        Every histogram of the column is computed on these edges
     """
 
     data_type: ColumnDataType
     list_index: Optional[int]
+    # stored with $set by the repository, kept out of the API responses
+    bin_edges: Optional[List[float]] = Field(default=None, exclude=True)
 
 
 class ModelVersionSchemaInDB(BaseModel):
@@ -83,6 +89,31 @@ class ModelVersionSchemaInDB(BaseModel):
     features: Dict[str, ModelVersionSchemaFieldDetails]
     predictions: Dict[str, ModelVersionSchemaFieldDetails]
 
+    def bin_edges(self) -> Dict[str, List[float]]:
+        """Stored histogram bin edges of the feature and prediction columns"""
+        return {
+            name: details.bin_edges
+            for columns in [self.features, self.predictions]
+            for name, details in columns.items()
+            if details.bin_edges
+        }
+
+    def column_dictionary(self) -> List[Tuple[str, str]]:
+        """
+        (name, mapping type) of the columns of the logged rows, by column id of
+        the compact rows. Actuals are logged for the prediction columns. The
+        schema columns never change, so neither do the column ids
+        """
+        return [
+            (name, mapping_type.value)
+            for mapping_type, columns in [
+                (ColumnMappingType.FEATURE, self.features),
+                (ColumnMappingType.PREDICTION, self.predictions),
+                (ColumnMappingType.ACTUAL, self.predictions),
+            ]
+            for name in sorted(columns)
+        ]
+
 
 class BaseModelVersionDB(BaseModel):
     model_version_id: UUID = Field(default=None)
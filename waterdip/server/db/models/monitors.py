@@ -64,3 +64,86 @@ class BaseMonitorDB(BaseModel):
 
 
 MonitorDB = TypeVar("MonitorDB", bound=BaseMonitorDB)
+
+
+class BaseMonitorLeaseDB(BaseModel):
+    """
+    Lease held by a worker while it processes a monitor.
+
+    Attributes:
+    ------------------
+    monitor_id:
+        id of the leased monitor
+    owner:
+        identifier of the worker (task id) holding the lease
+    fence_token:
+        strictly increasing token used to reject writes from stale lease holders
+    acquired_at:
+        time the lease was acquired
+    expires_at:
+        time after which the lease can be taken over by another worker
+    """
+
+    monitor_id: UUID = Field(...)
+    owner: str = Field(...)
+    fence_token: int = Field(...)
+    acquired_at: datetime = Field(...)
+    expires_at: datetime = Field(...)
+
+    def dict(self, *args, **kwargs) -> "DictStrAny":
+        lease = super().dict(*args, **kwargs)
+        lease["monitor_id"] = str(lease["monitor_id"])
+        return lease
+
+
+MonitorLeaseDB = TypeVar("MonitorLeaseDB", bound=BaseMonitorLeaseDB)
+
+
+class BaseMonitorRunDB(BaseModel):
+    """
+    Compact record of a single monitor run.
+
+    Attributes:
+    ------------------
+    run_id:
+        id of the run, the celery task id when run by a worker
+    monitor_id:
+        id of the processed monitor
+    model_id:
+        id of the model of the monitor
+    status:
+        SUCCESS or FAILURE
+    started_at:
+        start time of the run, the run expires monitor_run_retention seconds after
+    duration:
+        duration of the run in seconds
+    rows_scanned:
+        number of rows aggregated by the run, None if not known
+    violations:
+        number of violations found by the run
+    alerts_sent:
+        number of new alerts raised by the run
+    error:
+        error message of a failed run
+    """
+
+    run_id: str = Field(...)
+    monitor_id: UUID = Field(...)
+    model_id: UUID = Field(...)
+    monitor_type: MonitorType = Field(...)
+    status: Literal["SUCCESS", "FAILURE"] = Field(...)
+    started_at: datetime = Field(...)
+    duration: float = Field(...)
+    rows_scanned: Optional[int] = Field(default=None)
+    violations: int = Field(default=0)
+    alerts_sent: int = Field(default=0)
+    error: Optional[str] = Field(default=None)
+
+    def dict(self, *args, **kwargs) -> "DictStrAny":
+        run = super().dict(*args, **kwargs)
+        run["monitor_id"] = str(run["monitor_id"])
+        run["model_id"] = str(run["model_id"])
+        return run
+
+
+MonitorRunDB = TypeVar("MonitorRunDB", bound=BaseMonitorRunDB)
@@ -0,0 +1,58 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from datetime import datetime
+from typing import TypeVar
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+
+class BasePerformanceCountDB(BaseModel):
+    """
+    Confusion counts of the event rows of one day created in [start_time, end_time)
+
+    Attributes:
+    ------------------
+    dataset_id:
+        event dataset the rows belong to
+    positive_class:
+        positive class the confusion counts are computed for
+    day:
+        day of the counted rows
+    start_time:
+        start of the counted interval, inclusive
+    end_time:
+        end of the counted interval, exclusive. Never crosses the end of the day
+    """
+
+    dataset_id: UUID = Field(...)
+    positive_class: str = Field(...)
+    day: datetime = Field(...)
+    start_time: datetime = Field(...)
+    end_time: datetime = Field(...)
+    total: int = Field(default=0)
+    is_match: int = Field(default=0)
+    true_positive: int = Field(default=0)
+    false_negative: int = Field(default=0)
+    true_negative: int = Field(default=0)
+    false_positive: int = Field(default=0)
+
+    def dict(self, *args, **kwargs) -> "DictStrAny":
+        counts = super().dict(*args, **kwargs)
+        counts["dataset_id"] = str(counts["dataset_id"])
+        return counts
+
+
+PerformanceCountDB = TypeVar("PerformanceCountDB", bound=BasePerformanceCountDB)
@@ -17,6 +17,7 @@ from pymongo import MongoClient
 from pymongo.database import Database
 
 from waterdip.server.commons.config import settings
+from waterdip.server.db.telemetry import CommandTelemetry
 
 MONGO_COLLECTION_MODELS = settings.mongo_collection_models
 MONGO_COLLECTION_MODEL_VERSIONS = settings.mongo_collection_model_versions
@@ -26,6 +27,16 @@ MONGO_COLLECTION_EVENT_ROWS = settings.mongo_collection_event_rows
 MONGO_COLLECTION_MONITORS = settings.mongo_collection_monitors
 MONGO_COLLECTION_ALERTS = settings.mongo_collection_alerts
 MONGO_COLLECTION_INTEGRATIONS = settings.mongo_collection_integrations
+MONGO_COLLECTION_MONITOR_LEASES = settings.mongo_collection_monitor_leases
+MONGO_COLLECTION_BASELINE_HISTOGRAMS = settings.mongo_collection_baseline_histograms
+MONGO_COLLECTION_PERFORMANCE_COUNTS = settings.mongo_collection_performance_counts
+MONGO_COLLECTION_MONITOR_RUNS = settings.mongo_collection_monitor_runs
+MONGO_COLLECTION_COLUMN_COUNTS = settings.mongo_collection_column_counts
+MONGO_COLLECTION_METRIC_VIEWS = settings.mongo_collection_metric_views
+MONGO_COLLECTION_METRIC_VIEW_WATERMARKS = (
+    settings.mongo_collection_metric_view_watermarks
+)
+MONGO_COLLECTION_DATASET_PROFILES = settings.mongo_collection_dataset_profiles
 
 
 class MongodbBackend:
@@ -34,7 +45,12 @@ class MongodbBackend:
     @classmethod
     def get_instance(cls):
         if cls._INSTANCE is None:
-            mongo_client = MongoClient(settings.mongo_url)
+            mongo_client = MongoClient(
+                settings.mongo_url,
+                event_listeners=[CommandTelemetry.get_instance()]
+                if settings.mongo_telemetry_enabled
+                else [],
+            )
             cls._INSTANCE = cls(
                 mongo_client=mongo_client, mongo_database=settings.mongo_database
             )
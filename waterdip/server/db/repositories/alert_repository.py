@@ -12,10 +12,12 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+from datetime import datetime, time, timedelta
 from typing import Dict, List, Optional
 from uuid import UUID
 
 from fastapi import Depends
+from pymongo import UpdateOne
 
 from waterdip.server.apis.models.models import ModelOverviewAlertList
 from waterdip.server.db.models.alerts import AlertDB, BaseAlertDB
@@ -36,6 +38,12 @@ class AlertRepository:
 
     def __init__(self, mongodb: MongodbBackend):
         self._mongo = mongodb
+        self._create_indexes()
+
+    def _create_indexes(self):
+        self._mongo.database[MONGO_COLLECTION_ALERTS].create_index(
+            [("model_id", 1), ("created_at", -1)]
+        )
 
     def insert_alert(self, alert: BaseAlertDB) -> AlertDB:
         """
@@ -51,6 +59,69 @@ class AlertRepository:
 
         return BaseAlertDB(**created_alert)
 
+    def insert_alerts(self, alerts: List[BaseAlertDB]) -> int:
+        """
+        Insert alerts into the database in bulk, returns the number of inserted alerts
+        """
+        if not alerts:
+            return 0
+        inserted = self._mongo.database[MONGO_COLLECTION_ALERTS].insert_many(
+            [alert.dict() for alert in alerts]
+        )
+        return len(inserted.inserted_ids)
+
+    def upsert_backfill_alerts(self, alerts: List[BaseAlertDB]) -> int:
+        """
+        Insert backfilled alerts, at most one per monitor, violation field and
+        evaluated day. The alerts of a day backfilled again are updated with the
+        latest evaluation. Returns the number of inserted alerts
+        """
+        if not alerts:
+            return 0
+        requests = []
+        for alert in alerts:
+            document = alert.dict()
+            violation = document.pop("violation")
+            evaluated_at: datetime = violation["evaluated_at"]
+            # evaluations of a day end at the end of the day, or earlier for
+            # the current day
+            day_end = datetime.combine(evaluated_at.date(), time.min)
+            if day_end < evaluated_at:
+                day_end += timedelta(days=1)
+            latest = {
+                "created_at": document.pop("created_at"),
+                "violation.evaluated_at": evaluated_at,
+                "violation.focal_value": violation["focal_value"],
+            }
+            requests.append(
+                UpdateOne(
+                    {
+                        "monitor_id": document["monitor_id"],
+                        "violation.field": violation["field"],
+                        "violation.evaluated_at": {
+                            "$gt": day_end - timedelta(days=1),
+                            "$lte": day_end,
+                        },
+                    },
+                    {
+                        "$set": latest,
+                        "$setOnInsert": {
+                            **document,
+                            **{
+                                f"violation.{name}": value
+                                for name, value in violation.items()
+                                if f"violation.{name}" not in latest
+                            },
+                        },
+                    },
+                    upsert=True,
+                )
+            )
+        result = self._mongo.database[MONGO_COLLECTION_ALERTS].bulk_write(
+            requests, ordered=False
+        )
+        return result.upserted_count
+
     def count_alerts(self, filters: Dict) -> int:
         """
         Count the number of alerts in the database based on the filters
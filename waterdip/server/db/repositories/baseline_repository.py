@@ -0,0 +1,74 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from typing import Optional
+
+from fastapi import Depends
+
+from waterdip.server.db.models.baselines import (
+    BaseBaselineHistogramDB,
+    BaselineHistogramDB,
+)
+from waterdip.server.db.mongodb import (
+    MONGO_COLLECTION_BASELINE_HISTOGRAMS,
+    MongodbBackend,
+)
+
+
+class BaselineHistogramRepository:
+    _INSTANCE = None
+
+    @classmethod
+    def get_instance(
+        cls, mongodb: MongodbBackend = Depends(MongodbBackend.get_instance)
+    ):
+        if cls._INSTANCE is None:
+            cls._INSTANCE = cls(mongodb=mongodb)
+        return cls._INSTANCE
+
+    def __init__(self, mongodb: MongodbBackend):
+        self._mongo = mongodb
+        collection = self._mongo.database[MONGO_COLLECTION_BASELINE_HISTOGRAMS]
+        collection.create_index("baseline_key", unique=True)
+        collection.create_index("expires_at", expireAfterSeconds=0)
+
+    def find_baseline_histogram(
+        self, baseline_key: str
+    ) -> Optional[BaselineHistogramDB]:
+        """
+        Find the cached histograms of a baseline
+        """
+        baseline = self._mongo.database[MONGO_COLLECTION_BASELINE_HISTOGRAMS].find_one(
+            {"baseline_key": baseline_key}
+        )
+        return BaseBaselineHistogramDB(**baseline) if baseline else None
+
+    def save_baseline_histogram(
+        self, baseline: BaseBaselineHistogramDB
+    ) -> BaselineHistogramDB:
+        """
+        Insert or replace the cached histograms of a baseline
+        """
+        self._mongo.database[MONGO_COLLECTION_BASELINE_HISTOGRAMS].replace_one(
+            {"baseline_key": baseline.baseline_key}, baseline.dict(), upsert=True
+        )
+        return baseline
+
+    def delete_baseline_histograms_by_model_version_id(self, model_version_id: str):
+        """
+        Delete the cached histograms of a model version
+        """
+        return self._mongo.database[MONGO_COLLECTION_BASELINE_HISTOGRAMS].delete_many(
+            {"model_version_id": model_version_id}
+        )
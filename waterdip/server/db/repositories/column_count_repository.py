@@ -0,0 +1,83 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from datetime import datetime
+from typing import Dict, Tuple
+from uuid import UUID
+
+from fastapi import Depends
+from pymongo import UpdateOne
+from pymongo.collection import Collection
+
+from waterdip.server.commons.config import settings
+from waterdip.server.db.mongodb import MONGO_COLLECTION_COLUMN_COUNTS, MongodbBackend
+
+
+class ColumnCountRepository:
+    """
+    Running hourly counters of the event rows of each column.
+    A counter document holds empty_count and total_count of one column for
+    the rows created in one hour
+    """
+
+    _INSTANCE = None
+
+    @classmethod
+    def get_instance(
+        cls, mongodb: MongodbBackend = Depends(MongodbBackend.get_instance)
+    ):
+        if cls._INSTANCE is None:
+            cls._INSTANCE = cls(mongodb=mongodb)
+        return cls._INSTANCE
+
+    def __init__(self, mongodb: MongodbBackend):
+        self._mongo = mongodb
+        # the hour comes before the column, reads match a dataset and an hour
+        # range with or without a list of columns
+        self.collection.create_index(
+            [("dataset_id", 1), ("hour", 1), ("column_name", 1)], unique=True
+        )
+        self.collection.create_index(
+            "hour", expireAfterSeconds=settings.column_count_retention
+        )
+
+    @property
+    def collection(self) -> Collection:
+        return self._mongo.database[MONGO_COLLECTION_COLUMN_COUNTS]
+
+    def increment_counts(
+        self, dataset_id: UUID, counts: Dict[Tuple[str, datetime], Tuple[int, int]]
+    ) -> int:
+        """
+        Add (empty_count, total_count) to the counters keyed by (column_name, hour)
+        Returns the number of updated counters
+        """
+        if not counts:
+            return 0
+        self.collection.bulk_write(
+            [
+                UpdateOne(
+                    {
+                        "dataset_id": str(dataset_id),
+                        "column_name": column_name,
+                        "hour": hour,
+                    },
+                    {"$inc": {"empty_count": empty, "total_count": total}},
+                    upsert=True,
+                )
+                for (column_name, hour), (empty, total) in counts.items()
+            ],
+            ordered=False,
+        )
+        return len(counts)
@@ -12,16 +12,25 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
-from typing import Dict, List
+from typing import Dict, List, Optional
+from uuid import UUID
 
 from fastapi import Depends
 
-from waterdip.server.db.models.datasets import BaseDatasetDB, DatasetDB
-from waterdip.server.db.mongodb import MONGO_COLLECTION_DATASETS, MongodbBackend
+from waterdip.server.db.models.datasets import (
+    BaseDatasetDB,
+    BaseDatasetProfileDB,
+    DatasetDB,
+    DatasetProfileDB,
+)
+from waterdip.server.db.mongodb import (
+    MONGO_COLLECTION_DATASET_PROFILES,
+    MONGO_COLLECTION_DATASETS,
+    MongodbBackend,
+)
 
 
 class DatasetRepository:
-
     _INSTANCE = None
 
     @classmethod
@@ -72,3 +81,26 @@ class DatasetRepository:
         self._mongo.database[MONGO_COLLECTION_DATASETS].delete_many(
             filter={"model_id": model_id}
         )
+        self._mongo.database[MONGO_COLLECTION_DATASET_PROFILES].delete_many(
+            filter={"model_id": model_id}
+        )
+
+    def find_profile(self, dataset_id: UUID) -> Optional[DatasetProfileDB]:
+        profile = self._mongo.database[MONGO_COLLECTION_DATASET_PROFILES].find_one(
+            {"dataset_id": str(dataset_id)}
+        )
+        return BaseDatasetProfileDB(**profile) if profile is not None else None
+
+    def save_profile(self, profile: DatasetProfileDB) -> DatasetProfileDB:
+        """Store the profile of a dataset, replacing the previous one"""
+        self._mongo.database[MONGO_COLLECTION_DATASET_PROFILES].replace_one(
+            {"dataset_id": str(profile.dataset_id)}, profile.dict(), upsert=True
+        )
+        return profile
+
+    def delete_profiles(self, model_version_id: UUID) -> int:
+        """Drop the profiles of the datasets of a model version"""
+        result = self._mongo.database[MONGO_COLLECTION_DATASET_PROFILES].delete_many(
+            {"model_version_id": str(model_version_id)}
+        )
+        return result.deleted_count
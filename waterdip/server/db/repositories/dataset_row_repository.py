@@ -13,13 +13,15 @@
 #  limitations under the License.
 
 from datetime import datetime
-from typing import Dict, List
-
+from typing import Dict, List, Optional
 
 from fastapi import Depends
 from pymongo.collection import Collection
 
+from waterdip.core.metrics.rows import RowReader, compact_row
+from waterdip.server.commons.config import settings
 from waterdip.server.db.models.dataset_rows import BaseDatasetBatchRowDB, BaseEventRowDB
+from waterdip.server.db.models.models import ModelVersionSchemaInDB
 from waterdip.server.db.mongodb import (
     MONGO_COLLECTION_BATCH_ROWS,
     MONGO_COLLECTION_EVENT_ROWS,
@@ -41,31 +43,65 @@ class EventDatasetRowRepository:
 
     def __init__(self, mongodb: MongodbBackend):
         self._mongo = mongodb
+        self._create_indexes()
+
+    def _create_indexes(self):
+        # metrics match on the dataset, the model overview on the model, both by time
+        self.collection.create_index([("dataset_id", 1), ("created_at", 1)])
+        self.collection.create_index([("model_id", 1), ("created_at", 1)])
 
     @property
     def collection(self) -> Collection:
         return self._mongo.database[MONGO_COLLECTION_EVENT_ROWS]
 
-    def insert_rows(self, rows: List[BaseEventRowDB]):
+    def row_reader(
+        self, version_schema: Optional[ModelVersionSchemaInDB] = None
+    ) -> RowReader:
+        """
+        Reader of the event rows. With the v2 layout the rows may be compact, their
+        columns are decoded with the column dictionary of the model version
+        """
+        return RowReader(
+            compact=settings.event_row_layout == "v2",
+            column_dictionary=version_schema.column_dictionary()
+            if version_schema is not None
+            else None,
+        )
+
+    def insert_rows(
+        self,
+        rows: List[BaseEventRowDB],
+        version_schema: Optional[ModelVersionSchemaInDB] = None,
+    ):
+        """Insert the rows, compact with the v2 layout, which needs the schema"""
+        documents = [row.dict() for row in rows]
+        if settings.event_row_layout == "v2":
+            column_dictionary = version_schema.column_dictionary()
+            documents = [
+                compact_row(document, column_dictionary=column_dictionary)
+                for document in documents
+            ]
         created_rows = self._mongo.database[MONGO_COLLECTION_EVENT_ROWS].insert_many(
-            [row.dict() for row in rows]
+            documents
         )
         return created_rows.inserted_ids
 
     def count_prediction_by_model_id(self, model_id: str):
         return self._mongo.database[MONGO_COLLECTION_EVENT_ROWS].count_documents(
-            {"model_id": model_id}
+            {"model_id": self.row_reader().id_value(model_id)}
         )
 
     def find_last_prediction_date(self, model_id: str):
         last_row = self._mongo.database[MONGO_COLLECTION_EVENT_ROWS].find_one(
-            {"model_id": model_id}, sort=[("created_at", -1)]
+            {"model_id": self.row_reader().id_value(model_id)},
+            sort=[("created_at", -1)],
         )
         return last_row["created_at"] if last_row else None
 
     def find_first_prediction_date(self, model_id: str) -> datetime:
         first_pred = self._mongo.database[MONGO_COLLECTION_EVENT_ROWS].find_one(
-            {"model_id": model_id}, sort=[("created_at", 1)]
+            {"model_id": self.row_reader().id_value(model_id)},
+            sort=[("created_at", 1)],
         )
         return first_pred["created_at"] if first_pred else None
 
@@ -81,7 +117,7 @@ class EventDatasetRowRepository:
 
     def delete_rows_by_model_id(self, model_id: str):
         return self._mongo.database[MONGO_COLLECTION_EVENT_ROWS].delete_many(
-            {"model_id": model_id}
+            {"model_id": self.row_reader().id_value(model_id)}
         )
 
 
@@ -99,6 +135,10 @@ class BatchDatasetRowRepository:
 
     def __init__(self, mongodb: MongodbBackend):
         self._mongo = mongodb
+        self._create_indexes()
+
+    def _create_indexes(self):
+        self.collection.create_index("dataset_id")
 
     @property
     def collection(self) -> Collection:
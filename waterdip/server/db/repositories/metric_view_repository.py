@@ -0,0 +1,211 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from uuid import UUID
+
+import pymongo
+from fastapi import Depends
+from pymongo.errors import DuplicateKeyError
+
+from waterdip.core.commons.models import MetricView, TimeRange
+from waterdip.core.metrics.views import VIEW_COMBINE, MaterializedView
+from waterdip.server.commons.config import settings
+from waterdip.server.db.models.metric_views import (
+    BaseMetricViewWatermarkDB,
+    MetricViewDB,
+    MetricViewWatermarkDB,
+)
+from waterdip.server.db.mongodb import (
+    MONGO_COLLECTION_METRIC_VIEW_WATERMARKS,
+    MONGO_COLLECTION_METRIC_VIEWS,
+    MongodbBackend,
+)
+
+
+class MetricViewRepository:
+    """
+    Metric view repository keeps the day results materialized by the metric view
+    refresh jobs, and one watermark document per view.
+
+    A refresh claims the watermark document with a single find_one_and_update,
+    a view without a watermark document gets one upserted against a unique index
+    on view and key. The claiming job stores the results of the rows created
+    since the watermark and moves the watermark, so the results of a view are
+    contiguous intervals from the view start up to the watermark.
+    """
+
+    _INSTANCE = None
+
+    @classmethod
+    def get_instance(
+        cls, mongodb: MongodbBackend = Depends(MongodbBackend.get_instance)
+    ):
+        if cls._INSTANCE is None:
+            cls._INSTANCE = cls(mongodb=mongodb)
+        return cls._INSTANCE
+
+    def __init__(self, mongodb: MongodbBackend):
+        self._mongo = mongodb
+        self._create_indexes()
+
+    def _create_indexes(self):
+        self._mongo.database[MONGO_COLLECTION_METRIC_VIEWS].create_index(
+            [("view", 1), ("key", 1), ("day", 1)]
+        )
+        self._mongo.database[MONGO_COLLECTION_METRIC_VIEW_WATERMARKS].create_index(
+            [("view", 1), ("key", 1)], unique=True
+        )
+
+    @staticmethod
+    def classification_key(dataset_id: UUID, positive_class: str) -> str:
+        """Key of the confusion counts view of an event dataset for a positive class"""
+        return f"{dataset_id}:{positive_class}"
+
+    def find_watermark(
+        self, view: MetricView, key: str
+    ) -> Optional[MetricViewWatermarkDB]:
+        watermark = self._mongo.database[
+            MONGO_COLLECTION_METRIC_VIEW_WATERMARKS
+        ].find_one({"view": view.value, "key": key})
+        return BaseMetricViewWatermarkDB(**watermark) if watermark else None
+
+    def claim_refresh(
+        self, view: MetricView, key: str, owner: str, ttl: int = None
+    ) -> Optional[MetricViewWatermarkDB]:
+        """
+        Claim the refresh of a view for ttl seconds.
+        Returns None if another job holds a claim which has not expired yet
+        """
+        claimed_at = datetime.utcnow()
+        claimed_until = claimed_at + timedelta(
+            seconds=ttl if ttl is not None else settings.metric_view_refresh_ttl
+        )
+        try:
+            watermark = self._mongo.database[
+                MONGO_COLLECTION_METRIC_VIEW_WATERMARKS
+            ].find_one_and_update(
+                {
+                    "view": view.value,
+                    "key": key,
+                    "claimed_until": {"$lte": claimed_at},
+                },
+                {"$set": {"owner": owner, "claimed_until": claimed_until}},
+                upsert=True,
+                return_document=pymongo.ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            return None
+        return BaseMetricViewWatermarkDB(**watermark)
+
+    def complete_refresh(
+        self,
+        claim: MetricViewWatermarkDB,
+        views: List[MetricViewDB],
+        view_start: datetime,
+        watermark: datetime,
+    ) -> bool:
+        """
+        Store the results of a claimed refresh and move the watermark. Results
+        left after the watermark by a failed refresh are replaced.
+        Returns False, without storing the results, if the claim expired and was
+        taken over by another job
+        """
+        filters = {"view": claim.view.value, "key": claim.key}
+        # the claim is renewed before the results are written
+        claimed_until = datetime.utcnow() + timedelta(
+            seconds=settings.metric_view_refresh_ttl
+        )
+        renewed = self._mongo.database[
+            MONGO_COLLECTION_METRIC_VIEW_WATERMARKS
+        ].update_one(
+            {**filters, "owner": claim.owner, "claimed_until": claim.claimed_until},
+            {"$set": {"claimed_until": claimed_until}},
+        )
+        if renewed.matched_count != 1:
+            return False
+
+        if claim.watermark is not None:
+            self._mongo.database[MONGO_COLLECTION_METRIC_VIEWS].delete_many(
+                {**filters, "start_time": {"$gte": claim.watermark}}
+            )
+        if views:
+            self._mongo.database[MONGO_COLLECTION_METRIC_VIEWS].insert_many(
+                documents=[view.dict() for view in views]
+            )
+        now = datetime.utcnow()
+        result = self._mongo.database[
+            MONGO_COLLECTION_METRIC_VIEW_WATERMARKS
+        ].update_one(
+            {**filters, "owner": claim.owner},
+            {
+                "$set": {
+                    "view_start": view_start,
+                    "watermark": watermark,
+                    "claimed_until": now,
+                    "refreshed_at": now,
+                }
+            },
+        )
+        return result.matched_count == 1
+
+    def release_refresh(self, claim: MetricViewWatermarkDB) -> bool:
+        """Release the claim of a refresh without moving the watermark"""
+        result = self._mongo.database[
+            MONGO_COLLECTION_METRIC_VIEW_WATERMARKS
+        ].update_one(
+            {
+                "view": claim.view.value,
+                "key": claim.key,
+                "owner": claim.owner,
+                "claimed_until": claim.claimed_until,
+            },
+            {"$set": {"claimed_until": datetime.utcnow()}},
+        )
+        return result.matched_count == 1
+
+    def read_view(
+        self, view: MetricView, key: str, time_range: TimeRange
+    ) -> Optional[MaterializedView]:
+        """
+        Day results of the view for the part of the time range it covers, the
+        results of the intervals of the same day are combined.
+        None if the view covers no whole day of the time range
+        """
+        watermark = self.find_watermark(view=view, key=key)
+        if watermark is None or watermark.watermark is None:
+            return None
+        window = MaterializedView.window(
+            time_range, view_start=watermark.view_start, watermark=watermark.watermark
+        )
+        if window is None:
+            return None
+        start_time, end_time = window
+
+        combine = VIEW_COMBINE[view]
+        days: Dict[datetime, Dict] = {}
+        for interval in self._mongo.database[MONGO_COLLECTION_METRIC_VIEWS].find(
+            {
+                "view": view.value,
+                "key": key,
+                "day": {"$gte": start_time},
+                "end_time": {"$lte": end_time},
+            }
+        ):
+            days[interval["day"]] = combine(
+                days.get(interval["day"], {}), interval["value"]
+            )
+        return MaterializedView(start_time=start_time, end_time=end_time, days=days)
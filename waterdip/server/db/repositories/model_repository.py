@@ -142,6 +142,23 @@ class ModelVersionRepository:
 
         return BaseModelVersionDB(**result)
 
+    def update_bin_edges(
+        self, model_version_id: UUID, bin_edges: Dict[str, Dict[str, List[float]]]
+    ) -> None:
+        """
+        Store histogram bin edges in the version schema.
+        bin_edges is keyed by the schema mapping (features or predictions), then by column
+        """
+        updates = {
+            f"version_schema.{mapping}.{column}.bin_edges": edges
+            for mapping, columns in bin_edges.items()
+            for column, edges in columns.items()
+        }
+        if updates:
+            self._mongo.database[MONGO_COLLECTION_MODEL_VERSIONS].update_one(
+                {"model_version_id": str(model_version_id)}, {"$set": updates}
+            )
+
     def find_versions(self, version_filters: Dict) -> List[ModelVersionDB]:
         versions = (
             self._mongo.database[MONGO_COLLECTION_MODEL_VERSIONS]
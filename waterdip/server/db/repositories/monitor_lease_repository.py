@@ -0,0 +1,123 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID
+
+import pymongo
+from fastapi import Depends
+from pymongo.errors import DuplicateKeyError
+
+from waterdip.server.commons.config import settings
+from waterdip.server.db.models.monitors import BaseMonitorLeaseDB, MonitorLeaseDB
+from waterdip.server.db.mongodb import MONGO_COLLECTION_MONITOR_LEASES, MongodbBackend
+
+
+class MonitorLeaseRepository:
+    """
+    Monitor lease repository keeps one lease document per monitor.
+
+    A lease is acquired atomically: an expired lease is taken over with a single
+    find_one_and_update, and a monitor without a lease document gets one inserted
+    against a unique index on monitor_id. Lease documents are kept after release so
+    the fence token keeps increasing, and a TTL index removes leases of monitors
+    that have not run for the configured retention period.
+    """
+
+    _INSTANCE = None
+
+    @classmethod
+    def get_instance(
+        cls, mongodb: MongodbBackend = Depends(MongodbBackend.get_instance)
+    ):
+        if cls._INSTANCE is None:
+            cls._INSTANCE = cls(mongodb=mongodb)
+        return cls._INSTANCE
+
+    def __init__(self, mongodb: MongodbBackend):
+        self._mongo = mongodb
+        self._create_indexes()
+
+    def _create_indexes(self):
+        collection = self._mongo.database[MONGO_COLLECTION_MONITOR_LEASES]
+        collection.create_index("monitor_id", unique=True)
+        collection.create_index(
+            "expires_at", expireAfterSeconds=settings.monitor_lease_retention
+        )
+
+    def acquire_lease(
+        self, monitor_id: UUID, owner: str, ttl: int = None
+    ) -> Optional[MonitorLeaseDB]:
+        """
+        Acquire the lease of a monitor for ttl seconds.
+        Returns None if another worker holds a lease which has not expired yet
+        """
+        collection = self._mongo.database[MONGO_COLLECTION_MONITOR_LEASES]
+        acquired_at = datetime.utcnow()
+        expires_at = acquired_at + timedelta(
+            seconds=ttl if ttl is not None else settings.monitor_lease_ttl
+        )
+
+        lease = collection.find_one_and_update(
+            {"monitor_id": str(monitor_id), "expires_at": {"$lte": acquired_at}},
+            {
+                "$set": {
+                    "owner": owner,
+                    "acquired_at": acquired_at,
+                    "expires_at": expires_at,
+                },
+                "$inc": {"fence_token": 1},
+            },
+            return_document=pymongo.ReturnDocument.AFTER,
+        )
+        if lease is not None:
+            return BaseMonitorLeaseDB(**lease)
+
+        # The first lease of a monitor seeds the fence token from the clock, so it stays
+        # above the tokens of an older lease document removed by the TTL index
+        new_lease = BaseMonitorLeaseDB(
+            monitor_id=monitor_id,
+            owner=owner,
+            fence_token=int(acquired_at.timestamp() * 1000),
+            acquired_at=acquired_at,
+            expires_at=expires_at,
+        )
+        try:
+            collection.insert_one(document=new_lease.dict())
+        except DuplicateKeyError:
+            return None
+
+        return new_lease
+
+    def release_lease(self, lease: BaseMonitorLeaseDB) -> bool:
+        """
+        Release the lease if it is still held by the same owner.
+        The lease document is expired instead of deleted to keep its fence token
+        """
+        result = self._mongo.database[MONGO_COLLECTION_MONITOR_LEASES].update_one(
+            {
+                "monitor_id": str(lease.monitor_id),
+                "owner": lease.owner,
+                "fence_token": lease.fence_token,
+            },
+            {"$set": {"expires_at": datetime.utcnow()}},
+        )
+        return result.modified_count == 1
+
+    def find_lease(self, monitor_id: UUID) -> Optional[MonitorLeaseDB]:
+        lease = self._mongo.database[MONGO_COLLECTION_MONITOR_LEASES].find_one(
+            {"monitor_id": str(monitor_id)}
+        )
+        return BaseMonitorLeaseDB(**lease) if lease else None
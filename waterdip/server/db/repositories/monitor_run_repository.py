@@ -0,0 +1,77 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from typing import Dict, List
+
+from fastapi import Depends
+
+from waterdip.server.commons.config import settings
+from waterdip.server.db.models.monitors import BaseMonitorRunDB, MonitorRunDB
+from waterdip.server.db.mongodb import MONGO_COLLECTION_MONITOR_RUNS, MongodbBackend
+
+
+class MonitorRunRepository:
+    _INSTANCE = None
+
+    @classmethod
+    def get_instance(
+        cls, mongodb: MongodbBackend = Depends(MongodbBackend.get_instance)
+    ):
+        if cls._INSTANCE is None:
+            cls._INSTANCE = cls(mongodb=mongodb)
+        return cls._INSTANCE
+
+    def __init__(self, mongodb: MongodbBackend):
+        self._mongo = mongodb
+        collection = self._mongo.database[MONGO_COLLECTION_MONITOR_RUNS]
+        collection.create_index([("monitor_id", 1), ("started_at", -1)])
+        collection.create_index(
+            "started_at", expireAfterSeconds=settings.monitor_run_retention
+        )
+
+    def insert_run(self, run: BaseMonitorRunDB) -> MonitorRunDB:
+        """
+        Insert the record of a monitor run
+        """
+        self._mongo.database[MONGO_COLLECTION_MONITOR_RUNS].insert_one(
+            document=run.dict()
+        )
+        return run
+
+    def find_runs(
+        self,
+        filters: Dict,
+        sort: List = None,
+        skip: int = 0,
+        limit: int = 10,
+    ) -> List[MonitorRunDB]:
+        """
+        Find monitor runs based on the filters, latest runs first by default
+        """
+        result = (
+            self._mongo.database[MONGO_COLLECTION_MONITOR_RUNS]
+            .find(filters)
+            .sort(sort if sort else [("started_at", -1)])
+            .skip(skip)
+            .limit(limit)
+        )
+        return [BaseMonitorRunDB(**run) for run in result]
+
+    def count_runs(self, filters: Dict) -> int:
+        """
+        Count monitor runs based on the filters
+        """
+        return self._mongo.database[MONGO_COLLECTION_MONITOR_RUNS].count_documents(
+            filters
+        )
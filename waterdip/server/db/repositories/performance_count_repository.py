@@ -0,0 +1,197 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from datetime import datetime
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from fastapi import Depends
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError
+
+from waterdip.core.commons.models import TimeRange
+from waterdip.server.db.models.performance_counts import PerformanceCountDB
+from waterdip.server.db.mongodb import (
+    MONGO_COLLECTION_PERFORMANCE_COUNTS,
+    MongodbBackend,
+)
+
+COUNT_FIELDS = [
+    "total",
+    "is_match",
+    "true_positive",
+    "false_negative",
+    "true_negative",
+    "false_positive",
+]
+
+
+class PerformanceCountRepository:
+    _INSTANCE = None
+
+    @classmethod
+    def get_instance(
+        cls, mongodb: MongodbBackend = Depends(MongodbBackend.get_instance)
+    ):
+        if cls._INSTANCE is None:
+            cls._INSTANCE = cls(mongodb=mongodb)
+        return cls._INSTANCE
+
+    def __init__(self, mongodb: MongodbBackend):
+        self._mongo = mongodb
+        # A counted interval is identified by its start, workers counting the
+        # same interval concurrently can only store it once
+        self._mongo.database[MONGO_COLLECTION_PERFORMANCE_COUNTS].create_index(
+            [("dataset_id", 1), ("positive_class", 1), ("start_time", 1)],
+            unique=True,
+        )
+
+    def find_counted_range(
+        self, dataset_id: UUID, positive_class: str
+    ) -> Optional[TimeRange]:
+        """
+        Time range covered by the stored counts of the dataset
+        """
+        result = list(
+            self._mongo.database[MONGO_COLLECTION_PERFORMANCE_COUNTS].aggregate(
+                [
+                    {
+                        "$match": {
+                            "dataset_id": str(dataset_id),
+                            "positive_class": positive_class,
+                        }
+                    },
+                    {
+                        "$group": {
+                            "_id": None,
+                            "start_time": {"$min": "$start_time"},
+                            "end_time": {"$max": "$end_time"},
+                        }
+                    },
+                ]
+            )
+        )
+        if not result or result[0]["start_time"] is None:
+            return None
+        return TimeRange(
+            start_time=result[0]["start_time"], end_time=result[0]["end_time"]
+        )
+
+    def insert_counts(self, counts: List[PerformanceCountDB]) -> int:
+        """
+        Insert counted intervals. Intervals already stored by another run are skipped
+        """
+        if not counts:
+            return 0
+        try:
+            result = self._mongo.database[
+                MONGO_COLLECTION_PERFORMANCE_COUNTS
+            ].insert_many(documents=[count.dict() for count in counts], ordered=False)
+            return len(result.inserted_ids)
+        except BulkWriteError as e:
+            return e.details["nInserted"]
+
+    def find_recount_start(
+        self, dataset_id: UUID, positive_class: str, counted_after: datetime
+    ) -> Optional[datetime]:
+        """
+        Start of the earliest counted interval ending at or after counted_after,
+        None if every interval ends before
+        """
+        result = self._mongo.database[MONGO_COLLECTION_PERFORMANCE_COUNTS].find_one(
+            {
+                "dataset_id": str(dataset_id),
+                "positive_class": positive_class,
+                "end_time": {"$gte": counted_after},
+            },
+            sort=[("start_time", 1)],
+        )
+        return None if result is None else result["start_time"]
+
+    def replace_counts(
+        self,
+        dataset_id: UUID,
+        positive_class: str,
+        start_time: datetime,
+        end_time: datetime,
+        counts: List[PerformanceCountDB],
+    ) -> int:
+        """
+        Replace the counted intervals starting in [start_time, end_time) with counts.
+        Intervals are replaced by their start, runs counting the same intervals
+        concurrently replace each other instead of adding up
+        """
+        collection = self._mongo.database[MONGO_COLLECTION_PERFORMANCE_COUNTS]
+        interval_filter = {
+            "dataset_id": str(dataset_id),
+            "positive_class": positive_class,
+        }
+        collection.delete_many(
+            {
+                **interval_filter,
+                "start_time": {
+                    "$gte": start_time,
+                    "$lt": end_time,
+                    "$nin": [count.start_time for count in counts],
+                },
+            }
+        )
+        if not counts:
+            return 0
+        collection.bulk_write(
+            [
+                ReplaceOne(
+                    {**interval_filter, "start_time": count.start_time},
+                    count.dict(),
+                    upsert=True,
+                )
+                for count in counts
+            ],
+            ordered=False,
+        )
+        return len(counts)
+
+    def sum_counts(
+        self,
+        dataset_id: UUID,
+        positive_class: str,
+        start_day: datetime,
+        end_time: datetime,
+    ) -> Dict[str, int]:
+        """
+        Sum of the counts of the days starting at start_day and counted before end_time
+        """
+        result = list(
+            self._mongo.database[MONGO_COLLECTION_PERFORMANCE_COUNTS].aggregate(
+                [
+                    {
+                        "$match": {
+                            "dataset_id": str(dataset_id),
+                            "positive_class": positive_class,
+                            "day": {"$gte": start_day},
+                            "start_time": {"$lt": end_time},
+                        }
+                    },
+                    {
+                        "$group": {
+                            "_id": None,
+                            **{field: {"$sum": f"${field}"} for field in COUNT_FIELDS},
+                        }
+                    },
+                ]
+            )
+        )
+        if not result:
+            return {field: 0 for field in COUNT_FIELDS}
+        return {field: result[0][field] for field in COUNT_FIELDS}
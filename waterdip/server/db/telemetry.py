@@ -0,0 +1,241 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import hashlib
+import threading
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+from pymongo import monitoring
+
+from waterdip.server.commons.config import settings
+from waterdip.utils.tracing import Span, current_span
+
+# route or task on whose behalf mongo commands are sent
+_command_origin: ContextVar[str] = ContextVar("command_origin", default="unknown")
+
+IGNORED_COMMANDS = {
+    "hello",
+    "ismaster",
+    "isMaster",
+    "ping",
+    "buildInfo",
+    "saslStart",
+    "saslContinue",
+    "endSessions",
+}
+
+
+def set_command_origin(origin: str):
+    """
+    Sets the route or task the following mongo commands of the current context
+    are attributed to. Returns the token to reset the previous origin
+    """
+    return _command_origin.set(origin)
+
+
+def reset_command_origin(token):
+    _command_origin.reset(token)
+
+
+def _shape(value: Any) -> Any:
+    """
+    Shape of a command document, field names are kept and values are dropped.
+    Operators holding documents and lists, like $facet and $and, are kept recursively
+    """
+    if isinstance(value, dict):
+        return {key: _shape(item) for key, item in sorted(value.items())}
+    if isinstance(value, list):
+        return [_shape(item) for item in value if isinstance(item, (dict, list))]
+    return None
+
+
+def command_fingerprint(command_name: str, command: Dict) -> str:
+    """
+    Fingerprint of the query shape of a command. Commands which only differ in
+    the filtered values, like the dataset id or the time range, share a fingerprint
+    """
+    if command_name == "aggregate":
+        shape = _shape(command.get("pipeline", []))
+    elif command_name in ("find", "count", "delete", "update", "findAndModify"):
+        shape = _shape(
+            {
+                key: command.get(key)
+                for key in ("filter", "query", "sort", "deletes", "updates")
+                if key in command
+            }
+        )
+    else:
+        shape = None
+    return hashlib.sha1(f"{command_name}:{shape}".encode()).hexdigest()[:12]
+
+
+def _docs_returned(reply: Dict) -> int:
+    cursor = reply.get("cursor")
+    if cursor is not None:
+        return len(cursor.get("firstBatch", cursor.get("nextBatch", [])))
+    return int(reply.get("n", 0))
+
+
+class _CommandStats:
+    def __init__(self, samples: int):
+        self.count = 0
+        self.failures = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.docs_returned = 0
+        self.durations: Deque[float] = deque(maxlen=samples)
+
+    def add(self, duration_ms: float, docs_returned: int, failed: bool):
+        self.count += 1
+        self.failures += 1 if failed else 0
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        self.docs_returned += docs_returned
+        self.durations.append(duration_ms)
+
+
+class CommandTelemetry(monitoring.CommandListener):
+    """
+    pymongo command listener keeping the duration statistics of mongo commands.
+    Commands are grouped by origin, command name, collection and query shape
+    fingerprint. Percentiles are computed over the latest samples of each group,
+    commands slower than the slow threshold are logged
+
+    Attributes
+    ----------
+    slow_command_ms:
+        commands taking at least this many milliseconds are logged
+    samples:
+        number of latest durations kept per group for the percentiles
+    """
+
+    _INSTANCE: "CommandTelemetry" = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._INSTANCE is None:
+            cls._INSTANCE = cls(
+                slow_command_ms=settings.mongo_slow_command_ms,
+                samples=settings.mongo_telemetry_samples,
+            )
+        return cls._INSTANCE
+
+    def __init__(self, slow_command_ms: int, samples: int):
+        self.slow_command_ms = slow_command_ms
+        self._samples = samples
+        self._lock = threading.Lock()
+        self._started: Dict[Tuple, Tuple[str, str, str, Optional[Span]]] = {}
+        self._stats: Dict[Tuple[str, str, str, str], _CommandStats] = {}
+
+    @staticmethod
+    def _event_key(event) -> Tuple:
+        return event.connection_id, event.request_id
+
+    def started(self, event):
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        collection = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            collection = event.command.get("collection")
+        collection = collection if isinstance(collection, str) else ""
+        fingerprint = command_fingerprint(event.command_name, event.command)
+        parent = current_span()
+        command_span = (
+            parent.start_child(
+                f"mongo:{event.command_name}",
+                "mongo",
+                collection=collection,
+                fingerprint=fingerprint,
+            )
+            if parent is not None
+            else None
+        )
+        with self._lock:
+            self._started[self._event_key(event)] = (
+                _command_origin.get(),
+                collection,
+                fingerprint,
+                command_span,
+            )
+
+    def succeeded(self, event):
+        self._record(event, docs_returned=_docs_returned(event.reply), failed=False)
+
+    def failed(self, event):
+        self._record(event, docs_returned=0, failed=True)
+
+    def _record(self, event, docs_returned: int, failed: bool):
+        with self._lock:
+            started = self._started.pop(self._event_key(event), None)
+            if started is None:
+                return
+            origin, collection, fingerprint, command_span = started
+            key = (origin, event.command_name, collection, fingerprint)
+            if key not in self._stats:
+                self._stats[key] = _CommandStats(samples=self._samples)
+            duration_ms = event.duration_micros / 1000.0
+            self._stats[key].add(duration_ms, docs_returned, failed)
+        if command_span is not None:
+            command_span.attributes["docs_returned"] = docs_returned
+            command_span.end()
+            # the span covers the time pymongo measured for the command
+            command_span.duration_ms = duration_ms
+            if failed:
+                command_span.error = str(getattr(event, "failure", "failed"))
+
+        if duration_ms >= self.slow_command_ms:
+            logger.warning(
+                f"slow mongo command [{event.command_name}] on [{collection}] "
+                f"took {duration_ms:.1f} ms, origin: [{origin}], "
+                f"fingerprint: [{fingerprint}], docs returned: [{docs_returned}]"
+            )
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Statistics of every command group, groups with the largest total time first
+        """
+        with self._lock:
+            stats = [
+                (key, group, np.array(group.durations))
+                for key, group in self._stats.items()
+            ]
+        rows = []
+        for (origin, command_name, collection, fingerprint), group, durations in stats:
+            p50, p95, p99 = np.percentile(durations, [50, 95, 99])
+            rows.append(
+                {
+                    "origin": origin,
+                    "command_name": command_name,
+                    "collection": collection,
+                    "fingerprint": fingerprint,
+                    "count": group.count,
+                    "failures": group.failures,
+                    "docs_returned": group.docs_returned,
+                    "total_ms": round(group.total_ms, 3),
+                    "max_ms": round(group.max_ms, 3),
+                    "p50_ms": round(float(p50), 3),
+                    "p95_ms": round(float(p95), 3),
+                    "p99_ms": round(float(p99), 3),
+                }
+            )
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._started.clear()
+            self._stats.clear()
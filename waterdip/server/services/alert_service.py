@@ -33,8 +33,10 @@ from waterdip.server.db.repositories.alert_repository import (
     AlertRepository,
     BaseAlertDB,
 )
+from waterdip.utils.tracing import traced_service
 
 
+@traced_service
 class AlertService:
     _INSTANCE: "AlertService" = None
 
@@ -19,10 +19,15 @@ from pydantic import Field
 
 from waterdip.core.commons.models import DatasetType
 from waterdip.server.apis.models.params import RequestPagination, RequestSort
-from waterdip.server.db.models.datasets import BaseDatasetDB, DatasetDB
+from waterdip.server.db.models.datasets import (
+    BaseDatasetDB,
+    DatasetDB,
+    DatasetProfileDB,
+)
 from waterdip.server.db.repositories.dataset_repository import DatasetRepository
 from waterdip.server.db.repositories.model_repository import ModelVersionRepository
 from waterdip.server.errors.base_errors import EntityNotFoundError
+from waterdip.utils.tracing import traced_service
 
 
 class ServiceBaseDataset(BaseDatasetDB):
@@ -40,6 +45,7 @@ class ServiceEventDataset(ServiceBaseDataset):
     dataset_type: DatasetType = Field(default=DatasetType.EVENT, const=True)
 
 
+@traced_service
 class DatasetService:
     _INSTANCE: "DatasetService" = None
 
@@ -157,3 +163,12 @@ class DatasetService:
             raise EntityNotFoundError(name=str(filters), type="Dataset")
 
         return dataset_list[0]
+
+    def find_dataset_profile(self, dataset_id: UUID) -> Optional[DatasetProfileDB]:
+        return self._repository.find_profile(dataset_id=dataset_id)
+
+    def save_dataset_profile(self, profile: DatasetProfileDB) -> DatasetProfileDB:
+        return self._repository.save_profile(profile=profile)
+
+    def delete_dataset_profiles(self, model_version_id: UUID) -> int:
+        return self._repository.delete_profiles(model_version_id=model_version_id)
@@ -12,6 +12,7 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+import time
 from typing import Dict, List
 from uuid import UUID, uuid4
 
@@ -25,8 +26,11 @@ from waterdip.server.db.models.integrations import BaseIntegrationDB
 from waterdip.server.db.models.monitors import BaseMonitorCondition
 from waterdip.server.db.repositories.integration_repository import IntegrationRepository
 from waterdip.server.errors.base_errors import IntegrationError
+from waterdip.utils.instrumentation import ALERT_DELIVERY_DURATION
+from waterdip.utils.tracing import traced_service
 
 
+@traced_service
 class IntegrationService:
     _INSTANCE: "IntegrationService" = None
 
@@ -149,6 +153,25 @@ class IntegrationService:
         integration_id: UUID,
     ):
         integration = self.get_integration(integration_id=integration_id)
+        started_at, status = time.perf_counter(), "success"
+        try:
+            self._deliver_alert(alert, monitor_condition, integration)
+        except Exception:
+            status = "failure"
+            raise
+        finally:
+            ALERT_DELIVERY_DURATION.observe(
+                time.perf_counter() - started_at,
+                integration_type=integration.configuration["type"],
+                status=status,
+            )
+
+    def _deliver_alert(
+        self,
+        alert: BaseAlertDB,
+        monitor_condition: BaseMonitorCondition,
+        integration: BaseIntegrationDB,
+    ):
         if integration.configuration["type"] == Integration_Type.SLACK:
             self.send_message_to_slack(
                 message=self.alert_description(
@@ -19,8 +19,11 @@ from typing import Dict, List, Optional, Union
 from uuid import UUID
 
 from fastapi import Depends
+from loguru import logger
 
 from waterdip.core.commons.models import ColumnDataType, ColumnMappingType, Environment
+from waterdip.core.metrics.data_metrics import numeric_bin_edges
+from waterdip.server.commons.config import settings
 from waterdip.server.db.models.dataset_rows import (
     DataColumn,
     DatasetBatchRowDB,
@@ -33,13 +36,16 @@ from waterdip.server.db.models.models import (
     ModelVersionSchemaInDB,
 )
 from waterdip.server.services.dataset_service import DatasetService, ServiceBatchDataset
+from waterdip.server.services.metrics_service import DatasetMetricsService
 from waterdip.server.services.model_service import ModelService, ModelVersionService
+from waterdip.server.services.monitor_streaming_service import MonitorStreamingService
 from waterdip.server.services.row_service import (
     BatchDatasetRowService,
     EventDatasetRowService,
     ServiceClassificationEventRow,
     ServiceDatasetBatchRow,
 )
+from waterdip.utils.tracing import traced_service
 
 
 @dataclass
@@ -57,6 +63,7 @@ class ServiceLogEvent:
     timestamp: Optional[datetime] = None
 
 
+@traced_service
 class BatchLoggingService:
     """
     Batch Logging service prepare the batch logged data to be persisted in DB
@@ -75,12 +82,16 @@ class BatchLoggingService:
         row_service: BatchDatasetRowService = Depends(
             BatchDatasetRowService.get_instance
         ),
+        metrics_service: DatasetMetricsService = Depends(
+            DatasetMetricsService.get_instance
+        ),
     ):
         if not cls._INSTANCE:
             cls._INSTANCE = cls(
                 model_version_service=model_version_service,
                 dataset_service=dataset_service,
                 row_service=row_service,
+                metrics_service=metrics_service,
             )
         return cls._INSTANCE
 
@@ -89,10 +100,12 @@ class BatchLoggingService:
         model_version_service: ModelVersionService,
         dataset_service: DatasetService,
         row_service: BatchDatasetRowService,
+        metrics_service: Optional[DatasetMetricsService] = None,
     ):
         self._model_version_service = model_version_service
         self._dataset_service = dataset_service
         self._row_service = row_service
+        self._metrics_service = metrics_service
 
     @staticmethod
     def _data_column_converter(
@@ -199,7 +212,7 @@ class BatchLoggingService:
             environment=Environment(environment),
         )
 
-        self._dataset_service.create_batch_dataset(dataset=dataset)
+        created_dataset = self._dataset_service.create_batch_dataset(dataset=dataset)
         data_rows_in_db: List[DatasetBatchRowDB] = [
             self._log_row_to_batch_row_db_converter(
                 dataset_id=dataset_id,
@@ -210,9 +223,50 @@ class BatchLoggingService:
             )
             for row in rows
         ]
-        return self._row_service.insert_rows(data_rows_in_db)
+        inserted = self._row_service.insert_rows(data_rows_in_db)
+        if Environment(environment) == Environment.TRAINING:
+            bin_edges = self._derive_bin_edges(model_version, rows)
+            self._model_version_service.update_bin_edges(
+                model_version_id=model_version_id, bin_edges=bin_edges
+            )
+            if bin_edges:
+                # profiles of the other batch datasets were binned without the edges,
+                # they are profiled again on their next request
+                self._dataset_service.delete_dataset_profiles(
+                    model_version_id=model_version_id
+                )
+        if self._metrics_service is not None and settings.batch_dataset_profile_at_log:
+            try:
+                self._metrics_service.profile_batch_dataset(dataset=created_dataset)
+            except Exception:
+                logger.exception(f"Profiling of Dataset ID [{dataset_id}] failed")
+        return inserted
 
+    @staticmethod
+    def _derive_bin_edges(
+        model_version: BaseModelVersionDB, rows: List[ServiceLogRow]
+    ) -> Dict[str, Dict[str, List[float]]]:
+        """
+        Bin edges of the numeric columns which have none yet, derived from the
+        logged training rows. Edges are never recomputed, so every histogram of
+        the model version stays on the same bins
+        """
+        bin_edges: Dict[str, Dict[str, List[float]]] = {}
+        for mapping in ["features", "predictions"]:
+            schema: Dict[str, ModelVersionSchemaFieldDetails] = getattr(
+                model_version.version_schema, mapping
+            )
+            for column, details in schema.items():
+                if details.data_type != ColumnDataType.NUMERIC or details.bin_edges:
+                    continue
+                values = [getattr(row, mapping).get(column) for row in rows]
+                edges = numeric_bin_edges([float(v) for v in values if v is not None])
+                if edges is not None:
+                    bin_edges.setdefault(mapping, {})[column] = edges
+        return bin_edges
 
+
+@traced_service
 class EventLoggingService:
     _INSTANCE: "EventLoggingService" = None
 
@@ -227,6 +281,9 @@ class EventLoggingService:
         row_service: EventDatasetRowService = Depends(
             EventDatasetRowService.get_instance
         ),
+        streaming_service: MonitorStreamingService = Depends(
+            MonitorStreamingService.get_instance
+        ),
     ):
         if not cls._INSTANCE:
             cls._INSTANCE = cls(
@@ -234,6 +291,7 @@ class EventLoggingService:
                 dataset_service=dataset_service,
                 row_service=row_service,
                 model_service=model_service,
+                streaming_service=streaming_service,
             )
         return cls._INSTANCE
 
@@ -243,11 +301,13 @@ class EventLoggingService:
         dataset_service: DatasetService,
         row_service: EventDatasetRowService,
         model_service: ModelService = Depends(ModelService.get_instance),
+        streaming_service: Optional[MonitorStreamingService] = None,
     ):
         self._model_version_service = model_version_service
         self._dataset_service = dataset_service
         self._row_service = row_service
         self._model_service = model_service
+        self._streaming_service = streaming_service
 
     @staticmethod
     def _convert_event_column(
@@ -479,4 +539,13 @@ class EventLoggingService:
 
         self._model_service.update_prediction_classes(model_version.model_id, classes)
 
-        return self._row_service.insert_rows(rows=events_row_db)
+        inserted_rows = self._row_service.insert_rows(
+            rows=events_row_db, version_schema=model_version.version_schema
+        )
+        if self._streaming_service is not None:
+            self._streaming_service.observe(
+                dataset_id=event_dataset.dataset_id,
+                model_version_id=model_version_id,
+                rows=events_row_db,
+            )
+        return inserted_rows
@@ -13,7 +13,8 @@
 #  limitations under the License.
 import json
 from datetime import datetime, timedelta
-from typing import Dict, List
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple, Type
 from uuid import UUID
 
 from fastapi import Depends, HTTPException
@@ -22,8 +23,11 @@ from waterdip.core.commons.models import (
     ColumnDataType,
     DatasetType,
     Histogram,
+    MetricView,
+    TimeGranularity,
     TimeRange,
 )
+from waterdip.core.metrics.base import TimeBuckets
 from waterdip.core.metrics.classification_metrics import (
     ClassificationDateHistogramDBMetrics,
 )
@@ -31,17 +35,33 @@ from waterdip.core.metrics.data_metrics import (
     CardinalityCategorical,
     CategoricalCountHistogram,
     CountEmptyHistogram,
+    DataMetrics,
     NumericBasicMetrics,
     NumericCountHistogram,
 )
 from waterdip.core.metrics.drift_psi import PSIMetrics
+from waterdip.core.metrics.executor import (
+    ColumnGroupExecutor,
+    PartitionCache,
+    TimePartitionExecutor,
+    combine_basic_metrics,
+    strip_basic_metrics_moments,
+)
+from waterdip.core.metrics.rows import RowReader
+from waterdip.core.metrics.sampling import RowSample
 from waterdip.server.apis.models.metrics import (
     CategoricalColumnStats,
     DatasetMetricsResponse,
     NumericColumnStats,
     PSIMetricResponse,
+    SamplingInfo,
 )
 from waterdip.server.commons.config import settings
+from waterdip.server.db.models.datasets import (
+    BaseDatasetProfileDB,
+    DatasetDB,
+    DatasetProfileDB,
+)
 from waterdip.server.db.models.models import (
     ModelBaselineTimeWindowType,
     ModelVersionSchemaInDB,
@@ -50,10 +70,36 @@ from waterdip.server.db.repositories.dataset_row_repository import (
     BatchDatasetRowRepository,
     EventDatasetRowRepository,
 )
+from waterdip.server.db.repositories.metric_view_repository import MetricViewRepository
 from waterdip.server.services.dataset_service import DatasetService
 from waterdip.server.services.model_service import ModelService, ModelVersionService
+from waterdip.utils.tracing import traced_service
+
+_PARTITION_CACHE: Optional[PartitionCache] = None
+
+
+def time_partition_executor() -> Optional[TimePartitionExecutor]:
+    """
+    Partition executor of the metrics of long time ranges, None when the
+    partitioning is off. The executors of a process share one partition cache
+    """
+    global _PARTITION_CACHE
+    if not settings.metric_time_partition:
+        return None
+    if _PARTITION_CACHE is None and settings.metric_time_partition_cache_size > 0:
+        _PARTITION_CACHE = PartitionCache(
+            max_entries=settings.metric_time_partition_cache_size,
+            ttl=settings.metric_time_partition_cache_ttl,
+        )
+    return TimePartitionExecutor(
+        granularity=settings.metric_time_partition,
+        workers=settings.metric_time_partition_workers,
+        min_range_days=settings.metric_time_partition_min_days,
+        cache=_PARTITION_CACHE,
+    )
 
 
+@traced_service
 class DatasetMetricsService:
     _INSTANCE: "DatasetMetricsService" = None
 
@@ -91,41 +137,128 @@ class DatasetMetricsService:
         self._batch_repo = batch_repo
         self._dataset_service = dataset_service
         self._model_version_service = model_version_service
+        self._column_group_executor = ColumnGroupExecutor(
+            workers=settings.metric_column_group_workers,
+            max_time_ms=settings.metric_column_group_timeout_ms,
+        )
+        self._time_partitions = time_partition_executor()
 
-    def numeric_basic_metrics(
-        self, dataset_id: UUID, dataset_type: DatasetType, time_range: TimeRange = None
-    ) -> Dict[str, Dict]:
+    def _data_metric_result(
+        self,
+        metric_class: Type[DataMetrics],
+        dataset_id: UUID,
+        dataset_type: DatasetType,
+        columns: Optional[List[str]] = None,
+        columns_kwarg: Optional[str] = None,
+        sample: Optional[RowSample] = None,
+        row_reader: Optional[RowReader] = None,
+        **aggregation_kwargs,
+    ) -> Dict[str, Any]:
+        """
+        Result of a data metric on the rows of the dataset, or on the row sample.
+        Wide models, with more columns than metric_column_group_threshold, are
+        aggregated in parallel column groups
+        """
+        metric_kwargs = {"dataset_id": dataset_id, "sample": sample}
         if dataset_type == DatasetType.BATCH:
-            basic_metrics = NumericBasicMetrics(
-                collection=self._batch_repo.collection,
-                dataset_id=dataset_id,
-            )
-            columns = basic_metrics.aggregation_result(
-                std_dev_disable=settings.is_testing
-            )
+            metric_kwargs["collection"] = self._batch_repo.collection
+            aggregation_kwargs.pop("time_range", None)
         else:
-            basic_metrics = NumericBasicMetrics(
-                collection=self._event_repo.collection, dataset_id=dataset_id
+            metric_kwargs["collection"] = self._event_repo.collection
+            metric_kwargs["row_reader"] = row_reader
+
+        if (
+            columns is not None
+            and len(columns) > settings.metric_column_group_threshold
+        ):
+            return self._column_group_executor.run_metric(
+                metric_class,
+                columns=list(columns),
+                metric_kwargs=metric_kwargs,
+                aggregation_kwargs=aggregation_kwargs,
+                columns_kwarg=columns_kwarg,
             )
-            columns = basic_metrics.aggregation_result(
-                time_range=time_range, std_dev_disable=settings.is_testing
+        if columns_kwarg is not None:
+            aggregation_kwargs[columns_kwarg] = columns
+        return metric_class(**metric_kwargs).aggregation_result(**aggregation_kwargs)
+
+    def numeric_basic_metrics(
+        self,
+        dataset_id: UUID,
+        dataset_type: DatasetType,
+        time_range: TimeRange = None,
+        numeric_columns: Optional[List[str]] = None,
+        sample: Optional[RowSample] = None,
+        row_reader: Optional[RowReader] = None,
+    ) -> Dict[str, Dict]:
+        """
+        Basic statistics of the numeric columns. The production rows of long
+        time ranges are aggregated in time partitions, combined from the moments
+        and quantile sketches of the partitions
+        """
+        aggregation_kwargs = {
+            "std_dev_disable": settings.is_testing,
+            "percentiles": settings.numeric_percentiles,
+            "relative_accuracy": settings.quantile_sketch_relative_accuracy,
+        }
+        metric_kwargs = {
+            "dataset_id": dataset_id,
+            "dataset_type": dataset_type,
+            "columns": numeric_columns,
+            "sample": sample,
+            "row_reader": row_reader,
+        }
+        if (
+            dataset_type == DatasetType.BATCH
+            or time_range is None
+            or self._time_partitions is None
+        ):
+            return self._data_metric_result(
+                NumericBasicMetrics,
+                time_range=time_range,
+                **metric_kwargs,
+                **aggregation_kwargs,
             )
 
-        return columns
+        basic_metrics = self._time_partitions.run(
+            lambda partition: self._data_metric_result(
+                NumericBasicMetrics,
+                time_range=partition,
+                moments=True,
+                **metric_kwargs,
+                **aggregation_kwargs,
+            ),
+            time_range=time_range,
+            combine=partial(
+                combine_basic_metrics, percentiles=settings.numeric_percentiles
+            ),
+            cache_key=NumericBasicMetrics(
+                collection=self._event_repo.collection,
+                dataset_id=dataset_id,
+                columns=numeric_columns,
+                sample=sample,
+            ).partition_cache_key(**aggregation_kwargs),
+        )
+        return strip_basic_metrics_moments(basic_metrics)
 
     def empty_histogram(
-        self, dataset_id: UUID, dataset_type: DatasetType, time_range: TimeRange = None
+        self,
+        dataset_id: UUID,
+        dataset_type: DatasetType,
+        time_range: TimeRange = None,
+        columns: Optional[List[str]] = None,
+        sample: Optional[RowSample] = None,
+        row_reader: Optional[RowReader] = None,
     ) -> Dict[str, Dict]:
-        if dataset_type == DatasetType.BATCH:
-            hist_empty = CountEmptyHistogram(
-                collection=self._batch_repo.collection, dataset_id=dataset_id
-            )
-            columns = hist_empty.aggregation_result()
-        else:
-            hist_empty = CountEmptyHistogram(
-                collection=self._event_repo.collection, dataset_id=dataset_id
-            )
-            columns = hist_empty.aggregation_result(time_range=time_range)
+        columns = self._data_metric_result(
+            CountEmptyHistogram,
+            dataset_id=dataset_id,
+            dataset_type=dataset_type,
+            columns=columns,
+            sample=sample,
+            row_reader=row_reader,
+            time_range=time_range,
+        )
 
         column_empty_histogram: Dict[str, Dict] = {}
 
@@ -142,23 +275,23 @@ class DatasetMetricsService:
         dataset_type: DatasetType,
         numeric_columns: list,
         time_range: TimeRange = None,
+        bin_edges: Dict[str, List[float]] = None,
+        sample: Optional[RowSample] = None,
+        row_reader: Optional[RowReader] = None,
     ) -> Dict[str, Histogram]:
         column_histograms: Dict[str, Histogram] = {}
         if len(numeric_columns) > 0:
-            if dataset_type == DatasetType.BATCH:
-                hist_categorical = NumericCountHistogram(
-                    collection=self._batch_repo.collection, dataset_id=dataset_id
-                )
-                columns = hist_categorical.aggregation_result(
-                    numeric_columns=numeric_columns
-                )
-            else:
-                hist_categorical = NumericCountHistogram(
-                    collection=self._event_repo.collection, dataset_id=dataset_id
-                )
-                columns = hist_categorical.aggregation_result(
-                    time_range=time_range, numeric_columns=numeric_columns
-                )
+            columns = self._data_metric_result(
+                NumericCountHistogram,
+                dataset_id=dataset_id,
+                dataset_type=dataset_type,
+                columns=list(numeric_columns),
+                columns_kwarg="numeric_columns",
+                sample=sample,
+                row_reader=row_reader,
+                time_range=time_range,
+                bin_edges=bin_edges,
+            )
 
             for column_name, hist_value in columns.items():
                 column_histograms[column_name] = Histogram(
@@ -167,18 +300,32 @@ class DatasetMetricsService:
         return column_histograms
 
     def categorical_count_histogram(
-        self, dataset_id: UUID, dataset_type: DatasetType, time_range: TimeRange = None
+        self,
+        dataset_id: UUID,
+        dataset_type: DatasetType,
+        time_range: TimeRange = None,
+        sample: Optional[RowSample] = None,
+        row_reader: Optional[RowReader] = None,
     ) -> Dict[str, Histogram]:
         if dataset_type == DatasetType.BATCH:
             hist_categorical = CategoricalCountHistogram(
-                collection=self._batch_repo.collection, dataset_id=dataset_id
+                collection=self._batch_repo.collection,
+                dataset_id=dataset_id,
+                sample=sample,
+            )
+            columns = hist_categorical.aggregation_result(
+                top_k=settings.categorical_histogram_top_k
             )
-            columns = hist_categorical.aggregation_result()
         else:
             hist_categorical = CategoricalCountHistogram(
-                collection=self._event_repo.collection, dataset_id=dataset_id
+                collection=self._event_repo.collection,
+                dataset_id=dataset_id,
+                sample=sample,
+                row_reader=row_reader,
+            )
+            columns = hist_categorical.aggregation_result(
+                time_range=time_range, top_k=settings.categorical_histogram_top_k
             )
-            columns = hist_categorical.aggregation_result(time_range=time_range)
 
         column_histograms: Dict[str, Histogram] = {}
 
@@ -190,18 +337,35 @@ class DatasetMetricsService:
         return column_histograms
 
     def categorical_cardinality(
-        self, dataset_id: UUID, dataset_type: DatasetType, time_range: TimeRange = None
+        self,
+        dataset_id: UUID,
+        dataset_type: DatasetType,
+        time_range: TimeRange = None,
+        sample: Optional[RowSample] = None,
+        row_reader: Optional[RowReader] = None,
     ) -> Dict[str, Dict]:
         if dataset_type == DatasetType.BATCH:
             cardinality = CardinalityCategorical(
-                collection=self._batch_repo.collection, dataset_id=dataset_id
+                collection=self._batch_repo.collection,
+                dataset_id=dataset_id,
+                sample=sample,
+            )
+            columns = cardinality.aggregation_result(
+                approximate=settings.categorical_cardinality_approximate,
+                top_k=settings.categorical_top_k,
             )
-            columns = cardinality.aggregation_result()
         else:
             cardinality = CardinalityCategorical(
-                collection=self._event_repo.collection, dataset_id=dataset_id
+                collection=self._event_repo.collection,
+                dataset_id=dataset_id,
+                sample=sample,
+                row_reader=row_reader,
+            )
+            columns = cardinality.aggregation_result(
+                time_range=time_range,
+                approximate=settings.categorical_cardinality_approximate,
+                top_k=settings.categorical_top_k,
             )
-            columns = cardinality.aggregation_result(time_range=time_range)
 
         column_cardinality: Dict[str, Dict] = {}
 
@@ -234,27 +398,95 @@ class DatasetMetricsService:
         model_version_id: UUID,
         dataset_id: UUID,
         time_range: TimeRange,
+        sample_rate: Optional[float] = None,
+        refresh_profile: bool = False,
     ) -> DatasetMetricsResponse:
+        """
+        Statistics of every column of the dataset. With a sample_rate, they are
+        approximated on a sample of the rows: counts are scaled to all the rows,
+        and come with the errors of the histograms and of the means
+
+        Batch datasets never change, their statistics are served from the dataset
+        profile. A batch dataset without a profile is profiled on the request,
+        unless a sample is requested. The profile is exact, so it is served even
+        with a sample_rate, and only recomputed with refresh_profile
+        """
         dataset = self._dataset_service.find_dataset_by_id(dataset_id)
+        if dataset.dataset_type == DatasetType.BATCH:
+            profile = (
+                self._dataset_service.find_dataset_profile(dataset_id)
+                if not refresh_profile
+                else None
+            )
+            if profile is None and (sample_rate is None or refresh_profile):
+                profile = self.profile_batch_dataset(dataset=dataset)
+            if profile is not None:
+                return DatasetMetricsResponse(
+                    numeric_column_stats=profile.numeric_column_stats,
+                    categorical_column_stats=profile.categorical_column_stats,
+                )
+
+        return self._column_stats(
+            dataset=dataset,
+            model_version_id=model_version_id,
+            time_range=time_range,
+            sample=RowSample(rate=sample_rate) if sample_rate is not None else None,
+        )
+
+    def profile_batch_dataset(self, dataset: DatasetDB) -> DatasetProfileDB:
+        """Compute the column stats of all the rows of a batch dataset and store them"""
+        column_stats = self._column_stats(
+            dataset=dataset, model_version_id=dataset.model_version_id
+        )
+        profile = BaseDatasetProfileDB(
+            dataset_id=dataset.dataset_id,
+            model_id=dataset.model_id,
+            model_version_id=dataset.model_version_id,
+            profiled_at=datetime.utcnow(),
+            numeric_column_stats=[
+                column.dict() for column in column_stats.numeric_column_stats
+            ],
+            categorical_column_stats=[
+                column.dict() for column in column_stats.categorical_column_stats
+            ],
+        )
+        return self._dataset_service.save_dataset_profile(profile=profile)
 
+    def _column_stats(
+        self,
+        dataset: DatasetDB,
+        model_version_id: UUID,
+        time_range: Optional[TimeRange] = None,
+        sample: Optional[RowSample] = None,
+    ) -> DatasetMetricsResponse:
         model_version = self._model_version_service.find_by_id(
             model_version_id=model_version_id
         )
 
         columns = self._get_all_columns(version_schema=model_version.version_schema)
         params = {
-            "dataset_id": dataset_id,
+            "dataset_id": dataset.dataset_id,
             "time_range": time_range,
             "dataset_type": dataset.dataset_type,
+            "sample": sample,
+            "row_reader": self._event_repo.row_reader(model_version.version_schema),
         }
         categorical_count_histogram = self.categorical_count_histogram(**params)
         numeric_count_histogram = self.numeric_count_histogram(
-            **{**params, "numeric_columns": columns["NUMERIC"].keys()}
+            **params,
+            numeric_columns=columns["NUMERIC"].keys(),
+            bin_edges=model_version.version_schema.bin_edges(),
         )
 
-        empty_histogram = self.empty_histogram(**params)
+        empty_histogram = self.empty_histogram(
+            **params,
+            columns=list(columns["NUMERIC"].keys())
+            + list(columns["CATEGORICAL"].keys()),
+        )
         categorical_cardinality = self.categorical_cardinality(**params)
-        numeric_basic_metrics = self.numeric_basic_metrics(**params)
+        numeric_basic_metrics = self.numeric_basic_metrics(
+            **params, numeric_columns=list(columns["NUMERIC"].keys())
+        )
 
         cat_columns_stats: List[CategoricalColumnStats] = []
         numeric_columns_stats: List[NumericColumnStats] = []
@@ -263,13 +495,21 @@ class DatasetMetricsService:
             count_histogram = categorical_count_histogram.get(categorical_column, None)
             cardinality = categorical_cardinality.get(categorical_column, {})
             empty_values = empty_histogram.get(categorical_column, {})
+            missing_total = empty_values.get("missing_total", None)
+            histogram_error = None
+            if sample is not None:
+                count_histogram, histogram_error = self._scale_histogram(
+                    sample, count_histogram
+                )
+                missing_total = sample.scale_count(missing_total)
 
             cat_column_stats = CategoricalColumnStats(
                 column_name=categorical_column,
                 histogram=count_histogram,
+                histogram_error=histogram_error,
                 unique=cardinality.get("unique", None),
                 top=cardinality.get("top", None),
-                missing_total=empty_values.get("missing_total", None),
+                missing_total=missing_total,
                 missing_percentage=empty_values.get("missing_percentage", None),
             )
             cat_columns_stats.append(cat_column_stats)
@@ -278,25 +518,58 @@ class DatasetMetricsService:
             count_histogram = numeric_count_histogram.get(numeric_column, None)
             empty_values = empty_histogram.get(numeric_column, {})
             numeric_basic_metrics_column = numeric_basic_metrics.get(numeric_column, {})
+            missing_total = empty_values.get("missing_total", None)
+            zeros = numeric_basic_metrics_column.get("zeros", 0)
+            total = numeric_basic_metrics_column.get("total", None)
+            histogram_error, mean_error = None, None
+            if sample is not None:
+                count_histogram, histogram_error = self._scale_histogram(
+                    sample, count_histogram
+                )
+                if total:
+                    mean_error = sample.mean_error(
+                        numeric_basic_metrics_column.get("std_dev", None), total
+                    )
+                missing_total = sample.scale_count(missing_total)
+                zeros = sample.scale_count(zeros)
+                total = sample.scale_count(total)
             numeric_column_stats = NumericColumnStats(
                 column_name=numeric_column,
-                missing_total=empty_values.get("missing_total", None),
+                missing_total=missing_total,
                 missing_percentage=empty_values.get("missing_percentage", None),
                 mean=numeric_basic_metrics_column.get("avg", None),
+                mean_error=mean_error,
                 std_dev=numeric_basic_metrics_column.get("std_dev", None),
                 variance=numeric_basic_metrics_column.get("variance", None),
-                zeros=numeric_basic_metrics_column.get("zeros", 0),
-                total=numeric_basic_metrics_column.get("total", None),
+                zeros=zeros,
+                total=total,
                 min=numeric_basic_metrics_column.get("min", None),
                 max=numeric_basic_metrics_column.get("max", None),
+                percentiles=numeric_basic_metrics_column.get("percentiles", None),
                 histogram=count_histogram,
+                histogram_error=histogram_error,
             )
             numeric_columns_stats.append(numeric_column_stats)
 
         return DatasetMetricsResponse(
             categorical_column_stats=cat_columns_stats,
             numeric_column_stats=numeric_columns_stats,
+            sampling=SamplingInfo(rate=sample.rate, confidence=sample.confidence)
+            if sample is not None
+            else None,
+        )
+
+    @staticmethod
+    def _scale_histogram(
+        sample: RowSample, histogram: Optional[Histogram]
+    ) -> Tuple[Optional[Histogram], Optional[List[float]]]:
+        """Histogram of the row sample scaled to all the rows, and its errors"""
+        if histogram is None:
+            return None, None
+        scaled = sample.scale_histogram(
+            {"bins": histogram.bins, "count": histogram.val}
         )
+        return Histogram(bins=scaled["bins"], val=scaled["count"]), scaled["error"]
 
 
 class ClassificationPerformance:
@@ -310,12 +583,16 @@ class ClassificationPerformance:
         ),
         dataset_service: DatasetService = Depends(DatasetService.get_instance),
         model_service: ModelService = Depends(ModelService.get_instance),
+        metric_view_repo: MetricViewRepository = Depends(
+            MetricViewRepository.get_instance
+        ),
     ):
         if not cls._INSTANCE:
             cls._INSTANCE = cls(
                 event_repo=event_repo,
                 dataset_service=dataset_service,
                 model_service=model_service,
+                metric_view_repo=metric_view_repo,
             )
         return cls._INSTANCE
 
@@ -324,13 +601,20 @@ class ClassificationPerformance:
         event_repo: EventDatasetRowRepository,
         dataset_service: DatasetService,
         model_service: ModelService,
+        metric_view_repo: Optional[MetricViewRepository] = None,
     ):
         self._event_repo = event_repo
         self._dataset_service = dataset_service
         self._model_service = model_service
+        self._metric_view_repo = metric_view_repo
 
     def model_performance(
-        self, model_id: UUID, model_version_id: UUID, time_range: TimeRange
+        self,
+        model_id: UUID,
+        model_version_id: UUID,
+        time_range: TimeRange,
+        granularity: TimeGranularity = TimeGranularity.DAY,
+        timezone: str = "UTC",
     ):
         dataset_id = self._dataset_service.find_event_dataset_by_model_version_id(
             model_version_id
@@ -341,33 +625,63 @@ class ClassificationPerformance:
                 status_code=400,
                 detail="Positive class is not set for this model",
             )
+        try:
+            time_buckets = TimeBuckets(
+                granularity, timezone=timezone, at=time_range.start_time
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         hist = ClassificationDateHistogramDBMetrics(
             self._event_repo.collection,
             dataset_id=dataset_id,
             positive_class=positive_class["name"],
+            row_reader=self._event_repo.row_reader(),
         )
 
-        result = hist.aggregation_result(time_range=time_range)
-        response = {}
-        for key, value in result.items():
-            response[key] = []
-            for date in value:
-                response[key].append({datetime.strptime(date, "%d-%m-%Y"): value[date]})
-            response[key].sort(key=lambda x: list(x.keys())[0])
+        # the confusion counts are materialized by UTC day
+        view = None
+        if (
+            settings.metric_views_enabled
+            and self._metric_view_repo
+            and granularity == TimeGranularity.DAY
+            and timezone == "UTC"
+        ):
+            view = self._metric_view_repo.read_view(
+                MetricView.CLASSIFICATION_COUNTS,
+                key=MetricViewRepository.classification_key(
+                    dataset_id, positive_class["name"]
+                ),
+                time_range=time_range,
+            )
 
+        result = hist.aggregation_result(
+            time_range=time_range,
+            granularity=granularity,
+            timezone=timezone,
+            view=view,
+        )
         output = {}
-        for key, value in response.items():
+        for key, value in result.items():
+            buckets = sorted(value.keys())
             output[key] = {
-                "date": [],
-                "value": [],
+                "date": [bucket_label(time_buckets, bucket) for bucket in buckets],
+                "value": [value[bucket] for bucket in buckets],
             }
-            for date in value:
-                output[key]["date"].append(list(date.keys())[0].strftime("%d-%m-%Y"))
-                output[key]["value"].append(list(date.values())[0])
 
         return output
 
 
+def bucket_label(time_buckets: TimeBuckets, bucket: int) -> str:
+    """Date of the bucket start in the timezone of the buckets, with the hour"""
+    bucket_format = (
+        "%d-%m-%Y %H:%M"
+        if time_buckets.granularity == TimeGranularity.HOUR
+        else "%d-%m-%Y"
+    )
+    return time_buckets.local_start_time(bucket).strftime(bucket_format)
+
+
+@traced_service
 class PSIMetricService:
     _INSTANCE: "PSIMetricService" = None
 
@@ -385,6 +699,9 @@ class PSIMetricService:
         model_version_service: ModelVersionService = Depends(
             ModelVersionService.get_instance
         ),
+        metric_view_repo: MetricViewRepository = Depends(
+            MetricViewRepository.get_instance
+        ),
     ):
         if not cls._INSTANCE:
             cls._INSTANCE = cls(
@@ -393,6 +710,7 @@ class PSIMetricService:
                 dataset_service=dataset_service,
                 model_service=model_service,
                 model_version_service=model_version_service,
+                metric_view_repo=metric_view_repo,
             )
         return cls._INSTANCE
 
@@ -403,26 +721,44 @@ class PSIMetricService:
         dataset_service: DatasetService,
         model_service: ModelService,
         model_version_service: ModelVersionService,
+        metric_view_repo: Optional[MetricViewRepository] = None,
     ):
         self._event_repo = event_repo
         self._batch_repo = batch_repo
         self._dataset_service = dataset_service
         self._model_service = model_service
         self._model_version_service = model_version_service
+        self._metric_view_repo = metric_view_repo
+        self._time_partitions = time_partition_executor()
 
     def metric_psi(
         self,
         model_id: UUID,
         model_version_id: UUID,
         time_range: TimeRange,
+        sample_rate: Optional[float] = None,
+        granularity: TimeGranularity = TimeGranularity.DAY,
+        timezone: str = "UTC",
     ):
+        try:
+            time_buckets = TimeBuckets(
+                granularity, timezone=timezone, at=time_range.start_time
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         dataset_id = self._dataset_service.find_event_dataset_by_model_version_id(
             model_version_id
         ).dataset_id
+        sample = RowSample(rate=sample_rate) if sample_rate is not None else None
+        version_schema = self._model_version_service.find_by_id(
+            model_version_id
+        ).version_schema
+        row_reader = self._event_repo.row_reader(version_schema)
 
         baseline = self._model_service.find_by_id(model_id).baseline
         baseline_dataset_id = None
         baseline_collection = None
+        baseline_row_reader = None
         baseline_time_range = None
 
         if baseline.dataset_env is not None:
@@ -443,6 +779,7 @@ class PSIMetricService:
                 }
             ).dataset_id
             baseline_collection = self._event_repo.collection
+            baseline_row_reader = row_reader
             time_window = baseline.time_window
             if (
                 time_window.time_window_type
@@ -471,7 +808,17 @@ class PSIMetricService:
             dataset_id=dataset_id,
             baseline_dataset_id=baseline_dataset_id,
             baseline_collection=baseline_collection,
+            baseline_row_reader=baseline_row_reader,
             baseline_time_range=baseline_time_range,
+            bin_edges=version_schema.bin_edges(),
+            top_k=settings.categorical_histogram_top_k,
+            time_partitions=self._time_partitions,
+            sample=sample,
+            row_reader=row_reader,
+            time_buckets=time_buckets,
+            views=partial(self._metric_view_repo.read_view, key=str(dataset_id))
+            if settings.metric_views_enabled and self._metric_view_repo
+            else None,
         )
 
         (
@@ -484,18 +831,34 @@ class PSIMetricService:
             numeric_columns=numeric_columns,
             categorical_columns=categorical_columns,
         )
+        column_intervals = metric._average_interval_column_agg(metric.psi_intervals)
         feat_breakdown = [
-            {"driftscore": value, "name": key}
+            {
+                "driftscore": value,
+                "name": key,
+                "driftscore_interval": column_intervals.get(key),
+            }
             for key, value in metric._average_psi_column_agg(results).items()
         ]
         date_agg = metric._average_psi_date_agg(results)
-        time_buckets = []
+        date_intervals = metric._average_interval_date_agg(metric.psi_intervals)
+        dates = []
         data = []
+        data_interval = []
 
         for key, value in date_agg.items():
-            time_buckets.append(key)
+            dates.append(bucket_label(time_buckets, key))
             data.append(value)
+            data_interval.append(date_intervals.get(key))
 
+        if sample is None:
+            return PSIMetricResponse(
+                feat_breakdown=feat_breakdown, time_buckets=dates, data=data
+            )
         return PSIMetricResponse(
-            feat_breakdown=feat_breakdown, time_buckets=time_buckets, data=data
+            feat_breakdown=feat_breakdown,
+            time_buckets=dates,
+            data=data,
+            data_interval=data_interval,
+            sampling=SamplingInfo(rate=sample.rate, confidence=sample.confidence),
         )
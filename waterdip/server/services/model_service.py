@@ -58,8 +58,10 @@ from waterdip.server.services.row_service import (
     BatchDatasetRowService,
     EventDatasetRowService,
 )
+from waterdip.utils.tracing import traced_service
 
 
+@traced_service
 class ModelVersionService:
     _INSTANCE: "ModelVersionService" = None
 
@@ -158,6 +160,15 @@ class ModelVersionService:
     def delete_versions_by_model_id(self, model_id: uuid.UUID) -> None:
         self._repository.delete_versions_by_model_id(str(model_id))
 
+    def update_bin_edges(
+        self,
+        model_version_id: uuid.UUID,
+        bin_edges: Dict[str, Dict[str, List[float]]],
+    ) -> None:
+        self._repository.update_bin_edges(
+            model_version_id=model_version_id, bin_edges=bin_edges
+        )
+
     def agg_model_versions_per_model(
         self, model_ids: List[str]
     ) -> Dict[str, List[str]]:
@@ -206,6 +217,7 @@ class ModelVersionService:
         return numeric_columns, categorical_columns
 
 
+@traced_service
 class ModelService:
     _INSTANCE: "ModelService" = None
 
@@ -0,0 +1,174 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import uuid
+from datetime import datetime, time, timedelta
+from typing import Dict, List
+from uuid import UUID
+
+from fastapi import Depends, HTTPException
+
+from waterdip.core.commons.models import DataQualityMetric, MonitorType, TimeRange
+from waterdip.core.metrics.data_metrics import CountEmptyDateHistogram
+from waterdip.core.monitors.evaluators.data_quality import EmptyValueBackfillEvaluator
+from waterdip.core.monitors.models import DataQualityBaseMonitorCondition
+from waterdip.server.db.models.alerts import AlertIdentification, BaseAlertDB
+from waterdip.server.db.models.monitors import MonitorDB
+from waterdip.server.db.repositories.alert_repository import AlertRepository
+from waterdip.server.db.repositories.dataset_row_repository import (
+    EventDatasetRowRepository,
+)
+from waterdip.server.db.repositories.model_repository import ModelVersionRepository
+from waterdip.server.db.repositories.monitor_repository import MonitorRepository
+from waterdip.server.errors.base_errors import EntityNotFoundError
+from waterdip.server.services.dataset_service import DatasetService
+from waterdip.server.services.metrics_service import time_partition_executor
+from waterdip.utils.tracing import traced_service
+
+
+@traced_service
+class MonitorBackfillService:
+    """
+    Evaluates monitors over the past days of data, as if the monitor had been
+    running for the whole period
+    """
+
+    _INSTANCE: "MonitorBackfillService" = None
+
+    @classmethod
+    def get_instance(
+        cls,
+        repository: MonitorRepository = Depends(MonitorRepository.get_instance),
+        alert_repository: AlertRepository = Depends(AlertRepository.get_instance),
+        event_repo: EventDatasetRowRepository = Depends(
+            EventDatasetRowRepository.get_instance
+        ),
+        dataset_service: DatasetService = Depends(DatasetService.get_instance),
+        model_version_repo: ModelVersionRepository = Depends(
+            ModelVersionRepository.get_instance
+        ),
+    ):
+        if not cls._INSTANCE:
+            cls._INSTANCE = cls(
+                repository=repository,
+                alert_repository=alert_repository,
+                event_repo=event_repo,
+                dataset_service=dataset_service,
+                model_version_repo=model_version_repo,
+            )
+        return cls._INSTANCE
+
+    def __init__(
+        self,
+        repository: MonitorRepository,
+        alert_repository: AlertRepository,
+        event_repo: EventDatasetRowRepository,
+        dataset_service: DatasetService,
+        model_version_repo: ModelVersionRepository,
+    ):
+        self._repository = repository
+        self._alert_repository = alert_repository
+        self._event_repo = event_repo
+        self._dataset_service = dataset_service
+        self._model_version_repo = model_version_repo
+        self._time_partitions = time_partition_executor()
+
+    def _find_monitor(self, monitor_id: UUID) -> MonitorDB:
+        monitors = self._repository.find_monitors(
+            filters={"monitor_id": str(monitor_id)}, limit=1
+        )
+        if not monitors:
+            raise EntityNotFoundError(name=str(monitor_id), type="Monitor")
+        return monitors[0]
+
+    def _create_alerts(self, monitor: MonitorDB, violations: List[Dict]) -> int:
+        identification = monitor.monitor_identification
+        alerts = [
+            BaseAlertDB(
+                monitor_id=monitor.monitor_id,
+                model_id=identification.model_id,
+                alert_id=uuid.uuid4(),
+                monitor_type=monitor.monitor_type,
+                alert_identification=AlertIdentification(
+                    model_id=identification.model_id,
+                    model_version_id=identification.model_version_id,
+                ),
+                created_at=violation["evaluated_at"],
+                violation={
+                    "field": violation["dimension"],
+                    "max_threshold": violation["threshold"].value,
+                    "model_version_id": str(identification.model_version_id),
+                    "focal_time_window": monitor.monitor_condition.evaluation_window,
+                    "focal_value": violation["metric_value"],
+                    "evaluated_at": violation["evaluated_at"],
+                    # backfilled alerts do not suppress the alerts of live runs
+                    "backfilled": True,
+                },
+            )
+            for violation in violations
+        ]
+        return self._alert_repository.upsert_backfill_alerts(alerts=alerts)
+
+    def backfill_monitor(
+        self, monitor_id: UUID, days: int, create_alerts: bool = False
+    ) -> Dict:
+        """
+        Evaluates the monitor at the end of each of the last days.
+        Returns the violation timeline and the number of alerts created
+        """
+        monitor = self._find_monitor(monitor_id)
+        condition = monitor.monitor_condition
+        if (
+            monitor.monitor_type != MonitorType.DATA_QUALITY
+            or condition.evaluation_metric != DataQualityMetric.EMPTY_VALUE
+        ):
+            raise HTTPException(
+                status_code=400,
+                detail="Backfill is only supported for empty value monitors",
+            )
+
+        event_dataset = self._dataset_service.find_event_dataset_by_model_version_id(
+            monitor.monitor_identification.model_version_id
+        )
+        model_version = self._model_version_repo.find_by_id(
+            monitor.monitor_identification.model_version_id
+        )
+        end_time = datetime.utcnow()
+        time_range = TimeRange(
+            start_time=datetime.combine(end_time.date(), time.min)
+            - timedelta(days=days - 1),
+            end_time=end_time,
+        )
+        evaluator = EmptyValueBackfillEvaluator(
+            monitor_condition=DataQualityBaseMonitorCondition(**condition.dict()),
+            metric=CountEmptyDateHistogram(
+                collection=self._event_repo.collection,
+                dataset_id=event_dataset.dataset_id,
+                columns=(condition.dimensions.features or [])
+                + (condition.dimensions.predictions or []),
+                row_reader=self._event_repo.row_reader(
+                    model_version.version_schema if model_version else None
+                ),
+            ),
+            time_range=time_range,
+            time_partitions=self._time_partitions,
+        )
+        violations = evaluator.evaluate()
+
+        return {
+            "violations": violations,
+            "alerts_created": self._create_alerts(monitor, violations)
+            if create_alerts
+            else 0,
+        }
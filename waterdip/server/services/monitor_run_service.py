@@ -0,0 +1,77 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from fastapi import Depends
+
+from waterdip.server.apis.models.params import RequestPagination, RequestSort
+from waterdip.server.db.models.monitors import MonitorRunDB
+from waterdip.server.db.repositories.monitor_run_repository import MonitorRunRepository
+from waterdip.utils.tracing import traced_service
+
+
+@traced_service
+class MonitorRunService:
+    _INSTANCE: "MonitorRunService" = None
+
+    @classmethod
+    def get_instance(
+        cls,
+        repository: MonitorRunRepository = Depends(MonitorRunRepository.get_instance),
+    ):
+        if not cls._INSTANCE:
+            cls._INSTANCE = cls(repository=repository)
+        return cls._INSTANCE
+
+    def __init__(self, repository: MonitorRunRepository):
+        self._repository = repository
+
+    @staticmethod
+    def _run_filters(
+        monitor_id: Optional[UUID] = None, model_id: Optional[UUID] = None
+    ) -> Dict:
+        filters = {}
+        if monitor_id:
+            filters["monitor_id"] = str(monitor_id)
+        if model_id:
+            filters["model_id"] = str(model_id)
+        return filters
+
+    def list_monitor_runs(
+        self,
+        sort_request: Optional[RequestSort] = None,
+        pagination: Optional[RequestPagination] = None,
+        monitor_id: Optional[UUID] = None,
+        model_id: Optional[UUID] = None,
+    ) -> List[MonitorRunDB]:
+        """
+        List the recorded runs of monitors, latest runs first by default
+        """
+        return self._repository.find_runs(
+            filters=self._run_filters(monitor_id=monitor_id, model_id=model_id),
+            sort=[(sort_request.get_sort_field, sort_request.get_sort_order)]
+            if sort_request and sort_request.sort
+            else [("started_at", -1)],
+            skip=(pagination.page - 1) * pagination.limit if pagination else 0,
+            limit=pagination.limit if pagination else 10,
+        )
+
+    def count_monitor_runs(
+        self, monitor_id: Optional[UUID] = None, model_id: Optional[UUID] = None
+    ) -> int:
+        return self._repository.count_runs(
+            filters=self._run_filters(monitor_id=monitor_id, model_id=model_id)
+        )
@@ -35,6 +35,7 @@ from waterdip.server.db.models.monitors import (
 from waterdip.server.db.repositories.monitor_repository import MonitorRepository
 from waterdip.server.services.alert_service import AlertService
 from waterdip.server.services.model_service import ModelService, ModelVersionService
+from waterdip.utils.tracing import traced_service
 
 
 class ServiceBaseMonitor(BaseMonitorDB):
@@ -56,6 +57,7 @@ class ServiceDriftMonitor(ServiceBaseMonitor):
     monitor_condition: DriftBaseMonitorCondition = Field(...)
 
 
+@traced_service
 class MonitorService:
     _INSTANCE: "MonitorService" = None
 
@@ -0,0 +1,195 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Set, Tuple
+from uuid import UUID
+
+from fastapi import Depends
+from loguru import logger
+
+from waterdip.core.commons.models import ColumnDataType, DataQualityMetric, MonitorType
+from waterdip.processor.monitors.streaming_processor import StreamingMonitorProcessor
+from waterdip.server.commons.config import settings
+from waterdip.server.db.models.dataset_rows import EventRowDB
+from waterdip.server.db.models.monitors import MonitorDB
+from waterdip.server.db.mongodb import MongodbBackend
+from waterdip.server.db.repositories.alert_repository import AlertRepository
+from waterdip.server.db.repositories.baseline_repository import (
+    BaselineHistogramRepository,
+)
+from waterdip.server.db.repositories.column_count_repository import (
+    ColumnCountRepository,
+)
+from waterdip.server.db.repositories.dataset_repository import DatasetRepository
+from waterdip.server.db.repositories.dataset_row_repository import (
+    EventDatasetRowRepository,
+)
+from waterdip.server.db.repositories.model_repository import (
+    ModelRepository,
+    ModelVersionRepository,
+)
+from waterdip.server.db.repositories.monitor_lease_repository import (
+    MonitorLeaseRepository,
+)
+from waterdip.server.db.repositories.monitor_repository import MonitorRepository
+from waterdip.server.db.repositories.performance_count_repository import (
+    PerformanceCountRepository,
+)
+from waterdip.server.services.integration_service import IntegrationService
+from waterdip.utils.tracing import traced_service
+
+
+@traced_service
+class MonitorStreamingService:
+    """
+    Evaluates empty value monitors while events are logged.
+    Every logged event increments hourly empty and total counters of its columns,
+    the monitors of the model version are then evaluated from the counters, so
+    violations are alerted within the log request instead of at the next
+    scheduled run
+    """
+
+    _INSTANCE: "MonitorStreamingService" = None
+
+    @classmethod
+    def get_instance(
+        cls,
+        mongodb: MongodbBackend = Depends(MongodbBackend.get_instance),
+        column_count_repository: ColumnCountRepository = Depends(
+            ColumnCountRepository.get_instance
+        ),
+        monitor_repository: MonitorRepository = Depends(MonitorRepository.get_instance),
+        alert_repository: AlertRepository = Depends(AlertRepository.get_instance),
+        dataset_repository: DatasetRepository = Depends(DatasetRepository.get_instance),
+        integration_service: IntegrationService = Depends(
+            IntegrationService.get_instance
+        ),
+    ):
+        if not cls._INSTANCE:
+            cls._INSTANCE = cls(
+                mongodb=mongodb,
+                column_count_repository=column_count_repository,
+                monitor_repository=monitor_repository,
+                alert_repository=alert_repository,
+                dataset_repository=dataset_repository,
+                integration_service=integration_service,
+            )
+        return cls._INSTANCE
+
+    def __init__(
+        self,
+        mongodb: MongodbBackend,
+        column_count_repository: ColumnCountRepository,
+        monitor_repository: MonitorRepository,
+        alert_repository: AlertRepository,
+        dataset_repository: DatasetRepository,
+        integration_service: IntegrationService,
+    ):
+        self._mongo = mongodb
+        self._column_count_repository = column_count_repository
+        self._monitor_repository = monitor_repository
+        self._alert_repository = alert_repository
+        self._dataset_repository = dataset_repository
+        self._integration_service = integration_service
+
+    @staticmethod
+    def _is_empty(column) -> bool:
+        if column.data_type == ColumnDataType.CATEGORICAL:
+            return column.value_categorical is None
+        return column.value_numeric is None
+
+    def _count_rows(
+        self, rows: List[EventRowDB]
+    ) -> Dict[Tuple[str, datetime], Tuple[int, int]]:
+        """
+        (empty_count, total_count) of the rows keyed by (column_name, hour)
+        """
+        counts = defaultdict(lambda: [0, 0])
+        for row in rows:
+            hour = row.created_at.replace(minute=0, second=0, microsecond=0)
+            for column in row.columns:
+                count = counts[(column.name, hour)]
+                count[0] += 1 if self._is_empty(column) else 0
+                count[1] += 1
+        return {key: (empty, total) for key, (empty, total) in counts.items()}
+
+    def _find_monitors(self, model_version_id: UUID) -> List[MonitorDB]:
+        return self._monitor_repository.find_monitors(
+            filters={
+                "monitor_identification.model_version_id": str(model_version_id),
+                "monitor_type": MonitorType.DATA_QUALITY,
+                "monitor_condition.evaluation_metric": DataQualityMetric.EMPTY_VALUE,
+            },
+            limit=0,
+        )
+
+    def observe(
+        self, dataset_id: UUID, model_version_id: UUID, rows: List[EventRowDB]
+    ) -> int:
+        """
+        Count the logged rows and evaluate the empty value monitors of the
+        model version which monitor any of the logged columns.
+        Returns the number of alerts raised. Failing monitors are logged and
+        never fail the log request
+        """
+        if not settings.streaming_monitors_enabled or not rows:
+            return 0
+        counts = self._count_rows(rows)
+        self._column_count_repository.increment_counts(
+            dataset_id=dataset_id, counts=counts
+        )
+
+        logged_columns: Set[str] = {column_name for column_name, _ in counts}
+        alerts_sent = 0
+        for monitor in self._find_monitors(model_version_id):
+            dimensions = monitor.monitor_condition.dimensions
+            monitored = set(dimensions.features or []) | set(
+                dimensions.predictions or []
+            )
+            if not monitored & logged_columns:
+                continue
+            try:
+                processor = StreamingMonitorProcessor(
+                    monitor=monitor.dict(),
+                    dataset_id=dataset_id,
+                    mongodb_backend=self._mongo,
+                    alert_repo=self._alert_repository,
+                    dataset_repo=self._dataset_repository,
+                    integration_service=self._integration_service,
+                    model_version_repo=ModelVersionRepository.get_instance(
+                        mongodb=self._mongo
+                    ),
+                    baseline_histogram_repo=BaselineHistogramRepository.get_instance(
+                        mongodb=self._mongo
+                    ),
+                    model_repo=ModelRepository.get_instance(mongodb=self._mongo),
+                    performance_count_repo=PerformanceCountRepository.get_instance(
+                        mongodb=self._mongo
+                    ),
+                    event_row_repo=EventDatasetRowRepository.get_instance(
+                        mongodb=self._mongo
+                    ),
+                    monitor_lease_repo=MonitorLeaseRepository.get_instance(
+                        mongodb=self._mongo
+                    ),
+                )
+                processor.process()
+                alerts_sent += processor.alerts_sent
+            except Exception:
+                logger.exception(
+                    f"Streaming evaluation of Monitor ID [{monitor.monitor_id}] failed"
+                )
+        return alerts_sent
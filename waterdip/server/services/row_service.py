@@ -13,28 +13,37 @@
 #  limitations under the License.
 
 from datetime import date, datetime, timedelta
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Union
 from uuid import UUID
 
 from fastapi import Depends
 
+from waterdip.core.commons.models import MetricView, TimeRange
+from waterdip.core.metrics.base import EPOCH
+from waterdip.core.metrics.rows import uuid_str
 from waterdip.server.apis.models.models import DateHistogram, ModelOverviewPredictions
+from waterdip.server.commons.config import settings
 from waterdip.server.db.models.dataset_rows import (
     BaseClassificationEventRowDB,
     BaseDatasetBatchRowDB,
     BaseEventRowDB,
 )
+from waterdip.server.db.models.models import ModelVersionSchemaInDB
 from waterdip.server.db.repositories.dataset_row_repository import (
     BatchDatasetRowRepository,
     EventDatasetRowRepository,
 )
+from waterdip.server.db.repositories.metric_view_repository import MetricViewRepository
 from waterdip.server.db.repositories.model_repository import ModelVersionRepository
+from waterdip.utils.instrumentation import INGESTED_ROWS, INSERT_BATCH_SIZE
+from waterdip.utils.tracing import traced_service
 
 
 class ServiceDatasetBatchRow(BaseDatasetBatchRowDB):
     pass
 
 
+@traced_service
 class BatchDatasetRowService:
     _INSTANCE: "BatchDatasetRowService" = None
 
@@ -54,6 +63,8 @@ class BatchDatasetRowService:
 
     def insert_rows(self, rows: List[ServiceDatasetBatchRow]) -> int:
         inserted_rows = self._repository.insert_rows(rows)
+        INGESTED_ROWS.inc(len(inserted_rows), kind="batch")
+        INSERT_BATCH_SIZE.observe(len(inserted_rows), kind="batch")
         return len(inserted_rows)
 
     def delete_rows_by_model_id(self, model_id: UUID) -> int:
@@ -68,6 +79,7 @@ class ServiceClassificationEventRow(BaseClassificationEventRowDB):
     pass
 
 
+@traced_service
 class EventDatasetRowService:
     _INSTANCE: "EventDatasetRowService" = None
 
@@ -80,10 +92,15 @@ class EventDatasetRowService:
         model_version_repository: ModelVersionRepository = Depends(
             ModelVersionRepository.get_instance
         ),
+        metric_view_repository: MetricViewRepository = Depends(
+            MetricViewRepository.get_instance
+        ),
     ):
         if not cls._INSTANCE:
             cls._INSTANCE = cls(
-                repository=repository, model_version_repository=model_version_repository
+                repository=repository,
+                model_version_repository=model_version_repository,
+                metric_view_repository=metric_view_repository,
             )
         return cls._INSTANCE
 
@@ -91,14 +108,22 @@ class EventDatasetRowService:
         self,
         repository: EventDatasetRowRepository,
         model_version_repository: ModelVersionRepository,
+        metric_view_repository: Optional[MetricViewRepository] = None,
     ):
         self._repository = repository
         self._model_version_repository = model_version_repository
+        self._metric_view_repository = metric_view_repository
 
     def insert_rows(
-        self, rows: Union[List[ServiceEventRow], List[ServiceClassificationEventRow]]
+        self,
+        rows: Union[List[ServiceEventRow], List[ServiceClassificationEventRow]],
+        version_schema: Optional[ModelVersionSchemaInDB] = None,
     ) -> int:
-        inserted_rows = self._repository.insert_rows(rows)
+        inserted_rows = self._repository.insert_rows(
+            rows, version_schema=version_schema
+        )
+        INGESTED_ROWS.inc(len(inserted_rows), kind="event")
+        INSERT_BATCH_SIZE.observe(len(inserted_rows), kind="event")
         return len(inserted_rows)
 
     def count_prediction_by_model_id(self, model_id: str) -> int:
@@ -125,7 +150,10 @@ class EventDatasetRowService:
         if window.days > days:
             window_date = datetime.utcnow() - timedelta(days=days)
         window_prediction_count = self._repository.prediction_count(
-            filter={"model_id": str(model_id), "created_at": {"$gte": window_date}}
+            filter={
+                "model_id": self._repository.row_reader().id_value(model_id),
+                "created_at": {"$gte": window_date},
+            }
         )
         if not window.days:
             """
@@ -145,12 +173,15 @@ class EventDatasetRowService:
         today_date = datetime.combine(date.today(), datetime.min.time())
         today = datetime.combine(date.today(), datetime.min.time())
         today_predicition_count = self._repository.prediction_count(
-            filter={"model_id": str(model_id), "created_at": {"$gte": today}}
+            filter={
+                "model_id": self._repository.row_reader().id_value(model_id),
+                "created_at": {"$gte": today},
+            }
         )
         agg_week_prediction_count_pipeline = [
             {
                 "$match": {
-                    "model_id": str(model_id),
+                    "model_id": self._repository.row_reader().id_value(model_id),
                     "created_at": {
                         "$gte": datetime.utcnow() - timedelta(days=prediction_days),
                         "$lt": today_date,
@@ -202,8 +233,44 @@ class EventDatasetRowService:
         }
 
     def prediction_histogram(self, model_id: str) -> dict:
+        """
+        Number of predictions of every day with predictions. With the metric views
+        enabled, the days of the prediction counts view are read from the view and
+        only the predictions after its watermark are aggregated
+        """
+        view = None
+        if settings.metric_views_enabled and self._metric_view_repository:
+            time_range = TimeRange(start_time=EPOCH, end_time=datetime.utcnow())
+            view = self._metric_view_repository.read_view(
+                MetricView.PREDICTION_COUNTS, key=model_id, time_range=time_range
+            )
+
+        if view is None:
+            day_counts = self._prediction_day_counts(model_id)
+        else:
+            day_counts = {day: counts["count"] for day, counts in view.days.items()}
+            for uncovered in view.uncovered(time_range):
+                for day, count in self._prediction_day_counts(
+                    model_id, time_range=uncovered
+                ).items():
+                    day_counts[day] = day_counts.get(day, 0) + count
+
+        date_bins = sorted(day for day, count in day_counts.items() if count)
+        return DateHistogram(
+            date_bins=date_bins, val=[day_counts[day] for day in date_bins]
+        )
+
+    def _prediction_day_counts(
+        self, model_id: str, time_range: Optional[TimeRange] = None
+    ) -> Dict[datetime, int]:
+        match = {"model_id": self._repository.row_reader().id_value(model_id)}
+        if time_range is not None:
+            match["created_at"] = {
+                "$gte": time_range.start_time,
+                "$lte": time_range.end_time,
+            }
         preidiction_histogram_pipeline = [
-            {"$match": {"model_id": model_id}},
+            {"$match": match},
             {
                 "$project": {
                     "year": {"$year": "$created_at"},
@@ -217,30 +284,16 @@ class EventDatasetRowService:
                     "count": {"$sum": 1},
                 }
             },
-            {
-                "$sort": {
-                    "_id.year": 1,
-                    "_id.month": 1,
-                    "_id.day": 1,
-                }
-            },
         ]
 
-        prediction_histogram = self._repository.agg_prediction(
-            preidiction_histogram_pipeline
-        )
-        date_bins = []
-        val = []
-        for i in prediction_histogram:
-            date_bins.append(
-                datetime(i["_id"]["year"], i["_id"]["month"], i["_id"]["day"])
-            )
-            val.append(i["count"])
-        return DateHistogram(date_bins=date_bins, val=val)
+        return {
+            datetime(i["_id"]["year"], i["_id"]["month"], i["_id"]["day"]): i["count"]
+            for i in self._repository.agg_prediction(preidiction_histogram_pipeline)
+        }
 
     def prediction_histogram_version(self, model_id: str) -> dict:
         preidiction_histogram_pipeline = [
-            {"$match": {"model_id": model_id}},
+            {"$match": {"model_id": self._repository.row_reader().id_value(model_id)}},
             {
                 "$project": {
                     "year": {"$year": "$created_at"},
@@ -281,23 +334,30 @@ class EventDatasetRowService:
                 }
             },
         ]
-        predictions_versions = []
+        # rows of a version migrated to the compact layout are grouped by the
+        # binary version id, the counts of both ids are merged
+        version_counts: Dict[str, Dict[datetime, int]] = {}
         for versions_prediction in self._repository.agg_prediction(
             preidiction_histogram_pipeline
         ):
+            day_counts = version_counts.setdefault(
+                uuid_str(versions_prediction["_id"]), {}
+            )
+            for i in versions_prediction["prediction"]:
+                day = datetime(i["year"], i["month"], i["day"])
+                day_counts[day] = day_counts.get(day, 0) + i["count"]
+
+        predictions_versions = []
+        for model_version_id, day_counts in version_counts.items():
             model_version = self._model_version_repository.find_by_id(
-                versions_prediction["_id"]
+                model_version_id
             ).model_version
-            date_bins = []
-            val = []
-            for i in versions_prediction["prediction"]:
-                date_bins.append(datetime(i["year"], i["month"], i["day"]))
-                val.append(i["count"])
+            date_bins = sorted(day_counts)
             predictions_versions.append(
                 {
                     "model_version": model_version,
-                    versions_prediction["_id"]: DateHistogram(
-                        date_bins=date_bins, val=val
+                    model_version_id: DateHistogram(
+                        date_bins=date_bins, val=[day_counts[day] for day in date_bins]
                     ),
                 }
             )
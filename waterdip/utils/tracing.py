@@ -0,0 +1,228 @@
+#  Copyright 2022-present, the Waterdip Labs Pvt. Ltd.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import functools
+import inspect
+import json
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+
+
+class Span:
+    """
+    Timed operation of a trace. Spans started while another span is current
+    become its children, the root span holds the whole tree
+
+    Attributes
+    ----------
+    name:
+        name of the operation, like route:/v1/metrics.dataset or DatasetService.find_dataset_by_id
+    kind:
+        route, service, metric, mongo or task
+    attributes:
+        key values describing the operation
+    """
+
+    def __init__(
+        self,
+        name: str,
+        kind: str,
+        trace_id: str,
+        parent: Optional["Span"] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent = parent
+        self.attributes = attributes or {}
+        self.children: List["Span"] = []
+        self.error: Optional[str] = None
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+
+    def start_child(self, name: str, kind: str, **attributes) -> "Span":
+        """
+        Starts a child span without making it the current span
+        """
+        child = Span(
+            name, kind, self.trace_id, parent=self, attributes=attributes or None
+        )
+        self.children.append(child)
+        return child
+
+    def end(self, error: Optional[BaseException] = None):
+        self.duration_ms = (time.perf_counter() - self._start) * 1000.0
+        if error is not None:
+            self.error = repr(error)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 3)
+            if self.duration_ms is not None
+            else None,
+            "attributes": self.attributes,
+            "error": self.error,
+            "children": [child.to_dict() for child in list(self.children)],
+        }
+
+
+class JsonFileSpanExporter:
+    """
+    Appends every sampled trace to a file as one JSON span tree per line
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, root: Span):
+        line = json.dumps(root.to_dict(), default=str)
+        with self._lock:
+            with open(self.path, "a") as trace_file:
+                trace_file.write(line + "\n")
+
+
+class Tracer:
+    """
+    Starts root spans for a sampled fraction of the traces. Spans are only
+    recorded under a sampled root span, so unsampled traces only cost a
+    context variable lookup per instrumented call
+
+    Attributes
+    ----------
+    sample_rate:
+        fraction of the root spans which are recorded, 0 disables tracing
+    exporter:
+        receives the span tree when the root span ends
+    """
+
+    _INSTANCE: "Tracer" = None
+
+    @classmethod
+    def get_instance(cls) -> "Tracer":
+        if cls._INSTANCE is None:
+            from waterdip.server.commons.config import settings
+
+            cls._INSTANCE = cls(
+                sample_rate=settings.tracing_sample_rate,
+                exporter=JsonFileSpanExporter(settings.tracing_export_path),
+            )
+        return cls._INSTANCE
+
+    def __init__(self, sample_rate: float, exporter: JsonFileSpanExporter):
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+
+    @contextmanager
+    def trace(self, name: str, kind: str, **attributes):
+        """
+        Starts a root span, or a child span when a trace is already current
+        """
+        parent = current_span()
+        if parent is not None:
+            with span(name, kind, **attributes) as child:
+                yield child
+            return
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            yield None
+            return
+
+        root = Span(name, kind, uuid.uuid4().hex, attributes=attributes or None)
+        token = _current_span.set(root)
+        error = None
+        try:
+            yield root
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _current_span.reset(token)
+            root.end(error)
+            try:
+                self.exporter.export(root)
+            except Exception as e:
+                logger.warning(f"failed to export trace [{root.trace_id}]: [{e}]")
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, kind: str, **attributes):
+    """
+    Child span of the current span, nothing is recorded outside of a sampled trace
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = parent.start_child(name, kind, **attributes)
+    token = _current_span.set(child)
+    error = None
+    try:
+        yield child
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _current_span.reset(token)
+        child.end(error)
+
+
+def traced(name: str, kind: str = "service") -> Callable:
+    """
+    Decorator recording a span for every call of the function within a trace
+    """
+
+    def decorator(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return function(*args, **kwargs)
+            with span(name, kind):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def traced_service(cls):
+    """
+    Class decorator recording a span for the public methods of a service class
+    """
+    for attribute, value in list(cls.__dict__.items()):
+        if attribute.startswith("_") or not inspect.isfunction(value):
+            continue
+        setattr(cls, attribute, traced(f"{cls.__name__}.{attribute}")(value))
+    return cls